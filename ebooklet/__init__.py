@@ -14,17 +14,19 @@ from ebooklet.errors import (
     PushInProgressError,
     ConcurrentCompactionError,
 )
-from ebooklet.main import open_ebooklet, open_rcg, EVariableLengthValue, RemoteConnGroup, PushResult
+from ebooklet.main import open_ebooklet, open_rcg, EVariableLengthValue, RemoteConnGroup, PushResult, Prefetch
 from ebooklet.remote import S3Connection
 from ebooklet.fsck import fsck, FsckReport
+from ebooklet.aio import open_ebooklet_async, AsyncEBooklet
 
 __all__ = [
     "open_ebooklet", "open_rcg", "EVariableLengthValue", 'RemoteConnGroup', 'S3Connection',
-    'PushResult',
+    'PushResult', 'Prefetch',
     'Error', 'ReadOnlyError', 'UUIDMismatchError', 'RemoteMissingError',
     'UnsupportedFormatError', 'GroupTooLargeError', 'RemoteIntegrityError',
     'LockLostError', 'OfflineError', 'PushInProgressError', 'ConcurrentCompactionError',
     'fsck', 'FsckReport',
+    'open_ebooklet_async', 'AsyncEBooklet',
 ]
 
 __version__ = '0.10.3'
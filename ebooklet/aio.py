@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio front-end: open_ebooklet_async / AsyncEBooklet.
+
+Wraps a regular EVariableLengthValue session so asyncio services can await
+reads and pushes instead of parking every call on run_in_executor. The
+session's semantics are unchanged - the journal, the manifest, the
+read-your-writes gate and the missing-object re-check protocol all run
+through the same code as the blocking API:
+
+- Reads split load_items into its three phases: the planning and completion
+  phases (index scan, cache eviction, re-materialization guard, re-check
+  protocol) run in worker threads, and only the remote GETs in between are
+  issued from the event loop, bounded by an asyncio.Semaphore. They are
+  dispatched like the blocking load_items: within the session's adaptive
+  concurrency window, charged to its max_inflight_bytes budget, and each
+  completion is reported back to the window.
+- By default each GET runs on the blocking session in a worker thread, and
+  point reads (get) are hedged when the session hedges its reads. With
+  native=True the GETs use aiohttp instead, when it is installed (an
+  optional dependency) and the session was opened from an S3Connection -
+  requests are built and signed from the connection's ObjectRequests.
+  Native GETs are never hedged: hedging duplicates a GET on the session's
+  thread pool. Otherwise (no aiohttp, or another kind of session)
+  native=True falls back to the threaded GETs.
+- Pushes, index pulls and the other whole-session operations run the
+  blocking implementation in a thread (asyncio.to_thread).
+
+The wrapped session's local file and index are shared with any blocking use
+of the same object, exactly like concurrent threads on one session.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+
+import urllib3
+from s3func.utils import add_metadata_from_urllib3
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+from . import utils
+from .main import open_ebooklet, _failure_exception, _MISSING
+from .remote import _xml_text
+
+DEFAULT_MAX_INFLIGHT = 64
+
+## Statuses retried by the native client - the same transient set s3func's
+## urllib3 Retry policy uses for the blocking sessions.
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504, 520, 521, 522, 523, 524))
+
+
+class _Retry(Exception):
+    """A transient status the native client retries."""
+
+
+def _error_dict(status, data):
+    """
+    The error of a failed native GET, in the shape ebooklet raises for S3
+    errors: the status plus the XML body's Code and Message (the raw body
+    text as the Message when it is not S3 XML).
+    """
+    code = _xml_text(data, 'Code') if data else None
+    if code is None:
+        return {'status': status, 'Code': None, 'Message': data[:1000].decode(errors='replace')}
+    return {'status': status, 'Code': code, 'Message': _xml_text(data, 'Message')}
+
+
+class _AsyncResp:
+    """The slice of s3func's Response the read path consumes."""
+    __slots__ = ('status', 'data', 'metadata', 'error')
+
+    def __init__(self, status, data, metadata, error):
+        self.status = status
+        self.data = data
+        self.metadata = metadata
+        self.error = error
+
+
+class AsyncRangeClient:
+    """
+    Awaitable object GETs against a session's read store, at most
+    max_inflight at a time. With native=True it uses aiohttp for sessions
+    opened from an S3Connection (their object_requests) when aiohttp is
+    installed; otherwise (and by default) the blocking session in a worker
+    thread.
+    """
+
+    def __init__(self, remote_session, max_inflight=DEFAULT_MAX_INFLIGHT, native=False):
+        if not isinstance(max_inflight, int) or max_inflight < 1:
+            raise ValueError('max_inflight must be an integer >= 1.')
+        self._remote_session = remote_session
+        self._max_inflight = max_inflight
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self._requests = getattr(remote_session, 'object_requests', None) if native and aiohttp is not None else None
+        self.native = self._requests is not None
+        self._http = None
+
+    async def get_object(self, key, range_start=None, range_end=None, hedge=False):
+        """
+        GET key (None: the db object). hedge: a point read - a threaded GET
+        may be hedged (S3SessionReader.get_object); native GETs never are.
+        """
+        async with self._semaphore:
+            if not self.native:
+                if hedge:
+                    return await asyncio.to_thread(self._remote_session.get_object, key, range_start, range_end, hedge=True)
+                return await asyncio.to_thread(self._remote_session.get_object, key, range_start, range_end)
+            return await self._native_get(key, range_start, range_end)
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _client(self):
+        if self._http is None:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_inflight),
+                timeout=aiohttp.ClientTimeout(sock_read=self._requests.read_timeout),
+            )
+        return self._http
+
+    async def _native_get(self, key, range_start, range_end):
+        full_key = self._remote_session.read_db_key if key is None else self._remote_session.read_db_key + '/' + key
+        url = self._requests.url(full_key)
+        signer = self._requests.signer
+
+        headers = {}
+        if range_start is not None:
+            headers['Range'] = f'bytes={range_start}-{"" if range_end is None else range_end}'
+
+        ## Sent exactly as signed: yarl would otherwise re-normalize the
+        ## percent-encoded key (e.g. %21 back to !) and break the signature.
+        request_url = yarl.URL(url, encoded=True)
+        attempts = self._requests.retries + 1
+        for attempt in range(attempts):
+            ## Re-signed per attempt: the SigV4 date is part of the signature.
+            req_headers = dict(headers)
+            if signer is not None:
+                signer.add_auth('GET', url, req_headers, None)
+            try:
+                async with self._client().get(request_url, headers=req_headers) as resp:
+                    data = await resp.read()
+                    if resp.status in _RETRY_STATUSES and attempt + 1 < attempts:
+                        raise _Retry()
+                    metadata = add_metadata_from_urllib3(resp)
+                    if resp.status // 100 == 2:
+                        return _AsyncResp(resp.status, data, metadata, None)
+                    return _AsyncResp(resp.status, None, metadata, _error_dict(resp.status, data))
+            except (_Retry, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if attempt + 1 >= attempts:
+                    ## Raised like the blocking session's exhausted retries
+                    ## (and so counted as congestion by the window).
+                    raise urllib3.exceptions.HTTPError(f'GET {url} failed after {attempts} attempts: {err!r}') from err
+            await asyncio.sleep(min(2 ** attempt, 20) * random.random())
+
+
+class AsyncChange:
+    """Awaitable counterpart of Change (push/pull/discard run in a thread)."""
+
+    def __init__(self, change):
+        self._change = change
+
+    async def pull(self):
+        await asyncio.to_thread(self._change.pull)
+
+    async def push(self, force_push=False):
+        return await asyncio.to_thread(self._change.push, force_push)
+
+    async def discard(self, keys=None):
+        await asyncio.to_thread(self._change.discard, keys)
+
+    async def iter_changes(self):
+        """The changelog records (see Change.iter_changes), as a list."""
+        return await asyncio.to_thread(lambda: list(self._change.iter_changes()))
+
+    @property
+    def pending_deletes(self):
+        return self._change.pending_deletes
+
+
+class AsyncEBooklet:
+    """
+    Awaitable wrapper around an EVariableLengthValue (or RemoteConnGroup)
+    session. Create it with open_ebooklet_async, or wrap an already-open
+    session directly. The blocking session stays reachable as .ebooklet.
+    """
+
+    def __init__(self, ebooklet, max_inflight=DEFAULT_MAX_INFLIGHT, native=False):
+        self.ebooklet = ebooklet
+        self._range_client = AsyncRangeClient(ebooklet._remote_session, max_inflight, native)
+
+    @property
+    def writable(self):
+        return self.ebooklet.writable
+
+    @property
+    def offline(self):
+        return self.ebooklet.offline
+
+    @property
+    def type(self):
+        return self.ebooklet.type
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def load_items(self, keys=None):
+        """
+        Load items into the local file from the remote (None: every key).
+        Returns a dict of failed transfers, like the blocking load_items.
+        """
+        return await self._load(keys)
+
+    async def _load(self, keys, hedge=False):
+        eb = self.ebooklet
+        if keys is not None and not isinstance(keys, (list, tuple, set)):
+            keys = tuple(keys)
+        plan = await asyncio.to_thread(eb._plan_load, keys)
+        window = eb._concurrency
+        budget = eb._inflight
+
+        jobs = deque(plan.jobs)
+        running = {}
+        first_exc = None
+        try:
+            while jobs or running:
+                ## The blocking load_items' dispatch: at most the window's
+                ## width in flight, each range charged to the shared byte
+                ## budget before it starts (the head job is always admitted
+                ## alone), and every completion reported to the window.
+                while jobs and (window is None or len(running) < window.limit):
+                    job = jobs[0]
+                    size = eb._load_job_bytes(job[1], job[3])
+                    if not budget.try_acquire(size):
+                        if running:
+                            break
+                        await asyncio.to_thread(budget.acquire, size)
+                    jobs.popleft()
+                    running[asyncio.ensure_future(self._run_job(job, hedge))] = (job[0], size, time.monotonic())
+
+                done, _pending = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    fkey, size, start = running.pop(task)
+                    budget.release(size)
+                    error = task.exception()
+                    if error is not None:
+                        ## Like the blocking pool: jobs already running
+                        ## finish before a transport raise propagates.
+                        if first_exc is None:
+                            first_exc = error
+                        jobs.clear()
+                    else:
+                        error = task.result()
+                        plan.add_failure(fkey, error)
+                    if window is not None:
+                        window.record(time.monotonic() - start, size, error)
+        finally:
+            ## A cancelled load must not strand bytes in the shared budget.
+            for task, (_fkey, size, _start) in running.items():
+                task.cancel()
+                budget.release(size)
+        if first_exc is not None:
+            raise first_exc
+
+        return await asyncio.to_thread(eb._finish_load, plan)
+
+    async def _run_job(self, job, hedge=False):
+        fkey, group_id, gen, target = job
+        eb = self.ebooklet
+        if group_id is None:
+            resp = await self._range_client.get_object(target, hedge=hedge)
+            return await asyncio.to_thread(utils.apply_remote_value, eb._local_file, target, resp)
+
+        read_range = utils.group_read_range(target, eb._remote_session.compression is not None)
+        if read_range is None:
+            ## Malformed offsets: the blocking path's full-object recovery.
+            return await asyncio.to_thread(utils.get_remote_group_values, group_id, gen, target, eb._local_file, eb._remote_session)
+        range_start, range_end = read_range
+        resp = await self._range_client.get_object(utils.group_obj_key(group_id, gen), range_start, range_end, hedge)
+        return await asyncio.to_thread(utils.apply_group_range, group_id, gen, target, range_start, resp, eb._local_file, eb._remote_session)
+
+    async def get(self, key, default=None):
+        """Get the value for key, or default if the key does not exist."""
+        eb = self.ebooklet
+        ## A point read: its GET may be hedged, as for db[key].
+        failure = await self._load([key], eb._hedge_reads)
+        if failure:
+            raise _failure_exception(failure)
+        value = await asyncio.to_thread(eb._local_file.get, key, _MISSING)
+        if value is _MISSING and eb._cache is not None and key in eb._remote_index:
+            ## Evicted by a concurrent operation between the load and the
+            ## read (bounded cache) - re-load once.
+            failure = await self._load([key], eb._hedge_reads)
+            if failure:
+                raise _failure_exception(failure)
+            value = await asyncio.to_thread(eb._local_file.get, key, _MISSING)
+        return default if value is _MISSING else value
+
+    async def get_items(self, keys, default=None):
+        """
+        Load the keys in one batch, then return a list of (key, value) pairs;
+        missing keys get default.
+        """
+        if not isinstance(keys, (list, tuple, set)):
+            keys = tuple(keys)
+        failure = await self.load_items(keys)
+        if failure:
+            raise _failure_exception(failure)
+
+        eb = self.ebooklet
+        def read():
+            return [(key, eb._local_file.get(key, default=_MISSING)) for key in keys]
+        out = []
+        for key, value in await asyncio.to_thread(read):
+            if value is _MISSING:
+                value = await self.get(key, default) if eb._cache is not None else default
+            out.append((key, value))
+        return out
+
+    async def contains(self, key):
+        return await asyncio.to_thread(self.ebooklet.__contains__, key)
+
+    async def set(self, key, value, timestamp=None, encode_value=True):
+        await asyncio.to_thread(self.ebooklet.set, key, value, timestamp, encode_value)
+
+    async def delete(self, key):
+        await asyncio.to_thread(self.ebooklet.__delitem__, key)
+
+    async def get_metadata(self, include_timestamp=False):
+        return await asyncio.to_thread(self.ebooklet.get_metadata, include_timestamp)
+
+    async def _pull_remote_index(self, force=False):
+        await asyncio.to_thread(self.ebooklet._pull_remote_index, force)
+
+    async def changes(self):
+        return AsyncChange(await asyncio.to_thread(self.ebooklet.changes))
+
+    async def sync(self):
+        await asyncio.to_thread(self.ebooklet.sync)
+
+    async def close(self):
+        await self._range_client.close()
+        await asyncio.to_thread(self.ebooklet.close)
+
+
+async def open_ebooklet_async(remote_conn, file_path, flag='r', max_inflight=DEFAULT_MAX_INFLIGHT, native=False, **kwargs):
+    """
+    Awaitable open_ebooklet: opens the session in a worker thread and wraps
+    it in an AsyncEBooklet.
+
+    Parameters
+    ----------
+    remote_conn, file_path, flag
+        As for open_ebooklet.
+
+    max_inflight : int
+        The most remote GETs a read operation keeps in flight at once (the
+        asyncio semaphore width). Default 64.
+
+    native : bool
+        Issue the remote GETs over aiohttp (the ``ebooklet[async]`` extra)
+        instead of on the blocking session in worker threads. Only sessions
+        opened from an S3Connection support it; others keep the threaded
+        GETs. Native GETs are not hedged (hedge_reads). Default False.
+
+    **kwargs
+        Every other open_ebooklet parameter.
+
+    Returns
+    -------
+    AsyncEBooklet
+    """
+    ebooklet = await asyncio.to_thread(open_ebooklet, remote_conn, file_path, flag, **kwargs)
+    try:
+        return AsyncEBooklet(ebooklet, max_inflight, native)
+    except BaseException:
+        ebooklet.close()
+        raise
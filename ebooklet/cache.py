@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Size-bounded local value cache for read-only sessions.
+
+A flag='r' session materializes every fetched value permanently into its
+local booklet; without a bound, a replica browsing a remote larger than its
+disk fills up. ValueCache tracks the materialized values (key -> size plus
+the policy's recency/frequency/age state) and names the coldest ones to
+evict. It never touches files itself: the session deletes the named LOCAL
+values and leaves the remote-index entries intact, so an evicted value
+re-pulls transparently on its next access.
+
+Policies:
+  'lru' - evict the least recently accessed value first.
+  'lfu' - evict the least frequently accessed value first (ties: the least
+          recently accessed).
+  'ttl' - evict values materialized more than `ttl` seconds ago, even under
+          budget; over budget, evict the oldest-materialized first.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_POLICIES = ('lru', 'lfu', 'ttl')
+
+## Fraction of the byte budget that may sit in evicted (dead) local blocks
+## before the session compacts the local file to return the space to the disk.
+PRUNE_DEAD_FRACTION = 0.25
+
+
+class ValueCache:
+    """
+    Thread-safe access tracker. All methods take the internal lock; none of
+    them does I/O. Keys tracked here are exactly the values the session
+    considers materialized locally (seeded at open, then admitted as fetched).
+    """
+
+    def __init__(self, max_bytes: int, policy: str = 'lru', ttl: float = None):
+        if not isinstance(max_bytes, int) or max_bytes < 1:
+            raise ValueError('cache_max_bytes must be a positive integer.')
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f'cache_policy must be one of {CACHE_POLICIES}, not {policy!r}.')
+        if policy == 'ttl':
+            if ttl is None or ttl <= 0:
+                raise ValueError("cache_policy='ttl' requires a positive cache_ttl (seconds).")
+        elif ttl is not None:
+            raise ValueError("cache_ttl only applies to cache_policy='ttl'.")
+
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttl = ttl
+        self.total_bytes = 0
+        ## Bytes evicted since the last local compaction (see needs_prune).
+        self.dead_bytes = 0
+        self._lock = threading.Lock()
+        ## key -> size, ordered coldest-first for 'lru' (access order) and
+        ## 'ttl' (admission order).
+        self._sizes = OrderedDict()
+        ## 'ttl': key -> monotonic admission time.
+        self._admitted = {}
+        ## 'lfu': key -> [count, seq]; the heap holds (count, seq, key) with
+        ## lazy invalidation (stale tuples are skipped on pop).
+        self._freq = {}
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __contains__(self, key):
+        return key in self._sizes
+
+    def seed(self, entries):
+        """
+        Register values already materialized when the session opened.
+        entries: iterable of (key, size), coldest first - they rank behind
+        every value accessed during this session.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, size in entries:
+                self._add(key, size, now)
+
+    def admit(self, key, size):
+        """Register a freshly materialized value (replacing any stale record)."""
+        now = time.monotonic()
+        with self._lock:
+            self._drop(key)
+            self._add(key, size, now)
+
+    def touch(self, key):
+        """Record a local hit on a tracked value."""
+        with self._lock:
+            if key not in self._sizes:
+                return
+            if self.policy == 'lru':
+                self._sizes.move_to_end(key)
+            elif self.policy == 'lfu':
+                self._seq += 1
+                state = self._freq[key]
+                state[0] += 1
+                state[1] = self._seq
+                heapq.heappush(self._heap, (state[0], state[1], key))
+                self._compact_heap()
+
+    def discard(self, key):
+        """Forget a value the session removed itself (no dead-byte accounting)."""
+        with self._lock:
+            self._drop(key)
+
+    def select_evictions(self, incoming=0):
+        """
+        Pop and return the keys to evict so that `incoming` more bytes fit in
+        the budget ('ttl' additionally returns every expired value). The
+        caller deletes the local values; their sizes count as dead bytes.
+        """
+        out = []
+        with self._lock:
+            if self.policy == 'ttl':
+                cutoff = time.monotonic() - self.ttl
+                for key in list(self._sizes):
+                    if self._admitted[key] > cutoff:
+                        break
+                    out.append(key)
+                    self._evict(key)
+            while self._sizes and self.total_bytes + incoming > self.max_bytes:
+                key = self._coldest()
+                out.append(key)
+                self._evict(key)
+        return out
+
+    def needs_prune(self):
+        """True once enough evicted bytes sit dead in the local file to be worth a compaction."""
+        with self._lock:
+            return self.dead_bytes > self.max_bytes * PRUNE_DEAD_FRACTION
+
+    def pruned(self):
+        """Reset the dead-byte count after the local file was compacted."""
+        with self._lock:
+            self.dead_bytes = 0
+
+    ## Internals - callers hold self._lock.
+
+    def _add(self, key, size, now):
+        self._sizes[key] = size
+        self.total_bytes += size
+        if self.policy == 'ttl':
+            self._admitted[key] = now
+        elif self.policy == 'lfu':
+            self._seq += 1
+            self._freq[key] = [1, self._seq]
+            heapq.heappush(self._heap, (1, self._seq, key))
+            self._compact_heap()
+
+    def _drop(self, key):
+        size = self._sizes.pop(key, None)
+        if size is None:
+            return None
+        self.total_bytes -= size
+        self._admitted.pop(key, None)
+        self._freq.pop(key, None)
+        return size
+
+    def _evict(self, key):
+        size = self._drop(key)
+        if size is not None:
+            self.dead_bytes += size
+
+    def _coldest(self):
+        if self.policy != 'lfu':
+            return next(iter(self._sizes))
+        while True:
+            count, seq, key = heapq.heappop(self._heap)
+            state = self._freq.get(key)
+            if state is not None and state[0] == count and state[1] == seq:
+                return key
+
+    def _compact_heap(self):
+        ## Stale tuples accumulate with every touch; rebuild once they
+        ## dominate so the heap stays O(live keys).
+        if len(self._heap) > 2 * len(self._freq) + 1024:
+            self._heap = [(c, s, k) for k, (c, s) in self._freq.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Group-object compression codecs (storage format 3).
+
+A remote created with open_ebooklet(..., compression=...) stores its group
+objects as a run of independently-decodable frames instead of the raw
+packed layout. Each frame is one compressed pack_group() image of a run of
+members (about DEFAULT_FRAME_SIZE raw bytes; a single larger member gets a
+frame of its own), prefixed by a small header:
+
+    comp_len >I | raw_len >I | codec payload (comp_len bytes)
+
+The index entry of every member points at its FRAME (offset and full length,
+header included) rather than at its value bytes, so grouped reads stay
+ranged GETs - a read fetches, decompresses and scans just the frames that
+hold the requested members. The codec is fixed per remote: it is stamped in
+the db object's metadata (`compression`) and in the payload header, and the
+remote's format_version becomes 3 so older clients refuse it instead of
+misreading the frames.
+
+Codecs:
+  'zlib' - the standard library's deflate; always available.
+  'zstd' - Zstandard, via the `zstandard` package (extra `ebooklet[zstd]`),
+           or the standard library's compression.zstd on Python >= 3.14.
+  'lz4'  - LZ4 frames, via the `lz4` package (extra `ebooklet[lz4]`).
+"""
+import zlib
+
+from .errors import UnsupportedFormatError
+
+## Codec name -> the id stamped in the db-object payload header. Ids are
+## part of the storage format: never renumber, only append.
+CODEC_IDS = {'zlib': 1, 'zstd': 2, 'lz4': 3}
+CODECS = tuple(CODEC_IDS)
+
+## Target uncompressed size of one frame. Small enough that a point read
+## decompresses little more than its member, large enough for the codecs to
+## find the redundancy across neighbouring members.
+DEFAULT_FRAME_SIZE = 2**17
+
+FRAME_HEADER_LEN = 8
+
+
+class Codec:
+    """A named compress/decompress pair (see get_codec)."""
+    __slots__ = ('name', 'codec_id', 'compress', 'decompress')
+
+    def __init__(self, name, compress, decompress):
+        self.name = name
+        self.codec_id = CODEC_IDS[name]
+        self.compress = compress
+        self.decompress = decompress
+
+    def __repr__(self):
+        return f'Codec({self.name!r})'
+
+
+def _zlib_codec():
+    return Codec('zlib', lambda data: zlib.compress(data, 6), zlib.decompress)
+
+
+def _zstd_codec():
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        ## One compressor/decompressor per call: zstandard's objects are not
+        ## safe to share across the push's pack workers.
+        return Codec('zstd',
+                     lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+                     lambda data: zstandard.ZstdDecompressor().decompress(data))
+    try:
+        from compression import zstd
+    except ImportError:
+        raise ImportError(
+            "compression='zstd' needs the zstandard package: pip install 'ebooklet[zstd]'."
+        ) from None
+    return Codec('zstd', zstd.compress, zstd.decompress)
+
+
+def _lz4_codec():
+    try:
+        import lz4.frame
+    except ImportError:
+        raise ImportError(
+            "compression='lz4' needs the lz4 package: pip install 'ebooklet[lz4]'."
+        ) from None
+    return Codec('lz4', lz4.frame.compress, lz4.frame.decompress)
+
+
+_FACTORIES = {'zlib': _zlib_codec, 'zstd': _zstd_codec, 'lz4': _lz4_codec}
+_loaded = {}
+
+
+def validate_compression(name):
+    """
+    Argument validation for the user-facing `compression` parameter: None
+    (no compression) or one of CODECS. Also imports the codec's library, so
+    a missing optional dependency fails at open rather than mid-push.
+    """
+    if name is None:
+        return None
+    if name not in CODEC_IDS:
+        raise ValueError(f'compression must be None or one of {CODECS}, not {name!r}.')
+    get_codec(name)
+    return name
+
+
+def get_codec(name):
+    """
+    The Codec for a codec name. Raises UnsupportedFormatError for a name this
+    ebooklet does not know (a remote stamped by a newer client), ImportError
+    when the codec's optional library is missing.
+    """
+    codec = _loaded.get(name)
+    if codec is None:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            raise UnsupportedFormatError(
+                f"The remote's group objects use the compression codec {name!r}, which this "
+                'ebooklet does not support. Upgrade ebooklet to open it.'
+            )
+        codec = _loaded[name] = factory()
+    return codec
+
+
+def codec_name(codec_id):
+    """The codec name for a payload-header codec id (0 = uncompressed)."""
+    if codec_id == 0:
+        return None
+    for name, cid in CODEC_IDS.items():
+        if cid == codec_id:
+            return name
+    raise UnsupportedFormatError(
+        f'The remote db object names compression codec id {codec_id}, which this '
+        'ebooklet does not support. Upgrade ebooklet to open it.'
+    )
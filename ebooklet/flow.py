@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flow control for background transfers.
+
+ByteBudget bounds the bytes a set of concurrent transfers keeps in flight:
+a transfer acquires its size before it starts and releases it when it ends.
+prefetch() uses one per call (max_inflight_bytes) so a large background
+fetch cannot crowd the link or the local disk, and push() one per push
+across its pull and upload stages; the thread pool still caps the NUMBER
+of concurrent requests.
+
+ConcurrencyWindow adapts that number (AIMD, as TCP does): a session's push
+and load_items dispatch at most `limit` requests at once, halving it when a
+transfer signals congestion (a timeout or other transport error, 503
+SlowDown, 429, 5xx) and widening it by one per window of clean completions
+while latency stays flat. The session's threads stay the ceiling.
+
+HedgedReads trims the tail of point reads: a GET still outstanding after a
+high percentile of recent GET latencies gets a duplicate, and whichever
+answers first is used - within a budget of extra requests.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import urllib3
+
+
+class ByteBudget:
+    """
+    A counting gate in bytes. acquire(n) blocks until n more bytes fit under
+    max_bytes - except that a request is always admitted when nothing is in
+    flight, so a single transfer larger than the whole budget still runs
+    (alone). max_bytes=None never blocks. Thread-safe.
+    """
+    def __init__(self, max_bytes=None):
+        if max_bytes is not None and (not isinstance(max_bytes, int) or max_bytes < 1):
+            raise ValueError('max_inflight_bytes must be None or a positive integer.')
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n, cancelled=None):
+        """
+        Reserve n bytes. Returns False without reserving when the `cancelled`
+        event is set while waiting, else True.
+        """
+        with self._cond:
+            while (self.max_bytes is not None and self.in_flight
+                   and self.in_flight + n > self.max_bytes):
+                if cancelled is not None and cancelled.is_set():
+                    return False
+                ## Re-check the cancel flag periodically: cancel() does not
+                ## know which budget its waiter is blocked on.
+                self._cond.wait(0.1)
+            if cancelled is not None and cancelled.is_set():
+                return False
+            self.in_flight += n
+            return True
+
+    def try_acquire(self, n):
+        """
+        Reserve n bytes if the admission rule lets them in right now; never
+        blocks. Returns whether they were reserved.
+        """
+        with self._cond:
+            if (self.max_bytes is not None and self.in_flight
+                    and self.in_flight + n > self.max_bytes):
+                return False
+            self.in_flight += n
+            return True
+
+    def release(self, n):
+        with self._cond:
+            self.in_flight -= n
+            self._cond.notify_all()
+
+
+## Statuses a store answers with when it wants fewer requests: throttling
+## (429, 503 SlowDown) and the transient 5xx family.
+CONGESTION_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+## Requests smaller than this count as this size in the latency samples: a
+## small GET's time is dominated by its round trip, not its bytes.
+LATENCY_FLOOR_BYTES = 2**16
+
+## Latency counts as flat while its moving average stays within this factor
+## of the best (per-byte) latency seen.
+LATENCY_TOLERANCE = 2.0
+
+
+def is_congestion(error):
+    """
+    Whether a transfer's outcome asks for less concurrency: a raised
+    transport error (timeouts, exhausted retries) or a returned error whose
+    status is in CONGESTION_STATUSES. None and application errors (404s,
+    missing members, pack failures) are not congestion.
+    """
+    if error is None:
+        return False
+    if isinstance(error, (urllib3.exceptions.HTTPError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, dict):
+        return error.get('status') in CONGESTION_STATUSES
+    return False
+
+
+class ConcurrencyWindow:
+    """
+    An AIMD limit on concurrent requests, between min_limit and max_limit
+    (starting at max_limit, so a clean link runs exactly as wide as before).
+    Callers dispatch while their running count is below `limit` and
+    record() every completion. Thread-safe; one window is shared by every
+    operation of a session, since they share the link.
+
+    - Congestion halves the limit, at most once per window of completions:
+      the requests already in flight when it backed off report the same
+      event and must not halve it again.
+    - A clean completion counts towards growth while the moving average of
+      per-byte latency stays within LATENCY_TOLERANCE of the best seen; one
+      window (`limit`) of them widens the limit by one. Rising latency holds
+      the limit - the link is full, more requests would only queue.
+    """
+    def __init__(self, max_limit, min_limit=1):
+        if not isinstance(max_limit, int) or max_limit < 1:
+            raise ValueError('max_limit must be a positive integer.')
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = max_limit
+        self.decreases = 0
+        self.increases = 0
+        self._clean = 0
+        self._hold = 0
+        self._base = None
+        self._avg = None
+        self._lock = threading.Lock()
+
+    def record(self, secs, nbytes=0, error=None):
+        """One completed request: its duration, size and outcome (see is_congestion)."""
+        with self._lock:
+            held = self._hold > 0
+            if held:
+                self._hold -= 1
+            if is_congestion(error):
+                if not held:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self.decreases += 1
+                    self._hold = self.limit
+                self._clean = 0
+                return
+            if error is not None:
+                return
+
+            sample = secs / max(nbytes, LATENCY_FLOOR_BYTES)
+            ## The best latency drifts up slowly so a lasting change of link
+            ## is eventually accepted as the new normal.
+            self._base = sample if self._base is None else min(sample, self._base * 1.01)
+            self._avg = sample if self._avg is None else 0.8 * self._avg + 0.2 * sample
+            if self._avg > self._base * LATENCY_TOLERANCE:
+                self._clean = 0
+                return
+            self._clean += 1
+            if self._clean >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self.increases += 1
+                self._clean = 0
+
+
+## The share of extra requests hedging may add, the latency percentile a
+## request must outlive before it is hedged, and the latency samples needed
+## before any request is.
+DEFAULT_HEDGE_BUDGET = 0.05
+DEFAULT_HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+
+
+class HedgedReads:
+    """
+    Hedged (speculative) GETs. call(fn, ...) runs fn - a GET - on a worker;
+    if it has not returned after the `percentile` of the last `samples`
+    GET latencies, a duplicate is issued and the first definitive answer
+    wins (a raise or a 5xx waits for the other request). The duplicate is
+    not cancelled, only ignored: GETs are idempotent and preloaded, so the
+    loser merely costs a request.
+
+    Hedges are capped at `budget` times the requests made, and none are sent
+    before HEDGE_MIN_SAMPLES latencies have been seen. Counters: requests,
+    hedged (duplicates issued) and won (calls a duplicate answered).
+    Thread-safe; close() stops the workers.
+    """
+    def __init__(self, max_workers, budget=DEFAULT_HEDGE_BUDGET, percentile=DEFAULT_HEDGE_PERCENTILE, samples=512):
+        if not 0 < budget <= 1:
+            raise ValueError('hedge_budget must be in (0, 1].')
+        if not 0 < percentile < 1:
+            raise ValueError('percentile must be in (0, 1).')
+        self.budget = budget
+        self.percentile = percentile
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        ## Each hedged call holds up to two workers.
+        self._pool = ThreadPoolExecutor(max_workers=2 * max_workers, thread_name_prefix='ebooklet-hedge')
+
+    def delay(self):
+        """Seconds a GET may run before it is hedged; None until enough samples."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'hedged': self.hedged, 'won': self.won}
+
+    def _sample(self, start):
+        def record(_future):
+            ## The primary's own latency, hedged or not: the percentile
+            ## tracks single-request latency, not the hedged result.
+            with self._lock:
+                self._samples.append(time.monotonic() - start)
+        return record
+
+    def call(self, fn, *args, **kwargs):
+        start = time.monotonic()
+        delay = self.delay()
+        with self._lock:
+            self.requests += 1
+        primary = self._pool.submit(fn, *args, **kwargs)
+        primary.add_done_callback(self._sample(start))
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+        with self._lock:
+            allowed = self.hedged + 1 <= self.budget * self.requests
+            if allowed:
+                self.hedged += 1
+        if not allowed:
+            return primary.result()
+
+        hedge = self._pool.submit(fn, *args, **kwargs)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            ## Prefer the primary when both landed together.
+            for future in sorted(done, key=lambda f: f is not primary):
+                if _definitive(future) or not pending:
+                    if future is hedge:
+                        with self._lock:
+                            self.won += 1
+                    return future.result()
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+def _definitive(future):
+    """A GET's answer worth returning: no raise, no 5xx."""
+    if future.exception() is not None:
+        return False
+    return getattr(future.result(), 'status', 200) < 500
@@ -4,8 +4,9 @@
 fsck for ebooklet remotes (storage format 2).
 
 The generational design makes integrity checking trivial: the db object's
-manifest (plus, in per-key mode, its index) is the COMPLETE list of objects
-the database references. Everything else under the namespace is an orphan -
+manifest (plus its index in per-key mode, and the index deltas its
+delta_parents metadata lists) is the COMPLETE list of objects the database
+references. Everything else under the namespace is an orphan -
 an abandoned generation from a crashed or partially-failed push, a
 replaced/emptied generation whose GC delete failed, or an aged writability
 probe. Orphans are invisible to readers and never a correctness problem;
@@ -102,12 +103,15 @@ def fsck(remote_conn, delete_orphans: bool = False,
             return report
 
         ## Too-new remotes already refused at open (_load_db_metadata); refuse
-        ## too-old explicitly - fsck reasons entirely in format-2 terms.
-        if session.format_version != utils.SUPPORTED_FORMAT_VERSION:
+        ## too-old explicitly - fsck reasons entirely in format-2 terms
+        ## (format 3 only changes the inside of the group objects, format 4 only
+        ## lets a manifest slot name a chain of them).
+        if session.format_version < utils.GENERATIONAL_FORMAT_VERSION:
             raise utils.UnsupportedFormatError(
                 f"fsck '{db_key}': the remote uses storage format_version "
-                f'{session.format_version}; fsck only understands format '
-                f'{utils.SUPPORTED_FORMAT_VERSION}. Re-create the remote with an upgraded client.'
+                f'{session.format_version}; fsck only understands formats '
+                f'{utils.GENERATIONAL_FORMAT_VERSION}-{utils.SUPPORTED_FORMAT_VERSION}. '
+                'Re-create the remote with an upgraded client.'
             )
 
         resp = session.get_object()
@@ -115,7 +119,10 @@ def fsck(remote_conn, delete_orphans: bool = False,
             raise urllib3.exceptions.HTTPError(resp.error)
         manifest, _meta_section, index_bytes = utils.parse_db_payload(resp.data)
 
-        expected = {utils.group_obj_key(gid, gen) for gid, gen in manifest.items()}
+        expected = set(utils.manifest_obj_keys(manifest))
+        ## The index deltas the db object lists are live too (a missing one is
+        ## not a fault - readers fall back to the full index body).
+        expected |= {utils.delta_obj_key(p) for p in session.delta_parents}
         unmanifested = []
         idx = booklet.FixedLengthValue(io.BytesIO(bytes(index_bytes)), 'r')
         try:
@@ -130,9 +137,7 @@ def fsck(remote_conn, delete_orphans: bool = False,
 
         orphans = sorted(set(listed) - expected)
 
-        claimed_but_missing = sorted(utils.group_obj_key(gid, gen)
-                                     for gid, gen in manifest.items()
-                                     if utils.group_obj_key(gid, gen) not in listed)
+        claimed_but_missing = sorted(k for k in utils.manifest_obj_keys(manifest) if k not in listed)
         if session.num_groups is None and check_objects:
             claimed_but_missing += sorted(k for k in index_keys if k not in listed)
 
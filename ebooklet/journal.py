@@ -4,8 +4,9 @@
 Persistent pending-change journal (Seam 2 of the architecture assessment).
 
 The journal records this local file's unpushed state - written keys, pending
-deletes, the num_groups choice, a pending remote replacement, and pending
-metadata - in booklet reserved slot 1, so it survives session close (and most
+deletes, the num_groups and compression choices, a pending remote
+replacement, pending metadata, and the groups an interrupted push already
+uploaded - in booklet reserved slot 1, so it survives session close (and most
 crashes) instead of dying with the process. Before the journal, deletes were
 memory-only (silently lost at close) and clock-skewed local edits never
 entered the timestamp-diff changelog.
@@ -16,16 +17,48 @@ mid-bulk-load, so data blocks can be durable while the journal - persisted at
 sync boundaries, not per-write - is stale; the timestamp diff catches that
 crash window).
 
-Serialization is msgspec-JSON, encoded/decoded entirely here: booklet's
-reserved-slot API is bytes-in/bytes-out and never sees msgspec.
+Persistence is a checkpoint plus a write-ahead log. The checkpoint - the
+full state, msgspec-JSON in slot 1 - is rewritten only when that is about as
+cheap as logging: a scalar field changed, most of the pending keys changed,
+or the log outgrew the checkpoint. Every other persist appends one batch of
+the keys whose state changed since the last persist to <local file>.journal,
+so a sync costs O(changes) instead of re-encoding every pending key. The
+checkpoint names the log it continues (a random id in the log header);
+load replays that log's intact batches. A checkpoint is written before its
+new log, so a crash between the two leaves the old log (which the new
+checkpoint already covers) or none. Any other missing or foreign log - the
+local file copied or moved without its sidecar, or the sidecar deleted - has
+lost the batches since the checkpoint, so load flags the state (log_lost)
+for the session to warn about instead of dropping them silently.
+
+Serialization is encoded/decoded entirely here: booklet's reserved-slot API
+is bytes-in/bytes-out and never sees msgspec.
 """
+import struct
+import uuid
+import zlib
+
 import msgspec
 
+from .keyset import KeySet
+
 ## Reserved-slot assignments (booklet 0.12.7 slots).
 JOURNAL_SLOT = 1
 REMOTE_STATE_SLOT = 2   # manifest + remote user-metadata cache (storage format 2)
 
-JOURNAL_VERSION = 1
+## 2: the checkpoint may name a write-ahead log (JournalRecord.log). An
+## older ebooklet would ignore the log's pending deletes, so it must refuse.
+JOURNAL_VERSION = 2
+
+## Write-ahead log framing: magic + the 16-byte log id, then one frame per
+## persist - payload length and crc32 (>II), and the msgpack JournalBatch.
+LOG_MAGIC = b'ebooklet-journal-log\x00'
+_LOG_HEADER_LEN = len(LOG_MAGIC) + 16
+_FRAME = struct.Struct('>II')
+
+## The log is folded into a new checkpoint once it exceeds twice the
+## checkpoint's size (and at least this many bytes).
+LOG_CHECKPOINT_MIN_BYTES = 2**22
 
 
 class JournalRecord(msgspec.Struct):
@@ -44,11 +77,38 @@ class JournalRecord(msgspec.Struct):
     num_groups_set: bool = False
     replace_pending: bool = False
     meta_pending: bool = False
+    ## The group codec chosen for a push that has not committed yet (a new
+    ## remote's first push, or a replacement); None = uncompressed.
+    compression: str | None = None
+    ## Groups an unfinished push already PUT: gid -> [gen, size, digest]
+    ## (utils.group_pack_digest). A retry adopts a generation whose digest
+    ## still matches instead of re-uploading it.
+    pushed: dict[int, list] = {}
+    ## The id (hex) of the write-ahead log that continues this checkpoint.
+    log: str | None = None
+    ## A load found the log a checkpoint named missing, unreadable or
+    ## foreign: the changes it held (pending deletes among them) are gone.
+    ## Kept until a push commits, so every open and push until then warns.
+    log_lost: bool = False
+
+
+class JournalBatch(msgspec.Struct):
+    """
+    One write-ahead log batch: the state every key changed since the previous
+    persist ended in (pending write, pending delete, or neither), and the
+    pushed generations recorded since.
+    """
+    written: list = []
+    deletes: list = []
+    settled: list = []
+    pushed: dict[int, list] = {}
 
 
 class JournalState:
     """
-    Live journal state: mutable sets and flags with dirty tracking.
+    Live journal state: mutable sets and flags with dirty tracking. written
+    and deletes are KeySets, so millions of pending keys stay compact while
+    the per-read `key in written` probes stay exact.
 
     Invariant maintained by the mutation methods: written and deletes are
     DISJOINT - a re-written key must never stay pending-delete (the push's
@@ -58,64 +118,180 @@ class JournalState:
     Persistence is if-dirty: read paths and 'r' sessions never mutate the
     journal, so persist() is a no-op for them (this also keeps journal
     persistence from invalidating live iterators when nothing changed).
+    The mutation methods also note what changed since the last persist -
+    the keys (_changed), the pushed generations, or a change only a
+    checkpoint records (_full) - which is all a log batch carries. Once the
+    changed keys reach the pending total the persist checkpoints anyway, so
+    _changed is dropped rather than grown alongside a huge journal.
+    log_path None (no log) makes every persist a checkpoint.
     """
 
     __slots__ = ('written', 'deletes', 'num_groups', 'num_groups_set',
-                 'replace_pending', 'meta_pending', '_dirty')
+                 'replace_pending', 'meta_pending', 'compression', 'pushed', 'log_lost', '_dirty',
+                 '_changed', '_pushed_new', '_full', '_log_path', '_log_id', '_log_end',
+                 '_checkpoint_bytes')
 
-    def __init__(self, record: JournalRecord = None):
+    def __init__(self, record: JournalRecord = None, log_path=None):
         if record is None:
             record = JournalRecord()
-        self.written = set(record.written)
-        self.deletes = set(record.deletes)
+        self.written = KeySet(record.written)
+        self.deletes = KeySet(record.deletes)
         self.num_groups = record.num_groups
         self.num_groups_set = record.num_groups_set
         self.replace_pending = record.replace_pending
         self.meta_pending = record.meta_pending
+        self.compression = record.compression
+        self.pushed = {gid: tuple(entry) for gid, entry in record.pushed.items()}
+        self.log_lost = record.log_lost
         ## Belt for the invariant on load - the mutation methods keep the sets
         ## disjoint, so an intersection can only come from a foreign writer.
         self.deletes -= self.written
         self._dirty = False
+        self._changed = set()
+        self._pushed_new = {}
+        self._full = False
+        self._log_path = log_path
+        self._log_id = None
+        self._log_end = 0
+        self._checkpoint_bytes = 0
 
     @classmethod
-    def load(cls, local_file):
+    def load(cls, local_file, log_path=None):
         """
-        Load the journal from reserved slot 1 of the local booklet, or start a
+        Load the journal from reserved slot 1 of the local booklet and replay
+        the write-ahead log at log_path that the checkpoint names, or start a
         fresh one when the slot has never been written (pre-journal files, new
         files, and flag='n' recreations - the 'n' truncation destroys the slot,
         which is exactly right: a replacement starts with no pending history).
+        When the log the checkpoint names is missing, unreadable or foreign,
+        its batches are lost: the state is flagged log_lost (see
+        set_log_lost) and the next persist starts a new log with a checkpoint.
         """
         raw = local_file.get_reserved(JOURNAL_SLOT)
         if raw is None:
-            return cls()
+            return cls(log_path=log_path)
         record = msgspec.json.decode(raw, type=JournalRecord)
         if record.v > JOURNAL_VERSION:
             raise ValueError(
                 f'This local file carries a journal with version {record.v}, but this '
                 f'ebooklet only supports up to {JOURNAL_VERSION}. Upgrade ebooklet to open it.'
             )
-        return cls(record)
+        state = cls(record, log_path)
+        state._checkpoint_bytes = len(raw)
+        if record.log is not None and log_path is not None and not state._replay(record.log):
+            state.set_log_lost(True)
+        return state
 
     def persist(self, local_file, force: bool = False):
         """
-        Write the journal to reserved slot 1 when dirty (or forced - used after
-        clear(), which destroys the slot regardless of dirtiness). The local
+        Persist the journal when dirty (or forced - used after clear(), which
+        destroys slot 1 regardless of dirtiness): append a batch to the log,
+        or write a checkpoint when that costs about as much. The local
         booklet is opened writable in every ebooklet mode, so this never hits
         a read-only file; 'r' sessions simply never dirty the journal.
         """
         if not (self._dirty or force):
             return
+        if (force or self._full or self._log_id is None
+                or len(self._changed) >= len(self.written) + len(self.deletes)
+                or self._log_end > max(LOG_CHECKPOINT_MIN_BYTES, 2 * self._checkpoint_bytes)
+                or not self._append(local_file)):
+            self._checkpoint(local_file)
+        self._changed = set()
+        self._pushed_new = {}
+        self._full = False
+        self._dirty = False
+
+    def _checkpoint(self, local_file):
+        """Write the full state to slot 1, naming a new, empty log."""
+        log_id = uuid.uuid4().hex if self._log_path is not None else None
         record = JournalRecord(
             v=JOURNAL_VERSION,
-            written=sorted(self.written),
-            deletes=sorted(self.deletes),
+            written=list(self.written),
+            deletes=list(self.deletes),
             num_groups=self.num_groups,
             num_groups_set=self.num_groups_set,
             replace_pending=self.replace_pending,
             meta_pending=self.meta_pending,
+            compression=self.compression,
+            pushed={gid: list(entry) for gid, entry in self.pushed.items()},
+            log=log_id,
+            log_lost=self.log_lost,
             )
-        local_file.set_reserved(JOURNAL_SLOT, msgspec.json.encode(record))
-        self._dirty = False
+        raw = msgspec.json.encode(record)
+        local_file.set_reserved(JOURNAL_SLOT, raw)
+        self._checkpoint_bytes = len(raw)
+        self._log_id = None
+        if log_id is not None:
+            try:
+                with open(self._log_path, 'wb') as f:
+                    f.write(LOG_MAGIC + bytes.fromhex(log_id))
+            except OSError:
+                ## No log: the next persist checkpoints again.
+                return
+            self._log_id = log_id
+            self._log_end = _LOG_HEADER_LEN
+
+    def _append(self, local_file):
+        """Append the changes since the last persist to the log; False when the log cannot be written."""
+        ## Same order as set_reserved's pre-sync: the local data a batch
+        ## describes reaches the file before the batch does.
+        local_file.sync()
+        written = []
+        deletes = []
+        settled = []
+        for key in self._changed:
+            if key in self.written:
+                written.append(key)
+            elif key in self.deletes:
+                deletes.append(key)
+            else:
+                settled.append(key)
+        pushed = {gid: list(entry) for gid, entry in self._pushed_new.items()}
+        data = msgspec.msgpack.encode(JournalBatch(written, deletes, settled, pushed))
+        try:
+            with open(self._log_path, 'r+b') as f:
+                ## Overwrites a torn tail the replay stopped at.
+                f.seek(self._log_end)
+                f.write(_FRAME.pack(len(data), zlib.crc32(data)))
+                f.write(data)
+                f.truncate()
+        except OSError:
+            return False
+        self._log_end += _FRAME.size + len(data)
+        return True
+
+    def _replay(self, log_id):
+        """
+        Apply the intact batches of the log log_id. Returns False (applying
+        nothing) when that log is missing, unreadable or foreign.
+        """
+        try:
+            with open(self._log_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if data[:_LOG_HEADER_LEN] != LOG_MAGIC + bytes.fromhex(log_id):
+            return False
+        pos = _LOG_HEADER_LEN
+        while pos + _FRAME.size <= len(data):
+            length, crc = _FRAME.unpack_from(data, pos)
+            payload = data[pos + _FRAME.size:pos + _FRAME.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            batch = msgspec.msgpack.decode(payload, type=JournalBatch)
+            self.written.update(batch.written)
+            self.deletes.difference_update(batch.written)
+            self.deletes.update(batch.deletes)
+            self.written.difference_update(batch.deletes)
+            self.written.difference_update(batch.settled)
+            self.deletes.difference_update(batch.settled)
+            for gid, entry in batch.pushed.items():
+                self.pushed[gid] = tuple(entry)
+            pos += _FRAME.size + length
+        self._log_id = log_id
+        self._log_end = pos
+        return True
 
     ## Mutation methods - every one maintains the disjointness invariant and
     ## marks the state dirty.
@@ -123,28 +299,62 @@ class JournalState:
     def record_write(self, key):
         self.written.add(key)
         self.deletes.discard(key)
+        self._note(key)
         self._dirty = True
 
     def record_delete(self, key):
         self.deletes.add(key)
         self.written.discard(key)
+        self._note(key)
         self._dirty = True
 
     def discard_written(self, key):
         if key in self.written:
             self.written.discard(key)
+            self._note(key)
             self._dirty = True
 
     def discard_delete(self, key):
         if key in self.deletes:
             self.deletes.discard(key)
+            self._note(key)
             self._dirty = True
 
     def clear_committed(self, written_keys=(), delete_keys=()):
-        """Remove entries a successful commit has made durable remotely."""
+        """
+        Remove entries a successful commit has made durable remotely. Passing
+        written/deletes themselves clears them without a per-key pass.
+        """
         if written_keys or delete_keys:
-            self.written -= set(written_keys)
-            self.deletes -= set(delete_keys)
+            self.written.difference_update(written_keys)
+            self.deletes.difference_update(delete_keys)
+            if len(written_keys) + len(delete_keys) >= len(self.written) + len(self.deletes):
+                self._full = True
+                self._changed = set()
+            elif not self._full:
+                self._changed.update(written_keys)
+                self._changed.update(delete_keys)
+            self._dirty = True
+
+    def _note(self, key):
+        """Record a key whose state changed, for the next log batch."""
+        if not self._full:
+            self._changed.add(key)
+            if len(self._changed) >= len(self.written) + len(self.deletes):
+                self._full = True
+                self._changed = set()
+
+    def record_pushed(self, gid, gen, size, digest):
+        """A group generation this push has PUT but not committed yet."""
+        self.pushed[gid] = (gen, size, digest)
+        self._pushed_new[gid] = (gen, size, digest)
+        self._dirty = True
+
+    def clear_pushed(self):
+        """After a commit: recorded generations are either live or orphans."""
+        if self.pushed:
+            self.pushed.clear()
+            self._full = True
             self._dirty = True
 
     def clear_written(self):
@@ -152,22 +362,38 @@ class JournalState:
         moot; pending DELETES and the replacement intent survive."""
         if self.written:
             self.written.clear()
+            self._full = True
             self._dirty = True
 
     def set_num_groups(self, num_groups):
         if not self.num_groups_set or self.num_groups != num_groups:
             self.num_groups = num_groups
             self.num_groups_set = True
+            self._full = True
+            self._dirty = True
+
+    def set_compression(self, compression):
+        if self.compression != compression:
+            self.compression = compression
+            self._full = True
             self._dirty = True
 
     def set_replace_pending(self, value: bool):
         if self.replace_pending != value:
             self.replace_pending = value
+            self._full = True
             self._dirty = True
 
     def set_meta_pending(self, value: bool):
         if self.meta_pending != value:
             self.meta_pending = value
+            self._full = True
+            self._dirty = True
+
+    def set_log_lost(self, value: bool):
+        if self.log_lost != value:
+            self.log_lost = value
+            self._full = True
             self._dirty = True
 
 
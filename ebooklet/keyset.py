@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact sets of str keys for the journal.
+
+A Python set of str costs roughly 80 bytes per key on top of the key's own
+characters (the str object plus its hash-table slot), so a journal with tens
+of millions of pending writes or deletes holds gigabytes of bookkeeping -
+most of it never touched again before the push. KeySet keeps small sets as a
+plain set and moves large ones into a packed open-addressing table: 32-bit
+slots pointing at entries, each entry a 64-bit key hash, an offset into one
+bytearray of the UTF-8 keys, and a deleted flag (about 25-33 bytes per key
+plus the key). Membership probes the slots by hash and compares the stored
+key bytes on a hash match, so it stays exact. A discard only flags its
+entry; the table is rebuilt without the dead entries when they outnumber
+the live ones, and when it fills past half its slots.
+
+Reads are safe alongside a single writer the way a plain set's are: the
+plain set or the table lives in one attribute that a reader loads once, an
+entry is complete before a slot points at it, and a rebuild or a switch
+between the set and the table replaces that attribute in one assignment.
+"""
+from array import array
+from collections.abc import MutableSet
+
+## Sets up to this size stay a plain set; larger ones move to the table, and
+## a table rebuilt at half this size or less moves back.
+COMPACT_MIN_KEYS = 2**16
+
+
+def _new_table(capacity):
+    """(slots, hashes, offsets, blob, dead) with capacity slots (a power of 2)."""
+    return array('I', bytes(4 * capacity)), array('q'), array('Q', [0]), bytearray(), bytearray()
+
+
+def _find(table, key):
+    """
+    Probe for key: (entry, slot, hash, key bytes). entry is -1 when absent,
+    and slot is then the empty slot an insert would take. A found entry may
+    be flagged deleted.
+    """
+    slots, hashes, offsets, blob, dead = table
+    h = hash(key)
+    mask = len(slots) - 1
+    i = h & mask
+    key_bytes = None
+    while True:
+        e = slots[i]
+        if not e:
+            return -1, i, h, key_bytes
+        e -= 1
+        if hashes[e] == h:
+            if key_bytes is None:
+                key_bytes = key.encode()
+            if blob[offsets[e]:offsets[e + 1]] == key_bytes:
+                return e, i, h, key_bytes
+        i = (i + 1) & mask
+
+
+def _append(table, i, h, key_bytes):
+    slots, hashes, offsets, blob, dead = table
+    e = len(hashes)
+    hashes.append(h)
+    blob.extend(key_bytes)
+    offsets.append(len(blob))
+    dead.append(0)
+    slots[i] = e + 1
+
+
+class KeySet(MutableSet):
+    """
+    A mutable set of str keys that switches to a packed hash table past
+    COMPACT_MIN_KEYS. Supports the set API the journal and its callers use:
+    in, len, iteration, add/discard/update/difference_update/clear and the
+    -= and & operators (binary operators return plain sets).
+    """
+
+    ## _store is either the plain set or the (slots, hashes, offsets, blob,
+    ## dead) table; _len counts the table's live keys.
+    __slots__ = ('_store', '_len')
+
+    def __init__(self, keys=()):
+        self._store = set()
+        self._len = 0
+        self.update(keys)
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+    def __contains__(self, key):
+        store = self._store
+        if type(store) is set:
+            return key in store
+        e = _find(store, key)[0]
+        return e >= 0 and not store[4][e]
+
+    def __len__(self):
+        store = self._store
+        if type(store) is set:
+            return len(store)
+        return self._len
+
+    def __iter__(self):
+        store = self._store
+        if type(store) is set:
+            yield from store
+            return
+        slots, hashes, offsets, blob, dead = store
+        for e in range(len(hashes)):
+            if not dead[e]:
+                yield blob[offsets[e]:offsets[e + 1]].decode()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} keys)'
+
+    def add(self, key):
+        table = self._store
+        if type(table) is set:
+            table.add(key)
+            if len(table) > COMPACT_MIN_KEYS:
+                self._rebuild(len(table))
+            return
+        e, i, h, key_bytes = _find(table, key)
+        if e >= 0:
+            if table[4][e]:
+                table[4][e] = 0
+                self._len += 1
+            return
+        if 2 * (len(table[1]) + 1) > len(table[0]):
+            self._rebuild(self._len + 1)
+            table = self._store
+            if type(table) is set:
+                table.add(key)
+                return
+            e, i, h, key_bytes = _find(table, key)
+        _append(table, i, h, key.encode() if key_bytes is None else key_bytes)
+        self._len += 1
+
+    def discard(self, key):
+        table = self._store
+        if type(table) is set:
+            table.discard(key)
+            return
+        e = _find(table, key)[0]
+        if e >= 0 and not table[4][e]:
+            table[4][e] = 1
+            self._len -= 1
+            if len(table[1]) - self._len > max(COMPACT_MIN_KEYS, self._len):
+                self._rebuild(self._len)
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def difference_update(self, keys):
+        if keys is self:
+            self.clear()
+        else:
+            for key in keys:
+                self.discard(key)
+
+    def __isub__(self, keys):
+        self.difference_update(keys)
+        return self
+
+    def clear(self):
+        self._store = set()
+        self._len = 0
+
+    def _rebuild(self, live):
+        """
+        Re-pack the live keys into a table that holds `live` keys at no more
+        than half load - or back into a plain set when few are left.
+        """
+        if live <= COMPACT_MIN_KEYS // 2:
+            self._store = set(self)
+            self._len = 0
+            return
+        capacity = 1 << (2 * live - 1).bit_length()
+        new = _new_table(capacity)
+        mask = capacity - 1
+        slots = new[0]
+        old = self._store
+        if type(old) is set:
+            for key in old:
+                h = hash(key)
+                i = h & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                _append(new, i, h, key.encode())
+        else:
+            _, hashes, offsets, blob, dead = old
+            for e in range(len(hashes)):
+                if dead[e]:
+                    continue
+                h = hashes[e]
+                i = h & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                _append(new, i, h, blob[offsets[e]:offsets[e + 1]])
+        ## _len first: a reader that sees the new table sees its count.
+        self._len = len(new[1])
+        self._store = new
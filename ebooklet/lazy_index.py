@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy remote index for read-only sessions (open_ebooklet(..., lazy_index=True)).
+
+A cold reader normally downloads the whole index section of the db object
+into its .remote_index sidecar before it can resolve a single key. The index
+section is a booklet FixedLengthValue file with a fixed bucket table, and
+format 2 places it last in the payload at a known offset - so a key resolves
+with ranged GETs: the bucket slot, then the block(s) of its chain. The
+LazyRemoteIndex keeps the index remote and walks the chain through an
+in-memory page cache (a copy of booklet's fixed-length chain walk reads
+through a file-like view of the pages), so a reader that wants five keys
+fetches a handful of pages instead of the whole index.
+
+Every page GET is checked against the db object timestamp the index is
+pinned to. When a writer commits meanwhile, the pages of the old object are
+gone: the index re-pins to the new object (fresh header, empty page cache),
+bumps `version`, and reports the new manifest/metadata through `on_repin` so
+the session adopts them together. Whole-index operations (keys/items/len)
+download the index section once per pin. Page GETs never run under the
+session's index lock: a lookup snapshots the pin, reads unlocked, and takes
+the lock again only to install a re-pin.
+"""
+import io
+import threading
+from collections import OrderedDict
+from hashlib import blake2s
+
+import booklet
+import msgspec
+import urllib3
+
+from . import utils
+
+DEFAULT_PAGE_SIZE = 2**16
+## 64 MiB of index pages at the default page size.
+DEFAULT_MAX_PAGES = 1024
+
+## How many consecutive commits a single lookup rides out before giving up.
+_MAX_REPINS = 5
+
+## booklet's fixed-length file layout (format version 5). The chain walk below
+## reads these on-disk constants directly rather than booklet's internal
+## helpers and parameter attributes.
+_BLT_FIXED_UUID = b'\x04\xd3\xb2\x94\xf2\x10Ab\x95\x8d\x04\x00s\x8c\x9e\n'
+_BLT_HEADER_LEN = 200
+_BLT_KEY_HASH_LEN = 13
+_BLT_N_BYTES_FILE = 6
+_BLT_N_BYTES_KEY = 2
+## Written by booklets that predate the stored index offset.
+_BLT_UNSET_OFFSETS = (0, 52983525027888)
+
+
+class _IndexMoved(Exception):
+    """A page GET returned a different db object than the pinned one."""
+
+
+class _Pin:
+    """
+    One pinned db object: its sections, the index header fields and its page
+    cache. Immutable once built except for the cache and the materialized
+    index, both guarded by the pin's own lock - never the session's.
+    """
+    __slots__ = ('timestamp', 'manifest', 'meta_section', 'index_start', 'object_len',
+                 'n_buckets', 'value_len', 'index_offset', 'key_serializer',
+                 'pages', 'materialized', 'lock')
+
+    def __init__(self):
+        self.timestamp = None
+        self.manifest = {}
+        self.meta_section = None
+        self.index_start = None
+        self.object_len = 0
+        self.pages = OrderedDict()
+        self.materialized = None
+        self.lock = threading.Lock()
+
+    def parse_index_header(self, base):
+        """Read the bucket table geometry and key serializer of a fixed-length booklet header."""
+        if base[:16] != _BLT_FIXED_UUID:
+            raise utils.UnsupportedFormatError('The index section of the remote db object is not a fixed-length booklet.')
+        self.n_buckets = int.from_bytes(base[21:25], 'little')
+        key_serializer = booklet.serializers.serial_int_dict.get(int.from_bytes(base[31:33], 'little'))
+        if key_serializer is None:
+            raise utils.UnsupportedFormatError('The index section of the remote db object has no stored key serializer.')
+        self.key_serializer = key_serializer
+        self.value_len = int.from_bytes(base[37:41], 'little')
+        index_offset = int.from_bytes(base[65:65 + _BLT_N_BYTES_FILE], 'little')
+        self.index_offset = _BLT_HEADER_LEN if index_offset in _BLT_UNSET_OFFSETS else index_offset
+
+
+def _chain_value(view, key, n_buckets, value_len, index_offset, key_serializer):
+    """
+    Walk a fixed-length booklet's bucket chain for key. A bucket slot holds the
+    first block position; a block is key hash, next-block position (1 ends
+    the chain), key length, key, value. Returns the value bytes or None.
+    """
+    key_hash = blake2s(key_serializer.dumps(key), digest_size=_BLT_KEY_HASH_LEN).digest()
+    next_end = _BLT_KEY_HASH_LEN + _BLT_N_BYTES_FILE
+    header_len = next_end + _BLT_N_BYTES_KEY
+
+    bucket = int.from_bytes(key_hash, 'little') % n_buckets
+    view.seek(index_offset + bucket * _BLT_N_BYTES_FILE)
+    block_pos = int.from_bytes(view.read(_BLT_N_BYTES_FILE), 'little')
+    while block_pos > 1:
+        view.seek(block_pos)
+        header = view.read(header_len)
+        next_pos = int.from_bytes(header[_BLT_KEY_HASH_LEN:next_end], 'little')
+        if not next_pos:
+            return None
+        if header[:_BLT_KEY_HASH_LEN] == key_hash:
+            view.seek(int.from_bytes(header[next_end:], 'little'), 1)
+            return view.read(value_len) or None
+        block_pos = next_pos
+    return None
+
+
+class _PageView:
+    """
+    Seek/read view of one pin's index section for the chain walk (positions
+    are relative to the index section start).
+    """
+    __slots__ = ('_index', '_pin', '_pos')
+
+    def __init__(self, index, pin):
+        self._index = index
+        self._pin = pin
+        self._pos = 0
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self._pos = offset
+        elif whence == 1:
+            self._pos += offset
+        else:
+            raise ValueError('Only absolute and relative seeks are supported.')
+        return self._pos
+
+    def read(self, n):
+        data = self._index._read(self._pin, self._pin.index_start + self._pos, n)
+        self._pos += len(data)
+        return data
+
+
+class LazyRemoteIndex:
+    """
+    Read-only, remote-resident stand-in for the .remote_index sidecar. Offers
+    the slice of the FixedLengthValue API read-only sessions use: get,
+    __contains__, keys/items/__iter__/__len__, and __delitem__ (journaled
+    deletes replayed at open hide their keys locally). Thread-safe; pass the
+    session's index lock so a re-pin is atomic with the session's reads. The
+    lock is only taken to snapshot the pin and the deletes and to install a
+    re-pin - page GETs run outside it.
+    """
+
+    def __init__(self, remote_session, lock=None, page_size=DEFAULT_PAGE_SIZE, max_pages=DEFAULT_MAX_PAGES):
+        if not isinstance(page_size, int) or page_size < 4096:
+            raise ValueError('page_size must be an integer >= 4096.')
+        self._remote_session = remote_session
+        self._lock = lock if lock is not None else threading.RLock()
+        self._page_size = page_size
+        self._max_pages = max_pages
+        self._deleted = set()
+        self._current = None
+        ## Called as on_repin(manifest, meta_section, timestamp) after an
+        ## implicit re-pin (a commit landed mid-lookup), with the lock held.
+        self.on_repin = None
+        ## Incremented by every (re-)pin: a reader comparing it before and
+        ## after a batch of lookups knows whether they all saw one object.
+        self.version = 0
+        pin = self._load_pin()
+        with self._lock:
+            self._install(pin)
+
+    ## Pinning
+
+    def repin(self, clear_deletes=True):
+        """
+        Re-pin to the remote's current db object (drops the page cache). The
+        explicit pull path clears the local deletes and replays the journal.
+        """
+        pin = self._load_pin()
+        with self._lock:
+            if clear_deletes:
+                self._deleted.clear()
+            self._install(pin)
+
+    def _install(self, pin):
+        """Make pin the current one (caller holds the lock)."""
+        old = self._current
+        self._current = pin
+        self.version += 1
+        self.timestamp = pin.timestamp
+        self.manifest = pin.manifest
+        self.meta_section = pin.meta_section
+        if old is not None:
+            with old.lock:
+                old.pages.clear()
+
+    def _load_pin(self):
+        """Read the header, sections and index header of the current db object."""
+        pin = _Pin()
+        resp = self._remote_session.get_object(range_start=0, range_end=self._page_size - 1)
+        if resp.status == 404:
+            ## No remote (a local-only read): an empty index.
+            return pin
+        if resp.status not in (200, 206):
+            raise urllib3.exceptions.HTTPError(resp.error)
+        ts = resp.metadata.get('timestamp')
+        pin.timestamp = int(ts) if ts is not None else self._remote_session.timestamp
+
+        head = resp.data
+        manifest_len, meta_len, index_len = utils.parse_db_payload_header(head[:utils.PAYLOAD_HEADER_LEN])
+        pin.index_start = utils.PAYLOAD_HEADER_LEN + manifest_len + meta_len
+        pin.object_len = pin.index_start + index_len
+        self._store_pages(pin, 0, head)
+
+        sections = self._read(pin, utils.PAYLOAD_HEADER_LEN, manifest_len + meta_len)
+        pin.manifest = msgspec.json.decode(sections[:manifest_len], type=dict[int, str]) if manifest_len else {}
+        pin.meta_section = bytes(sections[manifest_len:]) if meta_len else None
+        pin.parse_index_header(self._read(pin, pin.index_start, _BLT_HEADER_LEN))
+        return pin
+
+    ## Page cache
+
+    def _store_pages(self, pin, start, data):
+        ps = self._page_size
+        with pin.lock:
+            for pos in range(0, len(data), ps):
+                pin.pages[(start + pos) // ps] = bytes(data[pos:pos + ps])
+            while len(pin.pages) > self._max_pages:
+                pin.pages.popitem(last=False)
+
+    def _fetch(self, pin, range_start, range_end):
+        resp = self._remote_session.get_object(range_start=range_start, range_end=range_end)
+        if resp.status not in (200, 206):
+            if resp.status in (404, 416):
+                ## Deleted or replaced by a shorter object - either way not
+                ## the pinned object any more.
+                raise _IndexMoved()
+            raise urllib3.exceptions.HTTPError(resp.error)
+        ts = resp.metadata.get('timestamp')
+        if ts is not None and int(ts) != pin.timestamp:
+            raise _IndexMoved()
+        return resp.data
+
+    def _read(self, pin, offset, n):
+        """n bytes of the pinned object from offset (short at the object's end)."""
+        end = min(offset + n, pin.object_len)
+        if end <= offset:
+            return b''
+        ps = self._page_size
+        first = offset // ps
+        last = (end - 1) // ps
+
+        with pin.lock:
+            missing = [p for p in range(first, last + 1) if p not in pin.pages]
+        ## One GET per run of consecutive missing pages.
+        while missing:
+            run_start = missing[0]
+            run_end = run_start
+            while len(missing) > 1 and missing[1] == run_end + 1:
+                missing.pop(0)
+                run_end += 1
+            missing.pop(0)
+            range_end = min((run_end + 1) * ps, pin.object_len) - 1
+            self._store_pages(pin, run_start * ps, self._fetch(pin, run_start * ps, range_end))
+
+        parts = []
+        for p in range(first, last + 1):
+            with pin.lock:
+                page = pin.pages.get(p)
+                if page is not None:
+                    pin.pages.move_to_end(p)
+            if page is None:
+                ## Evicted by this very read (a span wider than the cache) or
+                ## by a concurrent one.
+                page = self._fetch(pin, p * ps, min((p + 1) * ps, pin.object_len) - 1)
+            parts.append(page)
+        data = b''.join(parts)
+        start = offset - first * ps
+        return data[start:start + (end - offset)]
+
+    def _retrying(self, pin, func, *args):
+        """
+        func(pin, *args) against the snapshotted pin, re-pinning when a commit
+        moved the db object. The new pin is read unlocked; the lock is taken
+        only to install it (unless another thread already moved on).
+        """
+        for _ in range(_MAX_REPINS):
+            try:
+                return func(pin, *args)
+            except _IndexMoved:
+                new_pin = self._load_pin()
+                with self._lock:
+                    if self._current is pin:
+                        self._install(new_pin)
+                        if self.on_repin is not None:
+                            self.on_repin(self.manifest, self.meta_section, self.timestamp)
+                    pin = self._current
+        raise urllib3.exceptions.HTTPError(
+            f'The remote db object changed {_MAX_REPINS} times during one index lookup; retry later.')
+
+    ## Lookups
+
+    def _get(self, pin, key):
+        if pin.index_start is None:
+            return None
+        with pin.lock:
+            if pin.materialized is not None:
+                return pin.materialized.get(key)
+        return _chain_value(_PageView(self, pin), key, pin.n_buckets, pin.value_len, pin.index_offset, pin.key_serializer)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._deleted:
+                return default
+            pin = self._current
+        value = self._retrying(pin, self._get, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._deleted.add(key)
+
+    def _items(self, pin):
+        """Every (key, value) of the pin's index, downloading the section once per pin."""
+        if pin.index_start is None:
+            return []
+        with pin.lock:
+            index = pin.materialized
+        if index is None:
+            data = self._fetch(pin, pin.index_start, pin.object_len - 1)
+            index = booklet.FixedLengthValue(io.BytesIO(bytes(data)), 'r')
+            with pin.lock:
+                if pin.materialized is None:
+                    pin.materialized = index
+                else:
+                    index.close()
+                    index = pin.materialized
+        with pin.lock:
+            return list(index.items())
+
+    def items(self):
+        with self._lock:
+            pin = self._current
+            deleted = set(self._deleted)
+        return iter([(k, v) for k, v in self._retrying(pin, self._items) if k not in deleted])
+
+    def keys(self):
+        return (k for k, _v in self.items())
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def sync(self):
+        pass
+
+    def prune(self):
+        return 0
+
+    def close(self):
+        with self._lock:
+            pin = self._current
+        if pin is not None:
+            with pin.lock:
+                pin.pages.clear()
+                if pin.materialized is not None:
+                    pin.materialized.close()
+                    pin.materialized = None
@@ -10,8 +10,9 @@ import os
 import pathlib
 import re
 import threading
+import time
 import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import booklet
 import msgspec
 import weakref
@@ -22,6 +23,12 @@ import urllib3
 from . import utils
 from . import remote
 from .journal import JournalState, RemoteState
+from .cache import ValueCache
+from .membership import GroupMembership
+from .lazy_index import LazyRemoteIndex
+from . import flow
+from .flow import ByteBudget, ConcurrencyWindow, HedgedReads
+from . import compression as compression_mod
 from .errors import (
     Error,
     ReadOnlyError,
@@ -42,6 +49,14 @@ logger = logging.getLogger(__name__)
 
 _MISSING = object()
 
+## Keys per load batch when a bounded value cache iterates the whole
+## database (items/values/timestamps) - see _iter_via_cache.
+_CACHE_ITER_BATCH = 1000
+
+## Keys per read-ahead unit in per-key mode (grouped mode reads ahead by
+## whole groups) - see _iter_read_ahead.
+_READ_AHEAD_BATCH = 256
+
 
 ## RemoteIntegrityError moved to errors.py in 0.10.0 (typed taxonomy); the
 ## import above keeps the old main.RemoteIntegrityError attribute path working.
@@ -112,7 +127,8 @@ class Change:
 
         self._ebooklet = ebooklet
 
-        self._changelog_path = None
+        ## The in-memory ChangeSet (utils.create_changelog); None until built.
+        self._changes = None
         ## Captured by build_changelog's sweep (0.10.1): {key: (ts, value_offset,
         ## value_len)} + the compaction_count snapshot the offsets are valid for.
         self._loc_map = None
@@ -145,21 +161,24 @@ class Change:
         confused with the MutableMapping update() on the ebooklet itself).
         """
         self._ebooklet.sync()
-        changelog_path, loc_map, comp0 = utils.create_changelog(self._ebooklet._local_file_path, self._ebooklet._local_file, self._ebooklet._remote_index, self._ebooklet._remote_session, self._ebooklet._journal)
+        changes, loc_map, comp0 = utils.create_changelog(self._ebooklet._local_file, self._ebooklet._remote_index, self._ebooklet._remote_session, self._ebooklet._journal)
 
-        self._changelog_path = changelog_path
+        self._changes = changes
         self._loc_map = loc_map
+        ## Earlier versions kept the change set in a '<file>.changelog'
+        ## booklet next to the local file, left behind by a failed push.
+        self._ebooklet._local_file_path.with_name(self._ebooklet._local_file_path.name + '.changelog').unlink(missing_ok=True)
         self._comp0 = comp0
 
 
     def iter_changes(self):
         """
         Create an iterator of the changed/written keys. Pending DELETIONS are
-        not part of the changelog file - see pending_deletes.
+        not part of the changelog - see pending_deletes.
         """
-        if not self._changelog_path:
+        if self._changes is None:
             self.build_changelog()
-        return utils.view_changelog(self._changelog_path)
+        return utils.view_changelog(self._changes)
 
 
     @property
@@ -182,20 +201,19 @@ class Change:
         if not self._ebooklet.writable:
             raise ReadOnlyError('File is open for read-only.')
 
-        if not self._changelog_path:
+        if self._changes is None:
             self.build_changelog()
 
         journal = self._ebooklet._journal
 
-        with booklet.FixedLengthValue(self._changelog_path) as f:
-            if keys is None:
-                rm_keys = list(f.keys())
-            else:
-                rm_keys = [key for key in keys if key in f]
+        if keys is None:
+            rm_keys = list(self._changes)
+        else:
+            rm_keys = [key for key in keys if key in self._changes]
 
-            for key in rm_keys:
-                del self._ebooklet._local_file[key]
-                journal.discard_written(key)
+        for key in rm_keys:
+            del self._ebooklet._local_file[key]
+            journal.discard_written(key)
 
         ## Cancel journaled deletions: forget them, then force an index
         ## re-pull to restore the entries __delitem__ removed from the local
@@ -220,8 +238,7 @@ class Change:
         if discard_deletes:
             self._ebooklet._pull_remote_index(force=True)
 
-        self._changelog_path.unlink()
-        self._changelog_path = None
+        self._changes = None
 
 
     def push(self, force_push=False):
@@ -285,16 +302,36 @@ class Change:
 
             self.build_changelog()
 
-            result = utils.update_remote(self._ebooklet._local_file, self._ebooklet._remote_index, self._ebooklet._remote_index_path, self._changelog_path, self._ebooklet._remote_session, force_push, journal, self._ebooklet._remote_state, journal.replace_pending, self._ebooklet.type, self._ebooklet._num_groups, lock=self._ebooklet.lock, loc_map=self._loc_map, comp0=self._comp0, packers=self._ebooklet._push_packers)
+            if journal.log_lost:
+                logger.warning(
+                    'Pushing after the journal log was lost: deletes made since its last '
+                    'checkpoint are not in this push and those keys stay on the remote.'
+                )
+
+            eb = self._ebooklet
+            ctx = utils.PushContext(
+                eb._local_file, eb._remote_index, eb._remote_index_path, self._changes, eb._remote_session,
+                journal, eb._remote_state, eb.type, eb._num_groups, force_push=force_push,
+                replace_pending=journal.replace_pending, lock=eb.lock, loc_map=self._loc_map,
+                comp0=self._comp0, packers=eb._push_packers, range_merge_gap=eb._range_merge_gap,
+                compression=eb._compression, upload_part_size=eb._upload_part_size,
+                max_inflight_bytes=eb._max_inflight_bytes, budget=eb._inflight,
+                copy_repack=eb._copy_repack, membership=eb._membership,
+                max_group_deltas=eb._max_group_deltas, compact_dead_ratio=eb._compact_dead_ratio,
+                window=eb._concurrency)
+            result = utils.update_remote(ctx)
 
             if isinstance(result, dict):
-                # Partial failure — don't clean up changelog so push can be retried.
+                # Partial failure — keep the change set so push can be retried.
                 # replace_pending is also kept so a retry redoes the full
                 # wipe-and-replace (the remote must never end up half old, half new).
                 # updated: a partial REPLACEMENT commits nothing (the old remote is
                 # untouched); a partial ordinary push has already committed its
                 # successful groups/keys (a failed commit PUT raises, never returns).
+                ## The journal also holds the generations that did land, so
+                ## the retry adopts them instead of uploading them again.
                 failures = {key: _failure_str(value) for key, value in result.items()}
+                journal.persist(self._ebooklet._local_file)
                 return PushResult(updated=not journal.replace_pending, failures=failures)
 
             ## A replacement session is a REPLACEMENT only until the replacement
@@ -304,8 +341,11 @@ class Change:
             ## only the new changelog, silently destroying everything pushed
             ## earlier in the session (0.9.4's data-loss fix, now journal-backed
             ## so the intent also survives sessions instead of dying with _flag).
-            if journal.replace_pending:
+            ## A completed push also settles a lost journal log: what it held
+            ## is out of reach, so later opens need not warn again.
+            if journal.replace_pending or journal.log_lost:
                 journal.set_replace_pending(False)
+                journal.set_log_lost(False)
                 journal.persist(self._ebooklet._local_file)
 
             ## After this session's own v2 commit, a formerly format-1 remote is
@@ -315,8 +355,7 @@ class Change:
                 self._ebooklet._remote_session._load_db_metadata()
 
             if result:
-                self._changelog_path.unlink()
-                self._changelog_path = None
+                self._changes = None
 
                 if not self._ebooklet._remote_session.initialized:
                     self._ebooklet._remote_session._load_db_metadata()
@@ -326,6 +365,77 @@ class Change:
             self._ebooklet._push_active = False
 
 
+class _LoadPlan:
+    """
+    What one load_items call fetches (see EVariableLengthValue._plan_load)
+    plus the state its completion phase needs.
+    """
+    __slots__ = ('jobs', 'failure_dict', 'dispatched', 'admit')
+
+    def __init__(self):
+        self.jobs = []
+        self.failure_dict = {}
+        self.dispatched = []
+        self.admit = []
+
+    def add_failure(self, fkey, error):
+        if error is not None:
+            ## A group's range chunks report under one failure key.
+            self.failure_dict[fkey] = utils.merge_group_failures(self.failure_dict.get(fkey), error)
+
+
+class Prefetch:
+    """
+    Handle of one background prefetch (EVariableLengthValue.prefetch).
+
+    done() says whether the fetch finished; wait() blocks for it and returns
+    the failure dict (empty on success - the same shape load_items returns);
+    result() raises the failures instead; cancel() stops dispatching the
+    fetches that have not started (in-flight ones complete). A prefetch
+    never raises on its own: failures only surface through the handle, and a
+    later read of a key whose prefetch failed simply fetches it again.
+    """
+    __slots__ = ('n_keys', '_done', '_cancelled', '_failures', '_thread')
+
+    def __init__(self, n_keys):
+        self.n_keys = n_keys
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+        self._failures = None
+        self._thread = None
+
+    def __repr__(self):
+        state = 'done' if self.done() else ('cancelled' if self.cancelled() else 'running')
+        return f'Prefetch(n_keys={self.n_keys}, {state})'
+
+    def done(self):
+        return self._done.is_set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        """The failure dict once finished, or None if timeout expired first."""
+        if not self._done.wait(timeout):
+            return None
+        return self._failures
+
+    def result(self, timeout=None):
+        """Wait, then raise the prefetch's failures (if any) like get_items would."""
+        failures = self.wait(timeout)
+        if failures is None:
+            raise TimeoutError('The prefetch did not finish within the timeout.')
+        if failures:
+            raise _failure_exception(failures)
+
+    def _finish(self, failures):
+        self._failures = failures
+        self._done.set()
+
+
 class EVariableLengthValue(MutableMapping):
     """
 
@@ -342,18 +452,64 @@ class EVariableLengthValue(MutableMapping):
             lock_timeout: int = 300,
             force_lock: bool = False,
             push_packers: int = 1,
+            range_merge_gap: int = utils.DEFAULT_RANGE_MERGE_GAP,
+            cache_max_bytes: int = None,
+            cache_policy: str = 'lru',
+            cache_ttl: float = None,
+            lazy_index: bool = False,
+            compression: str = None,
+            upload_part_size: int = utils.DEFAULT_UPLOAD_PART_SIZE,
+            max_inflight_bytes: int = None,
+            copy_repack: bool = False,
+            max_group_deltas: int = None,
+            compact_dead_ratio: float = utils.DEFAULT_COMPACT_DEAD_RATIO,
+            adaptive_concurrency: bool = True,
+            hedge_reads: bool = False,
+            hedge_budget: float = flow.DEFAULT_HEDGE_BUDGET,
             ):
         """
 
         """
-        self._init_common(remote_session, local_file_path, flag, value_serializer, n_buckets, buffer_size, 'EVariableLengthValue', num_groups, lock_timeout, force_lock, push_packers)
+        self._init_common(remote_session, local_file_path, flag, value_serializer, n_buckets, buffer_size, 'EVariableLengthValue', num_groups, lock_timeout, force_lock, push_packers, range_merge_gap, cache_max_bytes, cache_policy, cache_ttl, lazy_index, compression, upload_part_size, max_inflight_bytes, copy_repack, max_group_deltas, compact_dead_ratio, adaptive_concurrency, hedge_reads, hedge_budget)
 
-    def _init_common(self, remote_session, local_file_path, flag, value_serializer, n_buckets, buffer_size, ebooklet_type, num_groups=None, lock_timeout=300, force_lock=False, push_packers=1):
+    def _init_common(self, remote_session, local_file_path, flag, value_serializer, n_buckets, buffer_size, ebooklet_type, num_groups=None, lock_timeout=300, force_lock=False, push_packers=1, range_merge_gap=utils.DEFAULT_RANGE_MERGE_GAP, cache_max_bytes=None, cache_policy='lru', cache_ttl=None, lazy_index=False, compression=None, upload_part_size=utils.DEFAULT_UPLOAD_PART_SIZE, max_inflight_bytes=None, copy_repack=False, max_group_deltas=None, compact_dead_ratio=utils.DEFAULT_COMPACT_DEAD_RATIO, adaptive_concurrency=True, hedge_reads=False, hedge_budget=flow.DEFAULT_HEDGE_BUDGET):
         """
         Shared initialization logic for EVariableLengthValue and RemoteConnGroup.
         """
         if not isinstance(push_packers, int) or push_packers < 1:
             raise ValueError('push_packers must be an integer >= 1.')
+        if not isinstance(range_merge_gap, int) or range_merge_gap < 0:
+            raise ValueError('range_merge_gap must be an integer >= 0.')
+        if upload_part_size is not None and (not isinstance(upload_part_size, int) or upload_part_size < utils.MIN_UPLOAD_PART_SIZE):
+            raise ValueError(f'upload_part_size must be None or an integer >= {utils.MIN_UPLOAD_PART_SIZE} (the S3 minimum part size).')
+        if max_inflight_bytes is not None and (not isinstance(max_inflight_bytes, int) or max_inflight_bytes < 1):
+            raise ValueError('max_inflight_bytes must be None or a positive integer.')
+        if max_group_deltas is not None and (not isinstance(max_group_deltas, int) or max_group_deltas < 1):
+            raise ValueError('max_group_deltas must be None or an integer >= 1.')
+        if not 0 < compact_dead_ratio <= 1:
+            raise ValueError('compact_dead_ratio must be in (0, 1].')
+        if not 0 < hedge_budget <= 1:
+            raise ValueError('hedge_budget must be in (0, 1].')
+        ## The bounded value cache evicts LOCAL values; a writer's local file
+        ## is the source of its unpushed data, so eviction is reader-only.
+        if cache_max_bytes is not None:
+            if flag != 'r':
+                raise ValueError("cache_max_bytes is only supported for read-only sessions (flag='r').")
+            value_cache = ValueCache(cache_max_bytes, cache_policy, cache_ttl)
+        else:
+            value_cache = None
+        ## The lazy index resolves keys against the remote db object; a
+        ## writer's pushes need the full sidecar. Offline sessions have no
+        ## remote to be lazy against and read the sidecar as usual.
+        if lazy_index and flag != 'r':
+            raise ValueError("lazy_index is only supported for read-only sessions (flag='r').")
+        lazy_index = bool(lazy_index) and not isinstance(remote_session, remote.OfflineSession)
+        ## The group codec is a write-side choice; readers decode whatever
+        ## codec the remote's metadata names.
+        if compression is not None and flag == 'r':
+            raise ValueError("compression only applies to writable sessions; readers use the remote's codec.")
+        compression = compression_mod.validate_compression(compression)
+        index_lock = threading.RLock()
         ## Lock the remote if file is opened for write
         if flag != 'r':
             lock = remote_session.create_lock()
@@ -406,6 +562,7 @@ class EVariableLengthValue(MutableMapping):
         ## remote lock held until garbage collection finally releases it.
         local_file = None
         remote_index = None
+        membership = None
         try:
             ## flag 'n' guard: the 'n' contract keeps the old remote readable until
             ## push, and those reads need the OLD grouping - a conflicting
@@ -413,7 +570,7 @@ class EVariableLengthValue(MutableMapping):
             ## never read (index-fetch-suppressed replacement), so its old
             ## grouping is irrelevant and a fresh num_groups choice is fine.
             v1_remote = (remote_session.initialized and remote_session.format_version is not None
-                         and remote_session.format_version < utils.SUPPORTED_FORMAT_VERSION)
+                         and remote_session.format_version < utils.GENERATIONAL_FORMAT_VERSION)
             if (flag == 'n' and not v1_remote and num_groups is not None
                     and remote_session.num_groups is not None and num_groups != remote_session.num_groups):
                 raise ValueError(
@@ -426,11 +583,24 @@ class EVariableLengthValue(MutableMapping):
             local_file_existed = local_file_path.exists()
             local_file, overwrite_remote_index = utils.init_local_file(local_file_path, flag, remote_session, value_serializer, n_buckets, buffer_size)
 
-            ## Load the persistent journal. flag 'n' recreates the local file,
-            ## which destroys any previous journal slot - exactly right, a
-            ## replacement starts with no pending history.
-            journal = JournalState.load(local_file)
+            ## Load the persistent journal (checkpoint + its write-ahead log).
+            ## flag 'n' recreates the local file, which destroys any previous
+            ## journal slot - exactly right, a replacement starts with no
+            ## pending history (the old log no longer matches and is ignored).
+            journal = JournalState.load(local_file, local_file_path.parent.joinpath(local_file_path.name + '.journal'))
+            if journal.log_lost and flag != 'n':
+                warnings.warn(
+                    f"The journal log ({local_file_path.name}.journal) this local file's journal "
+                    'names is missing, unreadable or from another file (the file was copied or '
+                    'moved without it, or it was deleted). Changes journaled since its last '
+                    'checkpoint may be lost - pending DELETES among them, which the next push '
+                    'cannot recover: keys deleted in that window will survive on the remote. '
+                    'Check changes().pending_deletes and delete those keys again before pushing.',
+                    UserWarning,
+                    stacklevel=4,
+                )
             if flag == 'n':
+                journal.set_log_lost(False)
                 journal.set_replace_pending(True)
             elif journal.replace_pending:
                 warnings.warn(
@@ -460,6 +630,15 @@ class EVariableLengthValue(MutableMapping):
                         'num_groups - it is not inherited from the old remote).'
                     )
 
+            ## The persisted group membership of the sidecar (writers only:
+            ## only pushes consume it). Opened BEFORE the index fetch so an
+            ## open-time delta replay keeps it current; anything else that
+            ## rewrites the sidecar invalidates it.
+            if flag != 'r' and not lazy_index:
+                membership = GroupMembership(local_file_path.parent.joinpath(local_file_path.name + '.remote_index.groups'), RemoteState.load(local_file).remote_ts)
+                if index_fetch_suppressed or journal.replace_pending:
+                    membership.invalidate()
+
             if index_fetch_suppressed:
                 ## Never fetch the format-1 body. flag='n' starts from a fresh
                 ## EMPTY index (old keys read as absent - the documented
@@ -471,11 +650,22 @@ class EVariableLengthValue(MutableMapping):
                 index_fetched = False
                 fetched_manifest = None
                 fetched_meta = None
+            elif lazy_index:
+                ## Keep the index remote: one ranged GET pins the db object
+                ## (header, manifest, metadata section, index base params).
+                remote_index_path = local_file_path.parent.joinpath(local_file_path.name + '.remote_index')
+                remote_index = LazyRemoteIndex(remote_session, lock=index_lock)
+                index_fetched = remote_index.timestamp is not None
+                fetched_manifest = remote_index.manifest if index_fetched else None
+                fetched_meta = remote_index.meta_section
             else:
-                remote_index_path, index_fetched, fetched_manifest, fetched_meta = utils.get_remote_index_file(local_file_path, overwrite_remote_index, remote_session, flag)
+                ## The cached remote state rides along so a sidecar on the
+                ## remote's delta chain catches up from the index deltas.
+                remote_index_path, index_fetched, fetched_manifest, fetched_meta = utils.get_remote_index_file(local_file_path, overwrite_remote_index, remote_session, flag, RemoteState.load(local_file), journal.deletes, membership)
 
             ## Open remote index file
-            remote_index = utils.open_remote_index(remote_index_path, flag, n_buckets, buffer_size)
+            if not lazy_index:
+                remote_index = utils.open_remote_index(remote_index_path, flag, n_buckets, buffer_size)
 
             ## The persistent remote-state cache (manifest + metadata section
             ## of the last in-sync db object). Refresh it from what the open
@@ -488,7 +678,7 @@ class EVariableLengthValue(MutableMapping):
             ## (ts <= it) and post-sync local writes (ts > it).
             prev_synced_ts = remote_state.remote_ts
             if fetched_manifest is not None:
-                remote_state.update_committed(fetched_manifest, fetched_meta, remote_session.timestamp)
+                remote_state.update_committed(fetched_manifest, fetched_meta, remote_index.timestamp if lazy_index else remote_session.timestamp)
                 utils.refresh_local_metadata(local_file, journal, fetched_meta)
                 remote_state.persist(local_file)
             elif (not index_fetch_suppressed and remote_session.initialized
@@ -540,6 +730,35 @@ class EVariableLengthValue(MutableMapping):
                 if resolved_num_groups is not None:
                     journal.set_num_groups(resolved_num_groups)
 
+            ## Resolve the group codec: remote metadata > user param > journal.
+            ## A remote's codec is fixed once pushed - except by a replacement
+            ## (flag='n', or a journaled one being recovered), which rewrites
+            ## every group and so may choose afresh.
+            if flag == 'r':
+                resolved_compression = None
+            elif (remote_session.initialized and not index_fetch_suppressed
+                    and not journal.replace_pending):
+                resolved_compression = remote_session.compression
+                if compression is not None and compression != resolved_compression:
+                    raise ValueError(
+                        f"compression={compression!r} conflicts with the existing remote's "
+                        f'codec ({resolved_compression!r}). Omit compression to inherit it, or '
+                        "re-create the remote with flag='n' to change it."
+                    )
+            else:
+                if compression is not None:
+                    journal.set_compression(compression)
+                resolved_compression = journal.compression
+            if resolved_compression is not None and resolved_num_groups is None:
+                raise ValueError('compression requires grouped storage: pass num_groups as well.')
+            ## Copied runs are byte ranges of the old raw-layout object, and
+            ## only multipart uploads can carry them.
+            if copy_repack and (resolved_compression is not None or upload_part_size is None):
+                raise ValueError('copy_repack requires uncompressed groups (no compression) and multipart uploads (upload_part_size not None).')
+            ## Delta offsets are logical positions across raw-layout objects.
+            if max_group_deltas is not None and resolved_compression is not None:
+                raise ValueError('max_group_deltas requires uncompressed groups (no compression).')
+
             ## Reopening a created-but-not-yet-pushed database without a
             ## recorded num_groups choice would silently make the first push
             ## per-key. The journal records the choice since 0.10 (tri-state:
@@ -560,6 +779,12 @@ class EVariableLengthValue(MutableMapping):
                     remote_index.close()
                 except Exception:
                     pass
+            if membership is not None:
+                try:
+                    membership.invalidate()
+                    membership.close(None)
+                except Exception:
+                    pass
             if local_file is not None:
                 try:
                     local_file.close()
@@ -571,7 +796,7 @@ class EVariableLengthValue(MutableMapping):
 
         ## Finalizer (persists the journal before closing the local file, so a
         ## GC'd session still records its pending state)
-        self._finalizer = weakref.finalize(self, utils.ebooklet_finalizer, local_file, remote_index, remote_session, lock, journal)
+        self._finalizer = weakref.finalize(self, utils.ebooklet_finalizer, local_file, remote_index, remote_session, lock, journal, membership, remote_state)
 
         ## Assign properties
         ## _flag is FROZEN after open: the session-lifecycle facts it used to
@@ -583,12 +808,22 @@ class EVariableLengthValue(MutableMapping):
         self._local_file = local_file
         self._remote_index_path = remote_index_path
         self._remote_index = remote_index
+        ## gid -> member keys of the sidecar (writers; None otherwise) - lets
+        ## a push enumerate its affected groups without an index pass.
+        self._membership = membership
         ## Serializes the remote-index handle swap (_pull_remote_index closes and
         ## reopens the index booklet) against point reads and load_items - without
         ## it, a re-check triggered inside one thread's get() would close the index
         ## under a concurrent reader. RLock: _resolve_missing holds it while
         ## calling _pull_remote_index.
-        self._index_lock = threading.RLock()
+        self._index_lock = index_lock
+        ## True when _remote_index is a LazyRemoteIndex (reads resolve keys
+        ## with ranged GETs into the remote db object; no sidecar).
+        self._lazy_index = lazy_index
+        if lazy_index:
+            remote_index.on_repin = self._adopt_lazy_pin
+        ## The group codec this session's pushes write (None = raw layout).
+        self._compression = resolved_compression
         ## The persistent pending-change journal: written keys, pending deletes,
         ## the num_groups choice, replacement intent, pending metadata. Replaces
         ## the memory-only _written_keys/_deletes sets (Seam 2).
@@ -610,10 +845,56 @@ class EVariableLengthValue(MutableMapping):
         ## Push read-gate width: how many pack workers may read the local disk
         ## at once during push() (PUT concurrency is remote_session.threads).
         self._push_packers = push_packers
+        ## Grouped reads coalesce two members into one ranged GET only when
+        ## the dead bytes between them are at most this many
+        ## (utils.plan_group_ranges).
+        self._range_merge_gap = range_merge_gap
+        ## Push groups larger than this stream into multipart uploads of
+        ## parts this size (utils.stream_group); None buffers every group.
+        self._upload_part_size = upload_part_size
+        ## Bytes push() keeps in flight across its pull and upload stages
+        ## (pull ranges + uploading groups); None = bounded by threads only.
+        self._max_inflight_bytes = max_inflight_bytes
+        ## The session-wide gate on those bytes: push() and load_items()
+        ## charge every range and upload to the same budget, so concurrent
+        ## pushes and loads stay under max_inflight_bytes together.
+        self._inflight = ByteBudget(max_inflight_bytes)
+        ## Repack large groups by copying their unchanged members server-side
+        ## from the old generation (utils.stream_group's copied runs).
+        self._copy_repack = copy_repack
+        ## Append changed members to groups as delta generations, compacting
+        ## a group past this many deltas or this dead-byte ratio
+        ## (utils.plan_group_deltas); None rewrites every affected group.
+        self._max_group_deltas = max_group_deltas
+        self._compact_dead_ratio = compact_dead_ratio
+        ## How many requests push() and load_items() run at once: adapted to
+        ## the link (flow.ConcurrencyWindow), the S3Connection's threads the
+        ## ceiling; None = always threads.
+        self._concurrency = ConcurrencyWindow(remote_session.threads) if adaptive_concurrency else None
+        ## Point reads (db[key]) hedge their GET past a latency percentile
+        ## (flow.HedgedReads); the session owns and closes the hedger.
+        self._hedge_reads = hedge_reads and isinstance(remote_session, remote.S3SessionReader)
+        if self._hedge_reads:
+            remote_session.hedger = HedgedReads(remote_session.threads, hedge_budget)
+        ## Background prefetches (prefetch() / read-ahead iteration): the
+        ## fetch pool is created on first use and shut down by close().
+        self._prefetch_pool = None
+        self._prefetches = set()
+        self._prefetch_lock = threading.Lock()
         ## True while a push is running - prune()/clear() raise during it
         ## (they would invalidate the push's captured value offsets).
         self._push_active = False
         self._num_groups = resolved_num_groups
+        ## Bounded local value cache (flag='r' only; None = unbounded). Never
+        ## active offline: an evicted value could not be re-pulled there.
+        self._cache = value_cache if not self._offline else None
+        if self._cache is not None:
+            self._cache.seed(
+                (key, value_len) for key, _ts, _off, value_len
+                in sorted(local_file.locations(), key=lambda x: x[1] or 0)
+                if key not in utils.reserved_key_strs
+            )
+            self._cache_evict()
 
 
     @property
@@ -627,6 +908,29 @@ class EVariableLengthValue(MutableMapping):
         return self._offline
 
 
+    @property
+    def concurrency_window(self):
+        """
+        How many requests push() and load_items() currently run at once: the
+        adaptive window's width (see open_ebooklet's adaptive_concurrency),
+        or the S3Connection's threads when adaptation is off.
+        """
+        if self._concurrency is None:
+            return self._remote_session.threads
+        return self._concurrency.limit
+
+
+    @property
+    def hedge_stats(self):
+        """
+        The point-read hedging counters (see open_ebooklet's hedge_reads):
+        {'requests': hedgeable GETs, 'hedged': duplicates sent, 'won': GETs
+        a duplicate answered}. None when hedging is off.
+        """
+        hedger = getattr(self._remote_session, 'hedger', None)
+        return hedger.stats() if hedger is not None else None
+
+
     def set_metadata(self, data, timestamp=None):
         """
         Sets the metadata for the booklet. The data input must be a json serializable object. Optionally assign a timestamp.
@@ -654,10 +958,15 @@ class EVariableLengthValue(MutableMapping):
         return self._local_file.get_metadata(include_timestamp=include_timestamp)
 
 
-    def keys(self):
+    def keys(self, read_ahead=0):
         """
-        Returns a generator of the keys.
+        Returns a generator of the keys. With read_ahead > 0 the keys come
+        group by group while the values of the next read_ahead groups are
+        prefetched (see items).
         """
+        if read_ahead:
+            yield from self._iter_read_ahead(read_ahead, lambda key: key)
+            return
         overlap = {utils.metadata_key_str}
         for key in self._local_file.keys():
             if key in self._remote_index:
@@ -669,10 +978,23 @@ class EVariableLengthValue(MutableMapping):
                 yield key
 
 
-    def items(self):
+    def items(self, read_ahead=0):
         """
         Returns an iterator of the keys, values.
+
+        read_ahead : int
+            0 (the default) loads every value before the first item is
+            returned. N > 0 streams instead: the items come group by group
+            (batches of keys in per-key mode), and the groups of the next N
+            batches are fetched in the background while the current one is
+            consumed - the first item arrives after one group, and at most
+            N + 1 groups are in flight at a time.
         """
+        if read_ahead:
+            return self._iter_read_ahead(read_ahead, self._cached_item)
+        if self._cache is not None:
+            return self._iter_via_cache(self._cached_item)
+
         failure_dict = self.load_items()
 
         if failure_dict:
@@ -681,10 +1003,15 @@ class EVariableLengthValue(MutableMapping):
         return self._local_file.items()
 
 
-    def values(self):
+    def values(self, read_ahead=0):
         """
-        Returns an iterator of the values.
+        Returns an iterator of the values (read_ahead: see items).
         """
+        if read_ahead:
+            return (value for _key, value in self._iter_read_ahead(read_ahead, self._cached_item))
+        if self._cache is not None:
+            return (value for _key, value in self._iter_via_cache(self._cached_item))
+
         failure_dict = self.load_items()
 
         if failure_dict:
@@ -696,6 +1023,14 @@ class EVariableLengthValue(MutableMapping):
         """
         Return an iterator for timestamps for all keys. Optionally add values to the iterator.
         """
+        if self._cache is not None:
+            def read(key):
+                result = self.get_timestamp(key, include_value=include_value, default=_MISSING)
+                if result is _MISSING:
+                    return _MISSING
+                return (key, *result) if include_value else (key, result)
+            return self._iter_via_cache(read)
+
         failure_dict = self.load_items()
 
         if failure_dict:
@@ -712,7 +1047,10 @@ class EVariableLengthValue(MutableMapping):
         if failure:
             raise _failure_exception(failure)
 
-        return self._local_file.get_timestamp(key, include_value=include_value, decode_value=decode_value, default=default)
+        result = self._local_file.get_timestamp(key, include_value=include_value, decode_value=decode_value, default=_MISSING)
+        if result is _MISSING and self._evicted_meanwhile(key):
+            result = self._local_file.get_timestamp(key, include_value=include_value, decode_value=decode_value, default=_MISSING)
+        return default if result is _MISSING else result
 
     def set_timestamp(self, key, timestamp):
         """
@@ -773,7 +1111,10 @@ class EVariableLengthValue(MutableMapping):
         if failure:
             raise _failure_exception(failure)
 
-        return self._local_file.get(key, default=default)
+        value = self._local_file.get(key, default=_MISSING)
+        if value is _MISSING and self._evicted_meanwhile(key):
+            value = self._local_file.get(key, default=_MISSING)
+        return default if value is _MISSING else value
 
 
     def update(self, other=(), /, **kwargs):
@@ -797,6 +1138,83 @@ class EVariableLengthValue(MutableMapping):
             self[key] = value
 
 
+    def bulk_load(self, items, timestamp=None, local=False, spill_bytes=utils.DEFAULT_BULK_SPILL_BYTES):
+        """
+        Load a new database in one pass and commit it, for the initial load of
+        a flag='n' session with grouped storage (num_groups). items is a
+        mapping or an iterable of (key, value) pairs; it is read once, so a
+        generator works. Each value is serialized and packed straight into
+        its group - no per-key local write, journal entry or changelog - and
+        the index is built directly. Past spill_bytes of packed entries the
+        largest group buffers spill to temporary files next to the local
+        file. The groups then upload concurrently and the load commits as
+        the replacement of the remote.
+
+        All keys share one timestamp (timestamp, else now); a repeated key
+        keeps its last value. local=True also writes the values to the local
+        file, so reads need no fetch. Once committed the session is a plain
+        writer: later writes push as usual.
+
+        Returns a PushResult. Group uploads are retried; groups that still
+        fail come back in `failures` and nothing is committed - the old
+        remote is untouched, and the load must be run again. A failed commit
+        PUT raises HTTPError, a lost write lock LockLostError.
+        """
+        if not self.writable:
+            raise ReadOnlyError('File is open for read only.')
+        if not self._remote_session.writable:
+            raise ReadOnlyError('Remote is not writable.')
+        journal = self._journal
+        if not journal.replace_pending:
+            raise ValueError("bulk_load replaces the remote database - open it with flag='n'.")
+        if self._num_groups is None:
+            raise ValueError('bulk_load writes group objects - open the database with num_groups.')
+        if journal.written:
+            raise ValueError(
+                'bulk_load must be the first write of the session: it replaces the remote '
+                f'with its items only, and {len(journal.written)} key(s) are already pending.'
+            )
+        if self.lock is not None and not self.lock.verify():
+            raise LockLostError(
+                "The write lock is no longer held (this session's lock ticket was broken "
+                'by another client) - aborting the bulk load. Re-open the file to '
+                're-acquire the lock and load again.'
+            )
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        self._push_active = True
+        try:
+            ## As for a replacement push: values read through from the old
+            ## remote must not outlive it.
+            for k in list(self._local_file.keys()):
+                del self._local_file[k]
+
+            failures, index_path = utils.bulk_load_remote(self._local_file, self._remote_index_path, items, self._remote_session, journal, self._remote_state, self.type, self._num_groups, self._n_buckets, self._buffer_size, lock=self.lock, local=local, timestamp=timestamp, spill_bytes=spill_bytes, compression=self._compression, upload_part_size=self._upload_part_size, budget=self._inflight, max_group_deltas=self._max_group_deltas, window=self._concurrency)
+            if failures:
+                return PushResult(updated=False, failures={key: _failure_str(value) for key, value in failures.items()})
+
+            ## Swap the sidecar for the committed index (as _pull_remote_index
+            ## does) and re-register the finalizer with the new handle.
+            with self._index_lock:
+                self._remote_index.close()
+                try:
+                    os.replace(index_path, self._remote_index_path)
+                finally:
+                    self._remote_index = utils.open_remote_index(self._remote_index_path, self._flag, self._n_buckets, self._buffer_size)
+                if self._membership is not None:
+                    self._membership.invalidate()
+                self._finalizer.detach()
+                self._finalizer = weakref.finalize(self, utils.ebooklet_finalizer, self._local_file, self._remote_index, self._remote_session, self.lock, self._journal, self._membership, self._remote_state)
+
+            if self._index_fetch_suppressed:
+                self._index_fetch_suppressed = False
+            self._remote_session._load_db_metadata()
+            return PushResult(updated=True, failures={})
+        finally:
+            self._push_active = False
+
+
     def prune(self, timestamp=None):
         """
         Reclaim LOCAL disk space. Removes overwritten/deleted local entries and,
@@ -845,7 +1263,11 @@ class EVariableLengthValue(MutableMapping):
             raise _failure_exception(failure_dict)
 
         for key in keys:
-            output = self._local_file.get(key, default=default)
+            output = self._local_file.get(key, default=_MISSING)
+            if output is _MISSING:
+                ## A bounded cache may have evicted the value since the load
+                ## (a later batch, or another thread) - re-pull it.
+                output = self.get(key, default=default) if self._cache is not None else default
             yield key, output
 
 
@@ -853,93 +1275,330 @@ class EVariableLengthValue(MutableMapping):
         """
         Loads items into the local file from the remote. If keys is None, then it loads all of the values from the remote in to the local file. Returns a dict of failed transfers.
         """
-        futures = {}
-        failure_dict = {}
-        dispatched = []
+        plan = self._plan_load(keys)
+        window = self._concurrency
+        budget = self._inflight
 
+        jobs = deque(plan.jobs)
+        running = {}
         with ThreadPoolExecutor(max_workers=self._remote_session.threads) as executor:
-            ## The index-iteration phase holds _index_lock so a re-check in a
-            ## concurrent thread cannot swap the index handle mid-scan. The
-            ## fetch workers never touch the index (only local_file + session).
-            with self._index_lock:
-                if keys is None:
-                    items_iter = self._remote_index.items()
-                else:
-                    items_iter = ((k, self._remote_index.get(k)) for k in keys)
-
-                if self._num_groups is not None:
-                    groups_to_download = {}
-                    for key, remote_val in items_iter:
-                        ## Stale metadata entries can survive in indexes built
-                        ## from pre-format-2 local files - never fetched.
-                        if key == utils.metadata_key_str:
-                            continue
-                        ## Read-your-writes gate: a journaled pending write is
-                        ## the truth for its key - never pull the remote value
-                        ## over it, regardless of timestamps.
-                        if key in self._journal.written:
-                            continue
-                        remote_time_bytes = remote_val[:7] if remote_val else None
-                        check = utils.check_local_vs_remote(self._local_file, remote_time_bytes, key)
-                        if check:
-                            group_id = utils.key_to_group_id(key, self._num_groups)
-                            offset = utils.bytes_to_int(remote_val[7:11])
-                            length = utils.bytes_to_int(remote_val[11:15])
-                            timestamp_int = utils.bytes_to_int(remote_val[:7])
-                            groups_to_download.setdefault(group_id, []).append((key, offset, length, timestamp_int))
-
-                    ## Offline: never dispatch fetch workers - raise ONE named
-                    ## error before any future exists (a worker raise would
-                    ## surface as a raw future exception, not a clean error).
-                    if self._offline and groups_to_download:
-                        needed = sorted(k for infos in groups_to_download.values()
-                                        for k, _o, _l, _t in infos)
-                        raise OfflineError(
-                            f'This session is offline and the value(s) for key(s) {needed} '
-                            'are not materialized in the local cache.'
-                        )
-
-                    ## Resolve generations INSIDE _index_lock: the manifest is
-                    ## updated atomically with the index handle, so the pairs
-                    ## are consistent here.
-                    for group_id, key_infos in groups_to_download.items():
-                        gen = self._remote_state.manifest.get(group_id)
-                        if gen is None:
-                            ## The index claims members of a group the manifest
-                            ## does not reference - route through the re-check
-                            ## protocol like any missing backing object.
-                            failure_dict[f'_group_{group_id}'] = utils.MissingRemoteObject(
-                                f'{group_id}.<unmanifested>', [k for k, _o, _l, _t in key_infos])
-                            continue
-                        f = executor.submit(utils.get_remote_group_values, group_id, gen, key_infos, self._local_file, self._remote_session)
-                        futures[f] = f'_group_{group_id}'
-                        dispatched.extend(k for k, _o, _l, _t in key_infos)
+            try:
+                while jobs or running:
+                    ## At most the window's width in flight, and at most the
+                    ## session's max_inflight_bytes (shared with push()): a
+                    ## range is charged its length before it starts. With
+                    ## nothing of ours running, block for the head job - it
+                    ## is always admitted alone. Each completion reports its
+                    ## latency and outcome back to the window.
+                    width = window.limit if window is not None else self._remote_session.threads
+                    while jobs and len(running) < width:
+                        fkey, group_id, gen, target = jobs[0]
+                        size = self._load_job_bytes(group_id, target)
+                        if not budget.try_acquire(size):
+                            if running:
+                                break
+                            budget.acquire(size)
+                        jobs.popleft()
+                        if group_id is None:
+                            f = executor.submit(utils.get_remote_value, self._local_file, target, self._remote_session)
+                        else:
+                            f = executor.submit(utils.get_remote_group_values, group_id, gen, target, self._local_file, self._remote_session)
+                        running[f] = (fkey, size, time.monotonic())
+
+                    done, _pending = wait(running, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        fkey, size, start = running.pop(f)
+                        budget.release(size)
+                        error = f.result()
+                        if window is not None:
+                            window.record(time.monotonic() - start, size, error)
+                        plan.add_failure(fkey, error)
+            finally:
+                ## A raise must not strand bytes in the shared budget.
+                for _fkey, size, _start in running.values():
+                    budget.release(size)
+
+        return self._finish_load(plan)
+
+
+    def _load_job_bytes(self, group_id, target):
+        """
+        The bytes a load job holds in flight: its ranged GET's length. Per-key
+        objects count as 0, their size being unknown until fetched.
+        """
+        if group_id is None:
+            return 0
+        read_range = utils.group_read_range(target, self._remote_session.compression is not None)
+        return read_range[1] - read_range[0] + 1 if read_range is not None else 0
+
+
+    def prefetch(self, keys=None, max_inflight_bytes=None):
+        """
+        Start fetching the values of keys in the background and return at
+        once. Planning is load_items' (group bucketing, range coalescing, the
+        read-your-writes gate - journaled writes are never fetched over - and
+        values already local are skipped); only the transfers run in the
+        background, in a pool of S3Connection(threads=...) workers shared by
+        this session's prefetches. Reads of prefetched keys then hit the
+        local file.
+
+        Parameters
+        ----------
+        keys : iterable of str, callable, or None
+            The keys to fetch: an iterable (e.g. a sorted range of station
+            ids), a predicate selecting keys from this session's keys()
+            (key patterns and ranges: ``lambda k: k.startswith('st_')``), or
+            None for every key.
+        max_inflight_bytes : int or None
+            Bound the bytes this prefetch keeps in flight (ranged-GET sizes;
+            per-key objects count as 0, their size being unknown until
+            fetched). A single range larger than the bound still runs, alone.
+            None bounds only by the worker count.
+
+        Returns
+        -------
+        Prefetch
+        """
+        if callable(keys):
+            keys = [k for k in self.keys() if k not in utils.reserved_key_strs and keys(k)]
+        elif keys is not None and not isinstance(keys, (list, tuple, set)):
+            keys = tuple(keys)
+        budget = ByteBudget(max_inflight_bytes)
+        ## Planned here, on the caller's thread: an offline session raises
+        ## OfflineError now rather than from a background thread.
+        plan = self._plan_load(keys)
+
+        handle = Prefetch(len(plan.dispatched))
+        with self._prefetch_lock:
+            if self._prefetch_pool is None:
+                self._prefetch_pool = ThreadPoolExecutor(max_workers=self._remote_session.threads, thread_name_prefix='ebooklet-prefetch')
+            pool = self._prefetch_pool
+            self._prefetches.add(handle)
+        handle._thread = threading.Thread(target=self._run_prefetch, args=(handle, plan, pool, budget), name='ebooklet-prefetch-dispatch', daemon=True)
+        handle._thread.start()
+        return handle
+
+
+    def _run_prefetch(self, handle, plan, pool, budget):
+        """A prefetch's dispatch thread: submit the plan's jobs under the byte budget, then complete the load."""
+        try:
+            futures = []
+            for fkey, group_id, gen, target in plan.jobs:
+                size = self._load_job_bytes(group_id, target)
+                if handle.cancelled() or not budget.acquire(size, handle._cancelled):
+                    break
+                if group_id is None:
+                    f = pool.submit(utils.get_remote_value, self._local_file, target, self._remote_session)
                 else:
-                    to_fetch = []
-                    for key, remote_val in items_iter:
-                        ## Read-your-writes gate (see the grouped branch).
-                        if key in self._journal.written:
-                            continue
-                        remote_time_bytes = remote_val[:7] if remote_val else None
-                        check = utils.check_local_vs_remote(self._local_file, remote_time_bytes, key)
-                        if check:
-                            to_fetch.append(key)
-                    ## Offline: see the grouped branch - one named error, no workers.
-                    if self._offline and to_fetch:
-                        raise OfflineError(
-                            f'This session is offline and the value(s) for key(s) '
-                            f'{sorted(to_fetch)} are not materialized in the local cache.'
-                        )
-                    for key in to_fetch:
-                        f = executor.submit(utils.get_remote_value, self._local_file, key, self._remote_session)
-                        futures[f] = key
-                    dispatched.extend(to_fetch)
-
-            for f in as_completed(futures):
-                key = futures[f]
-                error = f.result()
-                if error is not None:
-                    failure_dict[key] = error
+                    f = pool.submit(utils.get_remote_group_values, group_id, gen, target, self._local_file, self._remote_session)
+                f.add_done_callback(lambda _f, size=size: budget.release(size))
+                futures.append((f, fkey))
+            for f, fkey in futures:
+                plan.add_failure(fkey, f.result())
+            failures = self._finish_load(plan)
+        except Exception as err:
+            ## Never raise from the background: report through the handle.
+            failures = {'_prefetch': err}
+        with self._prefetch_lock:
+            self._prefetches.discard(handle)
+        handle._finish(failures)
+
+
+    def _stop_prefetches(self):
+        """Cancel the running prefetches and wait for them (close())."""
+        with self._prefetch_lock:
+            handles = list(self._prefetches)
+            pool, self._prefetch_pool = self._prefetch_pool, None
+        for handle in handles:
+            handle.cancel()
+        for handle in handles:
+            handle._thread.join()
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+    def _iter_read_ahead(self, read_ahead, read):
+        """
+        Whole-database iteration with read-ahead: the keys are bucketed by
+        group (load_items' bucketing; _READ_AHEAD_BATCH-key batches in
+        per-key mode) and yielded bucket by bucket, while the next read_ahead
+        buckets are prefetched. read(key) returns the item to yield, or
+        _MISSING for keys deleted meanwhile.
+        """
+        if not isinstance(read_ahead, int) or read_ahead < 0:
+            raise ValueError('read_ahead must be an integer >= 0.')
+        keys = [k for k in self.keys() if k not in utils.reserved_key_strs]
+        if self._num_groups is not None:
+            buckets = {}
+            for key in keys:
+                buckets.setdefault(utils.key_to_group_id(key, self._num_groups), []).append(key)
+            batches = list(buckets.values())
+        else:
+            batches = [keys[i:i + _READ_AHEAD_BATCH] for i in range(0, len(keys), _READ_AHEAD_BATCH)]
+
+        in_flight = deque()
+        next_batch = 0
+        try:
+            for i, batch in enumerate(batches):
+                while next_batch < len(batches) and next_batch <= i + read_ahead:
+                    in_flight.append(self.prefetch(batches[next_batch]))
+                    next_batch += 1
+                failures = in_flight.popleft().wait()
+                if failures:
+                    raise _failure_exception(failures)
+                for key in batch:
+                    item = read(key)
+                    if item is not _MISSING:
+                        yield item
+        finally:
+            ## An abandoned iteration stops its read-ahead.
+            for handle in in_flight:
+                handle.cancel()
+
+
+    def _plan_load(self, keys):
+        """
+        The planning phase of load_items (shared with the asyncio front-end):
+        decide which keys need a remote fetch and how to fetch them. Returns a
+        _LoadPlan whose jobs are (failure_key, group_id, gen, key_infos_chunk)
+        for grouped reads, or (key, None, None, key) for per-key reads.
+        """
+        if not self._lazy_index:
+            return self._plan_load_pinned(keys)
+        if keys is not None and not isinstance(keys, (list, tuple, set)):
+            keys = tuple(keys)
+
+        ## A lazy index GETs its pages: resolve the entries outside
+        ## _index_lock, then plan under it only if no commit re-pinned the
+        ## index meanwhile, so one plan never pairs entries of two db objects
+        ## with one manifest.
+        for attempt in range(3):
+            version = self._remote_index.version
+            if keys is None:
+                entries = list(self._remote_index.items())
+            else:
+                entries = [(k, self._remote_index.get(k)) for k in keys]
+            with self._index_lock:
+                if self._remote_index.version == version or attempt == 2:
+                    return self._plan_load_pinned(keys, entries)
+
+
+    def _plan_load_pinned(self, keys, entries=None):
+        """_plan_load against one index view (entries: pre-resolved (key, index value) pairs)."""
+        plan = _LoadPlan()
+
+        ## The index-iteration phase holds _index_lock so a re-check in a
+        ## concurrent thread cannot swap the index handle mid-scan. The
+        ## fetch workers never touch the index (only local_file + session).
+        with self._index_lock:
+            if entries is not None:
+                items_iter = entries
+            elif keys is None:
+                items_iter = self._remote_index.items()
+            else:
+                items_iter = ((k, self._remote_index.get(k)) for k in keys)
+
+            if self._num_groups is not None:
+                groups_to_download = {}
+                for key, remote_val in items_iter:
+                    ## Stale metadata entries can survive in indexes built
+                    ## from pre-format-2 local files - never fetched.
+                    if key == utils.metadata_key_str:
+                        continue
+                    ## Read-your-writes gate: a journaled pending write is
+                    ## the truth for its key - never pull the remote value
+                    ## over it, regardless of timestamps.
+                    if key in self._journal.written:
+                        continue
+                    remote_time_bytes = remote_val[:7] if remote_val else None
+                    check = utils.check_local_vs_remote(self._local_file, remote_time_bytes, key)
+                    if check is False and self._cache is not None:
+                        self._cache.touch(key)
+                    if check:
+                        group_id = utils.key_to_group_id(key, self._num_groups)
+                        offset = utils.bytes_to_int(remote_val[7:11])
+                        length = utils.bytes_to_int(remote_val[11:15])
+                        timestamp_int = utils.bytes_to_int(remote_val[:7])
+                        groups_to_download.setdefault(group_id, []).append((key, offset, length, timestamp_int))
+
+                ## Offline: never dispatch fetch workers - raise ONE named
+                ## error before any future exists (a worker raise would
+                ## surface as a raw future exception, not a clean error).
+                if self._offline and groups_to_download:
+                    needed = sorted(k for infos in groups_to_download.values()
+                                    for k, _o, _l, _t in infos)
+                    raise OfflineError(
+                        f'This session is offline and the value(s) for key(s) {needed} '
+                        'are not materialized in the local cache.'
+                    )
+
+                ## Make room BEFORE fetching: the cache evicts cold values
+                ## so this operation's incoming bytes fit the budget.
+                if self._cache is not None:
+                    self._cache_evict(sum(ln for infos in groups_to_download.values()
+                                          for _k, _o, ln, _t in infos))
+                    ## Framed entries carry frame lengths, not value sizes:
+                    ## those are read back after the fetch.
+                    framed = self._remote_session.compression is not None
+                    for infos in groups_to_download.values():
+                        plan.admit.extend((k, None if framed else ln) for k, _o, ln, _t in infos)
+
+                ## Resolve generations INSIDE _index_lock: the manifest is
+                ## updated atomically with the index handle, so the pairs
+                ## are consistent here.
+                for group_id, key_infos in groups_to_download.items():
+                    slot = self._remote_state.manifest.get(group_id)
+                    if slot is None:
+                        ## The index claims members of a group the manifest
+                        ## does not reference - route through the re-check
+                        ## protocol like any missing backing object.
+                        plan.failure_dict[f'_group_{group_id}'] = utils.MissingRemoteObject(
+                            f'{group_id}.<unmanifested>', [k for k, _o, _l, _t in key_infos])
+                        continue
+                    ## One job per planned range: sparse members of a large
+                    ## group become several tight parallel reads instead of
+                    ## one span over most of the object. A delta chain is
+                    ## planned per generation.
+                    for gen, gen_infos in utils.resolve_group_slot(slot, key_infos):
+                        for chunk in utils.plan_group_ranges(gen_infos, self._range_merge_gap, self._remote_session.compression is not None):
+                            plan.jobs.append((f'_group_{group_id}', group_id, gen, chunk))
+                    plan.dispatched.extend(k for k, _o, _l, _t in key_infos)
+            else:
+                to_fetch = []
+                for key, remote_val in items_iter:
+                    ## Read-your-writes gate (see the grouped branch).
+                    if key in self._journal.written:
+                        continue
+                    remote_time_bytes = remote_val[:7] if remote_val else None
+                    check = utils.check_local_vs_remote(self._local_file, remote_time_bytes, key)
+                    if check is False and self._cache is not None:
+                        self._cache.touch(key)
+                    if check:
+                        to_fetch.append(key)
+                ## Offline: see the grouped branch - one named error, no workers.
+                if self._offline and to_fetch:
+                    raise OfflineError(
+                        f'This session is offline and the value(s) for key(s) '
+                        f'{sorted(to_fetch)} are not materialized in the local cache.'
+                    )
+                if self._cache is not None and to_fetch:
+                    ## Per-key index entries carry no length: sizes are
+                    ## read back after the fetch (_cache_admit).
+                    self._cache_evict()
+                    plan.admit.extend((k, None) for k in to_fetch)
+                plan.jobs.extend((key, None, None, key) for key in to_fetch)
+                plan.dispatched.extend(to_fetch)
+
+        return plan
+
+
+    def _finish_load(self, plan):
+        """
+        The completion phase of load_items (shared with the asyncio
+        front-end), run once every fetch job has finished. Returns the
+        failure dict.
+        """
+        failure_dict = plan.failure_dict
 
         ## Re-materialization guard: a worker may have completed against an
         ## index entry captured before a concurrent pull swapped + reconciled
@@ -947,14 +1606,17 @@ class EVariableLengthValue(MutableMapping):
         ## claims, else a remotely-deleted key re-enters the local file and
         ## serves until the next remote change (the defect reconciliation
         ## exists to fix). Journal-pending writes are never touched.
-        if dispatched:
+        if plan.dispatched:
             with self._index_lock:
-                for _k in dispatched:
+                for _k in plan.dispatched:
                     if (_k not in utils.reserved_key_strs
                             and _k not in self._remote_index and _k not in self._journal.written
                             and _k in self._local_file):
                         del self._local_file[_k]
 
+        if plan.admit:
+            self._cache_admit(plan.admit)
+
         ## Resolve missing-object markers ONCE per operation, after the pool has
         ## fully drained (the re-check protocol swaps the index handle - it must
         ## never run per-future).
@@ -1006,22 +1668,50 @@ class EVariableLengthValue(MutableMapping):
             if not overwrite_remote_index:
                 return
 
-            ## Fetch FIRST, to a temp path: a failed download must leave the live
-            ## session untouched (a close-then-fetch order would strand the session
-            ## with a closed index handle).
-            tmp_path = self._remote_index_path.parent.joinpath(self._remote_index_path.name + '.tmp')
-            fetched, manifest, meta_section = utils.fetch_remote_index(tmp_path, self._remote_session)
-            if not fetched:
-                return
-
-            ## Swap the handle: close -> atomic replace -> reopen -> re-register the
-            ## finalizer with the new index object (the old one is closed).
-            self._remote_index.close()
-            try:
-                os.replace(tmp_path, self._remote_index_path)
-            finally:
-                new_index = utils.open_remote_index(self._remote_index_path, self._flag, self._n_buckets, self._buffer_size)
-                self._remote_index = new_index
+            ## Incremental path: when this view's remote_ts is on the remote's
+            ## delta chain, replay the commits' index deltas onto the live
+            ## sidecar instead of downloading the whole body. Every delta is
+            ## fetched before any is applied; a broken chain (or force, which
+            ## must restore entries a journaled delete removed) takes the full
+            ## fetch below, which also overwrites a replay that failed its
+            ## key-count check.
+            applied = None
+            synced_ts = self._remote_session.timestamp
+            if self._lazy_index:
+                ## A lazy index re-pins to the current db object (one ranged
+                ## GET); its entries are never stored locally.
+                self._remote_index.repin()
+                synced_ts = self._remote_index.timestamp
+                if synced_ts is None:
+                    return
+                applied = (self._remote_index.manifest, self._remote_index.meta_section)
+            elif not force:
+                deltas = utils.fetch_index_deltas(self._remote_session, self._remote_state.remote_ts)
+                if deltas is not None:
+                    applied = utils.apply_index_deltas(self._remote_index, deltas, self._remote_state.manifest, self._journal.deletes, self._membership)
+
+            if applied is not None:
+                manifest, meta_section = applied
+                new_index = self._remote_index
+            else:
+                ## Fetch FIRST, to a temp path: a failed download must leave the live
+                ## session untouched (a close-then-fetch order would strand the session
+                ## with a closed index handle).
+                tmp_path = self._remote_index_path.parent.joinpath(self._remote_index_path.name + '.tmp')
+                fetched, manifest, meta_section = utils.fetch_remote_index(tmp_path, self._remote_session)
+                if not fetched:
+                    return
+                if self._membership is not None:
+                    self._membership.invalidate()
+
+                ## Swap the handle: close -> atomic replace -> reopen -> re-register the
+                ## finalizer with the new index object (the old one is closed).
+                self._remote_index.close()
+                try:
+                    os.replace(tmp_path, self._remote_index_path)
+                finally:
+                    new_index = utils.open_remote_index(self._remote_index_path, self._flag, self._n_buckets, self._buffer_size)
+                    self._remote_index = new_index
 
             ## Replay journaled deletes onto the fresh index copy (still inside
             ## _index_lock, atomic with the handle swap) so a re-pull cannot
@@ -1041,11 +1731,11 @@ class EVariableLengthValue(MutableMapping):
             ## Adopt the pulled manifest + metadata INSIDE the same critical
             ## section as the handle swap - load_items must never pair a new
             ## index with an old manifest.
-            self._remote_state.update_committed(manifest, meta_section, self._remote_session.timestamp)
+            self._remote_state.update_committed(manifest, meta_section, synced_ts)
             utils.refresh_local_metadata(self._local_file, self._journal, meta_section)
 
             self._finalizer.detach()
-            self._finalizer = weakref.finalize(self, utils.ebooklet_finalizer, self._local_file, new_index, self._remote_session, self.lock, self._journal)
+            self._finalizer = weakref.finalize(self, utils.ebooklet_finalizer, self._local_file, new_index, self._remote_session, self.lock, self._journal, self._membership, self._remote_state)
 
             ## Persist the remote-state cache BEFORE stamping freshness: a
             ## crash between the two must leave the stamp OLD (forcing a
@@ -1056,7 +1746,19 @@ class EVariableLengthValue(MutableMapping):
             ## Record the freshness of this view so an immediate second pull() is a
             ## no-op. NOTE: this stamp must stay AFTER the fetch gate above - hoisting
             ## it would let a no-op re-check mask a later real index change.
-            self._local_file._set_file_timestamp(self._remote_session.timestamp)
+            self._local_file._set_file_timestamp(synced_ts)
+
+
+    def _adopt_lazy_pin(self, manifest, meta_section, timestamp):
+        """
+        LazyRemoteIndex.on_repin: a commit landed mid-lookup and the lazy index
+        moved to the new db object - adopt its manifest and metadata together
+        (the caller holds _index_lock). Reconciliation and the freshness stamp
+        wait for the next explicit pull, which the older stamp guarantees.
+        """
+        self._remote_state.update_committed(manifest, meta_section, timestamp)
+        utils.refresh_local_metadata(self._local_file, self._journal, meta_section)
+        self._remote_state.persist(self._local_file)
 
 
     def _resolve_missing(self, missing):
@@ -1172,13 +1874,15 @@ class EVariableLengthValue(MutableMapping):
                 timestamp_int = utils.bytes_to_int(remote_val[:7])
                 by_group.setdefault(gid, []).append((k, offset, length, timestamp_int))
             for gid, key_infos in by_group.items():
-                gen = self._remote_state.manifest.get(gid)
-                if gen is None:
+                slot = self._remote_state.manifest.get(gid)
+                if slot is None:
                     return utils.MissingRemoteObject(
                         f'{gid}.<unmanifested>', [k for k, _o, _l, _t in key_infos])
-                failure = utils.get_remote_group_values(gid, gen, key_infos, self._local_file, self._remote_session)
-                if failure is not None:
-                    return failure
+                for gen, gen_infos in utils.resolve_group_slot(slot, key_infos):
+                    for chunk in utils.plan_group_ranges(gen_infos, self._range_merge_gap, self._remote_session.compression is not None):
+                        failure = utils.get_remote_group_values(gid, gen, chunk, self._local_file, self._remote_session)
+                        if failure is not None:
+                            return failure
             return None
         else:
             for k in keys:
@@ -1196,14 +1900,28 @@ class EVariableLengthValue(MutableMapping):
         ## its key - serve the local value, never pull the remote over it.
         if key in self._journal.written:
             return None
-        with self._index_lock:
-            remote_val = self._remote_index.get(key)
-            ## Resolve the generation inside the lock (manifest and index are
-            ## updated atomically).
-            gen = self._remote_state.manifest.get(utils.key_to_group_id(key, self._num_groups)) if self._num_groups is not None else None
+        if self._lazy_index:
+            ## The lookup GETs index pages: run it unlocked and pair it with
+            ## the manifest only if no re-pin happened in between.
+            for attempt in range(3):
+                version = self._remote_index.version
+                remote_val = self._remote_index.get(key)
+                with self._index_lock:
+                    if self._remote_index.version == version or attempt == 2:
+                        slot = self._remote_state.manifest.get(utils.key_to_group_id(key, self._num_groups)) if self._num_groups is not None else None
+                        break
+        else:
+            with self._index_lock:
+                remote_val = self._remote_index.get(key)
+                ## Resolve the generation inside the lock (manifest and index
+                ## are updated atomically).
+                slot = self._remote_state.manifest.get(utils.key_to_group_id(key, self._num_groups)) if self._num_groups is not None else None
         remote_time_bytes = remote_val[:7] if remote_val else None
         check = utils.check_local_vs_remote(self._local_file, remote_time_bytes, key)
 
+        if check is False and self._cache is not None:
+            self._cache.touch(key)
+
         if check:
             if self._offline:
                 raise OfflineError(
@@ -1211,19 +1929,26 @@ class EVariableLengthValue(MutableMapping):
                     'and this session is offline. (The key exists; its value needs the '
                     'remote.)'
                 )
+            value_len = None
+            if self._num_groups is not None and key != utils.metadata_key_str:
+                value_len = utils.bytes_to_int(remote_val[11:15])
+            if self._cache is not None:
+                self._cache_evict(value_len or 0)
+
+            ## A point read: its GET may be hedged.
+            hedge = {'hedge': True} if self._hedge_reads else {}
             if self._num_groups is not None and key != utils.metadata_key_str:
                 group_id = utils.key_to_group_id(key, self._num_groups)
-                if gen is None:
+                if slot is None:
                     ## Index claims the key, manifest lacks its group - treat
                     ## like a missing backing object (re-check protocol).
                     failure = utils.MissingRemoteObject(f'{group_id}.<unmanifested>', [key])
                 else:
-                    offset = utils.bytes_to_int(remote_val[7:11])
-                    length = utils.bytes_to_int(remote_val[11:15])
-                    timestamp_int = utils.bytes_to_int(remote_val[:7])
-                    failure = utils.get_remote_group_value(group_id, gen, key, offset, length, timestamp_int, self._local_file, self._remote_session)
+                    info = (key, utils.bytes_to_int(remote_val[7:11]), utils.bytes_to_int(remote_val[11:15]), utils.bytes_to_int(remote_val[:7]))
+                    ((gen, (info,)),) = utils.resolve_group_slot(slot, [info])
+                    failure = utils.get_remote_group_value(group_id, gen, *info, self._local_file, self._remote_session, **hedge)
             else:
-                failure = utils.get_remote_value(self._local_file, key, self._remote_session)
+                failure = utils.get_remote_value(self._local_file, key, self._remote_session, **hedge)
 
             if isinstance(failure, utils.MissingRemoteObject):
                 failure = self._resolve_missing({key: failure})[key]
@@ -1237,11 +1962,105 @@ class EVariableLengthValue(MutableMapping):
                         and key not in self._remote_index and key not in self._journal.written
                         and key in self._local_file):
                     del self._local_file[key]
+            if self._cache is not None and not failure and key != utils.metadata_key_str:
+                self._cache_admit([(key, None if self._remote_session.compression is not None else value_len)])
             return failure
         else:
             return None
 
 
+    def _cache_evict(self, incoming=0):
+        """
+        Delete the LOCAL values the bounded cache names as coldest, so
+        `incoming` more bytes fit its budget; compact the local file once
+        enough evicted bytes sit dead in it. Remote-index entries are never
+        touched - evicted values re-pull on their next access.
+        """
+        doomed = self._cache.select_evictions(incoming)
+        if doomed:
+            with self._index_lock:
+                for key in doomed:
+                    if key in self._local_file:
+                        del self._local_file[key]
+            logger.debug(f'value cache evicted {len(doomed)} local value(s)')
+        if self._cache.needs_prune():
+            with self._index_lock:
+                self._local_file.prune()
+                self._n_buckets = self._local_file._n_buckets
+            self._cache.pruned()
+
+
+    def _cache_admit(self, entries):
+        """
+        Register freshly fetched values with the bounded cache. entries:
+        [(key, size_or_None)]; None sizes (per-key mode, framed groups) are
+        read back from the local file. Keys whose fetch failed are skipped.
+        """
+        for key, size in entries:
+            if size is None:
+                raw = self._local_file.get_timestamp(key, include_value=True, decode_value=False)
+                if raw is None:
+                    continue
+                size = len(raw[1])
+            elif key not in self._local_file:
+                continue
+            self._cache.admit(key, size)
+
+
+    def _evicted_meanwhile(self, key):
+        """
+        A point read found no local value right after _load_item: with a
+        bounded cache, a concurrent operation may have evicted it in between.
+        Re-load it once if the index still claims it; returns True if a
+        re-load ran.
+        """
+        if self._cache is None or key in utils.reserved_key_strs or key not in self._remote_index:
+            return False
+        failure = self._load_item(key)
+        if failure:
+            raise _failure_exception(failure)
+        return True
+
+
+    def _cached_item(self, key):
+        value = self.get(key, default=_MISSING)
+        if value is _MISSING:
+            return _MISSING
+        return key, value
+
+
+    def _iter_via_cache(self, read):
+        """
+        Whole-database iteration under a bounded cache: load and read the keys
+        in batches (about half the cache budget, at most _CACHE_ITER_BATCH
+        keys) instead of materializing everything first. read(key) returns
+        the item to yield, or _MISSING for keys deleted meanwhile.
+        """
+        keys = [k for k in self.keys() if k not in utils.reserved_key_strs]
+        budget = self._cache.max_bytes // 2
+        start = 0
+        while start < len(keys):
+            batch = []
+            batch_bytes = 0
+            with self._index_lock:
+                for key in keys[start:start + _CACHE_ITER_BATCH]:
+                    remote_val = self._remote_index.get(key)
+                    value_len = utils.bytes_to_int(remote_val[11:15]) if remote_val and self._num_groups is not None else 0
+                    if batch and batch_bytes + value_len > budget:
+                        break
+                    batch.append(key)
+                    batch_bytes += value_len
+            start += len(batch)
+
+            failure_dict = self.load_items(batch)
+            if failure_dict:
+                raise _failure_exception(failure_dict)
+            for key in batch:
+                item = read(key)
+                if item is not _MISSING:
+                    yield item
+
+
     def __getitem__(self, key: str):
         value = self.get(key, default=_MISSING)
 
@@ -1350,6 +2169,7 @@ class EVariableLengthValue(MutableMapping):
         recorded in the local file's persistent journal and will be included
         in the next session's push.
         """
+        self._stop_prefetches()
         self.sync()
         self._finalizer()
 
@@ -1381,12 +2201,13 @@ class EVariableLengthValue(MutableMapping):
             raise ReadOnlyError('File is open for read only.')
 
 
-    def copy_remote(self, remote_conn):
+    def copy_remote(self, remote_conn, part_size=utils.DEFAULT_COPY_PART_SIZE):
         """
         Copy the entire remote file to another remote location. The new location must be empty.
+        Objects larger than part_size are copied in parallel parts (see S3SessionWriter.copy_remote). Returns a dict of failed copies, or None.
         """
         if self.writable:
-            self._remote_session.copy_remote(remote_conn)
+            return self._remote_session.copy_remote(remote_conn, part_size)
         else:
             raise ReadOnlyError('File is open for read only.')
 
@@ -1436,11 +2257,20 @@ class RemoteConnGroup(EVariableLengthValue):
             lock_timeout: int = 300,
             force_lock: bool = False,
             push_packers: int = 1,
+            range_merge_gap: int = utils.DEFAULT_RANGE_MERGE_GAP,
+            upload_part_size: int = utils.DEFAULT_UPLOAD_PART_SIZE,
+            max_inflight_bytes: int = None,
+            copy_repack: bool = False,
+            max_group_deltas: int = None,
+            compact_dead_ratio: float = utils.DEFAULT_COMPACT_DEAD_RATIO,
+            adaptive_concurrency: bool = True,
+            hedge_reads: bool = False,
+            hedge_budget: float = flow.DEFAULT_HEDGE_BUDGET,
             ):
         """
 
         """
-        self._init_common(remote_session, local_file_path, flag, 'orjson', n_buckets, buffer_size, 'RemoteConnGroup', num_groups, lock_timeout, force_lock, push_packers)
+        self._init_common(remote_session, local_file_path, flag, 'orjson', n_buckets, buffer_size, 'RemoteConnGroup', num_groups, lock_timeout, force_lock, push_packers, range_merge_gap, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
 
     def add(self, remote_conn: remote.S3Connection, key: str = None, user_meta=None):
@@ -1551,6 +2381,20 @@ def open_ebooklet(
     force_lock: bool = False,
     offline: Union[bool, str] = False,
     push_packers: int = 1,
+    range_merge_gap: int = utils.DEFAULT_RANGE_MERGE_GAP,
+    cache_max_bytes: int = None,
+    cache_policy: str = 'lru',
+    cache_ttl: float = None,
+    lazy_index: bool = False,
+    compression: str = None,
+    upload_part_size: int = utils.DEFAULT_UPLOAD_PART_SIZE,
+    max_inflight_bytes: int = None,
+    copy_repack: bool = False,
+    max_group_deltas: int = None,
+    compact_dead_ratio: float = utils.DEFAULT_COMPACT_DEAD_RATIO,
+    adaptive_concurrency: bool = True,
+    hedge_reads: bool = False,
+    hedge_budget: float = flow.DEFAULT_HEDGE_BUDGET,
     ):
     """
     Open an S3 dbm-style database. This allows the user to interact with an S3 bucket like a MutableMapping (python dict) object.
@@ -1609,6 +2453,118 @@ def open_ebooklet(
         (up to ``threads``) for storage where parallel readers scale (SSD,
         RAID). With threads=1 pack and PUT strictly alternate (no overlap).
 
+    range_merge_gap : int
+        Grouped storage only: the largest gap in bytes between two requested
+        members of the same group object that is still downloaded so both
+        arrive in one ranged GET. Members further apart are fetched as
+        separate ranges, in parallel (up to ``S3Connection(threads=...)``).
+        Default 1 MiB. Lower it for sparse reads against large groups on a
+        fast link; 0 merges only adjacent members.
+
+    cache_max_bytes : int or None
+        Read-only sessions (flag='r') only: bound the local file's
+        materialized values to about this many bytes. Cold values are evicted
+        from the LOCAL file before each remote fetch (and the file compacted
+        once enough evicted bytes accumulate); remote-index entries stay, so an
+        evicted value re-pulls transparently on its next access. A single
+        fetch larger than the budget overshoots it until the next fetch. None
+        (the default) keeps every fetched value. Inactive in offline mode.
+
+    cache_policy : str
+        Eviction order for ``cache_max_bytes``: ``'lru'`` (least recently
+        accessed first, the default), ``'lfu'`` (least frequently accessed
+        first), or ``'ttl'`` (values fetched more than ``cache_ttl`` seconds
+        ago are evicted even under budget; over budget, oldest fetched first).
+
+    cache_ttl : float or None
+        Seconds a value stays cached under ``cache_policy='ttl'`` (required
+        there, rejected for the other policies).
+
+    lazy_index : bool
+        Read-only sessions (flag='r') only: keep the remote index remote
+        instead of downloading it into the local ``.remote_index`` sidecar at
+        open. Each key resolves with one or two ranged GETs into the index's
+        bucket chain (fetched pages are cached in memory), so a cold reader
+        that wants a few keys starts in milliseconds. Whole-index operations
+        (iteration, ``len``, ``load_items()`` of everything) download the
+        index section once. Ignored offline.
+
+    compression : str or None
+        Grouped storage only (requires ``num_groups``): compress group objects
+        with this codec - ``'zstd'`` (needs ``ebooklet[zstd]``), ``'lz4'``
+        (needs ``ebooklet[lz4]``) or ``'zlib'`` (standard library). Members
+        are packed into independently compressed frames of about 128 KiB and
+        the index points at the frames, so reads stay ranged GETs. Chosen when
+        the remote is created (or replaced with flag='n'); afterwards it is
+        read from the remote's metadata and may be omitted. Compressed remotes
+        are storage format 3 (older clients refuse them). Readers need the
+        codec's library installed. Default None (uncompressed).
+
+    upload_part_size : int or None
+        Grouped storage only: push() streams a group whose packed size
+        exceeds this many bytes straight into an S3 multipart upload of parts
+        this size, instead of packing the whole group in memory first - each
+        uploading group then holds about two parts in memory however large it
+        is. Default 8 MiB; the minimum is 5 MiB (the S3 part-size floor).
+        None packs every group in memory (one PUT per group).
+
+    max_inflight_bytes : int or None
+        Grouped storage only: caps the bytes this session keeps in flight
+        across push() and load_items() together. push() pulls the members
+        it must repack and uploads the repacked groups as one pipeline -
+        each group uploads as soon as its own pulls have landed; it charges
+        pull ranges and uploading groups (a streamed group counts two
+        parts), load_items() its ranged GETs. A single job larger than the
+        cap still runs, on its own. Default None (bounded only by the
+        connection's threads).
+
+    copy_repack : bool
+        Grouped, uncompressed storage only: push() rebuilds a group whose
+        unchanged members add up to at least upload_part_size bytes as a
+        multipart upload in which runs of those members are copied
+        server-side from the old generation (S3 UploadPartCopy). Only the
+        changed members, and at most about one part of unchanged bytes per
+        gap between copied runs, travel through the client - the unchanged
+        members are not pulled first. Needs an S3 service that supports
+        UploadPartCopy. Default False (every group is repacked from local
+        values).
+
+    max_group_deltas : int or None
+        Grouped, uncompressed storage only: push() appends a small delta
+        generation holding only a group's changed members instead of
+        rewriting the whole group, so a push costs about the changed bytes.
+        Readers resolve each member to the generation its index entry points
+        into. A group is compacted (rewritten in full) once it would hold
+        more than this many deltas, or once its dead bytes pass
+        compact_dead_ratio. A remote holding delta generations is storage
+        format 4 (older clients refuse it). Default None (every push
+        rewrites its affected groups in full).
+
+    compact_dead_ratio : float
+        The share of a group's bytes that may be superseded or deleted
+        entries before push() compacts it - see max_group_deltas. Default
+        0.5.
+
+    adaptive_concurrency : bool
+        Adapt how many requests push() and load_items() run at once to the
+        link: the width halves when the store throttles or times out (503
+        SlowDown, 429, 5xx, transport errors) and grows back by one request
+        per window of clean transfers while latency stays flat, never past
+        the S3Connection's threads. The current width is
+        ``concurrency_window``. False always runs threads requests at once.
+        Default True.
+
+    hedge_reads : bool
+        Cut the latency tail of point reads (``db[key]``, ``get``): a GET
+        still outstanding past the 95th percentile of recent GET latencies
+        gets a duplicate, and the first answer wins. Batch reads
+        (load_items, prefetch, push) are never hedged. Counters are in
+        ``hedge_stats``. Default False.
+
+    hedge_budget : float
+        The most extra GETs hedging may add, as a share of point reads.
+        Default 0.05.
+
     Returns
     -------
     EVariableLengthValue
@@ -1643,13 +2599,13 @@ def open_ebooklet(
     if offline is True:
         if not local_file_path.exists():
             raise OfflineError(f'offline=True requires an existing local file; nothing found at {local_file_path}.')
-        return EVariableLengthValue(remote_session=remote.OfflineSession(), local_file_path=local_file_path, flag='r', value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, push_packers=push_packers)
+        return EVariableLengthValue(remote_session=remote.OfflineSession(), local_file_path=local_file_path, flag='r', value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, push_packers=push_packers, range_merge_gap=range_merge_gap, cache_max_bytes=cache_max_bytes, cache_policy=cache_policy, cache_ttl=cache_ttl, lazy_index=lazy_index, compression=compression, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
     if offline == 'auto':
         ## Wrap the WHOLE online open (both remote touches: the metadata HEAD
         ## and the index fetch) - a transport failure from either falls back.
         try:
-            return open_ebooklet(remote_conn, file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, offline=False, push_packers=push_packers)
+            return open_ebooklet(remote_conn, file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, offline=False, push_packers=push_packers, range_merge_gap=range_merge_gap, cache_max_bytes=cache_max_bytes, cache_policy=cache_policy, cache_ttl=cache_ttl, lazy_index=lazy_index, compression=compression, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
         except TRANSPORT_ERRORS as err:
             ## Typed ebooklet errors never fall back (TRANSPORT_ERRORS lists
             ## transport classes only; this is the belt to the design rule).
@@ -1660,7 +2616,7 @@ def open_ebooklet(
                 f'serving the local data at {local_file_path} as-is (it may be stale).',
                 UserWarning, stacklevel=2,
             )
-            return open_ebooklet(remote_conn, file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, offline=True, push_packers=push_packers)
+            return open_ebooklet(remote_conn, file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, offline=True, push_packers=push_packers, range_merge_gap=range_merge_gap, cache_max_bytes=cache_max_bytes, cache_policy=cache_policy, cache_ttl=cache_ttl, lazy_index=lazy_index, compression=compression, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
     local_file_exists = local_file_path.exists()
 
@@ -1671,7 +2627,7 @@ def open_ebooklet(
     if ebooklet_type is not None and ebooklet_type != 'EVariableLengthValue':
         raise TypeError(f'The remote database is of type {ebooklet_type}, not EVariableLengthValue. Use open_rcg() instead.')
 
-    return EVariableLengthValue(remote_session=remote_session, local_file_path=local_file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, push_packers=push_packers)
+    return EVariableLengthValue(remote_session=remote_session, local_file_path=local_file_path, flag=flag, value_serializer=value_serializer, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, push_packers=push_packers, range_merge_gap=range_merge_gap, cache_max_bytes=cache_max_bytes, cache_policy=cache_policy, cache_ttl=cache_ttl, lazy_index=lazy_index, compression=compression, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
 
 def open_rcg(
@@ -1685,6 +2641,15 @@ def open_rcg(
     force_lock: bool = False,
     offline: Union[bool, str] = False,
     push_packers: int = 1,
+    range_merge_gap: int = utils.DEFAULT_RANGE_MERGE_GAP,
+    upload_part_size: int = utils.DEFAULT_UPLOAD_PART_SIZE,
+    max_inflight_bytes: int = None,
+    copy_repack: bool = False,
+    max_group_deltas: int = None,
+    compact_dead_ratio: float = utils.DEFAULT_COMPACT_DEAD_RATIO,
+    adaptive_concurrency: bool = True,
+    hedge_reads: bool = False,
+    hedge_budget: float = flow.DEFAULT_HEDGE_BUDGET,
     ):
     """
     Open an S3-backed remote connection group. A remote connection group stores S3Connection references as key-value pairs, using orjson serialization.
@@ -1726,6 +2691,33 @@ def open_rcg(
     push_packers : int
         The push read-gate width - see open_ebooklet for the full semantics.
 
+    range_merge_gap : int
+        The grouped-read range coalescing gap - see open_ebooklet.
+
+    upload_part_size : int or None
+        The streaming-push part size - see open_ebooklet.
+
+    max_inflight_bytes : int or None
+        The in-flight byte cap of push() and load_items() - see open_ebooklet.
+
+    copy_repack : bool
+        Server-side copy of unchanged group members - see open_ebooklet.
+
+    max_group_deltas : int or None
+        Delta generations instead of full group rewrites - see open_ebooklet.
+
+    compact_dead_ratio : float
+        The delta compaction threshold - see open_ebooklet.
+
+    adaptive_concurrency : bool
+        Adapt the request concurrency to the link - see open_ebooklet.
+
+    hedge_reads : bool
+        Hedge slow point-read GETs - see open_ebooklet.
+
+    hedge_budget : float
+        The share of extra GETs hedging may add - see open_ebooklet.
+
     Returns
     -------
     RemoteConnGroup
@@ -1760,12 +2752,12 @@ def open_rcg(
     if offline is True:
         if not local_file_path.exists():
             raise OfflineError(f'offline=True requires an existing local file; nothing found at {local_file_path}.')
-        return RemoteConnGroup(remote_session=remote.OfflineSession(), local_file_path=local_file_path, flag='r', n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, push_packers=push_packers)
+        return RemoteConnGroup(remote_session=remote.OfflineSession(), local_file_path=local_file_path, flag='r', n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, push_packers=push_packers, range_merge_gap=range_merge_gap, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
     if offline == 'auto':
         ## Wrap the WHOLE online open (both remote touches) - see open_ebooklet.
         try:
-            return open_rcg(remote_conn, file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, offline=False, push_packers=push_packers)
+            return open_rcg(remote_conn, file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, offline=False, push_packers=push_packers, range_merge_gap=range_merge_gap, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
         except TRANSPORT_ERRORS as err:
             if isinstance(err, Error):
                 raise
@@ -1774,7 +2766,7 @@ def open_rcg(
                 f'serving the local data at {local_file_path} as-is (it may be stale).',
                 UserWarning, stacklevel=2,
             )
-            return open_rcg(remote_conn, file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, offline=True, push_packers=push_packers)
+            return open_rcg(remote_conn, file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, offline=True, push_packers=push_packers, range_merge_gap=range_merge_gap, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
     local_file_exists = local_file_path.exists()
 
@@ -1785,6 +2777,6 @@ def open_rcg(
     if ebooklet_type is not None and ebooklet_type != 'RemoteConnGroup':
         raise TypeError(f'The remote database is of type {ebooklet_type}, not RemoteConnGroup. Use open_ebooklet() instead.')
 
-    return RemoteConnGroup(remote_session=remote_session, local_file_path=local_file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, push_packers=push_packers)
+    return RemoteConnGroup(remote_session=remote_session, local_file_path=local_file_path, flag=flag, n_buckets=n_buckets, buffer_size=buffer_size, num_groups=num_groups, lock_timeout=lock_timeout, force_lock=force_lock, push_packers=push_packers, range_merge_gap=range_merge_gap, upload_part_size=upload_part_size, max_inflight_bytes=max_inflight_bytes, copy_repack=copy_repack, max_group_deltas=max_group_deltas, compact_dead_ratio=compact_dead_ratio, adaptive_concurrency=adaptive_concurrency, hedge_reads=hedge_reads, hedge_budget=hedge_budget)
 
 
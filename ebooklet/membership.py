@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persisted group membership of the remote index.
+
+A grouped push repacks every affected group in full, so it needs each
+affected group's complete member list. Without a record of membership that
+list costs a pass over the whole remote index, hashing every key to its
+group - on every push, however few keys changed. GroupMembership keeps
+gid -> member keys next to the sidecar (<local file>.remote_index.groups),
+maintained incrementally wherever this session mutates the index: commits
+add their staged keys and drop their deletes, delta replays apply the
+deltas. Paths that rewrite the index wholesale (a full re-fetch, a fresh
+flag='n' index, a replacement) invalidate it instead, and the next push
+rebuilds it with the one index pass it would have made anyway.
+
+The record is a SUPERSET of the index's keys, never a subset: keys removed
+from the index without a hook (lost members, journaled deletes, evictions)
+linger until the next rebuild, and the push filters members through the
+index. A missing member would be silently dropped from its repacked group,
+so validity is tracked conservatively: the persisted token - the remote
+timestamp and num_groups it was built for - is cleared while a session has
+the file open and rewritten only by a clean close. A crash, or an older
+ebooklet that moved the index without these hooks, leaves the token absent
+or mismatched, and the record is rebuilt.
+"""
+import booklet
+import msgspec
+
+from .utils import key_to_group_id
+
+## Keys per rebuild batch: bounds the in-memory key lists of a rebuild (each
+## batch is merged into the stored lists before the next is collected).
+REBUILD_BATCH_KEYS = 2**20
+
+
+class GroupMembership:
+    """
+    gid -> member keys, one booklet entry per group (a msgpack list of str).
+    Not thread-safe by itself: every caller already holds the session lock
+    (push) or the index lock (pull) around the index mutation it mirrors.
+    """
+
+    def __init__(self, path, remote_ts):
+        if path.exists():
+            self._file = booklet.VariableLengthValue(path, 'w')
+        else:
+            self._file = booklet.VariableLengthValue(path, 'n', key_serializer='uint4', value_serializer=None)
+        token = (self._file.get_metadata() or {}).get('token')
+        self.num_groups = token[1] if token else None
+        ## Current = covers every key of the sidecar as it stands now. Only
+        ## a token matching the remote state the sidecar was left at counts.
+        self._current = bool(token) and token[0] == remote_ts
+        ## Clear the token while the file is open: the next open trusts the
+        ## record only if this session closes cleanly.
+        self._file.set_metadata({'token': None})
+        self._file.sync()
+
+    def current(self, num_groups):
+        """Whether members() can be trusted for a push grouped by num_groups."""
+        return self._current and self.num_groups == num_groups
+
+    def invalidate(self):
+        """The index was rewritten without this record: rebuild before use."""
+        self._current = False
+
+    def members(self, gid):
+        """The recorded members of a group (may include keys since removed from the index)."""
+        raw = self._file.get(gid)
+        if raw is None:
+            return []
+        return msgspec.msgpack.decode(raw)
+
+    def update(self, added=(), removed=()):
+        """Mirror index mutations: keys set in the index, and keys deleted from it."""
+        if not self._current:
+            return
+        added_by_gid = self._by_gid(added)
+        removed_by_gid = self._by_gid(removed)
+        for gid in added_by_gid.keys() | removed_by_gid.keys():
+            keys = set(self.members(gid))
+            keys.update(added_by_gid.get(gid, ()))
+            keys.difference_update(removed_by_gid.get(gid, ()))
+            self._store(gid, keys)
+
+    def rebuild(self, remote_index, num_groups, skip=None):
+        """
+        Rebuild from one pass over the index (skip: the metadata key). The
+        record is current for num_groups afterwards.
+        """
+        self._file.clear()
+        self.num_groups = num_groups
+        batch = {}
+        n = 0
+        for key in remote_index.keys():
+            if key == skip:
+                continue
+            batch.setdefault(key_to_group_id(key, num_groups), []).append(key)
+            n += 1
+            if n >= REBUILD_BATCH_KEYS:
+                self._merge(batch)
+                batch = {}
+                n = 0
+        self._merge(batch)
+        self._current = True
+
+    def close(self, remote_ts):
+        """Persist the token for remote_ts (the remote state the sidecar is left at) and close."""
+        if self._current and self.num_groups is not None:
+            self._file.set_metadata({'token': [remote_ts, self.num_groups]})
+        self._file.close()
+
+    ## Internals
+
+    def _by_gid(self, keys):
+        out = {}
+        for key in keys:
+            out.setdefault(key_to_group_id(key, self.num_groups), []).append(key)
+        return out
+
+    def _merge(self, batch):
+        for gid, keys in batch.items():
+            existing = self.members(gid)
+            if existing:
+                keys = set(existing).union(keys)
+            self._store(gid, keys)
+
+    def _store(self, gid, keys):
+        if keys:
+            self._file[gid] = msgspec.msgpack.encode(sorted(keys))
+        elif gid in self._file:
+            del self._file[gid]
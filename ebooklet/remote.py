@@ -11,16 +11,21 @@ import urllib3
 import booklet
 from typing import Union
 import s3func
+import s3func.response
+from s3func.signer import SigV4Auth
 import warnings
 import weakref
 import msgspec
 import io
 import base64
+import urllib.parse
+import hashlib
+import xml.etree.ElementTree as ET
 import datetime
 import concurrent.futures
 
 logger = logging.getLogger(__name__)
-from . import utils
+from . import utils, compression, sessions
 from .errors import ReadOnlyError, RemoteMissingError, UUIDMismatchError, OfflineError
 
 
@@ -29,6 +34,10 @@ from .errors import ReadOnlyError, RemoteMissingError, UUIDMismatchError, Offlin
 
 ebooklet_types = ('EVariableLengthValue', 'RemoteConnGroup')
 
+## The region every S3 session signs for (s3func's default; S3Connection
+## does not take one).
+s3_region = 'us-east-1'
+
 
 ###############################################
 ### Functions
@@ -83,18 +92,21 @@ def create_s3_read_session(
         retries: int=3,
         ):
     """
-
+    The read session is shared process-wide (sessions.registry): release it
+    with sessions.registry.release when done.
     """
     if isinstance(db_url, str):
         if not s3func.utils.is_url(db_url):
             raise TypeError(f'{db_url} is not a proper url.')
-        read_session = s3func.HttpSession(max_connections=threads, read_timeout=read_timeout, stream=False, max_attempts=retries)
+        read_session = sessions.registry.acquire(
+            sessions.http_session_key(threads, read_timeout, retries),
+            lambda: s3func.HttpSession(max_connections=threads, read_timeout=read_timeout, stream=False, max_attempts=retries))
         key = db_url
     elif isinstance(access_key_id, str) and isinstance(access_key, str) and isinstance(db_key, str) and isinstance(bucket, str):
         if isinstance(endpoint_url, str):
             if not s3func.utils.is_url(endpoint_url):
                 raise TypeError(f'{endpoint_url} is not a proper url.')
-        read_session = s3func.S3Session(access_key_id, access_key, bucket, endpoint_url, max_pool_connections=threads, read_timeout=read_timeout, stream=False, max_attempts=retries)
+        read_session = _acquire_s3_session(access_key_id, access_key, bucket, endpoint_url, threads, read_timeout, retries)
         key = db_key
     else:
         read_session = None
@@ -113,16 +125,23 @@ def create_s3_write_session(
         retries: int=3,
         ):
     """
-
+    The write session is shared process-wide like the read session - with
+    the same settings they are the same session (one pool).
     """
     if check_write_config(access_key_id, access_key, db_key, bucket, endpoint_url):
-        write_session = s3func.S3Session(access_key_id, access_key, bucket, endpoint_url, max_pool_connections=threads, read_timeout=read_timeout, stream=False, max_attempts=retries)
+        write_session = _acquire_s3_session(access_key_id, access_key, bucket, endpoint_url, threads, read_timeout, retries)
     else:
         write_session = None
 
     return write_session, db_key
 
 
+def _acquire_s3_session(access_key_id, access_key, bucket, endpoint_url, threads, read_timeout, retries):
+    return sessions.registry.acquire(
+        sessions.s3_session_key(access_key_id, access_key, bucket, endpoint_url, threads, read_timeout, retries),
+        lambda: s3func.S3Session(access_key_id, access_key, bucket, endpoint_url, max_pool_connections=threads, read_timeout=read_timeout, stream=False, max_attempts=retries))
+
+
 
 
 
@@ -147,6 +166,147 @@ class JsonSerializer:
         return msgspec.json.encode(self.to_dict())
 
 
+def _xml_text(data, tag):
+    """Text of the first element named tag (any namespace) in an S3 XML body."""
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        return None
+    for elem in root.iter():
+        if elem.tag == tag or elem.tag.endswith('}' + tag):
+            return elem.text
+    return None
+
+
+class MultipartUpload:
+    """
+    One S3 multipart upload, driven through the s3func session's signed
+    request() (CreateMultipartUpload on construction, then UploadPart /
+    CompleteMultipartUpload / AbortMultipartUpload). Nothing is visible under
+    the key until complete() succeeds - an upload that is aborted, or never
+    completed, leaves no object behind (only billable parts until a bucket
+    lifecycle rule expires them).
+
+    Parts may be uploaded in any order; every part but the last must be at
+    least 5 MiB (an S3 rule, enforced at complete()). A part may also be a
+    byte range of an existing object, copied server-side
+    (upload_part_copy). Failures raise urllib3.exceptions.HTTPError, except
+    abort(), which returns its error.
+    """
+    def __init__(self, session, key, metadata=None):
+        self._session = session
+        self.key = key
+        self._url = session._object_url(key)
+        self.parts = {}
+        headers = {'x-amz-meta-' + k: v for k, v in (metadata or {}).items()}
+        resp = self._request('POST', headers, {'uploads': ''})
+        self.upload_id = _xml_text(resp.data, 'UploadId')
+        if not self.upload_id:
+            raise urllib3.exceptions.HTTPError(f'CreateMultipartUpload for {key!r} returned no UploadId.')
+
+    def _request(self, method, headers, fields, body=None):
+        resp = s3func.response.S3Response(
+            self._session.request(method, self._url, headers=headers, fields=fields, body=body, preload_content=True),
+            False)
+        if resp.status // 100 != 2:
+            raise urllib3.exceptions.HTTPError(resp.error or {'status': resp.status})
+        return resp
+
+    def upload_part(self, part_number, data):
+        """Upload one part (numbered from 1). Re-uploading a number replaces it."""
+        data = bytes(data)
+        headers = {'Content-Length': str(len(data))}
+        body = data
+        if len(data) > s3func.utils.stream_body_threshold:
+            ## Stream large bodies (see s3func's put_object): a bytes body is
+            ## sent in one sendall() whose deadline is never extended.
+            headers['x-amz-content-sha256'] = hashlib.sha256(data).hexdigest()
+            body = io.BytesIO(data)
+        resp = self._request('PUT', headers, {'partNumber': str(part_number), 'uploadId': self.upload_id}, body)
+        etag = resp.metadata.get('etag')
+        if not etag:
+            raise urllib3.exceptions.HTTPError(f'UploadPart {part_number} of {self.key!r} returned no ETag.')
+        self.parts[part_number] = etag
+        return etag
+
+    def upload_part_copy(self, part_number, source_key, range_start, range_end, source_bucket=None):
+        """
+        Fill one part with bytes range_start..range_end (inclusive) of the
+        object source_key in source_bucket (default: this upload's bucket) -
+        copied by S3, never sent through this client (UploadPartCopy).
+        """
+        headers = {
+            'x-amz-copy-source': '/' + (source_bucket or self._session.bucket) + '/' + urllib.parse.quote(source_key),
+            'x-amz-copy-source-range': f'bytes={range_start}-{range_end}',
+            }
+        resp = self._request('PUT', headers, {'partNumber': str(part_number), 'uploadId': self.upload_id})
+        ## The ETag comes back in the body; a failed copy can be a 200
+        ## whose body is an <Error>.
+        code = _xml_text(resp.data, 'Code') if resp.data else None
+        if code is not None:
+            raise urllib3.exceptions.HTTPError({'status': resp.status, 'Code': code, 'Message': _xml_text(resp.data, 'Message')})
+        etag = _xml_text(resp.data, 'ETag') if resp.data else None
+        if not etag:
+            raise urllib3.exceptions.HTTPError(f'UploadPartCopy {part_number} of {self.key!r} returned no ETag.')
+        etag = etag.strip('"')
+        self.parts[part_number] = etag
+        return etag
+
+    def complete(self):
+        """Assemble the uploaded parts into the object; returns the response."""
+        body = ''.join(
+            f'<Part><PartNumber>{n}</PartNumber><ETag>"{self.parts[n]}"</ETag></Part>'
+            for n in sorted(self.parts))
+        body = f'<CompleteMultipartUpload>{body}</CompleteMultipartUpload>'.encode()
+        resp = self._request('POST', {'Content-Type': 'application/xml'}, {'uploadId': self.upload_id}, body)
+        ## S3 reports a failed assembly as a 200 whose body is an <Error>.
+        code = _xml_text(resp.data, 'Code') if resp.data else None
+        if code is not None:
+            raise urllib3.exceptions.HTTPError({'status': resp.status, 'Code': code, 'Message': _xml_text(resp.data, 'Message')})
+        return resp
+
+    def abort(self):
+        """Discard the upload and its parts. Returns None or the error (never raises)."""
+        try:
+            self._request('DELETE', {}, {'uploadId': self.upload_id})
+        except Exception as err:
+            return err
+        return None
+
+
+class ObjectRequests:
+    """
+    How to GET the read store's objects without the blocking s3func session
+    (the asyncio front-end's aiohttp GETs): each object's url and, for S3, a
+    SigV4 signer. Built by S3Connection.open from the connection's own
+    parameters, the same ones its s3func read session was created with.
+    """
+    __slots__ = ('base_url', 'signer', 'retries', 'read_timeout')
+
+    def __init__(self, access_key_id=None, access_key=None, bucket=None, endpoint_url=None, db_url=None, retries=3, read_timeout=60):
+        if isinstance(db_url, str):
+            ## A public http url: the read keys are urls already.
+            self.base_url = None
+            self.signer = None
+        else:
+            endpoint_url = endpoint_url or f'https://s3.{s3_region}.amazonaws.com/'
+            if not endpoint_url.endswith('/'):
+                endpoint_url += '/'
+            self.base_url = urllib.parse.urljoin(endpoint_url, bucket + '/')
+            self.signer = SigV4Auth(access_key_id, access_key, s3_region)
+        self.retries = retries
+        self.read_timeout = read_timeout
+
+    def url(self, obj_key):
+        """
+        The url of obj_key. S3 keys are percent-encoded exactly once - the
+        signed canonical path must match what the server receives.
+        """
+        if self.base_url is None:
+            return obj_key
+        return self.base_url + urllib.parse.quote(obj_key)
+
+
 class S3SessionReader:
     """
 
@@ -155,10 +315,21 @@ class S3SessionReader:
                  read_session,
                  read_db_key,
                  threads,
+                 object_requests=None,
                  ):
         self._read_session = read_session
         self.read_db_key = read_db_key
         self.threads = threads
+        ## ObjectRequests for GETs outside the s3func session (see aio);
+        ## None when the session was not opened from an S3Connection.
+        self.object_requests = object_requests
+        ## flow.HedgedReads for get_object(hedge=True); None = never hedge.
+        ## Set by the ebooklet that opened this session (hedge_reads).
+        self.hedger = None
+
+        ## Finalizer: hands the shared session back to the registry.
+        self._finalizer = weakref.finalize(self, utils.s3session_finalizer, self._read_session)
+
         self._load_db_metadata()
 
     def __bool__(self):
@@ -187,6 +358,8 @@ class S3SessionReader:
         """
         Close the remote connection. Should return None.
         """
+        if getattr(self, 'hedger', None) is not None:
+            self.hedger.close()
         if hasattr(self, '_finalizer'):
             self._finalizer()
 
@@ -212,6 +385,12 @@ class S3SessionReader:
             self.uuid = uuid.UUID(hex=meta['uuid'])
             self.type = meta['type']
             self.num_groups = int(meta['num_groups']) if 'num_groups' in meta else None
+            self.delta_parents = utils.parse_delta_parents(meta.get('delta_parents'))
+            ## The group codec (format 3). An unknown codec is a too-new
+            ## remote: refuse it here like an unknown format_version.
+            self.compression = meta.get('compression')
+            if self.compression is not None:
+                compression.get_codec(self.compression)
         elif resp_obj.status == 404:
             self._init_bytes = None
             self.uuid = None
@@ -219,6 +398,8 @@ class S3SessionReader:
             self.type = None
             self.num_groups = None
             self.format_version = None
+            self.delta_parents = []
+            self.compression = None
         else:
             raise urllib3.exceptions.HTTPError(resp_obj.error)
 
@@ -271,17 +452,20 @@ class S3SessionReader:
         return data
 
 
-    def get_object(self, key: str=None, range_start: int=None, range_end: int=None):
+    def get_object(self, key: str=None, range_start: int=None, range_end: int=None, hedge: bool=False):
         """
         Get a remote object/file. The input should be a key as a str. It should return an object with a .status attribute as an int, a .data attribute in bytes, and a .error attribute as a dict.
         Optionally specify range_start and range_end for byte-range requests.
+        hedge=True sends a duplicate GET when this one runs past the session's hedging deadline (see flow.HedgedReads); it is a plain GET when the session has no hedger.
         """
         if key is None:
-            resp = self._read_session.get_object(self.read_db_key, range_start=range_start, range_end=range_end)
+            obj_key = self.read_db_key
         else:
-            resp = self._read_session.get_object(self.read_db_key + '/' + key, range_start=range_start, range_end=range_end)
+            obj_key = self.read_db_key + '/' + key
 
-        return resp
+        if hedge and self.hedger is not None:
+            return self.hedger.call(self._read_session.get_object, obj_key, range_start=range_start, range_end=range_end)
+        return self._read_session.get_object(obj_key, range_start=range_start, range_end=range_end)
 
     def head_object(self, key: str=None):
         """
@@ -305,18 +489,21 @@ class S3SessionWriter(S3SessionReader):
                  read_db_key,
                  write_db_key,
                  threads,
+                 object_requests=None,
                  ):
         self._read_session = read_session
         self._write_session = write_session
         self.read_db_key = read_db_key
         self.write_db_key = write_db_key
         self.threads = threads
+        self.object_requests = object_requests
+        self.hedger = None
 
         self._writable_check = False
         self._writable = False
 
         ## Finalizer
-        self._finalizer = weakref.finalize(self, utils.s3session_finalizer, self._write_session)
+        self._finalizer = weakref.finalize(self, utils.s3session_finalizer, self._read_session, self._write_session)
 
         ## Get latest metadata
         self._load_db_metadata()
@@ -370,6 +557,17 @@ class S3SessionWriter(S3SessionReader):
             raise ReadOnlyError('Session is not writable.')
 
 
+    def create_multipart_upload(self, key: str, metadata=None):
+        """
+        Start a multipart upload of an object (a MultipartUpload; the object
+        appears only when it completes).
+        """
+        if self.writable:
+            return MultipartUpload(self._write_session, self.write_db_key + '/' + key, metadata)
+        else:
+            raise ReadOnlyError('Session is not writable.')
+
+
     def delete_object(self, key: str):
         """
         Delete a single object by exact key (all versions).
@@ -428,12 +626,17 @@ class S3SessionWriter(S3SessionReader):
         else:
             raise ReadOnlyError('Session is not writable.')
 
-    def copy_remote(self, remote_conn):
+    def copy_remote(self, remote_conn, part_size: int=utils.DEFAULT_COPY_PART_SIZE):
         """
         Copy an entire remote dataset to another remote location. The new location must be empty.
 
+        Objects larger than part_size are copied as multipart uploads of parts that size, in parallel (server-side UploadPartCopy with the same credentials, ranged GETs re-uploaded part by part otherwise); a failed part is retried on its own. None copies every object whole. Returns a dict of failed copies (target key -> error), or None.
+
         There's still a question of whether this method should be in the Reader rather than the writer. As a matter of API concept, this should be in the Reader as you only need to read something to copy it somewhere else (the target). But as a matter of implementation, the thing doing the copying would need to know all of the files to copy. This can be either known through a list_objects call (currently used and requires write permissions as defined in this API) or to parse the index file for all of the appropriate keys. Parsing the index file requires the file to be saved to disk and this API does not have that capability. Consequently, if the index file must be used, then it must be implemented in the EVariableLengthValue class instead of the session classes. Using the index file instead of the list_objects method would have the advantage of only copying over the objects that are actually used by ebooklet rather than other dangling objects. On the other hand, requiring the source session being a Writer would more likely cause the copy to be an effecient S3 to S3 copy rather than a slower routing through the user's network.
         """
+        if part_size is not None and (not isinstance(part_size, int) or part_size < utils.MIN_UPLOAD_PART_SIZE):
+            raise ValueError(f'part_size must be None or an integer >= {utils.MIN_UPLOAD_PART_SIZE} (the S3 minimum part size).')
+
         with remote_conn.open('w') as writer:
 
             if not writer.writable:
@@ -462,7 +665,7 @@ class S3SessionWriter(S3SessionReader):
             src_manifest, _src_meta, src_index_bytes = utils.parse_db_payload(db_resp.data)
 
             if src_manifest:
-                child_keys = [utils.group_obj_key(gid, gen) for gid, gen in src_manifest.items()]
+                child_keys = utils.manifest_obj_keys(src_manifest)
             else:
                 ## Per-key mode: the object names are the index's keys.
                 idx = booklet.FixedLengthValue(io.BytesIO(bytes(src_index_bytes)), 'r')
@@ -483,63 +686,145 @@ class S3SessionWriter(S3SessionReader):
             target_bucket = writer._write_session.bucket
 
             ## Determine if the s3 copy_object method can be used
-            if (self._write_session._access_key_id == writer._write_session._access_key_id) and (self._write_session._access_key == writer._write_session._access_key):
+            direct = (self._write_session._access_key_id == writer._write_session._access_key_id) and (self._write_session._access_key == writer._write_session._access_key)
+            if direct:
                 logger.info('Both the source and target remotes use the same credentials, so copying objects is efficient.')
-
-                futures = {}
-                failures = {}
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
-                    for child in child_keys:
-                        source_key = self.write_db_key + '/' + child
-                        target_key = writer.write_db_key + '/' + child
-                        if target_key not in target_exist_keys:
-                            f = executor.submit(self._write_session.copy_object, source_key, target_key, source_bucket=source_bucket, dest_bucket=target_bucket)
-                            futures[f] = target_key
-
-                    for f in concurrent.futures.as_completed(futures):
-                        target_key = futures[f]
-                        resp = f.result()
-                        if resp.status // 100 != 2:
-                            failures[target_key] = resp.error
-
-                if failures:
-                    logger.warning('Copy failures have occurred. Rerun copy_remote or delete_remote.')
-                    return failures
-                else:
-                    resp = self._write_session.copy_object(self.write_db_key, writer.write_db_key, source_bucket=source_bucket, dest_bucket=target_bucket)
-                    if resp.status // 100 != 2:
-                        raise urllib3.exceptions.HTTPError(resp.error)
-
             else:
                 logger.info('The source and target remotes use different credentials, so copying objects must be first downloaded then uploaded. Less efficient than if both remotes had the same credentials.')
 
-                futures = {}
-                failures = {}
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
-                    for child in child_keys:
-                        source_key = self.write_db_key + '/' + child
-                        target_key = writer.write_db_key + '/' + child
-                        if target_key not in target_exist_keys:
-                            # source GET via the (already-required) writable, key-addressed session:
-                            # a source connection with a public db_url makes _read_session an
-                            # HttpSession that crashes on a bare key - _write_session is always a
-                            # keyed S3Session (copy_remote reads it unconditionally above).
-                            f = executor.submit(utils.indirect_copy_remote, self._write_session, writer._write_session, source_key, target_key, source_bucket=source_bucket, dest_bucket=target_bucket)
-                            futures[f] = target_key
-
-                    for f in concurrent.futures.as_completed(futures):
-                        target_key = futures[f]
-                        resp = f.result()
-                        if resp.status // 100 != 2:
-                            failures[target_key] = resp.error
-
-                if failures:
-                    logger.warning('Copy failures have occurred. Rerun copy_remote or delete_remote.')
-                    return failures
+            children = [(self.write_db_key + '/' + child, writer.write_db_key + '/' + child) for child in child_keys]
+            children = [(s_key, t_key) for s_key, t_key in children if t_key not in target_exist_keys]
+            failures = self._copy_children(writer, children, direct, part_size)
+
+            if failures:
+                logger.warning('Copy failures have occurred. Rerun copy_remote or delete_remote.')
+                return failures
+
+            ## The db object last (it makes the copy visible), with the same
+            ## part logic: it holds the whole index, so with many keys it is
+            ## the object most likely to pass CopyObject's 5 GB cap.
+            db_failures = self._copy_children(writer, [(self.write_db_key, writer.write_db_key)], direct, part_size, sizes={self.write_db_key: len(db_resp.data)})
+            if db_failures:
+                raise urllib3.exceptions.HTTPError(db_failures[writer.write_db_key])
+
+
+    def _copy_children(self, writer, children, direct, part_size, sizes=None):
+        """
+        Copy copy_remote's (source_key, target_key) objects on one pool of
+        self.threads workers; returns {target_key: error}. An object larger
+        than part_size (its size from sizes, else one listing of the source)
+        is copied as a multipart upload whose parts run concurrently with
+        everything else - UploadPartCopy when direct, else ranged GET +
+        UploadPart (utils.indirect_copy_part, one part in memory per
+        worker). A failed part is retried alone, up to
+        utils.COPY_PART_ATTEMPTS tries; an object with a part that still
+        fails is aborted and reported, and the other objects carry on. A
+        whole-object copy that raises is reported the same way. Anything
+        else raised out of the pool aborts every multipart upload still
+        open before it propagates.
+        """
+        source_bucket = self._write_session.bucket
+        target_bucket = writer._write_session.bucket
+        if sizes is None:
+            sizes = {}
+            if part_size is not None:
+                listing = self._write_session.list_objects(prefix=self.write_db_key + '/')
+                if listing.status // 100 == 2:
+                    sizes = {obj['key']: obj.get('content_length') for obj in listing.iter_objects()}
                 else:
-                    resp = utils.indirect_copy_remote(self._write_session, writer._write_session, self.write_db_key, writer.write_db_key, source_bucket, target_bucket)
-                    if resp.status // 100 != 2:
-                        raise urllib3.exceptions.HTTPError(resp.error)
+                    logger.warning(f'Listing the source objects failed ({listing.error}): copying every object whole, without multipart parts.')
+
+        failures = {}
+        ## target_key -> [upload, parts still to settle, source_key, size];
+        ## an entry leaves once its upload is completed or aborted.
+        uploads = {}
+        attempts = {}
+        futures = {}
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+                def submit_part(target_key, part):
+                    upload, _left, source_key, _size = uploads[target_key]
+                    part_number, range_start, range_end = part
+                    if direct:
+                        f = executor.submit(upload.upload_part_copy, part_number, source_key, range_start, range_end, source_bucket)
+                    else:
+                        f = executor.submit(utils.indirect_copy_part, self._write_session, upload, source_key, part_number, range_start, range_end)
+                    futures[f] = (target_key, part)
+
+                for source_key, target_key in children:
+                    size = sizes.get(source_key)
+                    if size is not None and size > part_size:
+                        try:
+                            head = self._write_session.head_object(source_key)
+                            if head.status // 100 != 2:
+                                raise urllib3.exceptions.HTTPError(head.error)
+                            upload = MultipartUpload(writer._write_session, target_key, utils._user_metadata(head.metadata))
+                        except Exception as err:
+                            failures[target_key] = err
+                            continue
+                        parts = utils.copy_part_ranges(size, part_size)
+                        uploads[target_key] = [upload, len(parts), source_key, size]
+                        for part in parts:
+                            submit_part(target_key, part)
+                    elif direct:
+                        f = executor.submit(self._write_session.copy_object, source_key, target_key, source_bucket=source_bucket, dest_bucket=target_bucket)
+                        futures[f] = (target_key, None)
+                    else:
+                        # source GET via the (already-required) writable, key-addressed session:
+                        # a source connection with a public db_url makes _read_session an
+                        # HttpSession that crashes on a bare key - _write_session is always a
+                        # keyed S3Session (copy_remote reads it unconditionally above).
+                        f = executor.submit(utils.indirect_copy_remote, self._write_session, writer._write_session, source_key, target_key, source_bucket=source_bucket, dest_bucket=target_bucket)
+                        futures[f] = (target_key, None)
+
+                while futures:
+                    done, _pending = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for f in done:
+                        target_key, part = futures.pop(f)
+                        if part is None:
+                            try:
+                                resp = f.result()
+                            except Exception as err:
+                                failures[target_key] = err
+                                continue
+                            if resp.status // 100 != 2:
+                                failures[target_key] = resp.error
+                            continue
+
+                        entry = uploads[target_key]
+                        try:
+                            f.result()
+                        except Exception as err:
+                            tries = attempts[(target_key, part[0])] = attempts.get((target_key, part[0]), 1) + 1
+                            if tries <= utils.COPY_PART_ATTEMPTS and target_key not in failures:
+                                ## Redo just this part; the others stand.
+                                submit_part(target_key, part)
+                                continue
+                            failures.setdefault(target_key, err)
+                        entry[1] -= 1
+                        if entry[1]:
+                            continue
+                        upload, _left, _source_key, size = entry
+                        if target_key not in failures:
+                            try:
+                                upload.complete()
+                                del uploads[target_key]
+                                logger.info(f'Copied {target_key} ({size} bytes) in {len(upload.parts)} parts.')
+                                continue
+                            except Exception as err:
+                                failures[target_key] = err
+                        del uploads[target_key]
+                        upload.abort()
+
+        except BaseException:
+            for upload, _left, _source_key, _size in uploads.values():
+                try:
+                    upload.abort()
+                except Exception as err:
+                    logger.warning(f'Aborting the multipart copy of {upload.key} failed: {err}')
+            raise
+
+        return failures
 
 
     def list_objects(self):
@@ -644,6 +929,8 @@ class OfflineSession:
     timestamp = None
     num_groups = None
     format_version = None
+    delta_parents = ()
+    compression = None
     type = None
     _init_bytes = None
     threads = 1
@@ -715,6 +1002,7 @@ class S3Connection(JsonSerializer):
                 )
         if read_session is None:
             raise ValueError('Either db_url or a combo of access_key_id, access_key, db_key, and bucket (and optionally endpoint_url) must be passed.')
+        sessions.registry.release(read_session)
 
         ## Assign properties
         self.db_key = db_key
@@ -768,8 +1056,9 @@ class S3Connection(JsonSerializer):
                 self.retries,
                 )
 
+        object_requests = ObjectRequests(self.access_key_id, self.access_key, self.bucket, self.endpoint_url, self.db_url, self.retries, self.read_timeout) if read_session is not None else None
         if flag == 'r':
-            return S3SessionReader(read_session, read_db_key, self.threads)
+            return S3SessionReader(read_session, read_db_key, self.threads, object_requests)
         else:
             write_session, write_db_key = create_s3_write_session(
                     self.access_key_id,
@@ -791,6 +1080,7 @@ class S3Connection(JsonSerializer):
                                     read_db_key,
                                     write_db_key,
                                     self.threads,
+                                    object_requests,
                                     )
 
             # Check to make sure the uuids are the same if the read and write sessions are different
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide sharing of s3func sessions.
+
+Every S3Connection.open() used to build its own s3func session - its own
+urllib3 pool - so a process opening hundreds of ebooklets against one
+endpoint paid a TCP + TLS handshake per open, and RemoteConnGroup.add one
+more per member. The registry hands out ONE session per (endpoint,
+credentials, bucket, pool settings) and counts its users: the pool's
+keep-alive connections are reused by every session opened with the same
+settings, and are closed when the last user releases it. Each pool stays
+bounded by its `threads` (urllib3's per-host maxsize), however many
+sessions share it.
+
+Sessions the registry did not hand out (test doubles, sessions built by
+hand) are simply cleared on release - the pre-registry behavior.
+"""
+import hashlib
+import threading
+
+
+class SessionRegistry:
+    """
+    Reference-counted sessions by key. acquire() returns the live session
+    for a key (building it with factory() on first use); release() drops
+    one reference and closes the pool with the last one. Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        ## key -> [session, refs]; id(session) -> key for release().
+        self._entries = {}
+        self._keys = {}
+
+    def acquire(self, key, factory):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                session = factory()
+                entry = self._entries[key] = [session, 0]
+                self._keys[id(session)] = key
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, session):
+        with self._lock:
+            key = self._keys.get(id(session))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry[0] is not session:
+                ## Not ours: close it outright.
+                _close(session)
+                return
+            entry[1] -= 1
+            if entry[1]:
+                return
+            del self._entries[key]
+            del self._keys[id(session)]
+        _close(session)
+
+    def refs(self, session):
+        """The number of users holding session (0 when it is not shared)."""
+        with self._lock:
+            entry = self._entries.get(self._keys.get(id(session)))
+            return entry[1] if entry is not None and entry[0] is session else 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _close(session):
+    pool = getattr(session, '_session', None)
+    if pool is not None:
+        pool.clear()
+
+
+## The process-wide registry S3Connection.open() draws from.
+registry = SessionRegistry()
+
+
+def s3_session_key(access_key_id, access_key, bucket, endpoint_url, threads, read_timeout, retries):
+    """The registry key of an S3 session. The secret is keyed by digest, never held twice."""
+    secret = hashlib.sha256(access_key.encode()).hexdigest()
+    return ('s3', endpoint_url, access_key_id, secret, bucket, threads, read_timeout, retries)
+
+
+def http_session_key(threads, read_timeout, retries):
+    """The registry key of a plain-http (db_url) session: it is not bound to a host."""
+    return ('http', threads, read_timeout, retries)
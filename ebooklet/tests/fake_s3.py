@@ -14,11 +14,19 @@ Known fidelity limits (these belong to the live test tier):
   markers, or s3func's exact-key version-resolution filter (s3func s3.py:441).
 - FakeLock never writes lock-ticket objects: tests asserting on the
   db_key + '.lock.' namespace must seed those keys into the store manually.
+- request() understands only the multipart-upload calls (Create/UploadPart/
+  UploadPartCopy/Complete/Abort), answering with real urllib3 responses so s3func's response
+  parsing runs unmodified. Signatures are not checked.
 """
 import threading
 import io
 import datetime
+import hashlib
+import urllib.parse
 import uuid as _uuid
+import xml.etree.ElementTree as ET
+
+import urllib3
 
 from ebooklet import remote
 
@@ -72,6 +80,10 @@ class FakeS3Session:
     ## upload timestamps are shared per STORE (like the objects themselves),
     ## not per session - listings expose them; tests may back-date entries.
     _upload_times_by_store = {}
+    ## In-progress multipart uploads, per STORE: {upload_id: {'key', 'metadata', 'parts'}}.
+    _multipart_by_store = {}
+    ## S3's minimum size of every part but the last (tests may lower it).
+    min_part_size = 5 * 2**20
 
     def __init__(self, store, store_lock=None, bucket='fake-bucket'):
         self.store = store
@@ -82,6 +94,9 @@ class FakeS3Session:
         self._access_key = 'fake'
         self.put_log = []           # every key ever PUT (survives deletes)
         self.upload_times = self._upload_times_by_store.setdefault(id(store), {})
+        self.multipart_uploads = self._multipart_by_store.setdefault(id(store), {})
+        self.part_log = []          # (key, part_number, size) of every UploadPart
+        self.copy_log = []          # (key, part_number, size) of every UploadPartCopy
 
     # --- object ops -------------------------------------------------
     def put_object(self, key, obj, metadata=None, content_type=None):
@@ -138,7 +153,8 @@ class FakeS3Session:
     def list_objects(self, prefix=None, start_after=None, delimiter=None, max_keys=None):
         with self._lock:
             items = [{'key': k, 'version_id': None,
-                      'upload_timestamp': self.upload_times.get(k)}
+                      'upload_timestamp': self.upload_times.get(k),
+                      'content_length': len(self.store[k][0])}
                      for k in sorted(self.store)
                      if prefix is None or k.startswith(prefix)]
         return FakeListResp(items)
@@ -155,6 +171,84 @@ class FakeS3Session:
             self.store[dest_key] = entry
         return FakeResp(200)
 
+    # --- signed requests (multipart uploads only) --------------------
+    def _object_url(self, key, bucket=None):
+        return f'https://fake-s3.invalid/{bucket or self.bucket}/{urllib.parse.quote(key)}'
+
+    @staticmethod
+    def _http(status, body=b'', headers=None):
+        return urllib3.HTTPResponse(body=io.BytesIO(body), headers=headers or {}, status=status, preload_content=True)
+
+    @classmethod
+    def _error(cls, status, code):
+        return cls._http(status, f'<Error><Code>{code}</Code><Message>{code}</Message></Error>'.encode())
+
+    def request(self, method, url, headers=None, fields=None, body=None, preload_content=None):
+        headers = headers or {}
+        fields = fields or {}
+        path = urllib.parse.urlsplit(url).path
+        key = urllib.parse.unquote(path.split('/', 2)[2])
+        if hasattr(body, 'read'):
+            body = body.read()
+        uploads = self.multipart_uploads
+
+        with self._lock:
+            if method == 'POST' and 'uploads' in fields:
+                upload_id = _uuid.uuid4().hex
+                metadata = {k[len('x-amz-meta-'):]: v for k, v in headers.items() if k.lower().startswith('x-amz-meta-')}
+                uploads[upload_id] = {'key': key, 'metadata': metadata, 'parts': {}}
+                return self._http(200, f'<InitiateMultipartUploadResult><Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>'.encode())
+
+            upload = uploads.get(fields.get('uploadId'))
+            if upload is None or upload['key'] != key:
+                return self._error(404, 'NoSuchUpload')
+
+            if method == 'PUT' and 'partNumber' in fields and 'x-amz-copy-source' in headers:
+                source = urllib.parse.unquote(headers['x-amz-copy-source']).split('/', 2)[2]
+                entry = self.store.get(source)
+                if entry is None:
+                    return self._error(404, 'NoSuchKey')
+                first, last = (int(x) for x in headers['x-amz-copy-source-range'][len('bytes='):].split('-'))
+                if first > last or last >= len(entry[0]):
+                    return self._error(400, 'InvalidRange')
+                data = entry[0][first:last + 1]
+                etag = hashlib.md5(data).hexdigest()
+                upload['parts'][int(fields['partNumber'])] = (etag, data)
+                self.copy_log.append((key, int(fields['partNumber']), len(data)))
+                return self._http(200, f'<CopyPartResult><ETag>"{etag}"</ETag></CopyPartResult>'.encode())
+
+            if method == 'PUT' and 'partNumber' in fields:
+                data = bytes(body or b'')
+                etag = hashlib.md5(data).hexdigest()
+                upload['parts'][int(fields['partNumber'])] = (etag, data)
+                self.part_log.append((key, int(fields['partNumber']), len(data)))
+                return self._http(200, headers={'ETag': f'"{etag}"'})
+
+            if method == 'DELETE':
+                del uploads[fields['uploadId']]
+                return self._http(204)
+
+            if method == 'POST':
+                root = ET.fromstring(body)
+                listed = [(int(p.find('PartNumber').text), p.find('ETag').text.strip('"')) for p in root.iter('Part')]
+                if not listed or [n for n, _e in listed] != sorted({n for n, _e in listed}):
+                    return self._error(400, 'InvalidPartOrder')
+                chunks = []
+                for i, (n, etag) in enumerate(listed):
+                    part = upload['parts'].get(n)
+                    if part is None or part[0] != etag:
+                        return self._error(400, 'InvalidPart')
+                    if i < len(listed) - 1 and len(part[1]) < self.min_part_size:
+                        return self._error(400, 'EntityTooSmall')
+                    chunks.append(part[1])
+                del uploads[fields['uploadId']]
+                self.store[key] = (b''.join(chunks), upload['metadata'])
+                self.put_log.append(key)
+                self.upload_times[key] = datetime.datetime.now(datetime.timezone.utc)
+                return self._http(200, f'<CompleteMultipartUploadResult><Key>{key}</Key></CompleteMultipartUploadResult>'.encode())
+
+        return self._error(400, 'NotImplemented')
+
     # --- lock -------------------------------------------------------
     def lock(self, key, lock_id=None, **kw):
         return FakeLock()
@@ -0,0 +1,154 @@
+"""
+Tests for the adaptive concurrency window (adaptive_concurrency): push() and
+load_items() run at most window.limit requests at once, the window halves
+when the store throttles and grows back while transfers complete cleanly
+with flat latency, never past the S3Connection's threads.
+"""
+import re
+import threading
+import time
+
+import urllib3
+
+from ebooklet import open_ebooklet, flow
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 53
+THREADS = 8
+
+
+def test_window_halves_once_per_window():
+    window = flow.ConcurrencyWindow(8)
+    assert window.limit == 8
+    throttled = {'status': 503, 'code': 'SlowDown'}
+    window.record(0.01, 100, throttled)
+    assert window.limit == 4
+    ## The other requests of the same flight report the same event.
+    for _ in range(3):
+        window.record(0.01, 100, throttled)
+    assert window.limit == 4 and window.decreases == 1
+    window.record(0.01, 100, urllib3.exceptions.ReadTimeoutError(None, None, 'timed out'))
+    window.record(0.01, 100, {'status': 429})
+    assert window.limit == 2
+    for _ in range(10):
+        window.record(0.01, 100, throttled)
+    assert window.limit == 1
+
+
+def test_application_errors_are_not_congestion():
+    window = flow.ConcurrencyWindow(4)
+    for error in ({'status': 404}, {'status': 403}, KeyError('k')):
+        window.record(0.01, 100, error)
+    assert window.limit == 4 and window.decreases == 0
+    assert not flow.is_congestion(None)
+    assert flow.is_congestion(ConnectionResetError())
+
+
+def test_window_grows_while_latency_is_flat():
+    window = flow.ConcurrencyWindow(8)
+    window.record(0.01, 0, {'status': 503})
+    window.record(0.01, 0, {'status': 503})
+    assert window.limit == 4
+    ## One window of clean completions widens it by one.
+    for _ in range(8):
+        window.record(0.01, 0)
+    assert window.limit == 5
+    for _ in range(200):
+        window.record(0.01, 0)
+    assert window.limit == 8 and window.increases == 4
+
+
+def test_rising_latency_holds_the_window():
+    window = flow.ConcurrencyWindow(8)
+    window.record(0.01, 0, {'status': 503})
+    assert window.limit == 4
+    for _ in range(2):
+        window.record(0.01, 0)
+    ## Latency climbing well past the best seen: the link is full.
+    for _ in range(50):
+        window.record(0.5, 0)
+    assert window.limit == 4
+
+
+def _seed(store, tmp_path, **kwargs):
+    conn = fake_s3.FakeS3Connection(store, 'testdb', threads=THREADS)
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS, **kwargs) as eb:
+        eb.update({f'k{i}': b'v' * 100 for i in range(500)})
+        assert eb.changes().push()
+    return conn
+
+
+def _throttle_gets(monkeypatch, fail):
+    """Group GETs answer 503 SlowDown while fail() says so; records the concurrency each one saw."""
+    seen = []
+    state = {'running': 0}
+    lock = threading.Lock()
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if not re.match(r'testdb/\d+\.', key):
+            return orig_get(self, key, version_id, range_start, range_end)
+        with lock:
+            state['running'] += 1
+            seen.append(state['running'])
+        try:
+            time.sleep(0.005)
+            if fail():
+                return fake_s3.FakeResp(503, error={'status': 503, 'code': 'SlowDown'})
+            return orig_get(self, key, version_id, range_start, range_end)
+        finally:
+            with lock:
+                state['running'] -= 1
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    return seen
+
+
+def test_load_items_backs_off_and_recovers(tmp_path, monkeypatch):
+    store = {}
+    conn = _seed(store, tmp_path)
+    throttled = {'on': True}
+    seen = _throttle_gets(monkeypatch, lambda: throttled['on'])
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r.concurrency_window == THREADS
+        failures = r.load_items()
+        assert failures
+        assert r.concurrency_window == 1
+        ## Once narrowed, one request at a time.
+        assert max(seen[-10:]) == 1
+
+        throttled['on'] = False
+        assert r.load_items() == {}
+        assert r.concurrency_window > 1
+        assert dict(r.items()) == {f'k{i}': b'v' * 100 for i in range(500)}
+
+
+def test_fixed_width_without_adaptation(tmp_path, monkeypatch):
+    store = {}
+    conn = _seed(store, tmp_path)
+    _throttle_gets(monkeypatch, lambda: True)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', adaptive_concurrency=False) as r:
+        assert r.load_items()
+        assert r.concurrency_window == THREADS
+
+
+def test_push_backs_off_on_throttled_puts(tmp_path, monkeypatch):
+    store = {}
+    conn = _seed(store, tmp_path)
+    orig_put = fake_s3.FakeS3Session.put_object
+
+    def put(self, key, obj, metadata=None, content_type=None):
+        if re.match(r'testdb/\d+\.', key):
+            return fake_s3.FakeResp(503, error={'status': 503, 'code': 'SlowDown'})
+        return orig_put(self, key, obj, metadata, content_type)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', put)
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w.update({f'k{i}': b'n' * 100 for i in range(500)})
+        assert not w.changes().push()
+        assert w.concurrency_window < THREADS
+
+        monkeypatch.undo()
+        assert w.changes().push()
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k7'] == b'n' * 100
@@ -0,0 +1,185 @@
+"""
+Hermetic tests for the asyncio front-end (ebooklet.aio). The fake session is
+not an s3func session, so these exercise the threaded GET fallback; the
+planning/completion phases, journal gates and re-check protocol are the
+shared production code either way.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet, open_ebooklet_async, AsyncEBooklet
+from ebooklet.tests import fake_s3
+
+
+def _seed(store, tmp_path, items, num_groups=3):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def test_async_reads(tmp_path):
+    store = {}
+    items = {f'k{i}': f'v{i}'.encode() for i in range(30)}
+    conn = _seed(store, tmp_path, items)
+
+    async def run():
+        async with await open_ebooklet_async(conn, tmp_path / 'r.blt', flag='r') as db:
+            assert await db.get('k3') == b'v3'
+            assert await db.get('nope', b'dflt') == b'dflt'
+            assert dict(await db.get_items(sorted(items))) == items
+            assert await db.load_items() == {}
+            assert await db.contains('k7')
+
+    asyncio.run(run())
+
+
+def test_async_push_and_pull(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+
+    async def run():
+        async with await open_ebooklet_async(conn, tmp_path / 'r.blt', flag='r') as reader:
+            assert await reader.get('a') == b'1'
+
+            async with await open_ebooklet_async(conn, tmp_path / 'w.blt', flag='w') as writer:
+                await writer.set('a', b'2')
+                await writer.set('b', b'3')
+                changes = await writer.changes()
+                assert {c['key'] for c in await changes.iter_changes()} == {'a', 'b'}
+                assert await changes.push()
+
+            await reader._pull_remote_index()
+            assert await reader.get('a') == b'2'
+            assert await reader.get('b') == b'3'
+
+    asyncio.run(run())
+
+
+def test_async_read_your_writes(tmp_path):
+    """A journaled pending write is never overwritten by the remote value."""
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'remote'})
+
+    async def run():
+        async with await open_ebooklet_async(conn, tmp_path / 'w.blt', flag='w') as db:
+            await db.set('a', b'local')
+            assert await db.load_items(['a']) == {}
+            assert await db.get('a') == b'local'
+
+    asyncio.run(run())
+
+
+def test_async_heals_after_generational_gc(tmp_path):
+    """The re-check protocol runs for async reads too: a reader whose index
+    predates a writer's commit+GC re-pulls and fetches the new generation."""
+    store = {}
+    items = {f'k{i}': b'x' * 10 for i in range(10)}
+    conn = _seed(store, tmp_path, items, num_groups=1)
+
+    async def run():
+        async with await open_ebooklet_async(conn, tmp_path / 'r.blt', flag='r') as reader:
+            with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+                w['k0'] = b'new'
+                assert w.changes().push()
+            assert await reader.get('k5') == b'x' * 10
+            assert await reader.get('k0') == b'new'
+
+    asyncio.run(run())
+
+
+def test_inflight_gets_are_bounded(tmp_path):
+    store = {}
+    items = {f'k{i:02d}': bytes([i]) * 10 for i in range(40)}
+    conn = _seed(store, tmp_path, {k: v for k, v in items.items()}, num_groups=1)
+
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    async def run():
+        nonlocal in_flight, peak
+        db = await open_ebooklet_async(conn, tmp_path / 'r.blt', flag='r', max_inflight=3, range_merge_gap=0)
+        session = db.ebooklet._remote_session._read_session
+        orig_get = session.get_object
+
+        def slow_get(key, version_id=None, range_start=None, range_end=None):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            try:
+                return orig_get(key, version_id, range_start, range_end)
+            finally:
+                with lock:
+                    in_flight -= 1
+        session.get_object = slow_get
+
+        wanted = sorted(items)[::3]
+        async with db:
+            assert dict(await db.get_items(wanted)) == {k: items[k] for k in wanted}
+
+    asyncio.run(run())
+    assert 1 < peak <= 3
+
+
+def test_loads_use_the_session_window_budget_and_hedger(tmp_path):
+    store = {}
+    items = {f'k{i:02d}': bytes([i]) * 10 for i in range(40)}
+    conn = _seed(store, tmp_path, items, num_groups=1)
+
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    recorded = []
+
+    async def run():
+        nonlocal in_flight, peak
+        db = await open_ebooklet_async(conn, tmp_path / 'r.blt', flag='r', max_inflight=8, range_merge_gap=0,
+                                       max_inflight_bytes=1000, hedge_reads=True)
+        eb = db.ebooklet
+        window = eb._concurrency
+        window.limit = window.max_limit = 2
+        orig_record = window.record
+        window.record = lambda secs, nbytes=0, error=None: (recorded.append(nbytes), orig_record(secs, nbytes, error))
+        session = eb._remote_session._read_session
+        orig_get = session.get_object
+
+        def slow_get(key, version_id=None, range_start=None, range_end=None):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            try:
+                return orig_get(key, version_id, range_start, range_end)
+            finally:
+                with lock:
+                    in_flight -= 1
+        session.get_object = slow_get
+
+        wanted = sorted(items)[::3]
+        async with db:
+            assert dict(await db.get_items(wanted)) == {k: items[k] for k in wanted}
+            assert len(recorded) > 2 and all(n > 0 for n in recorded)
+            assert eb._inflight.in_flight == 0
+            ## Batch reads are never hedged; a point read is.
+            assert eb.hedge_stats['requests'] == 0
+            assert await db.get('k01') == items['k01']
+            assert eb.hedge_stats['requests'] == 1
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_max_inflight_validation(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as eb:
+        with pytest.raises(ValueError):
+            AsyncEBooklet(eb, max_inflight=0)
@@ -0,0 +1,185 @@
+"""
+Hermetic tests for the asyncio front-end's aiohttp GETs
+(AsyncRangeClient(native=True)) against a local aiohttp server posing as S3:
+each attempt must carry a valid SigV4 signature from the connection's
+ObjectRequests,
+ranges must reach the server as Range headers, transient statuses must be
+retried, and a failed GET must come back as a response with an error dict.
+"""
+import asyncio
+import datetime
+import types
+
+import pytest
+import urllib3
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from s3func.signer import SigV4Auth
+
+from ebooklet import aio, remote
+from ebooklet.tests import fake_s3
+
+ACCESS_KEY_ID = 'test-id'
+ACCESS_KEY = 'test-secret'
+
+OBJECTS = {
+    'bucket/db/g1!x': bytes(range(256)),
+    'bucket/db': b'db object',
+    }
+
+
+def _valid_signature(request):
+    """Re-sign the received request with the shared secret and compare."""
+    auth = request.headers.get('Authorization', '')
+    amz_date = request.headers.get('x-amz-date')
+    if not auth.startswith('AWS4-HMAC-SHA256 Credential=' + ACCESS_KEY_ID + '/') or amz_date is None:
+        return False
+    headers = {}
+    now = datetime.datetime.strptime(amz_date, '%Y%m%dT%H%M%SZ').replace(tzinfo=datetime.timezone.utc)
+    url = f'http://{request.headers["Host"]}{request.raw_path}'
+    SigV4Auth(ACCESS_KEY_ID, ACCESS_KEY, 'us-east-1').add_auth('GET', url, headers, None, _now=now)
+    return headers['Authorization'] == auth and headers['x-amz-content-sha256'] == request.headers['x-amz-content-sha256']
+
+
+class _S3Handler:
+    """GET-only S3 stand-in; answers the first `fail_first` GETs of a key with 503."""
+
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.requests = []
+
+    async def handle(self, request):
+        key = request.path.lstrip('/')
+        self.requests.append((key, dict(request.headers)))
+        if not _valid_signature(request):
+            return web.Response(status=403, body=b'<Error><Code>SignatureDoesNotMatch</Code><Message>bad signature</Message></Error>')
+        if sum(1 for k, _h in self.requests if k == key) <= self.fail_first:
+            return web.Response(status=503, body=b'<Error><Code>SlowDown</Code><Message>reduce your rate</Message></Error>')
+        if key not in OBJECTS:
+            return web.Response(status=404, body=b'<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message></Error>')
+        data = OBJECTS[key]
+        headers = {'x-amz-meta-timestamp': '1700000000000000'}
+        range_header = request.headers.get('Range')
+        if range_header is None:
+            return web.Response(status=200, body=data, headers=headers)
+        start, end = range_header.removeprefix('bytes=').split('-')
+        end = len(data) - 1 if not end else int(end)
+        return web.Response(status=206, body=data[int(start):end + 1], headers=headers)
+
+
+def _run(handler, check, max_attempts=3):
+    async def run():
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', handler.handle)
+        async with TestServer(app) as server:
+            requests = remote.ObjectRequests(ACCESS_KEY_ID, ACCESS_KEY, 'bucket', str(server.make_url('/')), retries=max_attempts)
+            remote_session = types.SimpleNamespace(object_requests=requests, read_db_key='db')
+            client = aio.AsyncRangeClient(remote_session, native=True)
+            assert client.native
+            try:
+                await check(client)
+            finally:
+                await client.close()
+
+    asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(aio.random, 'random', lambda: 0.0)
+
+
+def test_native_is_opt_in():
+    store = {}
+    session = fake_s3.FakeS3Connection(store, 'testdb')
+    s3_session = types.SimpleNamespace(object_requests=remote.ObjectRequests(ACCESS_KEY_ID, ACCESS_KEY, 'bucket'), read_db_key='db')
+    assert not aio.AsyncRangeClient(s3_session).native
+    assert aio.AsyncRangeClient(s3_session, native=True).native
+    assert not aio.AsyncRangeClient(session, native=True).native
+
+
+def test_object_requests_urls():
+    s3 = remote.ObjectRequests(ACCESS_KEY_ID, ACCESS_KEY, 'bucket', 'http://localhost:9000')
+    assert s3.url('db/g1!x') == 'http://localhost:9000/bucket/db/g1%21x'
+    assert remote.ObjectRequests(ACCESS_KEY_ID, ACCESS_KEY, 'bucket').url('db') == 'https://s3.us-east-1.amazonaws.com/bucket/db'
+    public = remote.ObjectRequests(db_url='https://example.com/db')
+    assert public.signer is None and public.url('https://example.com/db/g1!x') == 'https://example.com/db/g1!x'
+
+
+def test_signed_whole_and_range_gets():
+    handler = _S3Handler()
+
+    async def check(client):
+        resp = await client.get_object(None)
+        assert (resp.status, resp.data, resp.error) == (200, b'db object', None)
+        assert resp.metadata['timestamp'] == '1700000000000000'
+
+        resp = await client.get_object('g1!x', 10, 19)
+        assert (resp.status, resp.data, resp.error) == (206, bytes(range(10, 20)), None)
+        assert resp.metadata['content_length'] == 10
+
+        ## Native GETs are never hedged: hedge=True is a plain GET.
+        resp = await client.get_object('g1!x', 250, hedge=True)
+        assert resp.data == bytes(range(250, 256))
+
+    _run(handler, check)
+    assert [key for key, _h in handler.requests] == ['bucket/db', 'bucket/db/g1!x', 'bucket/db/g1!x']
+    assert [h.get('Range') for _k, h in handler.requests] == [None, 'bytes=10-19', 'bytes=250-']
+
+
+def test_transient_status_is_retried_and_resigned():
+    handler = _S3Handler(fail_first=2)
+
+    async def check(client):
+        resp = await client.get_object('g1!x', 0, 3)
+        assert (resp.status, resp.data) == (206, bytes(range(4)))
+
+    _run(handler, check)
+    assert len(handler.requests) == 3
+    assert all(h.get('Range') == 'bytes=0-3' for _k, h in handler.requests)
+
+
+def test_retries_exhausted_returns_error():
+    handler = _S3Handler(fail_first=10)
+
+    async def check(client):
+        resp = await client.get_object('g1!x', 0, 3)
+        assert resp.status == 503 and resp.data is None
+        assert resp.error == {'status': 503, 'Code': 'SlowDown', 'Message': 'reduce your rate'}
+
+    _run(handler, check, max_attempts=1)
+    assert len(handler.requests) == 2
+
+
+def test_connection_errors_raise_after_retries():
+    async def check(client):
+        with pytest.raises(urllib3.exceptions.HTTPError, match='after 2 attempts'):
+            await client.get_object('g1!x', 0, 3)
+
+    async def run():
+        ## Nothing listens on the port any more.
+        async with TestServer(web.Application()) as server:
+            url = str(server.make_url('/'))
+        requests = remote.ObjectRequests(ACCESS_KEY_ID, ACCESS_KEY, 'bucket', url, retries=1)
+        client = aio.AsyncRangeClient(types.SimpleNamespace(object_requests=requests, read_db_key='db'), native=True)
+        try:
+            await check(client)
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+
+def test_error_dict_shape():
+    handler = _S3Handler()
+
+    async def check(client):
+        resp = await client.get_object('missing')
+        assert resp.status == 404 and resp.data is None
+        assert resp.error == {'status': 404, 'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'}
+        assert resp.metadata['status'] == 404
+
+    _run(handler, check)
+    assert len(handler.requests) == 1
@@ -0,0 +1,163 @@
+"""
+Hermetic tests for bulk_load: a flag='n' session packs its items straight
+into group objects, builds the index directly and commits them as the
+replacement of the remote - with or without local copies of the values.
+"""
+import os
+import re
+
+import pytest
+
+from ebooklet import open_ebooklet, fsck, utils
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 5
+PART = utils.MIN_UPLOAD_PART_SIZE
+
+_orig_put = fake_s3.FakeS3Session.put_object
+
+
+def _is_group_object(key):
+    return re.match(r'testdb/\d+\.[0-9a-f]{13}$', key) is not None
+
+
+def _seed(store, tmp_path, name='seed.blt'):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / name, flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update({'old1': b'old', 'old2': b'older'})
+        eb.set_metadata({'seed': True})
+        assert eb.changes().push()
+    return conn
+
+
+def _items(n=500):
+    return ((f'k{i}', b'v%d' % i * (i % 7)) for i in range(n))
+
+
+def _read_all(conn, tmp_path, name='r.blt'):
+    with open_ebooklet(conn, tmp_path / name, flag='r') as r:
+        return dict(r.items()), r.get_metadata()
+
+
+def test_bulk_load_replaces_remote(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n') as w:
+        ## A value read through from the old remote does not survive the load.
+        assert w['old1'] == b'old'
+        result = w.bulk_load(_items(), spill_bytes=1000)
+        assert result
+        assert not w.changes().pending_deletes
+        assert not list(w._local_file.keys())
+        assert w['k10'] == b'v10' * 3
+        assert 'old1' not in w
+
+    data, meta = _read_all(conn, tmp_path)
+    assert data == dict(_items())
+    assert meta is None
+    assert all(_is_group_object(k) for k in store if k.startswith('testdb/'))
+    report = fsck(conn, check_objects=True)
+    assert report.orphans == [] and report.claimed_but_missing == []
+
+
+def test_bulk_load_local_then_push(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path)
+    path = tmp_path / 'w.blt'
+    with open_ebooklet(conn, path, flag='n') as w:
+        assert w.bulk_load(dict(_items()), local=True, timestamp=1_700_000_000_000_000)
+        assert dict(w._local_file.items()) == dict(_items())
+        assert w.get_timestamp('k3') == 1_700_000_000_000_000
+        assert not w._journal.written and not w._journal.replace_pending
+
+        ## The session is a plain writer now.
+        w['new'] = b'new'
+        del w['k0']
+        assert w.changes().push()
+
+    expected = dict(_items())
+    expected['new'] = b'new'
+    del expected['k0']
+    assert _read_all(conn, tmp_path)[0] == expected
+
+    ## Nothing is pending on re-open.
+    with open_ebooklet(conn, path, flag='w') as w:
+        assert not list(w.changes().iter_changes())
+
+
+def test_bulk_load_streams_and_compresses(tmp_path):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i:03d}': os.urandom(2**16) for i in range(200)}
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=1, upload_part_size=PART) as w:
+        assert w.bulk_load(items, spill_bytes=2**20)
+    assert _read_all(conn, tmp_path)[0] == items
+
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i}': b'abc' * i for i in range(300)}
+    with open_ebooklet(conn, tmp_path / 'z.blt', flag='n', num_groups=NUM_GROUPS, compression='zlib') as w:
+        assert w.bulk_load(items)
+    assert _read_all(conn, tmp_path, 'rz.blt')[0] == items
+    assert conn.open('r').compression == 'zlib'
+
+
+def test_bulk_load_retries_then_gives_up(tmp_path, monkeypatch):
+    store = {}
+    conn = _seed(store, tmp_path)
+    calls = []
+
+    def flaky(self, key, obj, metadata=None, content_type=None):
+        if _is_group_object(key) and key.startswith('testdb/1.'):
+            calls.append(key)
+            if len(calls) < utils.BULK_UPLOAD_ATTEMPTS:
+                return fake_s3.FakeResp(500, error={'status': 500, 'code': 'InternalError'})
+        return _orig_put(self, key, obj, metadata, content_type)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', flaky)
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n') as w:
+        assert w.bulk_load(_items())
+    assert len(calls) == utils.BULK_UPLOAD_ATTEMPTS
+    assert _read_all(conn, tmp_path)[0] == dict(_items())
+    ## The failed attempts left no orphans behind the replacement sweep.
+    assert sum(1 for k in store if k.startswith('testdb/1.')) == 1
+
+    store = {}
+    conn = _seed(store, tmp_path, name='seed2.blt')
+
+    def failing(self, key, obj, metadata=None, content_type=None):
+        if _is_group_object(key) and key.startswith('testdb/2.'):
+            return fake_s3.FakeResp(500, error={'status': 500, 'code': 'InternalError'})
+        return _orig_put(self, key, obj, metadata, content_type)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', failing)
+
+    path = tmp_path / 'w2.blt'
+    with open_ebooklet(conn, path, flag='n') as w:
+        result = w.bulk_load(_items())
+        assert not result
+        assert set(result.failures) == {2}
+        assert w._journal.replace_pending
+    assert not path.parent.joinpath(path.name + '.remote_index.bulk').exists()
+    data, meta = _read_all(conn, tmp_path, 'r2.blt')
+    assert data == {'old1': b'old', 'old2': b'older'}
+    assert meta == {'seed': True}
+
+
+def test_bulk_load_preconditions(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        with pytest.raises(ValueError, match="flag='n'"):
+            w.bulk_load(_items())
+    with open_ebooklet(conn, tmp_path / 'n.blt', flag='n') as w:
+        w['first'] = b'x'
+        with pytest.raises(ValueError, match='first write'):
+            w.bulk_load(_items())
+    with open_ebooklet(conn, tmp_path / 'n2.blt', flag='n') as w:
+        with pytest.raises(ValueError, match='reserved'):
+            w.bulk_load([(utils.metadata_key_str, b'x')])
+
+    conn = fake_s3.FakeS3Connection({}, 'perkey')
+    with open_ebooklet(conn, tmp_path / 'p.blt', flag='n') as w:
+        with pytest.raises(ValueError, match='num_groups'):
+            w.bulk_load(_items())
@@ -0,0 +1,193 @@
+"""
+Hermetic tests for compressed group objects (storage format 3): framed
+packing, ranged reads through the frames, codec resolution, and the format
+gates.
+"""
+import struct
+
+import pytest
+import msgspec
+
+from ebooklet import open_ebooklet, fsck, utils, compression
+from ebooklet.errors import UnsupportedFormatError
+from ebooklet.tests import fake_s3
+
+
+def _json_items(n):
+    return {f'k{i:04d}': msgspec.json.encode({'id': i, 'name': f'station {i}', 'tags': ['a', 'b', 'c'] * 5})
+            for i in range(n)}
+
+
+def _seed(store, tmp_path, items, num_groups=3, compression='zlib'):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups, compression=compression) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _group_keys(store):
+    return sorted(k for k in store if k.startswith('testdb/') and '_idelta' not in k)
+
+
+def _group_key_of(store, key):
+    data, meta = store['testdb']
+    manifest = utils.parse_db_payload(data)[0]
+    gid = utils.key_to_group_id(key, int(meta['num_groups']))
+    return 'testdb/' + utils.group_obj_key(gid, manifest[gid])
+
+
+def test_framed_pack_round_trip():
+    codec = compression.get_codec('zlib')
+    entries = [(f'k{i}', 1000 + i, bytes([i % 251]) * 700) for i in range(100)]
+    packed, offsets = utils.pack_framed_group(entries, codec, frame_size=4096)
+
+    found = utils.find_group_members(packed, [k for k, _t, _v in entries], codec)
+    assert [(k, *found[k]) for k, _t, _v in entries] == entries
+    frames = sorted(set(offsets.values()))
+    assert len(frames) > 10
+    for key, ts, value in entries:
+        off, ln = offsets[key]
+        assert utils.find_group_members(packed[off:off + ln], [key], codec) == {key: (ts, value)}
+
+    ## A truncated frame is refused, not mis-parsed.
+    off, ln = frames[0]
+    with pytest.raises(ValueError):
+        utils.find_group_members(packed[off:off + ln - 1], ['k0'], codec)
+
+    ## So is a frame that decompresses to a malformed raw pack.
+    comp = codec.compress(b'\x00\x00\x00\x05')
+    with pytest.raises(ValueError):
+        utils.find_group_members(struct.pack('>II', len(comp), 4) + comp, ['k0'], codec)
+
+
+def test_compressed_remote_round_trip(tmp_path):
+    store = {}
+    items = _json_items(300)
+    conn = _seed(store, tmp_path, items)
+
+    data, meta = store['testdb']
+    assert meta['format_version'] == '3'
+    assert meta['compression'] == 'zlib'
+
+    raw_bytes = sum(len(k) + len(v) for k, v in items.items())
+    assert sum(len(store[k][0]) for k in _group_keys(store)) < raw_bytes / 3
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0007'] == items['k0007']
+        assert dict(r.get_items(['k0001', 'k0150', 'k0299'])) == {
+            k: items[k] for k in ('k0001', 'k0150', 'k0299')}
+        assert r.load_items() == {}
+        assert dict(r.items()) == items
+    assert fsck(conn).orphans == []
+
+
+def test_point_read_fetches_one_frame(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i:05d}': f'value {i} '.encode() * 40 for i in range(6000)}
+    conn = _seed(store, tmp_path, items, num_groups=1)
+    group_key = _group_key_of(store, 'k03000')
+    group_size = len(store[group_key][0])
+
+    gets = []
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if key == group_key:
+            gets.append((range_start, range_end))
+        return orig_get(self, key, version_id, range_start, range_end)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+        assert r['k03000'] == items['k03000']
+
+    ((start, end),) = gets
+    assert start is not None
+    assert end - start + 1 < group_size / 10
+
+
+def test_writer_inherits_codec_and_repacks(tmp_path):
+    store = {}
+    items = _json_items(60)
+    conn = _seed(store, tmp_path, items, num_groups=2)
+
+    ## A fresh writer: repacking pulls the unmaterialized members through
+    ## their frames first.
+    with open_ebooklet(conn, tmp_path / 'w2.blt', flag='w') as w:
+        assert w._compression == 'zlib'
+        w['k0003'] = b'changed'
+        del w['k0004']
+        assert w.changes().push()
+
+    assert store['testdb'][1]['compression'] == 'zlib'
+    expected = dict(items, k0003=b'changed')
+    del expected['k0004']
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == expected
+
+
+def test_replacement_can_change_codec(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, _json_items(20))
+
+    with open_ebooklet(conn, tmp_path / 'n.blt', flag='n', num_groups=3) as n:
+        n['only'] = b'raw'
+        assert n.changes().push()
+
+    data, meta = store['testdb']
+    assert meta['format_version'] == '2'
+    assert 'compression' not in meta
+    assert struct.unpack_from('>H', data, 12)[0] == 2
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == {'only': b'raw'}
+
+
+def test_codec_argument_validation(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+
+    with pytest.raises(ValueError, match='conflicts'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='w', compression='lz4')
+    with pytest.raises(ValueError, match='num_groups'):
+        open_ebooklet(fake_s3.FakeS3Connection({}, 'other'), tmp_path / 'y.blt', flag='n', compression='zlib')
+    with pytest.raises(ValueError, match='compression must be'):
+        open_ebooklet(conn, tmp_path / 'z.blt', flag='n', num_groups=3, compression='brotli')
+    with pytest.raises(ValueError, match='readers'):
+        open_ebooklet(conn, tmp_path / 'r.blt', flag='r', compression='zlib')
+
+
+def test_unknown_codec_is_refused(tmp_path):
+    store = {}
+    _seed(store, tmp_path, {'a': b'1'})
+    data, meta = store['testdb']
+    store['testdb'] = (data, dict(meta, compression='future-codec'))
+
+    with pytest.raises(UnsupportedFormatError, match='Upgrade ebooklet'):
+        open_ebooklet(fake_s3.FakeS3Connection(store, 'testdb'), tmp_path / 'r.blt', flag='r')
+
+
+def test_corrupted_frame_recovers_from_full_object(tmp_path):
+    store = {}
+    items = _json_items(40)
+    conn = _seed(store, tmp_path, items, num_groups=1)
+
+    ## Shift the object by one frame-sized prefix: every indexed frame
+    ## offset is now wrong, but the object is still self-describing.
+    group_key = _group_key_of(store, 'k0005')
+    data, meta = store[group_key]
+    filler, _ = utils.pack_framed_group([('filler', 1, b'x' * 50)], compression.get_codec('zlib'))
+    store[group_key] = (filler + data, meta)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0005'] == items['k0005']
+
+
+@pytest.mark.parametrize('name', ['zstd', 'lz4'])
+def test_optional_codecs(tmp_path, name):
+    pytest.importorskip({'zstd': 'zstandard', 'lz4': 'lz4'}[name])
+    store = {}
+    items = _json_items(50)
+    conn = _seed(store, tmp_path, items, compression=name)
+    assert store['testdb'][1]['compression'] == name
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
@@ -0,0 +1,247 @@
+"""
+Hermetic tests for copy_remote's multipart path: a manifest child larger
+than part_size is copied as parallel parts (UploadPartCopy with the same
+credentials, ranged GET + UploadPart across credentials), a failed part is
+retried on its own, and an object whose part keeps failing is aborted and
+reported while the rest of the copy carries on. The db object takes the
+same path, and an error raised out of the copy aborts the open uploads.
+"""
+import threading
+
+import pytest
+
+from ebooklet import open_ebooklet, remote, utils
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 3
+MiB = 2**20
+PART = 5 * MiB
+
+
+class _CredS3Session(fake_s3.FakeS3Session):
+    def __init__(self, store, access_key_id, access_key, **kw):
+        super().__init__(store, **kw)
+        self._access_key_id = access_key_id
+        self._access_key = access_key
+
+
+class _CredS3Connection(fake_s3.FakeS3Connection):
+    """Connections with different credentials copy through the client."""
+    def __init__(self, store, db_key, access_key_id, **kw):
+        super().__init__(store, db_key, **kw)
+        self._akid = access_key_id
+
+    def open(self, flag='r'):
+        sess = _CredS3Session(self.store, self._akid, 'secret', bucket=self.bucket)
+        if flag == 'r':
+            return remote.S3SessionReader(sess, self.db_key, self.threads)
+        return remote.S3SessionWriter(sess, sess, self.db_key, self.db_key, self.threads)
+
+
+def _seed(store, tmp_path, conn):
+    items = {f'k{i}': bytes([i]) * MiB for i in range(36)}
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return items
+
+
+def _large_groups(store, db_key):
+    return sorted(k for k, (data, _m) in store.items() if k.startswith(db_key + '/') and len(data) > PART)
+
+
+def _log_parts(monkeypatch, method, fail=None):
+    """Record (key, part_number) of every part call; fail(key, n, tries) raises when true."""
+    calls = []
+    lock = threading.Lock()
+    orig = getattr(remote.MultipartUpload, method)
+
+    def call(self, part_number, *args, **kwargs):
+        with lock:
+            calls.append((self.key, part_number))
+            tries = calls.count((self.key, part_number))
+        if fail is not None and fail(self.key, part_number, tries):
+            raise remote.urllib3.exceptions.HTTPError({'status': 500, 'code': 'InternalError'})
+        return orig(self, part_number, *args, **kwargs)
+    monkeypatch.setattr(remote.MultipartUpload, method, call)
+    return calls
+
+
+def test_copy_part_ranges():
+    assert utils.copy_part_ranges(12, 5) == [(1, 0, 4), (2, 5, 9), (3, 10, 11)]
+    assert utils.copy_part_ranges(10, 5) == [(1, 0, 4), (2, 5, 9)]
+    ## Never more parts than S3 allows.
+    ranges = utils.copy_part_ranges(utils.MAX_UPLOAD_PARTS * 10 + 1, 5)
+    assert len(ranges) <= utils.MAX_UPLOAD_PARTS and ranges[-1][2] == utils.MAX_UPLOAD_PARTS * 10
+
+
+def test_large_groups_copy_in_server_side_parts(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    items = _seed(store, tmp_path, conn)
+    large = _large_groups(store, 'src')
+    assert large
+    calls = _log_parts(monkeypatch, 'upload_part_copy')
+
+    with conn.open('w') as src:
+        assert not src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    for key in large:
+        target = 'dst' + key[3:]
+        n_parts = len(utils.copy_part_ranges(len(store[key][0]), PART))
+        assert sorted(n for k, n in calls if k == target) == list(range(1, n_parts + 1))
+        assert store[target][0] == store[key][0]
+
+    with open_ebooklet(fake_s3.FakeS3Connection(store, 'dst'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_failed_part_is_retried_alone(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    items = _seed(store, tmp_path, conn)
+    calls = _log_parts(monkeypatch, 'upload_part_copy', lambda key, n, tries: n == 2 and tries == 1)
+
+    with conn.open('w') as src:
+        assert not src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    target = 'dst' + _large_groups(store, 'src')[0][3:]
+    assert calls.count((target, 2)) == 2
+    assert calls.count((target, 1)) == 1
+    with open_ebooklet(fake_s3.FakeS3Connection(store, 'dst'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_persistent_part_failure_aborts_the_object(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    items = _seed(store, tmp_path, conn)
+    failing = 'dst' + _large_groups(store, 'src')[0][3:]
+    calls = _log_parts(monkeypatch, 'upload_part_copy', lambda key, n, tries: key == failing and n == 1)
+
+    with conn.open('w') as src:
+        failures = src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    assert list(failures) == [failing]
+    assert calls.count((failing, 1)) == utils.COPY_PART_ATTEMPTS
+    assert failing not in store and 'dst' not in store
+
+    ## A rerun copies only what is missing.
+    monkeypatch.undo()
+    with conn.open('w') as src:
+        assert not src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    with open_ebooklet(fake_s3.FakeS3Connection(store, 'dst'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_cross_credential_copy_streams_parts(tmp_path, monkeypatch):
+    store = {}
+    conn = _CredS3Connection(store, 'src', 'akid-A')
+    items = _seed(store, tmp_path, conn)
+    large = _large_groups(store, 'src')
+    calls = _log_parts(monkeypatch, 'upload_part')
+
+    gets = []
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        resp = orig_get(self, key, version_id, range_start, range_end)
+        if key in large:
+            gets.append(len(resp.data))
+        return resp
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+
+    with conn.open('w') as src:
+        assert not src.copy_remote(_CredS3Connection(store, 'dst', 'akid-B'), part_size=PART)
+    ## No large object was ever fetched whole.
+    assert gets and max(gets) <= PART
+    assert {k for k, _n in calls} == {'dst' + k[3:] for k in large}
+
+    monkeypatch.undo()
+    with open_ebooklet(_CredS3Connection(store, 'dst', 'akid-B'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_part_size_validation(tmp_path):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    with conn.open('w') as src:
+        with pytest.raises(ValueError, match='part_size'):
+            src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=MiB)
+
+
+def test_large_db_object_copies_in_parts(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    items = {f'k{i}': b'v' * 10 for i in range(400)}
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    monkeypatch.setattr(utils, 'MIN_UPLOAD_PART_SIZE', 1024)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'min_part_size', 1024)
+    assert len(store['src'][0]) > 2048
+    calls = _log_parts(monkeypatch, 'upload_part_copy')
+
+    with conn.open('w') as src:
+        assert not src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=1024)
+    n_parts = len(utils.copy_part_ranges(len(store['src'][0]), 1024))
+    assert sorted(n for k, n in calls if k == 'dst') == list(range(1, n_parts + 1))
+    assert store['dst'][0] == store['src'][0]
+
+    monkeypatch.undo()
+    with open_ebooklet(fake_s3.FakeS3Connection(store, 'dst'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_raising_whole_copy_is_reported(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    _seed(store, tmp_path, conn)
+    small = _large_groups(store, 'src')[0]
+    orig = fake_s3.FakeS3Session.copy_object
+
+    def copy_object(self, source_key, dest_key, *args, **kwargs):
+        if source_key == small:
+            raise remote.urllib3.exceptions.ProtocolError('connection reset')
+        return orig(self, source_key, dest_key, *args, **kwargs)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'copy_object', copy_object)
+
+    with conn.open('w') as src:
+        failures = src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=None)
+    assert list(failures) == ['dst' + small[3:]]
+    assert 'dst' not in store
+
+
+def test_escaping_error_aborts_open_uploads(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    _seed(store, tmp_path, conn)
+    assert _large_groups(store, 'src')
+
+    def complete(self):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(remote.MultipartUpload, 'complete', complete)
+
+    with conn.open('w') as src, pytest.raises(KeyboardInterrupt):
+        src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    assert not fake_s3.FakeS3Session(store).multipart_uploads
+
+
+def test_failed_listing_copies_whole_with_warning(tmp_path, monkeypatch, caplog):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'src')
+    items = _seed(store, tmp_path, conn)
+    calls = _log_parts(monkeypatch, 'upload_part_copy')
+    orig = fake_s3.FakeS3Session.list_objects
+
+    def list_objects(self, prefix=None, **kwargs):
+        if prefix == 'src/':
+            return fake_s3.FakeResp(500, error={'status': 500, 'code': 'InternalError'})
+        return orig(self, prefix=prefix, **kwargs)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'list_objects', list_objects)
+
+    with conn.open('w') as src:
+        assert not src.copy_remote(fake_s3.FakeS3Connection(store, 'dst'), part_size=PART)
+    assert not calls
+    assert 'without multipart parts' in caplog.text
+
+    monkeypatch.undo()
+    with open_ebooklet(fake_s3.FakeS3Connection(store, 'dst'), tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
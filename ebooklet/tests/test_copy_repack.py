@@ -0,0 +1,132 @@
+"""
+Hermetic tests for the copy repack (copy_repack=True): a large group is
+rebuilt as a multipart upload whose unchanged member runs are copied from
+the old generation server-side (UploadPartCopy, implemented by the fake
+store), with only the changed members sent from the client.
+"""
+import os
+
+import pytest
+
+from ebooklet import open_ebooklet, fsck, utils
+from ebooklet.tests import fake_s3
+
+PART = utils.MIN_UPLOAD_PART_SIZE
+
+
+def _items(n=300, size=2**16):
+    return {f'k{i:04d}': os.urandom(size) for i in range(n)}
+
+
+def _group_objects(store):
+    return [k for k in store if k.startswith('testdb/') and '_idelta' not in k]
+
+
+def _traffic(monkeypatch):
+    """Client-sent part bytes, server-copied part bytes and group GET bytes."""
+    log = {'sent': 0, 'copied': 0, 'fetched': 0}
+    orig_request = fake_s3.FakeS3Session.request
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def request(self, method, url, headers=None, fields=None, body=None, preload_content=None):
+        resp = orig_request(self, method, url, headers, fields, body, preload_content)
+        if fields and 'partNumber' in fields:
+            if 'x-amz-copy-source' in (headers or {}):
+                log['copied'] += self.copy_log[-1][2]
+            else:
+                log['sent'] += self.part_log[-1][2]
+        return resp
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        resp = orig_get(self, key, version_id, range_start, range_end)
+        if key in _group_objects(self.store):
+            log['fetched'] += len(resp.data)
+        return resp
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'request', request)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    return log
+
+
+def test_small_change_copies_unchanged_runs(tmp_path, monkeypatch):
+    store = {}
+    items = _items()
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=1, upload_part_size=PART) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+
+    ## A fresh writer holds nothing locally: without the copy repack it would
+    ## pull every member of the touched groups and upload them again.
+    touched = {utils.key_to_group_id(k, 2) for k in ('k0150', 'new', 'k0010')}
+    old_sizes = {int(k.split('/')[1].split('.')[0]): len(store[k][0]) for k in _group_objects(store)}
+    log = _traffic(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', upload_part_size=PART, copy_repack=True) as w:
+        w['k0150'] = b'changed'
+        w['new'] = b'added'
+        del w['k0010']
+        assert w.changes().push()
+
+    touched_bytes = sum(old_sizes[gid] for gid in touched)
+    assert log['copied'] > touched_bytes - len(touched) * 2 * PART
+    assert log['sent'] + log['fetched'] < len(touched) * 2 * PART
+
+    expected = dict(items, k0150=b'changed', new=b'added')
+    del expected['k0010']
+    members = [m for k in _group_objects(store) for m in utils.unpack_group(store[k][0])]
+    assert sorted(k for k, _ts, _v in members) == sorted(expected)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0151'] == items['k0151']
+        assert dict(r.items()) == expected
+    assert fsck(conn).orphans == []
+
+
+def test_small_groups_repack_as_before(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' * 100 for i in range(50)}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=3) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+
+    log = _traffic(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', copy_repack=True) as w:
+        w['k1'] = b'x'
+        assert w.changes().push()
+    assert log['copied'] == 0
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == dict(items, k1=b'x')
+
+
+def test_failed_copy_leaves_old_generation(tmp_path, monkeypatch):
+    store = {}
+    items = _items(200)
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=1, upload_part_size=PART) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    before = dict(store)
+
+    orig = fake_s3.FakeS3Session.request
+
+    def no_copy(self, method, url, headers=None, fields=None, body=None, preload_content=None):
+        if 'x-amz-copy-source' in (headers or {}):
+            return self._error(501, 'NotImplemented')
+        return orig(self, method, url, headers, fields, body, preload_content)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'request', no_copy)
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', upload_part_size=PART, copy_repack=True) as w:
+        w['k0001'] = b'changed'
+        result = w.changes().push()
+        assert not result
+        assert set(result.failures) == {0}
+    assert store == before
+    assert fake_s3.FakeS3Session(store).multipart_uploads == {}
+
+
+def test_copy_repack_validation(tmp_path):
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='copy_repack'):
+        open_ebooklet(conn, tmp_path / 'a.blt', flag='n', num_groups=3, copy_repack=True, upload_part_size=None)
+    with pytest.raises(ValueError, match='copy_repack'):
+        open_ebooklet(conn, tmp_path / 'b.blt', flag='n', num_groups=3, copy_repack=True, compression='zlib')
@@ -0,0 +1,241 @@
+"""
+Hermetic tests for delta generations (max_group_deltas): a push appends a
+small delta object holding only a group's changed members instead of
+rewriting the group, readers resolve each member to the generation its
+logical index offset points into, and a group is compacted back to one
+generation once it holds too many deltas or too many dead bytes.
+"""
+import re
+
+import pytest
+
+from ebooklet import open_ebooklet, fsck, utils
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 5
+
+
+def _keys_in_group(gid, n, prefix='k'):
+    keys = []
+    i = 0
+    while len(keys) < n:
+        key = f'{prefix}{i}'
+        if utils.key_to_group_id(key, NUM_GROUPS) == gid:
+            keys.append(key)
+        i += 1
+    return keys
+
+
+def _manifest(store):
+    return utils.parse_db_payload(store['testdb'][0])[0]
+
+
+def _group_objects(store):
+    return sorted(k for k in store if re.match(r'testdb/\d+\.[0-9a-f]{13}$', k))
+
+
+def _seed(store, tmp_path, items, **kwargs):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS, **kwargs) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _traffic(monkeypatch):
+    """Bytes PUT to and ranged-GET from group objects."""
+    log = {'put': 0, 'get': 0}
+    orig_get = fake_s3.FakeS3Session.get_object
+    orig_put = fake_s3.FakeS3Session.put_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        resp = orig_get(self, key, version_id, range_start, range_end)
+        if re.match(r'testdb/\d+\.', key):
+            log['get'] += len(resp.data)
+        return resp
+
+    def put(self, key, obj, metadata=None, content_type=None):
+        if re.match(r'testdb/\d+\.', key):
+            log['put'] += len(obj)
+        return orig_put(self, key, obj, metadata, content_type)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', put)
+    return log
+
+
+def test_push_appends_a_delta(tmp_path, monkeypatch):
+    store = {}
+    members = _keys_in_group(0, 50)
+    items = {k: bytes([i]) * 1000 for i, k in enumerate(members)}
+    conn = _seed(store, tmp_path, items, max_group_deltas=4)
+    base_slot = _manifest(store)[0]
+    assert ':' in base_slot and '+' not in base_slot
+    assert store['testdb'][1]['format_version'] == str(utils.CHAINED_FORMAT_VERSION)
+
+    ## A fresh writer holds nothing locally: the delta neither pulls the
+    ## other members nor re-uploads them.
+    (added,) = _keys_in_group(0, 1, prefix='new')
+    log = _traffic(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=4) as w:
+        w[members[3]] = b'changed'
+        w[added] = b'added'
+        assert w.changes().push()
+    assert log['get'] == 0
+    assert log['put'] < 200
+
+    slot = _manifest(store)[0]
+    gens, dead = utils.parse_group_slot(slot)
+    assert [g for g, _s, _z in gens][0] == utils.parse_group_slot(base_slot)[0][0][0]
+    assert len(gens) == 2 and dead > 1000
+    assert len(_group_objects(store)) == 2
+
+    monkeypatch.undo()
+    expected = dict(items)
+    expected[members[3]] = b'changed'
+    expected[added] = b'added'
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        ## Point reads resolve through the chain; the batch read spans both
+        ## generations of the group.
+        assert r[members[3]] == b'changed'
+        assert r[members[4]] == items[members[4]]
+    with open_ebooklet(conn, tmp_path / 'r2.blt', flag='r') as r:
+        assert dict(r.items()) == expected
+
+    report = fsck(conn)
+    assert report.orphans == [] and report.claimed_but_missing == []
+
+
+def test_compaction_after_max_deltas(tmp_path):
+    store = {}
+    members = _keys_in_group(1, 40)
+    items = {k: b'v' * 500 for k in members}
+    conn = _seed(store, tmp_path, items, max_group_deltas=2)
+
+    for i in range(2):
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=2) as w:
+            w[members[i]] = b'x%d' % i
+            assert w.changes().push()
+    assert len(utils.slot_generations(_manifest(store)[1])) == 3
+
+    ## The third delta would exceed the limit: the group is rewritten and
+    ## every old generation of its chain is GC'd.
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=2) as w:
+        w[members[2]] = b'x2'
+        assert w.changes().push()
+    (gen,) = utils.slot_generations(_manifest(store)[1])
+    assert _group_objects(store) == [f'testdb/1.{gen}']
+    assert utils.parse_group_slot(_manifest(store)[1])[1] == 0
+
+    expected = dict(items, **{members[i]: b'x%d' % i for i in range(3)})
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == expected
+    assert fsck(conn).orphans == []
+
+
+def test_dead_ratio_compacts(tmp_path):
+    store = {}
+    members = _keys_in_group(2, 10)
+    items = {k: b'v' * 1000 for k in members}
+    conn = _seed(store, tmp_path, items, max_group_deltas=8)
+
+    ## Overwriting most of the group would leave the chain mostly dead.
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=8, compact_dead_ratio=0.3) as w:
+        for key in members[:6]:
+            w[key] = b'n' * 1000
+        assert w.changes().push()
+    assert len(utils.slot_generations(_manifest(store)[2])) == 1
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == dict(items, **{k: b'n' * 1000 for k in members[:6]})
+
+
+def test_deletes_only_keep_the_chain(tmp_path, monkeypatch):
+    store = {}
+    members = _keys_in_group(3, 20)
+    items = {k: b'v' * 100 for k in members}
+    conn = _seed(store, tmp_path, items, max_group_deltas=4)
+    objects = _group_objects(store)
+
+    log = _traffic(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=4) as w:
+        del w[members[0]]
+        assert w.changes().push()
+    assert log == {'put': 0, 'get': 0}
+    assert _group_objects(store) == objects
+    assert utils.parse_group_slot(_manifest(store)[3])[1] > 0
+
+    monkeypatch.undo()
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = dict(items)
+        del expected[members[0]]
+        assert dict(r.items()) == expected
+
+
+def test_plain_remote_compacts_then_appends(tmp_path):
+    store = {}
+    members = _keys_in_group(4, 10)
+    items = {k: b'v' for k in members}
+    conn = _seed(store, tmp_path, items)
+    assert store['testdb'][1]['format_version'] == str(utils.GENERATIONAL_FORMAT_VERSION)
+
+    ## A plain slot's base size is unknown: the first push rewrites it into
+    ## a one-generation chain, the next appends.
+    for i in range(2):
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_group_deltas=4) as w:
+            w[members[i]] = b'new'
+            assert w.changes().push()
+        assert len(utils.slot_generations(_manifest(store)[4])) == i + 1
+
+    ## A push without delta generations rewrites the chain into a plain slot
+    ## and the remote returns to format 2.
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w[members[2]] = b'new'
+        assert w.changes().push()
+    assert ':' not in _manifest(store)[4]
+    assert store['testdb'][1]['format_version'] == str(utils.GENERATIONAL_FORMAT_VERSION)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == dict(items, **{k: b'new' for k in members[:3]})
+    assert fsck(conn).orphans == []
+
+
+def test_resolve_group_slot():
+    slot = utils.format_group_slot([('a' * 13, 100), ('b' * 13, 50)], 7)
+    assert utils.parse_group_slot(slot) == ([('a' * 13, 0, 100), ('b' * 13, 100, 50)], 7)
+    infos = [('k', 40, 5, 1), ('j', 130, 3, 2)]
+    assert utils.resolve_group_slot(slot, infos) == [('a' * 13, [('k', 40, 5, 1)]), ('b' * 13, [('j', 30, 3, 2)])]
+    assert utils.resolve_group_slot('c' * 13, infos) == [('c' * 13, infos)]
+    ## An offset at a generation's exact start (a framed group's first frame)
+    ## belongs to that generation, not the one before it.
+    assert utils.resolve_group_slot(slot, [('s', 100, 4, 3), ('z', 0, 4, 4)]) == [('a' * 13, [('z', 0, 4, 4)]), ('b' * 13, [('s', 0, 4, 3)])]
+
+
+def test_compressed_chains_have_no_format():
+    assert utils.format_version_for('zlib') == utils.FRAMED_FORMAT_VERSION
+    assert utils.format_version_for(None, chained=True) == utils.CHAINED_FORMAT_VERSION
+    with pytest.raises(ValueError, match='uncompressed'):
+        utils.format_version_for('zlib', chained=True)
+
+
+@pytest.mark.parametrize('max_deltas', [1, 3])
+def test_delta_limit_boundary(max_deltas):
+    (key,) = _keys_in_group(2, 1)
+
+    def plan(n_deltas):
+        slot = utils.format_group_slot([(f'{i:013x}', 1000) for i in range(n_deltas + 1)])
+        return utils.plan_group_deltas([2], [key], (), {}, {2: slot}, {key: (1, 0, 10)}, NUM_GROUPS, max_deltas, 0.9)
+
+    ## One below the limit appends the max_deltas-th delta (the old chain
+    ## is the base plus max_deltas - 1); at the limit the group is compacted.
+    grown = plan(max_deltas - 1)[2]
+    assert len(grown.chain) == max_deltas and grown.keys == {key}
+    assert plan(max_deltas) == {}
+
+
+def test_validation(tmp_path):
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='max_group_deltas'):
+        open_ebooklet(conn, tmp_path / 'a.blt', flag='n', num_groups=3, max_group_deltas=0)
+    with pytest.raises(ValueError, match='max_group_deltas'):
+        open_ebooklet(conn, tmp_path / 'b.blt', flag='n', num_groups=3, max_group_deltas=2, compression='zlib')
+    with pytest.raises(ValueError, match='compact_dead_ratio'):
+        open_ebooklet(conn, tmp_path / 'c.blt', flag='n', num_groups=3, compact_dead_ratio=0)
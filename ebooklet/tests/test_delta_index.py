@@ -0,0 +1,211 @@
+"""
+Hermetic tests for the incremental remote-index download: commits publish
+per-commit index deltas on a delta_parents chain, and readers on the chain
+replay them instead of re-downloading the whole db object.
+"""
+import pytest
+
+from ebooklet import open_ebooklet, fsck, utils
+from ebooklet.tests import fake_s3
+
+
+def _seed(store, tmp_path, items, num_groups=4):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _count_db_gets(eb):
+    """Count full db-object GETs (ranged header reads are not counted)."""
+    session = eb._remote_session._read_session
+    orig_get = session.get_object
+    calls = []
+
+    def get(key, version_id=None, range_start=None, range_end=None):
+        if key == eb._remote_session.read_db_key and range_start is None:
+            calls.append(key)
+        return orig_get(key, version_id, range_start, range_end)
+    session.get_object = get
+    return calls
+
+
+def _delta_keys(store):
+    return sorted(k for k in store if k.startswith('testdb/_idelta.'))
+
+
+def _full_index(conn, tmp_path, name):
+    with open_ebooklet(conn, tmp_path / name, flag='r') as eb:
+        return dict(eb._remote_index.items()), dict(eb._remote_state.manifest)
+
+
+def test_commit_publishes_delta_chain(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {f'k{i}': b'v' for i in range(20)})
+    ## The creating commit has no parent.
+    assert _delta_keys(store) == []
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w['k1'] = b'x'
+        assert w.changes().push()
+        w['k2'] = b'y'
+        assert w.changes().push()
+
+    session = conn.open('r')
+    assert len(session.delta_parents) == 2
+    assert _delta_keys(store) == sorted(f'testdb/{utils.delta_obj_key(p)}' for p in session.delta_parents)
+    assert fsck(conn).orphans == []
+
+
+def test_reader_pull_applies_deltas(tmp_path):
+    store = {}
+    items = {f'k{i}': f'v{i}'.encode() for i in range(30)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k3'] == b'v3'
+        calls = _count_db_gets(r)
+
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k3'] = b'new'
+            w['extra'] = b'e'
+            del w['k4']
+            w.set_metadata({'a': 1})
+            assert w.changes().push()
+
+        r._pull_remote_index()
+        assert calls == []
+        assert r['k3'] == b'new'
+        assert r['extra'] == b'e'
+        assert 'k4' not in r
+        assert r.get_metadata() == {'a': 1}
+
+        index, manifest = _full_index(conn, tmp_path, 'fresh.blt')
+        assert dict(r._remote_index.items()) == index
+        assert r._remote_state.manifest == manifest
+
+
+def test_reopen_catches_up_over_several_commits(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(30)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        for i in range(3):
+            w[f'k{i}'] = b'round%d' % i
+            assert w.changes().push()
+
+    gets = []
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if key == 'testdb' and range_start is None:
+            gets.append(key)
+        return orig_get(self, key, version_id, range_start, range_end)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert gets == []
+        assert r['k0'] == b'round0'
+        assert r['k2'] == b'round2'
+        assert r._remote_state.remote_ts == r._remote_session.timestamp
+
+
+def test_broken_chain_falls_back_to_full_fetch(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {f'k{i}': b'v' for i in range(10)})
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k1'] == b'v'
+        calls = _count_db_gets(r)
+
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k1'] = b'x'
+            assert w.changes().push()
+        for key in _delta_keys(store):
+            del store[key]
+
+        r._pull_remote_index()
+        assert len(calls) == 1
+        assert r['k1'] == b'x'
+
+
+def test_chain_is_bounded_and_gcd(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'DELTA_CHAIN_LENGTH', 3)
+    store = {}
+    conn = _seed(store, tmp_path, {f'k{i}': b'v' for i in range(10)})
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        for i in range(6):
+            w['k0'] = b'%d' % i
+            assert w.changes().push()
+
+    session = conn.open('r')
+    assert len(session.delta_parents) == 3
+    assert len(_delta_keys(store)) == 3
+    assert fsck(conn).orphans == []
+
+
+def test_large_commit_restarts_chain(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'DELTA_MIN_ENTRIES', 0)
+    store = {}
+    items = {f'k{i}': b'v' for i in range(200)}
+    conn = _seed(store, tmp_path, items, num_groups=20)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0'] == b'v'
+        ## A delta carries every member of each repacked group.
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k0'] = b'small'
+            assert w.changes().push()
+            assert len(_delta_keys(store)) == 1
+            w.update({k: b'big' for k in items})
+            assert w.changes().push()
+
+        ## The oversized commit wrote no delta and dropped the old one.
+        assert conn.open('r').delta_parents == []
+        assert _delta_keys(store) == []
+
+        r._pull_remote_index()
+        assert r['k5'] == b'big'
+
+
+def test_replacement_push_sweeps_deltas(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w['a'] = b'2'
+        assert w.changes().push()
+    assert len(_delta_keys(store)) == 1
+
+    with open_ebooklet(conn, tmp_path / 'n.blt', flag='n') as n:
+        n['b'] = b'3'
+        assert n.changes().push()
+    assert _delta_keys(store) == []
+    assert conn.open('r').delta_parents == []
+
+
+@pytest.mark.parametrize('tamper', ['garbage', 'wrong_parent'])
+def test_inconsistent_delta_is_ignored(tmp_path, tamper):
+    store = {}
+    conn = _seed(store, tmp_path, {f'k{i}': b'v' for i in range(10)})
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k1'] == b'v'
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k1'] = b'x'
+            assert w.changes().push()
+
+        (key,) = _delta_keys(store)
+        data, meta = store[key]
+        if tamper == 'garbage':
+            store[key] = (b'not json', meta)
+        else:
+            store[key] = (data.replace(b'"parent_ts":', b'"parent_ts":1', 1), meta)
+
+        r._pull_remote_index()
+        assert r['k1'] == b'x'
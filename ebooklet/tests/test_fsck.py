@@ -34,7 +34,7 @@ def test_clean_remote_reports_clean(tmp_path):
     conn = _seed(store, 'testdb', tmp_path)
     report = fsck(conn)
     assert report.db_object_exists is True
-    assert report.format_version == utils.SUPPORTED_FORMAT_VERSION
+    assert report.format_version == utils.GENERATIONAL_FORMAT_VERSION
     assert report.orphans == []
     assert report.claimed_but_missing == []
     assert report.unmanifested_group_ids == []
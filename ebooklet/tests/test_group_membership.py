@@ -0,0 +1,144 @@
+"""
+Hermetic tests for the persisted group membership (GroupMembership): a push
+enumerates its affected groups from the record instead of passing over the
+whole remote index, the record follows commits and delta replays across
+sessions, and anything that rewrites the index without it forces a rebuild.
+"""
+from ebooklet import open_ebooklet, utils
+from ebooklet.membership import GroupMembership
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 53
+
+
+def _seed(store, tmp_path, items):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _count(monkeypatch):
+    counts = {'hashed': 0, 'rebuilds': 0}
+    orig_hash = utils.key_to_group_id
+    orig_rebuild = GroupMembership.rebuild
+
+    def key_to_group_id(key, num_groups):
+        counts['hashed'] += 1
+        return orig_hash(key, num_groups)
+
+    def rebuild(self, *args, **kwargs):
+        counts['rebuilds'] += 1
+        return orig_rebuild(self, *args, **kwargs)
+    monkeypatch.setattr(utils, 'key_to_group_id', key_to_group_id)
+    monkeypatch.setattr(GroupMembership, 'rebuild', rebuild)
+    return counts
+
+
+def test_push_skips_the_index_pass(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(400)}
+    conn = _seed(store, tmp_path, items)
+
+    ## The first writer session builds the record once...
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        counts = _count(monkeypatch)
+        w['k1'] = b'one'
+        assert w.changes().push()
+        assert counts['rebuilds'] == 1
+    assert (tmp_path / 'w.blt.remote_index.groups').exists()
+
+    ## ...later sessions reuse it: no rebuild, no hashing of the index.
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        counts = _count(monkeypatch)
+        w['k2'] = b'two'
+        del w['k3']
+        assert w.changes().push()
+        assert counts['rebuilds'] == 0
+        assert counts['hashed'] < 50
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = dict(items, k1=b'one', k2=b'two')
+        del expected['k3']
+        assert dict(r.items()) == expected
+
+
+def test_delta_replay_keeps_the_record_current(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(200)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'a.blt', flag='w') as a:
+        a['k0'] = b'a'
+        assert a.changes().push()
+
+    ## Another writer adds members to k5's group behind a's back.
+    gid = utils.key_to_group_id('k5', NUM_GROUPS)
+    extra = [f'x{i}' for i in range(2000) if utils.key_to_group_id(f'x{i}', NUM_GROUPS) == gid][:5]
+    with open_ebooklet(conn, tmp_path / 'b.blt', flag='w') as b:
+        for key in extra:
+            b[key] = b'b'
+        assert b.changes().push()
+
+    ## a's open replays the delta into its record: the repack of k5's group
+    ## still carries b's members, without a rebuild.
+    with open_ebooklet(conn, tmp_path / 'a.blt', flag='w') as a:
+        counts = _count(monkeypatch)
+        a['k5'] = b'a'
+        assert a.changes().push()
+        assert counts['rebuilds'] == 0
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = dict(items, k0=b'a', k5=b'a')
+        expected.update({key: b'b' for key in extra})
+        assert dict(r.items()) == expected
+
+
+def test_full_refetch_and_lost_record_rebuild(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(200)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'a.blt', flag='w') as a:
+        a['k0'] = b'a'
+        assert a.changes().push()
+
+    gid = utils.key_to_group_id('k7', NUM_GROUPS)
+    extra = [f'x{i}' for i in range(2000) if utils.key_to_group_id(f'x{i}', NUM_GROUPS) == gid][:3]
+    with open_ebooklet(conn, tmp_path / 'b.blt', flag='w') as b:
+        for key in extra:
+            b[key] = b'b'
+        assert b.changes().push()
+
+    ## Break the delta chain: a's open falls back to the full body fetch,
+    ## which the record cannot follow.
+    for key in [k for k in store if '_idelta' in k]:
+        del store[key]
+    with open_ebooklet(conn, tmp_path / 'a.blt', flag='w') as a:
+        counts = _count(monkeypatch)
+        a['k7'] = b'a'
+        assert a.changes().push()
+        assert counts['rebuilds'] == 1
+
+    ## A deleted record is simply rebuilt.
+    (tmp_path / 'a.blt.remote_index.groups').unlink()
+    with open_ebooklet(conn, tmp_path / 'a.blt', flag='w') as a:
+        counts = _count(monkeypatch)
+        a['k8'] = b'a'
+        assert a.changes().push()
+        assert counts['rebuilds'] == 1
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = dict(items, k0=b'a', k7=b'a', k8=b'a')
+        expected.update({key: b'b' for key in extra})
+        assert dict(r.items()) == expected
+
+
+def test_readers_keep_no_record(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r._membership is None
+        assert r['a'] == b'1'
+    assert not (tmp_path / 'r.blt.remote_index.groups').exists()
@@ -0,0 +1,140 @@
+"""
+Tests for hedged point reads (hedge_reads): a GET outstanding past the
+latency percentile gets a duplicate and the first definitive answer wins,
+within a budget of extra requests; batch reads are never hedged.
+"""
+import re
+import threading
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet, flow
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 53
+
+
+class Resp:
+    def __init__(self, status, data=b''):
+        self.status = status
+        self.data = data
+
+
+def _warm(hedger, n=flow.HEDGE_MIN_SAMPLES):
+    for _ in range(n):
+        assert hedger.call(lambda: Resp(200)).status == 200
+
+
+def test_no_hedging_before_enough_samples():
+    hedger = flow.HedgedReads(2, budget=1.0)
+    try:
+        assert hedger.delay() is None
+        assert hedger.call(lambda: (time.sleep(0.05), Resp(200))[1]).status == 200
+        assert hedger.stats() == {'requests': 1, 'hedged': 0, 'won': 0}
+    finally:
+        hedger.close()
+
+
+def test_slow_request_is_hedged_and_the_duplicate_wins():
+    hedger = flow.HedgedReads(2)
+    calls = []
+    lock = threading.Lock()
+
+    def get():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1.0)
+            return Resp(200, b'slow')
+        return Resp(200, b'fast')
+    try:
+        _warm(hedger, 40)
+        start = time.monotonic()
+        assert hedger.call(get).data == b'fast'
+        assert time.monotonic() - start < 0.5
+        assert hedger.stats() == {'requests': 41, 'hedged': 1, 'won': 1}
+    finally:
+        hedger.close()
+
+
+def test_budget_caps_hedges():
+    hedger = flow.HedgedReads(4, budget=0.05)
+    try:
+        _warm(hedger, 20)
+        for _ in range(3):
+            hedger.call(lambda: (time.sleep(0.02), Resp(200))[1])
+        ## 23 requests: one hedge fits in 5%.
+        assert hedger.stats()['hedged'] == 1
+    finally:
+        hedger.close()
+
+
+def test_server_error_waits_for_the_other_request():
+    hedger = flow.HedgedReads(2)
+    calls = []
+    lock = threading.Lock()
+
+    def get():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.05)
+            return Resp(503)
+        time.sleep(0.2)
+        return Resp(200, b'ok')
+    try:
+        _warm(hedger, 40)
+        assert hedger.call(get).data == b'ok'
+        assert hedger.stats()['won'] == 1
+    finally:
+        hedger.close()
+
+
+def test_budget_validation(tmp_path):
+    with pytest.raises(ValueError, match='hedge_budget'):
+        flow.HedgedReads(2, budget=0)
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='hedge_budget'):
+        open_ebooklet(conn, tmp_path / 'a.blt', flag='n', num_groups=3, hedge_reads=True, hedge_budget=2)
+
+
+def test_point_reads_hedge_slow_gets(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i}': bytes([i % 251]) * 100 for i in range(200)}
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+
+    ## Every 30th group GET stalls - once; its duplicate is answered at once.
+    state = {'n': 0}
+    lock = threading.Lock()
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if re.match(r'testdb/\d+\.', key):
+            with lock:
+                state['n'] += 1
+                stall = state['n'] % 30 == 0
+            time.sleep(1.0 if stall else 0.001)
+        return orig_get(self, key, version_id, range_start, range_end)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', hedge_reads=True, hedge_budget=0.1) as r:
+        start = time.monotonic()
+        for key in list(items)[:100]:
+            assert r[key] == items[key]
+        stats = r.hedge_stats
+        assert stats['requests'] == 100
+        assert stats['hedged'] >= 2 and stats['won'] >= 2
+        assert time.monotonic() - start < 2.0
+
+        ## Batch reads are not hedged.
+        r.load_items(list(items)[100:])
+        assert r.hedge_stats['requests'] == 100
+
+    with open_ebooklet(conn, tmp_path / 'r2.blt', flag='r') as r:
+        assert r.hedge_stats is None
@@ -17,7 +17,7 @@ import pytest
 import msgspec
 
 from ebooklet import open_ebooklet, utils
-from ebooklet.journal import JournalRecord, JOURNAL_SLOT
+from ebooklet.journal import JournalState, JOURNAL_SLOT
 from ebooklet.tests import fake_s3
 
 
@@ -130,10 +130,9 @@ def test_delete_journaled_immediately(tmp_path):
 
     with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as eb:
         del eb['k1']
-        raw = eb._local_file.get_reserved(JOURNAL_SLOT)
-        assert raw is not None
-        record = msgspec.json.decode(raw, type=JournalRecord)
-        assert 'k1' in record.deletes
+        assert eb._local_file.get_reserved(JOURNAL_SLOT) is not None
+        journal = JournalState.load(eb._local_file, tmp_path / 'w.blt.journal')
+        assert 'k1' in journal.deletes
 
 
 def test_union_changelog_covers_stale_journal(tmp_path):
@@ -0,0 +1,209 @@
+"""
+Hermetic tests for the journal's write-ahead log: a persist appends the keys
+changed since the previous one to <local file>.journal instead of rewriting
+the checkpoint in reserved slot 1, load replays the log the checkpoint names,
+and a torn or stale log never resurrects or loses state the checkpoint holds.
+"""
+import booklet
+import pytest
+
+from ebooklet import journal as journal_mod
+from ebooklet import open_ebooklet
+from ebooklet.journal import JournalState, JOURNAL_SLOT
+from ebooklet.tests import fake_s3
+
+
+@pytest.fixture
+def local(tmp_path):
+    with booklet.open(tmp_path / 'l.blt', 'n', key_serializer='str', value_serializer='bytes') as f:
+        yield f, tmp_path / 'l.blt.journal'
+
+
+def _sets(journal):
+    return set(journal.written), set(journal.deletes), dict(journal.pushed)
+
+
+def test_persist_appends_changes_only(local):
+    f, log_path = local
+    journal = JournalState.load(f, log_path)
+    for i in range(100):
+        journal.record_write(f'k{i}')
+    journal.persist(f)
+    checkpoint = f.get_reserved(JOURNAL_SLOT)
+    size = log_path.stat().st_size
+
+    journal.record_write('k100')
+    journal.record_delete('k3')
+    journal.discard_written('k4')
+    journal.record_pushed(2, 'abc', 10, 'ff')
+    journal.persist(f)
+    journal.clear_committed(written_keys=['k5'])
+    journal.persist(f)
+
+    ## The checkpoint was not rewritten; the log grew by two small batches.
+    assert f.get_reserved(JOURNAL_SLOT) == checkpoint
+    assert size < log_path.stat().st_size < size + 200
+
+    loaded = JournalState.load(f, log_path)
+    assert _sets(loaded) == _sets(journal)
+    assert 'k3' in loaded.deletes and 'k4' not in loaded.written and 'k5' not in loaded.written
+
+    ## Replay resumes appending after the last batch.
+    loaded.record_write('k4')
+    loaded.persist(f)
+    assert _sets(JournalState.load(f, log_path)) == _sets(loaded)
+
+
+def test_scalar_change_checkpoints(local):
+    f, log_path = local
+    journal = JournalState.load(f, log_path)
+    journal.record_write('a')
+    journal.persist(f)
+    journal.record_write('b')
+    journal.persist(f)
+    checkpoint = f.get_reserved(JOURNAL_SLOT)
+
+    journal.set_meta_pending(True)
+    journal.persist(f)
+    assert f.get_reserved(JOURNAL_SLOT) != checkpoint
+    assert log_path.stat().st_size == journal_mod._LOG_HEADER_LEN
+    loaded = JournalState.load(f, log_path)
+    assert loaded.meta_pending and loaded.written == {'a', 'b'}
+
+
+def test_torn_tail_is_dropped_and_overwritten(local):
+    f, log_path = local
+    journal = JournalState.load(f, log_path)
+    journal.record_write('a')
+    journal.record_write('b')
+    journal.persist(f)
+    journal.record_delete('a')
+    journal.persist(f)
+    intact = log_path.stat().st_size
+    journal.record_write('c')
+    journal.persist(f)
+
+    ## A crash mid-append leaves a partial last frame.
+    with open(log_path, 'r+b') as fh:
+        fh.truncate(log_path.stat().st_size - 3)
+    loaded = JournalState.load(f, log_path)
+    assert loaded.written == {'b'} and loaded.deletes == {'a'}
+
+    loaded.record_write('d')
+    loaded.persist(f)
+    assert log_path.stat().st_size > intact
+    reloaded = JournalState.load(f, log_path)
+    assert reloaded.written == {'b', 'd'} and reloaded.deletes == {'a'}
+
+
+def test_stale_or_missing_log_is_ignored(local):
+    f, log_path = local
+    journal = JournalState.load(f, log_path)
+    journal.record_write('a')
+    journal.record_write('b')
+    journal.persist(f)
+    journal.record_delete('a')
+    journal.persist(f)
+    stale = log_path.read_bytes()
+
+    ## A newer checkpoint starts a new log; the old one no longer applies.
+    journal.set_compression('zstd')
+    journal.persist(f)
+    journal.record_delete('b')
+    journal.persist(f)
+    log_path.write_bytes(stale)
+    loaded = JournalState.load(f, log_path)
+    assert loaded.written == {'b'} and loaded.deletes == {'a'}
+
+    log_path.unlink()
+    assert JournalState.load(f, log_path).deletes == {'a'}
+    assert JournalState.load(f).deletes == {'a'}
+
+
+def test_log_folds_into_checkpoint(local, monkeypatch):
+    f, log_path = local
+    monkeypatch.setattr(journal_mod, 'LOG_CHECKPOINT_MIN_BYTES', 0)
+    journal = JournalState.load(f, log_path)
+    for i in range(10):
+        journal.record_write(f'k{i}')
+    journal.persist(f)
+    checkpoint = f.get_reserved(JOURNAL_SLOT)
+    for i in range(10, 60):
+        journal.record_write(f'k{i}')
+        journal.persist(f)
+    assert f.get_reserved(JOURNAL_SLOT) != checkpoint
+    assert log_path.stat().st_size < 4 * len(f.get_reserved(JOURNAL_SLOT))
+    assert JournalState.load(f, log_path).written == {f'k{i}' for i in range(60)}
+
+
+def test_session_round_trip(tmp_path):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=3) as eb:
+        eb.update({f'k{i}': b'v' for i in range(20)})
+        assert eb.changes().push()
+
+    path = tmp_path / 'w.blt'
+    with open_ebooklet(conn, path, flag='w') as eb:
+        eb['new'] = b'new'
+        eb.sync()
+        del eb['k1']
+        del eb['k2']
+    assert path.parent.joinpath(path.name + '.journal').exists()
+
+    with open_ebooklet(conn, path, flag='w') as eb:
+        assert set(eb.changes().pending_deletes) == {'k1', 'k2'}
+        assert eb.changes().push()
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        data = dict(r.items())
+    assert 'new' in data and 'k1' not in data and 'k2' not in data
+
+
+def test_missing_log_flags_lost_changes(local):
+    f, log_path = local
+    journal = JournalState.load(f, log_path)
+    journal.record_write('a')
+    journal.record_write('b')
+    journal.persist(f)
+    ## A delete-only batch lives in the log alone.
+    journal.record_delete('a')
+    journal.persist(f)
+    assert log_path.stat().st_size > journal_mod._LOG_HEADER_LEN
+
+    log_path.unlink()
+    loaded = JournalState.load(f, log_path)
+    assert loaded.log_lost and not loaded.deletes
+    ## The flag is checkpointed, so it survives until a push clears it.
+    loaded.persist(f)
+    assert JournalState.load(f, log_path).log_lost
+
+    log_path.write_bytes(journal_mod.LOG_MAGIC + bytes(16))
+    assert JournalState.load(f, log_path).log_lost
+
+
+def test_session_warns_about_a_lost_log(tmp_path, caplog):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=3) as eb:
+        eb.update({f'k{i}': b'v' for i in range(20)})
+        assert eb.changes().push()
+
+    path = tmp_path / 'w.blt'
+    log_path = path.parent.joinpath(path.name + '.journal')
+    with open_ebooklet(conn, path, flag='w') as eb:
+        eb['new'] = b'new'
+        eb.sync()
+        del eb['k1']
+    log_path.unlink()
+
+    with pytest.warns(UserWarning, match='journal log'):
+        eb = open_ebooklet(conn, path, flag='w')
+    with eb:
+        assert not eb.changes().pending_deletes
+        assert eb.changes().push()
+    assert 'journal log was lost' in caplog.text
+
+    ## The push settled the flag.
+    with open_ebooklet(conn, path, flag='w') as eb:
+        assert not eb._journal.log_lost
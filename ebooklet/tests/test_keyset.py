@@ -0,0 +1,93 @@
+"""
+Hermetic tests for KeySet, the compact set behind the journal's written and
+deletes: it must behave exactly like a set of str on both sides of the
+switch to the packed table.
+"""
+import random
+
+import booklet
+import pytest
+
+from ebooklet import keyset
+from ebooklet.journal import JournalState
+from ebooklet.keyset import KeySet
+
+
+@pytest.fixture(autouse=True)
+def small_table(monkeypatch):
+    monkeypatch.setattr(keyset, 'COMPACT_MIN_KEYS', 8)
+
+
+class _Colliding(str):
+    def __hash__(self):
+        return 7
+
+
+def test_matches_set_under_random_mutation():
+    rng = random.Random(0)
+    ks = KeySet()
+    model = set()
+    modes = set()
+    for _ in range(20000):
+        key = f'k{rng.randrange(300)}'
+        ## Phases that grow the set and drain it again.
+        if rng.random() < (0.8 if (_ // 2000) % 2 == 0 else 0.2):
+            ks.add(key)
+            model.add(key)
+        else:
+            ks.discard(key)
+            model.discard(key)
+        assert (key in ks) == (key in model)
+        modes.add(type(ks._store) is set)
+    assert modes == {True, False}
+    assert len(ks) == len(model)
+    assert set(ks) == model and ks == model
+    assert all((f'k{i}' in ks) == (f'k{i}' in model) for i in range(400))
+
+
+def test_hash_collisions_compare_exact_keys():
+    keys = [_Colliding(f'c{i}') for i in range(20)]
+    ks = KeySet(keys[:15])
+    assert type(ks._store) is tuple and set(ks._store[1]) == {7}
+    assert all(key in ks for key in keys[:15])
+    assert not any(key in ks for key in keys[15:])
+    ks.discard(keys[3])
+    assert keys[3] not in ks and len(ks) == 14
+    ks.add(keys[3])
+    assert keys[3] in ks and len(ks) == 15
+
+
+def test_set_operators():
+    ks = KeySet(f'k{i}' for i in range(50))
+    assert ks & {'k1', 'x'} == {'k1'}
+    assert ks - {f'k{i}' for i in range(1, 50)} == {'k0'}
+    assert isinstance(ks & {'k1'}, set)
+    ks -= {f'k{i}' for i in range(10, 50)}
+    assert ks == {f'k{i}' for i in range(10)}
+    ks -= ks
+    assert not ks and type(ks._store) is set
+
+
+def test_journal_invariant_and_round_trip(tmp_path):
+    with booklet.open(tmp_path / 'l.blt', 'n', key_serializer='str', value_serializer='bytes') as f:
+        log_path = tmp_path / 'l.blt.journal'
+        journal = JournalState.load(f, log_path)
+        for i in range(200):
+            journal.record_write(f'k{i}')
+        for i in range(0, 200, 3):
+            journal.record_delete(f'k{i}')
+        assert isinstance(journal.written, KeySet) and type(journal.written._store) is tuple
+        assert not set(journal.written) & set(journal.deletes)
+        journal.persist(f)
+
+        journal.clear_committed({f'k{i}' for i in range(1, 200, 3)}, ())
+        journal.record_write('k0')
+        assert 'k0' in journal.written and 'k0' not in journal.deletes
+        journal.persist(f)
+
+        loaded = JournalState.load(f, log_path)
+        assert set(loaded.written) == {'k0'} | {f'k{i}' for i in range(2, 200, 3)}
+        assert set(loaded.deletes) == {f'k{i}' for i in range(3, 200, 3)}
+
+        loaded.clear_committed(loaded.written, loaded.deletes)
+        assert not loaded.written and not loaded.deletes
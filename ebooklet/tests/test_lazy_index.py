@@ -0,0 +1,164 @@
+"""
+Hermetic tests for lazy_index=True: read-only sessions that resolve keys with
+ranged GETs into the remote db object's index section instead of downloading
+the .remote_index sidecar.
+"""
+import io
+import threading
+
+import booklet
+import pytest
+
+from ebooklet import open_ebooklet
+from ebooklet import lazy_index
+from ebooklet.lazy_index import LazyRemoteIndex
+from ebooklet.tests import fake_s3
+
+
+def _seed(store, tmp_path, items, num_groups=7):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _record_db_gets(monkeypatch):
+    """Record (range_start, range_end) of every GET of the db object itself."""
+    gets = []
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if key == 'testdb':
+            gets.append((range_start, range_end))
+        return orig_get(self, key, version_id, range_start, range_end)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    return gets
+
+
+def test_cold_reader_reads_a_few_keys_with_ranged_gets(tmp_path, monkeypatch):
+    store = {}
+    items = {f'key{i:05d}': f'value{i}'.encode() for i in range(50000)}
+    conn = _seed(store, tmp_path, items)
+    db_size = len(store['testdb'][0])
+
+    gets = _record_db_gets(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', lazy_index=True) as r:
+        assert isinstance(r._remote_index, LazyRemoteIndex)
+        for key in ('key00003', 'key25000', 'key49999'):
+            assert r[key] == items[key]
+        assert r.get('missing') is None
+        assert 'key00010' in r
+
+    assert not (tmp_path / 'r.blt.remote_index').exists()
+    assert all(start is not None for start, _end in gets)
+    ## The pin plus at most two pages per lookup.
+    assert len(gets) <= 1 + 2 * 5
+    fetched = sum(end - start + 1 for start, end in gets)
+    assert fetched < db_size / 3
+
+
+def test_whole_index_operations(tmp_path):
+    store = {}
+    items = {f'k{i}': bytes([i]) for i in range(50)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', lazy_index=True) as r:
+        assert len(r) == 50
+        assert set(r.keys()) == set(items)
+        assert dict(r.items()) == items
+        assert dict(r.get_items(['k1', 'k2'])) == {'k1': b'\x01', 'k2': b'\x02'}
+
+
+def test_lazy_reader_follows_commits(tmp_path):
+    store = {}
+    items = {f'k{i}': b'old' for i in range(40)}
+    conn = _seed(store, tmp_path, items, num_groups=1)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', lazy_index=True) as r:
+        assert r['k1'] == b'old'
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k1'] = b'new'
+            w['k2'] = b'new'
+            del w['k3']
+            assert w.changes().push()
+
+        ## The cached pages belong to the old object: the stale generation
+        ## 404s and the re-check protocol re-pins the index.
+        assert r['k2'] == b'new'
+        r.changes().pull()
+        assert r['k1'] == b'new'
+        assert 'k3' not in r
+        assert r._remote_state.remote_ts == conn.open('r').timestamp
+
+
+def test_page_from_a_newer_object_repins(tmp_path):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(40)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', lazy_index=True) as r:
+        index = r._remote_index
+        version = index.version
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k5'] = b'changed'
+            assert w.changes().push()
+
+        index._current.pages.clear()
+        assert r['k5'] == b'changed'
+        assert index.version > version
+        assert r._remote_state.manifest == index.manifest
+
+
+def test_chain_walk_matches_booklet(tmp_path):
+    path = tmp_path / 'index.blt'
+    items = {f'key{i}': i.to_bytes(15, 'little') for i in range(3000)}
+    with booklet.FixedLengthValue(path, 'n', key_serializer='str', value_len=15) as f:
+        f.update(items)
+    data = path.read_bytes()
+
+    pin = lazy_index._Pin()
+    pin.parse_index_header(data[:lazy_index._BLT_HEADER_LEN])
+    assert pin.value_len == 15
+    view = io.BytesIO(data)
+    for key in ('key0', 'key1500', 'key2999', 'missing'):
+        assert lazy_index._chain_value(view, key, pin.n_buckets, pin.value_len, pin.index_offset, pin.key_serializer) == items.get(key)
+
+
+def test_page_gets_run_outside_the_session_lock(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(40)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', lazy_index=True) as r:
+        index = r._remote_index
+        with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+            w['k5'] = b'changed'
+            assert w.changes().push()
+
+        ## Every GET (stale page, re-pin, new pages) checks from another
+        ## thread that the session lock is free.
+        held = []
+        orig_get = fake_s3.FakeS3Session.get_object
+
+        def get(self, key, version_id=None, range_start=None, range_end=None):
+            if key == 'testdb':
+                free = []
+                t = threading.Thread(target=lambda: free.append(r._index_lock.acquire(timeout=5) and (r._index_lock.release() or True)))
+                t.start()
+                t.join()
+                held.append(not free[0])
+            return orig_get(self, key, version_id, range_start, range_end)
+        monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+
+        index._current.pages.clear()
+        assert r['k5'] == b'changed'
+        assert dict(r.get_items(['k1', 'k5'])) == {'k1': b'v', 'k5': b'changed'}
+        assert held and not any(held)
+
+
+def test_lazy_index_is_reader_only(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {'a': b'1'})
+    with pytest.raises(ValueError, match='read-only'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='w', lazy_index=True)
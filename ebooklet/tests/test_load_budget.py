@@ -0,0 +1,115 @@
+"""
+Hermetic tests for the session-wide bytes-in-flight budget: load_items()
+charges each ranged GET its length against max_inflight_bytes - the same
+budget push() charges - so the bytes held at once stay under the cap, and a
+range larger than the cap still loads, alone.
+"""
+import re
+import threading
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet, utils
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 11
+
+
+def _seed(store, tmp_path):
+    conn = fake_s3.FakeS3Connection(store, 'testdb', threads=8)
+    items = {f'k{i}': bytes([i % 251]) * 2000 for i in range(200)}
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn, items
+
+
+def _track_gets(monkeypatch):
+    """Peak concurrent group GETs and the peak bytes they held."""
+    state = {'running': 0, 'bytes': 0, 'peak': 0, 'peak_bytes': 0, 'largest': 0}
+    lock = threading.Lock()
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if not re.match(r'testdb/\d+\.', key):
+            return orig_get(self, key, version_id, range_start, range_end)
+        size = range_end - range_start + 1
+        with lock:
+            state['running'] += 1
+            state['bytes'] += size
+            state['peak'] = max(state['peak'], state['running'])
+            state['peak_bytes'] = max(state['peak_bytes'], state['bytes'])
+            state['largest'] = max(state['largest'], size)
+        try:
+            time.sleep(0.01)
+            return orig_get(self, key, version_id, range_start, range_end)
+        finally:
+            with lock:
+                state['running'] -= 1
+                state['bytes'] -= size
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    return state
+
+
+def test_load_items_stays_under_the_cap(tmp_path, monkeypatch):
+    store = {}
+    conn, items = _seed(store, tmp_path)
+    state = _track_gets(monkeypatch)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r.load_items() == {}
+    assert state['peak'] > 1
+    range_size = state['largest']
+
+    ## Room for two ranges at a time.
+    state.update(peak=0, peak_bytes=0)
+    with open_ebooklet(conn, tmp_path / 'r2.blt', flag='r', max_inflight_bytes=2 * range_size + 1) as r:
+        assert r.load_items() == {}
+        assert r._inflight.in_flight == 0
+        assert dict(r.items()) == items
+    assert 1 < state['peak'] <= 2
+    assert state['peak_bytes'] <= 2 * range_size + 1
+
+
+def test_oversized_ranges_load_alone(tmp_path, monkeypatch):
+    store = {}
+    conn, items = _seed(store, tmp_path)
+    state = _track_gets(monkeypatch)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', max_inflight_bytes=100) as r:
+        assert r.load_items() == {}
+        assert dict(r.items()) == items
+    assert state['peak'] == 1
+
+
+def test_push_and_load_share_the_budget(tmp_path):
+    store = {}
+    conn, _items = _seed(store, tmp_path)
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_inflight_bytes=10000) as w:
+        budget = w._inflight
+        charged = []
+        orig_acquire, orig_try = budget.acquire, budget.try_acquire
+        budget.acquire = lambda n, cancelled=None: charged.append(n) or orig_acquire(n, cancelled)
+        budget.try_acquire = lambda n: charged.append(n) or orig_try(n)
+
+        w.load_items(['k1', 'k2'])
+        n_load = len(charged)
+        assert n_load
+        w['k3'] = b'new'
+        assert w.changes().push()
+        assert len(charged) > n_load
+        assert budget.in_flight == 0
+
+
+def test_a_raising_load_releases_its_bytes(tmp_path, monkeypatch):
+    store = {}
+    conn, _items = _seed(store, tmp_path)
+
+    def boom(*args, **kwargs):
+        time.sleep(0.01)
+        raise RuntimeError('boom')
+    monkeypatch.setattr(utils, 'get_remote_group_values', boom)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', max_inflight_bytes=10**6) as r:
+        with pytest.raises(RuntimeError):
+            r.load_items()
+        assert r._inflight.in_flight == 0
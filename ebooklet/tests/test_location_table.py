@@ -0,0 +1,78 @@
+"""
+Hermetic tests for utils.LocationTable, the compact array-backed loc_map
+the push captures for every live local value.
+"""
+import sys
+
+import pytest
+
+from ebooklet import open_ebooklet, utils
+from ebooklet.tests import fake_s3
+
+
+def _table(records):
+    table = utils.LocationTable()
+    for key, ts, off, ln in records:
+        table.append(key.encode(), ts, off, ln)
+    return table
+
+
+def test_dict_protocol():
+    records = [(f'key-{i}', 1_700_000_000_000_000 + i, 200 + 37 * i, i % 90) for i in range(5000)]
+    records.append(('ünïcode ✓', 5, 6, 7))
+    table = _table(records)
+
+    assert len(table) == len(records)
+    assert list(table) == [r[0] for r in records]
+    assert dict(table.items()) == {k: (ts, off, ln) for k, ts, off, ln in records}
+    for key, ts, off, ln in records[::97]:
+        assert key in table
+        assert table[key] == (ts, off, ln)
+        assert table.get(key) == (ts, off, ln)
+    assert 'missing' not in table
+    assert table.get('missing') is None
+    with pytest.raises(KeyError):
+        table['missing']
+
+    ## Assignment updates in place or appends (index kept current).
+    table['key-3'] = (9, 10, 11)
+    table['new'] = (1, 2, 3)
+    assert table['key-3'] == (9, 10, 11)
+    assert table['new'] == (1, 2, 3)
+    assert len(table) == len(records) + 1
+    for i in range(3000):
+        table.append(f'more-{i}'.encode(), i, i, i)
+    assert table['more-2999'] == (2999, 2999, 2999)
+    assert table['key-4999'] == records[4999][1:]
+
+
+def test_smaller_than_a_dict_of_tuples():
+    records = [(f'station/{i:08d}', 1_700_000_000_000_000 + i, 10_000_000 + 50 * i, 40) for i in range(20000)]
+    table = _table(records)
+    table.get(records[0][0])   # build the index
+
+    table_bytes = sum(sys.getsizeof(x) for x in (table._keys, table._key_ends, table.ts, table.offsets, table.lengths, table._slots))
+    as_dict = {k: (ts, off, ln) for k, ts, off, ln in records}
+    dict_bytes = sys.getsizeof(as_dict) + sum(
+        sys.getsizeof(k) + sys.getsizeof(v) + sum(sys.getsizeof(x) for x in v) for k, v in as_dict.items())
+    assert table_bytes * 3 < dict_bytes
+
+
+def test_push_round_trip_with_location_table(tmp_path):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i}': f'value {i}'.encode() * 3 for i in range(400)}
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=7) as eb:
+        eb.update(items)
+        changes = eb.changes()
+        changes.build_changelog()
+        assert isinstance(changes._loc_map, utils.LocationTable)
+        assert len(changes._loc_map) == 400
+        assert changes.push()
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w['k5'] = b'changed'
+        assert w.changes().push()
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == dict(items, k5=b'changed')
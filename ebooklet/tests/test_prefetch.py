@@ -0,0 +1,159 @@
+"""
+Hermetic tests for background prefetch (EVariableLengthValue.prefetch) and
+read-ahead iteration (keys/items/values(read_ahead=N)).
+"""
+import threading
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet, Prefetch, RemoteIntegrityError
+from ebooklet.tests import fake_s3
+
+
+def _seed(store, tmp_path, items, num_groups=7):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _record_group_gets(monkeypatch, delay=0.0):
+    """Record group-object GETs and the peak number running at once."""
+    state = {'gets': [], 'running': 0, 'peak': 0}
+    lock = threading.Lock()
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if key.startswith('testdb/') and '_idelta' not in key:
+            with lock:
+                state['gets'].append(key)
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            try:
+                time.sleep(delay)
+                return orig_get(self, key, version_id, range_start, range_end)
+            finally:
+                with lock:
+                    state['running'] -= 1
+        return orig_get(self, key, version_id, range_start, range_end)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    return state
+
+
+def test_prefetch_materializes_in_background(tmp_path, monkeypatch):
+    store = {}
+    items = {f'st{i:04d}': f'value {i}'.encode() * 20 for i in range(300)}
+    conn = _seed(store, tmp_path, items)
+    wanted = sorted(items)[100:200]
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        state = _record_group_gets(monkeypatch)
+        handle = r.prefetch(wanted)
+        assert isinstance(handle, Prefetch)
+        assert handle.n_keys == len(wanted)
+        assert handle.wait(10) == {}
+        assert handle.done()
+        n_gets = len(state['gets'])
+        assert 0 < n_gets <= 7
+
+        ## Everything prefetched is local now: no further GETs.
+        assert dict(r.get_items(wanted)) == {k: items[k] for k in wanted}
+        assert len(state['gets']) == n_gets
+
+        ## A second prefetch of the same keys has nothing to do.
+        again = r.prefetch(wanted)
+        again.result(10)
+        assert again.n_keys == 0
+
+
+def test_prefetch_by_predicate(tmp_path):
+    store = {}
+    items = {f'{p}{i}': b'x' for p in ('a_', 'b_') for i in range(50)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        handle = r.prefetch(lambda key: key.startswith('b_'))
+        handle.result(10)
+        assert handle.n_keys == 50
+        assert set(r._local_file.keys()) >= {f'b_{i}' for i in range(50)}
+        assert not any(k.startswith('a_') for k in r._local_file.keys())
+
+
+def test_prefetch_respects_pending_writes(tmp_path):
+    store = {}
+    conn = _seed(store, tmp_path, {f'k{i}': b'remote' for i in range(20)})
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w['k3'] = b'local'
+        w.prefetch().result(10)
+        assert w['k3'] == b'local'
+        assert w['k4'] == b'remote'
+
+
+def test_max_inflight_bytes_serializes_large_ranges(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': bytes([i % 251]) * 4000 for i in range(200)}
+    conn = _seed(store, tmp_path, items)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        state = _record_group_gets(monkeypatch, delay=0.02)
+        r.prefetch(max_inflight_bytes=1000).result(30)
+        assert len(state['gets']) >= 7
+        assert state['peak'] == 1
+
+    with open_ebooklet(conn, tmp_path / 'r2.blt', flag='r') as r:
+        state = _record_group_gets(monkeypatch, delay=0.02)
+        r.prefetch().result(30)
+        assert state['peak'] > 1
+
+    with pytest.raises(ValueError, match='max_inflight_bytes'):
+        r.prefetch(['k1'], max_inflight_bytes=0)
+
+
+def test_prefetch_failures_surface_through_the_handle(tmp_path):
+    store = {}
+    items = {f'k{i}': b'v' for i in range(30)}
+    conn = _seed(store, tmp_path, items, num_groups=1)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        for key in [k for k in store if k.startswith('testdb/') and '_idelta' not in k]:
+            del store[key]
+        handle = r.prefetch()
+        assert handle.wait(10)
+        with pytest.raises(RemoteIntegrityError):
+            handle.result()
+
+
+@pytest.mark.parametrize('num_groups', [7, None])
+def test_read_ahead_iteration(tmp_path, monkeypatch, num_groups):
+    store = {}
+    items = {f'k{i:04d}': f'v{i}'.encode() for i in range(600)}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items(read_ahead=2)) == items
+    with open_ebooklet(conn, tmp_path / 'r2.blt', flag='r') as r:
+        assert sorted(r.values(read_ahead=1)) == sorted(items.values())
+        assert set(r.keys(read_ahead=3)) == set(items)
+
+
+def test_abandoned_read_ahead_and_close(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': b'v' * 100 for i in range(400)}
+    conn = _seed(store, tmp_path, items, num_groups=13)
+
+    r = open_ebooklet(conn, tmp_path / 'r.blt', flag='r')
+    _record_group_gets(monkeypatch, delay=0.01)
+    it = r.items(read_ahead=4)
+    key, value = next(it)
+    assert items[key] == value
+    it.close()
+    background = r.prefetch()
+    r.close()
+    assert background.done()
+    assert r._prefetch_pool is None
@@ -0,0 +1,170 @@
+"""
+Hermetic tests for the per-group push pipeline: a group's pack/PUT starts as
+soon as its OWN member pulls land (no barrier behind other groups' pulls),
+pull failures stay per-group, and max_inflight_bytes bounds the bytes in
+flight across the pull and upload stages.
+"""
+import logging
+import re
+import threading
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet, utils
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 5
+
+
+def _keys_in_group(gid, n, prefix='k'):
+    keys = []
+    i = 0
+    while len(keys) < n:
+        key = f'{prefix}{i}'
+        if utils.key_to_group_id(key, NUM_GROUPS) == gid:
+            keys.append(key)
+        i += 1
+    return keys
+
+
+def _seed(store, tmp_path, items):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn
+
+
+def _is_group_object(key):
+    return re.match(r'testdb/\d+\.[0-9a-f]{13}$', key) is not None
+
+
+def test_unpulled_group_uploads_during_slow_pull(tmp_path, monkeypatch):
+    store = {}
+    pulled = _keys_in_group(0, 20)
+    conn = _seed(store, tmp_path, {k: b'old' * 100 for k in pulled})
+    fresh = _keys_in_group(1, 3, prefix='new')
+
+    put_seen = threading.Event()
+    put_before_pull_done = []
+    orig_get = fake_s3.FakeS3Session.get_object
+    orig_put = fake_s3.FakeS3Session.put_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if _is_group_object(key) and range_start is not None:
+            ## Hold group 0's pull until group 1's PUT shows up (or give up).
+            put_before_pull_done.append(put_seen.wait(5))
+        return orig_get(self, key, version_id, range_start, range_end)
+
+    def put(self, key, obj, metadata=None, content_type=None):
+        if _is_group_object(key) and key.startswith('testdb/1.'):
+            put_seen.set()
+        return orig_put(self, key, obj, metadata, content_type)
+
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', put)
+
+    ## A fresh writer has nothing local: touching group 0 pulls its other
+    ## members; group 1 is new on the remote and pulls nothing.
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w[pulled[0]] = b'changed'
+        for key in fresh:
+            w[key] = b'fresh'
+        t0 = time.monotonic()
+        assert w.changes().push()
+        assert time.monotonic() - t0 < 5
+
+    assert put_before_pull_done and all(put_before_pull_done)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', orig_get)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = {k: b'old' * 100 for k in pulled}
+        expected[pulled[0]] = b'changed'
+        expected.update({k: b'fresh' for k in fresh})
+        assert dict(r.items()) == expected
+
+
+def test_failed_pull_does_not_hold_back_other_groups(tmp_path, monkeypatch, caplog):
+    store = {}
+    pulled = _keys_in_group(0, 10)
+    conn = _seed(store, tmp_path, {k: b'v' * 50 for k in pulled})
+    fresh = _keys_in_group(2, 2, prefix='new')
+
+    orig_get = fake_s3.FakeS3Session.get_object
+
+    def get(self, key, version_id=None, range_start=None, range_end=None):
+        if _is_group_object(key):
+            return fake_s3.FakeResp(500, error={'status': 500, 'code': 'InternalError'})
+        return orig_get(self, key, version_id, range_start, range_end)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', get)
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w') as w:
+        w[pulled[0]] = b'changed'
+        for key in fresh:
+            w[key] = b'fresh'
+        with caplog.at_level(logging.INFO, logger='ebooklet.push'):
+            result = w.changes().push()
+        assert not result
+        assert set(result.failures) == {0}
+
+    ## The failed group left the totals: the summary agrees with the records.
+    msgs = [r.getMessage() for r in caplog.records if r.name == 'ebooklet.push']
+    (summary,) = [m for m in msgs if m.startswith('push upload finished')]
+    assert '1/1 group(s)' in summary
+
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', orig_get)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r[pulled[0]] == b'v' * 50
+        assert all(r[k] == b'fresh' for k in fresh)
+
+
+def test_max_inflight_bytes_bounds_both_stages(tmp_path, monkeypatch):
+    store = {}
+    items = {f'k{i}': bytes([i % 251]) * 2000 for i in range(60)}
+    conn = _seed(store, tmp_path, items)
+
+    state = {'running': 0, 'peak': 0}
+    lock = threading.Lock()
+    orig_get = fake_s3.FakeS3Session.get_object
+    orig_put = fake_s3.FakeS3Session.put_object
+
+    def tracked(fn):
+        def call(self, key, *args, **kwargs):
+            if not _is_group_object(key):
+                return fn(self, key, *args, **kwargs)
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            try:
+                time.sleep(0.02)
+                return fn(self, key, *args, **kwargs)
+            finally:
+                with lock:
+                    state['running'] -= 1
+        return call
+
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', tracked(orig_get))
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', tracked(orig_put))
+
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', max_inflight_bytes=1000) as w:
+        for i in range(0, 60, 3):
+            w[f'k{i}'] = b'new'
+        assert w.changes().push()
+    assert state['peak'] == 1
+
+    state['peak'] = 0
+    with open_ebooklet(conn, tmp_path / 'w2.blt', flag='w') as w:
+        for i in range(1, 60, 3):
+            w[f'k{i}'] = b'newer'
+        assert w.changes().push()
+    assert state['peak'] > 1
+
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'get_object', orig_get)
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        expected = dict(items)
+        expected.update({f'k{i}': b'new' for i in range(0, 60, 3)})
+        expected.update({f'k{i}': b'newer' for i in range(1, 60, 3)})
+        assert dict(r.items()) == expected
+
+    with pytest.raises(ValueError, match='max_inflight_bytes'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='w', max_inflight_bytes=0)
@@ -0,0 +1,151 @@
+"""
+Hermetic tests for resumable pushes: the journal records every group
+generation a push PUT until a commit clears it, and a retry whose group
+would pack byte-identically adopts the recorded generation instead of
+uploading it again.
+"""
+import re
+
+import msgspec
+import pytest
+
+from ebooklet import open_ebooklet, utils
+from ebooklet.journal import JournalRecord, JournalState
+from ebooklet.tests import fake_s3
+
+NUM_GROUPS = 4
+
+
+def _is_group_object(key):
+    return re.match(r'testdb/\d+\.[0-9a-f]{13}$', key) is not None
+
+
+def _items():
+    return {f'k{i}': bytes([i % 251]) * 300 for i in range(40)}
+
+
+_orig_put = fake_s3.FakeS3Session.put_object
+
+
+def _failing_put(monkeypatch, fail_gid, puts):
+    def put(self, key, obj, metadata=None, content_type=None):
+        if _is_group_object(key):
+            puts.append(key)
+            if fail_gid is not None and key.startswith(f'testdb/{fail_gid}.'):
+                return fake_s3.FakeResp(500, error={'status': 500, 'code': 'InternalError'})
+        return _orig_put(self, key, obj, metadata, content_type)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'put_object', put)
+
+
+def test_group_pack_digest_matches_pack_layout():
+    members = [('a', 5, 3), ('bb', 6, 0), ('c', 7, 10)]
+    packed, offsets = utils.pack_group([('a', 5, b'xyz'), ('bb', 6, b''), ('c', 7, b'0123456789')])
+    assert utils.raw_group_offsets(members) == (offsets, len(packed))
+    digest = utils.group_pack_digest(members, 'abc')
+    assert digest == utils.group_pack_digest(list(members), 'abc')
+    assert digest != utils.group_pack_digest(members, None)
+    assert digest != utils.group_pack_digest([('a', 5, 3), ('bb', 9, 0), ('c', 7, 10)], 'abc')
+    assert digest != utils.group_pack_digest(members[::-1], 'abc')
+
+
+def test_failed_replacement_retry_skips_landed_groups(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update({'old': b'old'})
+        assert eb.changes().push()
+
+    items = _items()
+    puts = []
+    _failing_put(monkeypatch, 2, puts)
+    path = tmp_path / 'w.blt'
+    with open_ebooklet(conn, path, flag='n', num_groups=NUM_GROUPS) as w:
+        w.update(items)
+        result = w.changes().push()
+        assert not result
+        assert set(result.failures) == {2}
+    first = {key for key in puts if not key.startswith('testdb/2.')}
+    landed = {int(key.split('/')[1].split('.')[0]) for key in first}
+    assert len(landed) == len(first) > 1
+
+    ## The landed generations survive session close in the journal.
+    with pytest.warns(UserWarning, match='unpushed remote REPLACEMENT'), open_ebooklet(conn, path, flag='w') as w:
+        pushed = w._journal.pushed
+        assert set(pushed) == landed
+        assert {f'testdb/{gid}.{gen}' for gid, (gen, _size, _digest) in pushed.items()} == first
+
+        puts.clear()
+        _failing_put(monkeypatch, None, puts)
+        assert w.changes().push()
+        assert puts and all(key.startswith('testdb/2.') for key in puts)
+        assert not w._journal.pushed
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_changed_group_is_uploaded_again(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update({'old': b'old'})
+        assert eb.changes().push()
+
+    items = _items()
+    puts = []
+    _failing_put(monkeypatch, 2, puts)
+    path = tmp_path / 'w.blt'
+    with open_ebooklet(conn, path, flag='n', num_groups=NUM_GROUPS) as w:
+        w.update(items)
+        assert not w.changes().push()
+
+    ## Rewriting a member moves its timestamp: its group's digest no longer
+    ## matches and the group is packed and PUT afresh.
+    changed = next(key for key in items if utils.key_to_group_id(key, NUM_GROUPS) == 0)
+    items[changed] = b'changed'
+    puts.clear()
+    _failing_put(monkeypatch, None, puts)
+    with pytest.warns(UserWarning, match='unpushed remote REPLACEMENT'), open_ebooklet(conn, path, flag='w') as w:
+        w[changed] = b'changed'
+        assert w.changes().push()
+    assert {key.split('/')[1].split('.')[0] for key in puts} == {'0', '2'}
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_swept_generation_is_uploaded_again(tmp_path, monkeypatch):
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'seed.blt', flag='n', num_groups=NUM_GROUPS) as eb:
+        eb.update({'old': b'old'})
+        assert eb.changes().push()
+
+    items = _items()
+    puts = []
+    _failing_put(monkeypatch, 2, puts)
+    path = tmp_path / 'w.blt'
+    with open_ebooklet(conn, path, flag='n', num_groups=NUM_GROUPS) as w:
+        w.update(items)
+        assert not w.changes().push()
+
+    ## An orphan sweep between the attempts removed a recorded generation.
+    swept = next(key for key in puts if key.startswith('testdb/1.'))
+    del store[swept]
+    puts.clear()
+    _failing_put(monkeypatch, None, puts)
+    with pytest.warns(UserWarning, match='unpushed remote REPLACEMENT'), open_ebooklet(conn, path, flag='w') as w:
+        assert w.changes().push()
+    assert {key.split('/')[1].split('.')[0] for key in puts} == {'1', '2'}
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_journal_pushed_round_trip():
+    journal = JournalState()
+    journal.record_pushed(3, 'abc', 100, 'ff')
+    record = msgspec.json.decode(msgspec.json.encode(JournalRecord(pushed={3: ['abc', 100, 'ff']})), type=JournalRecord)
+    assert JournalState(record).pushed == journal.pushed == {3: ('abc', 100, 'ff')}
+    journal.clear_pushed()
+    assert not journal.pushed
@@ -0,0 +1,95 @@
+"""
+Tests for the process-wide session registry: S3Connection.open() shares one
+s3func session (one urllib3 pool) per endpoint/credentials/bucket/settings,
+counts its users, and closes the pool with the last one. No network: the
+db-object metadata load is stubbed out.
+"""
+import s3func
+
+from ebooklet import remote, sessions
+from ebooklet.tests import fake_s3
+
+
+def _conn(**kwargs):
+    params = dict(access_key_id='id', access_key='secret', db_key='db', bucket='b',
+                  endpoint_url='https://s3.invalid', threads=4)
+    params.update(kwargs)
+    return remote.S3Connection(**params)
+
+
+def _no_metadata(monkeypatch):
+    monkeypatch.setattr(remote.S3SessionReader, '_load_db_metadata', lambda self: None)
+
+
+def test_opens_share_one_session(monkeypatch):
+    _no_metadata(monkeypatch)
+    conn = _conn()
+    n0 = len(sessions.registry)
+
+    a = conn.open('r')
+    b = _conn(db_key='other').open('w')
+    shared = a._read_session
+    assert isinstance(shared, s3func.S3Session)
+    ## Other databases in the bucket, and a writer's read and write sides,
+    ## all ride the same pool.
+    assert b._read_session is shared and b._write_session is shared
+    assert sessions.registry.refs(shared) == 3
+    assert len(sessions.registry) == n0 + 1
+
+    a.close()
+    assert sessions.registry.refs(shared) == 2
+    b.close()
+    assert sessions.registry.refs(shared) == 0
+    assert len(sessions.registry) == n0
+
+    ## Released for good: the next open builds a fresh session.
+    c = conn.open('r')
+    assert c._read_session is not shared
+    c.close()
+
+
+def test_different_settings_do_not_share(monkeypatch):
+    _no_metadata(monkeypatch)
+    opened = [_conn().open('r'), _conn(bucket='b2').open('r'), _conn(access_key='other').open('r'),
+              _conn(endpoint_url='https://s3-2.invalid').open('r'), _conn(threads=8).open('r')]
+    try:
+        assert len({id(s._read_session) for s in opened}) == len(opened)
+    finally:
+        for s in opened:
+            s.close()
+
+
+def test_public_url_readers_share(monkeypatch):
+    _no_metadata(monkeypatch)
+    a = remote.S3Connection(db_url='https://example.invalid/a').open('r')
+    b = remote.S3Connection(db_url='https://example.invalid/b').open('r')
+    try:
+        assert isinstance(a._read_session, s3func.HttpSession)
+        assert a._read_session is b._read_session
+    finally:
+        a.close()
+        b.close()
+    assert sessions.registry.refs(a._read_session) == 0
+
+
+def test_registry_refcounts_and_passes_foreign_sessions_through():
+    registry = sessions.SessionRegistry()
+    built = []
+
+    def factory():
+        built.append(fake_s3.FakeS3Session({}))
+        built[-1]._session = {'conn': 1}
+        return built[-1]
+
+    s1 = registry.acquire('k', factory)
+    s2 = registry.acquire('k', factory)
+    assert s1 is s2 and len(built) == 1 and registry.refs(s1) == 2
+    registry.release(s1)
+    assert s1._session == {'conn': 1}
+    registry.release(s1)
+    assert s1._session == {} and len(registry) == 0
+
+    foreign = fake_s3.FakeS3Session({})
+    foreign._session = {'conn': 1}
+    registry.release(foreign)
+    assert foreign._session == {}
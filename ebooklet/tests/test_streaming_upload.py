@@ -0,0 +1,150 @@
+"""
+Hermetic tests for the streaming group upload: push groups larger than
+upload_part_size are packed straight into S3 multipart uploads (the fake
+store implements Create/UploadPart/Complete/Abort), with byte-identical
+layouts, exact offsets, and no visible object unless the upload completes.
+"""
+import logging
+import os
+
+import pytest
+
+from ebooklet import open_ebooklet, fsck, utils
+from ebooklet.tests import fake_s3
+
+PART = utils.MIN_UPLOAD_PART_SIZE
+
+
+def _items(n=200, size=2**16):
+    ## Random bytes: incompressible, so compressed groups stream too.
+    return {f'k{i:04d}': os.urandom(size) for i in range(n)}
+
+
+def _push(store, tmp_path, items, name='w.blt', flag='n', **kwargs):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    kwargs.setdefault('num_groups', 1)
+    with open_ebooklet(conn, tmp_path / name, flag=flag, upload_part_size=PART, **kwargs) as eb:
+        eb.update(items)
+        result = eb.changes().push()
+    return conn, result
+
+
+def _group_objects(store):
+    return [k for k in store if k.startswith('testdb/') and '_idelta' not in k]
+
+
+def _part_logs(monkeypatch):
+    parts = []
+    orig = fake_s3.FakeS3Session.request
+
+    def request(self, method, url, headers=None, fields=None, body=None, preload_content=None):
+        if fields and 'partNumber' in fields:
+            size = len(body.getvalue()) if hasattr(body, 'getvalue') else len(body)
+            parts.append((int(fields['partNumber']), size))
+        return orig(self, method, url, headers, fields, body, preload_content)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'request', request)
+    return parts
+
+
+def test_large_group_streams_in_parts(tmp_path, monkeypatch):
+    store = {}
+    items = _items()
+    parts = _part_logs(monkeypatch)
+    conn, result = _push(store, tmp_path, items)
+    assert result, result.failures
+
+    ## Several full parts, the first (count header) uploaded last.
+    assert len(parts) >= 3
+    assert all(size == PART for n, size in parts if n != max(p for p, _s in parts))
+    assert parts[-1][0] == 1
+    assert fake_s3.FakeS3Session(store).multipart_uploads == {}
+
+    ## The streamed object is byte-identical to the buffered layout.
+    for key in _group_objects(store):
+        data = store[key][0]
+        assert utils.pack_group(utils.unpack_group(data))[0] == data
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0150'] == items['k0150']
+        assert dict(r.items()) == items
+    assert fsck(conn).orphans == []
+
+
+def test_small_groups_and_opt_out_stay_single_put(tmp_path, monkeypatch):
+    parts = _part_logs(monkeypatch)
+    _conn, result = _push({}, tmp_path, _items(20), 'a.blt')
+    assert result
+
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with open_ebooklet(conn, tmp_path / 'b.blt', flag='n', num_groups=1, upload_part_size=None) as eb:
+        eb.update(_items())
+        assert eb.changes().push()
+    assert parts == []
+
+
+def test_compressed_group_streams_frames(tmp_path, monkeypatch):
+    store = {}
+    items = _items()
+    parts = _part_logs(monkeypatch)
+    conn, result = _push(store, tmp_path, items, num_groups=1, compression='zlib')
+    assert result, result.failures
+    assert len(parts) >= 3
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert r['k0007'] == items['k0007']
+        assert dict(r.items()) == items
+
+
+def test_failed_part_aborts_and_retries(tmp_path, monkeypatch):
+    store = {}
+    conn, result = _push(store, tmp_path, {'seed': b'1'})
+    assert result
+    before = dict(store)
+
+    orig = fake_s3.FakeS3Session.request
+
+    def flaky(self, method, url, headers=None, fields=None, body=None, preload_content=None):
+        if fields and fields.get('partNumber') == '2':
+            return self._error(500, 'InternalError')
+        return orig(self, method, url, headers, fields, body, preload_content)
+    monkeypatch.setattr(fake_s3.FakeS3Session, 'request', flaky)
+
+    items = _items()
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='w', upload_part_size=PART) as eb:
+        eb.update(items)
+        result = eb.changes().push()
+        assert not result
+        assert result.failures
+
+        ## Nothing became visible, and the upload was aborted.
+        assert store == before
+        assert fake_s3.FakeS3Session(store).multipart_uploads == {}
+
+        monkeypatch.setattr(fake_s3.FakeS3Session, 'request', orig)
+        result = eb.changes().push()
+        assert result, result.failures
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == dict(items, seed=b'1')
+
+
+def test_private_read_failure_restarts_on_locked_path(tmp_path, monkeypatch, caplog):
+    def denied(path):
+        raise OSError('induced mandatory-lock denial')
+    monkeypatch.setattr(utils, '_open_private_reader', denied)
+
+    store = {}
+    items = _items()
+    with caplog.at_level(logging.WARNING, logger='ebooklet.push'):
+        conn, result = _push(store, tmp_path, items)
+    assert result, result.failures
+    assert any('fast (private-fd) read path' in r.getMessage() for r in caplog.records)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+
+def test_upload_part_size_validation(tmp_path):
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='upload_part_size'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='n', num_groups=3, upload_part_size=2**20)
@@ -3,6 +3,7 @@ import pytest
 import pathlib
 import booklet
 from ebooklet import utils, remote, open_ebooklet
+from ebooklet.journal import JournalState
 from ebooklet.tests import fake_s3
 import uuid6 as uuid
 
@@ -49,6 +50,34 @@ def test_pack_unpack_single():
     assert unpacked[0] == entries[0]
 
 
+def test_scan_group_is_header_only_and_zero_copy():
+    entries = [(f'k{i}', 1000 + i, bytes([i]) * (i + 1)) for i in range(50)]
+    packed, offsets = utils.pack_group(entries)
+
+    table = utils.scan_group(packed)
+    assert len(table) == 50
+    assert [table.key(i) for i in range(50)] == [k for k, _t, _v in entries]
+    assert list(table.value_offsets) == [offsets[k][0] for k, _t, _v in entries]
+    value = table.value(7)
+    assert isinstance(value, memoryview) and value.obj is packed
+    assert [(k, t, bytes(v)) for k, t, v in utils.scan_group(packed).entries()] == entries
+
+    ## A wanted scan records only those members.
+    wanted = utils.scan_group(packed, ['k3', 'k40', 'absent'])
+    assert sorted(wanted.key(i) for i in range(len(wanted))) == ['k3', 'k40']
+
+    with pytest.raises(ValueError):
+        utils.scan_group(packed[:-1])
+
+
+def test_find_group_members_materializes_only_requested():
+    entries = [(f'k{i}', 1000 + i, b'v%d' % i) for i in range(20)]
+    packed, _offsets = utils.pack_group(entries)
+    found = utils.find_group_members(packed, ['k2', 'k19', 'nope'])
+    assert {k: (t, bytes(v)) for k, (t, v) in found.items()} == {
+        'k2': (1002, b'v2'), 'k19': (1019, b'v19')}
+
+
 def test_pack_group_offsets_allow_byte_range_read():
     """Offsets from pack_group can slice the packed bytes to recover each value."""
     entries = [
@@ -141,7 +170,7 @@ def test_check_local_vs_remote(tmp_path):
         # Key not in remote
         assert utils.check_local_vs_remote(db, None, "key1") is None
 
-def test_create_changelog(tmp_path):
+def test_create_changelog(tmp_path, monkeypatch):
     local_path = tmp_path / "local.blt"
     ri_path = tmp_path / "remote_index.blt"
     
@@ -168,13 +197,22 @@ def test_create_changelog(tmp_path):
 
     with booklet.open(local_path, "w") as db:
         with booklet.FixedLengthValue(ri_path, "r") as ri:
-            cl_path, loc_map, comp0 = utils.create_changelog(local_path, db, ri, MockRemoteSession())
-
-            assert cl_path.exists()
-            with booklet.FixedLengthValue(cl_path, "r") as cl:
-                assert "new_key" in cl
-                assert "updated_key" in cl
-                assert "same_key" not in cl
+            changes, loc_map, comp0 = utils.create_changelog(db, ri, MockRemoteSession())
+
+            assert isinstance(changes, utils.ChangeSet)
+            assert list(changes) == ["new_key", "updated_key"]
+            ## Changes are loc_map rows, not keys: nothing per key but two
+            ## 8-byte array slots.
+            assert changes.loc_map is loc_map
+            assert [loc_map.key(row) for row in changes.rows] == list(changes)
+            assert list(changes.remote_ts) == [0, ts_updated - 1000]
+            assert "same_key" not in changes
+            assert changes.local_timestamp("updated_key") == ts_updated
+            records = {r["key"]: r for r in utils.view_changelog(changes)}
+            assert records["new_key"]["remote_timestamp"] is None
+            assert records["updated_key"]["remote_timestamp"].timestamp() == pytest.approx((ts_updated - 1000) / 1e6)
+            ## No temporary changelog file any more.
+            assert not (tmp_path / "local.blt.changelog").exists()
 
             ## The capture side product: every live local key with its
             ## physical (ts, offset, len), valid for compaction_count comp0.
@@ -187,7 +225,44 @@ def test_create_changelog(tmp_path):
                     raw.seek(off)
                     assert raw.read(ln) == raw_val
 
-            cl_path.unlink()
+            ## The point-lookup diff (few local keys vs a large index) agrees
+            ## with the streamed one.
+            monkeypatch.setattr(utils, '_INDEX_SCAN_RATIO', 0)
+            point, _, _ = utils.create_changelog(db, ri, MockRemoteSession())
+            assert list(point.items()) == list(changes.items())
+
+
+def test_create_changelog_journal_union(tmp_path):
+    local_path = tmp_path / "local.blt"
+    ri_path = tmp_path / "remote_index.blt"
+    with booklet.open(local_path, "n", key_serializer="str", value_serializer="pickle") as db:
+        db["skewed"] = "edit"
+        db["same"] = "same"
+        ts_skewed = db.get_timestamp("skewed")
+        ts_same = db.get_timestamp("same")
+    with booklet.FixedLengthValue(ri_path, "n", key_serializer="str", value_len=7) as ri:
+        ri["skewed"] = booklet.utils.int_to_bytes(ts_skewed + 10**6, 7)
+        ri["same"] = booklet.utils.int_to_bytes(ts_same, 7)
+
+    class MockRemoteSession:
+        uuid = "some-uuid"
+
+    journal = JournalState()
+    journal.record_write("skewed")
+    journal.record_write("gone")
+    with booklet.open(local_path, "w") as db:
+        with booklet.FixedLengthValue(ri_path, "r") as ri:
+            with pytest.warns(UserWarning) as record:
+                changes, loc_map, _ = utils.create_changelog(db, ri, MockRemoteSession(), journal)
+    messages = [str(w.message) for w in record]
+    assert any("'skewed' carried a timestamp" in m for m in messages)
+    assert any("'gone'" in m and 'DROPPED' in m for m in messages)
+
+    ## The skewed edit was re-stamped past the remote, in the file and in
+    ## loc_map, and entered the change set through the row pass.
+    assert list(changes) == ["skewed"]
+    assert changes.local_timestamp("skewed") == loc_map["skewed"][0] > ts_skewed + 10**6
+    assert "gone" not in journal.written
 
 
 # ---------------------------------------------------------------------------
@@ -342,3 +417,74 @@ def test_copy_remote_indirect_path_different_creds(tmp_path):
     with open_ebooklet(fresh, tmp_path / 'tgt.blt', flag='r') as r:
         assert r['k1'] == b'v1'
         assert r['k2'] == b'v2'
+
+
+def _member_infos(entries, offsets):
+    return [(k, offsets[k][0], offsets[k][1], ts) for k, ts, _v in entries]
+
+
+def test_plan_group_ranges_merges_only_below_the_gap():
+    entries = [(f'k{i}', 1000000 + i, bytes([i]) * 1000) for i in range(10)]
+    _packed, offsets = utils.pack_group(entries)
+    infos = _member_infos(entries, offsets)
+    wanted = [infos[0], infos[1], infos[8]]
+
+    ## Adjacent members share a range even with gap 0; the far one does not.
+    chunks = utils.plan_group_ranges(list(reversed(wanted)), max_gap=0)
+    assert [[i[0] for i in c] for c in chunks] == [['k0', 'k1'], ['k8']]
+
+    ## A gap covering the six skipped entries merges everything.
+    chunks = utils.plan_group_ranges(wanted, max_gap=6 * 1020)
+    assert [[i[0] for i in c] for c in chunks] == [['k0', 'k1', 'k8']]
+
+    assert utils.plan_group_ranges([], max_gap=0) == []
+    with pytest.raises(ValueError):
+        utils.plan_group_ranges(wanted, max_gap=-1)
+
+
+def test_merge_group_failures():
+    a = utils.MissingRemoteObject('db/1.x', ['a'])
+    b = utils.MissingRemoteObject('db/1.x', ['b'])
+    merged = utils.merge_group_failures(a, b)
+    assert isinstance(merged, utils.MissingRemoteObject)
+    assert merged.keys == ['a', 'b']
+
+    ## A hard error wins over a marker, in either order.
+    err = {'status': 500}
+    assert utils.merge_group_failures(a, err) is err
+    assert utils.merge_group_failures(err, b) is err
+    assert utils.merge_group_failures(None, a) is a
+
+
+def test_load_items_splits_sparse_group_reads(tmp_path):
+    """Scattered members of one large group are fetched as separate tight
+    ranges - never one span over the dead bytes between them."""
+    store = {}
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i:02d}': bytes([i]) * 50_000 for i in range(20)}
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=1) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', range_merge_gap=1000) as r:
+        session = r._remote_session._read_session
+        ranges = []
+        orig_get = session.get_object
+        def logging_get(key, version_id=None, range_start=None, range_end=None):
+            resp = orig_get(key, version_id, range_start, range_end)
+            if key != 'testdb':
+                ranges.append(len(resp.data))
+            return resp
+        session.get_object = logging_get
+
+        wanted = sorted(items)[::7]
+        assert dict(r.get_items(wanted)) == {k: items[k] for k in wanted}
+
+    assert len(ranges) == len(wanted)
+    assert sum(ranges) < 60_000 * len(wanted)
+
+
+def test_range_merge_gap_validation(tmp_path):
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='range_merge_gap'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='n', range_merge_gap=-1)
@@ -0,0 +1,126 @@
+"""
+Hermetic tests for the bounded local value cache (cache_max_bytes): the
+ValueCache eviction policies, and read-only sessions that evict cold LOCAL
+values while keeping the remote index intact so evicted values re-pull.
+"""
+import time
+
+import pytest
+
+from ebooklet import open_ebooklet
+from ebooklet.cache import ValueCache
+from ebooklet.tests import fake_s3
+
+
+def _seed(store, tmp_path, n=20, size=1000, num_groups=3):
+    conn = fake_s3.FakeS3Connection(store, 'testdb')
+    items = {f'k{i:02d}': bytes([i]) * size for i in range(n)}
+    with open_ebooklet(conn, tmp_path / 'w.blt', flag='n', num_groups=num_groups) as eb:
+        eb.update(items)
+        assert eb.changes().push()
+    return conn, items
+
+
+def _local_keys(eb):
+    return set(eb._local_file.keys())
+
+
+def test_lru_evicts_least_recently_accessed():
+    cache = ValueCache(300, 'lru')
+    cache.seed([('a', 100), ('b', 100), ('c', 100)])
+    cache.touch('a')
+    assert cache.select_evictions(100) == ['b']
+    assert cache.total_bytes == 200
+    assert cache.dead_bytes == 100
+
+
+def test_lfu_evicts_least_frequently_accessed():
+    cache = ValueCache(300, 'lfu')
+    cache.seed([('a', 100), ('b', 100), ('c', 100)])
+    for _ in range(3):
+        cache.touch('a')
+    cache.touch('c')
+    assert cache.select_evictions(150) == ['b', 'c']
+
+
+def test_ttl_evicts_expired_even_under_budget():
+    cache = ValueCache(10_000, 'ttl', ttl=0.05)
+    cache.admit('old', 10)
+    time.sleep(0.1)
+    cache.admit('new', 10)
+    assert cache.select_evictions() == ['old']
+    assert 'new' in cache
+
+
+def test_cache_argument_validation(tmp_path):
+    with pytest.raises(ValueError):
+        ValueCache(0)
+    with pytest.raises(ValueError):
+        ValueCache(100, 'fifo')
+    with pytest.raises(ValueError):
+        ValueCache(100, 'ttl')
+    with pytest.raises(ValueError):
+        ValueCache(100, 'lru', ttl=5)
+
+    conn = fake_s3.FakeS3Connection({}, 'testdb')
+    with pytest.raises(ValueError, match='read-only'):
+        open_ebooklet(conn, tmp_path / 'x.blt', flag='n', cache_max_bytes=1000)
+
+
+def test_reader_stays_within_budget_and_repulls(tmp_path):
+    store = {}
+    conn, items = _seed(store, tmp_path)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', cache_max_bytes=5000) as r:
+        for k in sorted(items):
+            assert r[k] == items[k]
+        ## Eviction runs before each fetch, so at most budget + one value.
+        assert r._cache.total_bytes <= 6000
+        assert len(_local_keys(r)) <= 6
+
+        ## Evicted values are still claimed by the index and re-pull.
+        assert len(r) == len(items)
+        assert 'k00' not in _local_keys(r)
+        assert r['k00'] == items['k00']
+        assert dict(r.get_items(sorted(items))) == items
+
+
+def test_cached_iteration_is_batched(tmp_path):
+    store = {}
+    conn, items = _seed(store, tmp_path)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', cache_max_bytes=4000) as r:
+        assert dict(r.items()) == items
+        assert sorted(r.values()) == sorted(items.values())
+        assert {k for k, _ts in r.timestamps()} == set(items)
+        assert len(_local_keys(r)) < len(items)
+
+
+def test_local_file_is_compacted_after_evictions(tmp_path):
+    store = {}
+    conn, items = _seed(store, tmp_path, n=40, size=20_000)
+    path = tmp_path / 'r.blt'
+
+    with open_ebooklet(conn, path, flag='r', cache_max_bytes=100_000) as r:
+        for k in sorted(items):
+            assert r[k] == items[k]
+        r.sync()
+        size = path.stat().st_size
+
+    ## Without compaction the file would hold every fetched value (~800 KB).
+    assert size < 400_000
+
+
+def test_reopen_seeds_existing_values(tmp_path):
+    store = {}
+    conn, items = _seed(store, tmp_path)
+
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r') as r:
+        assert dict(r.items()) == items
+
+    ## An unbounded session materialized everything; reopening with a budget
+    ## evicts down to it immediately.
+    with open_ebooklet(conn, tmp_path / 'r.blt', flag='r', cache_max_bytes=3000) as r:
+        assert r._cache.total_bytes <= 3000
+        assert len(_local_keys(r)) <= 3
+        assert r['k05'] == items['k05']
@@ -9,7 +9,7 @@ import warnings
 import pytest
 
 import ebooklet
-from ebooklet import open_ebooklet, S3Connection, UnsupportedFormatError
+from ebooklet import open_ebooklet, S3Connection, UnsupportedFormatError, utils
 from ebooklet.tests import fake_s3
 
 
@@ -94,7 +94,7 @@ def test_too_new_format_version_is_refused(tmp_path):
 
     data, meta = store['testdb']
     meta = dict(meta)
-    meta['format_version'] = '3'
+    meta['format_version'] = str(utils.SUPPORTED_FORMAT_VERSION + 1)
     store['testdb'] = (data, meta)
 
     conn2 = fake_s3.FakeS3Connection(store, 'testdb')
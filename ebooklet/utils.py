@@ -6,9 +6,13 @@ Created on Thu Jan  5 11:04:13 2023
 @author: mike
 """
 import logging
+import contextlib
 import hashlib
 import struct
+import tempfile
 import threading
+from array import array
+from bisect import bisect_left, bisect_right
 import time
 import warnings
 import uuid as _uuid
@@ -17,9 +21,14 @@ import urllib3
 from datetime import datetime, timezone
 import base64
 import portalocker
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import deque
 import msgspec
 
+from . import compression as compression_mod
+from . import sessions as sessions_mod
+from .flow import ByteBudget
+
 logger = logging.getLogger(__name__)
 
 ## Push progress records (INFO) - a dedicated logger so consumers can opt in
@@ -48,20 +57,29 @@ reserved_key_strs = frozenset(
 ## Format 2 (0.10): generation-named immutable group objects + the manifest/
 ## metadata/index db-object payload. There is NO legacy read path for format 1
 ## (deliberate - see the changelog's upgrade recipe).
-SUPPORTED_FORMAT_VERSION = 2
+## Format 3: format 2 with compressed, framed group objects (see
+## compression.py). Only remotes created with a compression codec are stamped
+## 3 - uncompressed remotes keep stamping 2, so older clients still read them.
+## Format 4: format 2 whose manifest holds delta-generation chains (see
+## parse_group_slot) - stamped only while a chain slot is live.
+SUPPORTED_FORMAT_VERSION = 4
+GENERATIONAL_FORMAT_VERSION = 2
+FRAMED_FORMAT_VERSION = 3
 
 ## db-object payload layout (format 2). The sections that change together ride
 ## ONE object - one PUT is the push's atomic commit point:
-##   magic(12) | payload_version >H (2) | reserved (2)
+##   magic(12) | payload_version >H (2) | codec_id >H (2; payload v3, else 0)
 ##   | manifest_len >Q (8) | meta_len >Q (8) | index_len >Q (8)
 ##   | manifest: msgspec-JSON {gid: gen13}   (empty dict in per-key mode)
 ##   | meta:     msgspec-JSON {"timestamp": µs, "data": ...}  (len 0 = absent)
 ##   | index:    raw FixedLengthValue booklet bytes (value_len=15, unchanged)
 ## Sections precede the index so the manifest and user metadata are cheap
 ## ranged GETs. v1 bodies start with booklet's 16-byte fixed-file type uuid,
-## so the magic discriminates unambiguously.
+## so the magic discriminates unambiguously. Compressed remotes write payload
+## version 3 with the group codec's id (compression.CODEC_IDS) in the formerly
+## reserved field; uncompressed remotes keep writing version 2.
 DB_MAGIC = b'ebooklet-db\x00'
-PAYLOAD_VERSION = 2
+PAYLOAD_VERSION = 3
 PAYLOAD_HEADER_LEN = 40
 
 
@@ -80,16 +98,20 @@ from .errors import (  # noqa: E402
 )
 
 
-def build_db_payload(manifest, meta_section, index_bytes):
+def build_db_payload(manifest, meta_section, index_bytes, compression=None):
     """
     Assemble the format-2 db-object payload. manifest is {gid_int: gen_str};
-    meta_section is the pre-encoded metadata section (or None for absent).
+    meta_section is the pre-encoded metadata section (or None for absent);
+    compression is the group codec name (payload version 3) or None.
     """
     manifest_bytes = msgspec.json.encode(manifest)
     meta_bytes = meta_section if meta_section is not None else b''
+    if compression is None:
+        version_codec = struct.pack('>HH', 2, 0)
+    else:
+        version_codec = struct.pack('>HH', 3, compression_mod.CODEC_IDS[compression])
     header = (DB_MAGIC
-              + struct.pack('>H', PAYLOAD_VERSION)
-              + b'\x00\x00'
+              + version_codec
               + struct.pack('>Q', len(manifest_bytes))
               + struct.pack('>Q', len(meta_bytes))
               + struct.pack('>Q', len(index_bytes)))
@@ -115,10 +137,26 @@ def parse_db_payload_header(header):
             f'The remote db object uses payload version {payload_version}, but this '
             f'ebooklet only supports up to {PAYLOAD_VERSION}. Upgrade ebooklet to open it.'
         )
+    if payload_version >= 3:
+        ## Refuse unknown codecs here too, before any group object is read.
+        compression_mod.codec_name(struct.unpack_from('>H', header, 14)[0])
     manifest_len, meta_len, index_len = struct.unpack_from('>QQQ', header, 16)
     return manifest_len, meta_len, index_len
 
 
+def format_version_for(compression, chained=False):
+    """
+    The format_version a push stamps for a remote with this group codec
+    (chained: the committed manifest holds delta-generation chains).
+    Compressed (framed) groups cannot be chained: no format describes them.
+    """
+    if compression is not None:
+        if chained:
+            raise ValueError('Delta-generation chains require uncompressed groups; no storage format holds compressed chains.')
+        return FRAMED_FORMAT_VERSION
+    return CHAINED_FORMAT_VERSION if chained else GENERATIONAL_FORMAT_VERSION
+
+
 def parse_db_payload(data):
     """
     Split a full format-2 payload into (manifest {gid_int: gen_str},
@@ -152,6 +190,139 @@ def parse_meta_section(section):
     return parsed.timestamp, msgspec.json.decode(parsed.data)
 
 
+## Index deltas (grouped mode). Every commit whose writer was in sync with
+## the remote also PUTs a small '_idelta.{parent_ts}' object holding exactly
+## the index entries, manifest slots and metadata section the commit changed,
+## and lists the parent timestamps of the live deltas in the db object's
+## 'delta_parents' metadata (oldest first). A reader whose cached remote_ts is
+## on that chain applies the deltas to its sidecar instead of re-downloading
+## the whole index body. The chain restarts (an empty list) whenever a commit
+## writes no delta.
+DELTA_CHAIN_LENGTH = 16
+## A commit touching more than this fraction of the index writes no delta -
+## replaying it would cost about as much as the full body.
+DELTA_MAX_FRACTION = 0.25
+DELTA_MIN_ENTRIES = 1000
+
+
+class IndexDelta(msgspec.Struct):
+    """The index changes of one commit, from the parent_ts db object to timestamp."""
+    parent_ts: int
+    timestamp: int
+    ## The committed index's key count - a cheap end-to-end check after replay.
+    n_keys: int
+    entries: dict[str, bytes] = {}
+    deletes: list[str] = []
+    manifest_set: dict[int, str] = {}
+    manifest_drop: list[int] = []
+    meta_section: bytes | None = None
+
+
+def delta_obj_key(parent_ts):
+    """The S3 child key of the index delta whose parent commit is parent_ts."""
+    return f'_idelta.{parent_ts}'
+
+
+def parse_delta_parents(value):
+    """The db object's 'delta_parents' metadata -> list of int timestamps."""
+    if not value:
+        return []
+    return [int(p) for p in value.split(',')]
+
+
+def publish_index_delta(remote_session, remote_state, new_manifest, meta_section, time_int_us, entries, deletes, n_keys):
+    """
+    PUT this commit's index delta and return the delta_parents list the commit
+    should publish. Returns [] (the chain restarts) when the writer was not in
+    sync with the remote it is committing over, when the delta would be too
+    large to be worth replaying, or when the PUT fails - readers then fall back
+    to the full body, which is always correct.
+    """
+    parent_ts = remote_session.timestamp
+    if parent_ts is None or remote_state.remote_ts != parent_ts:
+        return []
+    if len(entries) + len(deletes) > max(DELTA_MIN_ENTRIES, n_keys * DELTA_MAX_FRACTION):
+        return []
+
+    old_manifest = remote_state.manifest
+    delta = IndexDelta(
+        parent_ts=parent_ts,
+        timestamp=time_int_us,
+        n_keys=n_keys,
+        entries=entries,
+        deletes=sorted(deletes),
+        manifest_set={gid: gen for gid, gen in new_manifest.items() if old_manifest.get(gid) != gen},
+        manifest_drop=[gid for gid in old_manifest if gid not in new_manifest],
+        meta_section=meta_section,
+        )
+    resp = remote_session.put_object(delta_obj_key(parent_ts), msgspec.json.encode(delta))
+    if resp.status // 100 != 2:
+        logger.warning(f'Could not upload the index delta (readers will fetch the full index instead): {resp.error}')
+        return []
+
+    parents = list(remote_session.delta_parents) + [parent_ts]
+    return parents[-DELTA_CHAIN_LENGTH:]
+
+
+def fetch_index_deltas(remote_session, from_ts):
+    """
+    Fetch the delta chain leading from the from_ts db object to the remote's
+    current one. Returns the IndexDelta list in commit order, or None when the
+    chain does not reach from_ts or any link is missing or inconsistent (e.g.
+    GC'd by a concurrent commit) - the caller falls back to the full body.
+    """
+    parents = remote_session.delta_parents
+    if from_ts is None or from_ts not in parents:
+        return None
+
+    deltas = []
+    expected = from_ts
+    for parent_ts in parents[parents.index(from_ts):]:
+        resp = remote_session.get_object(delta_obj_key(parent_ts))
+        if resp.status not in (200, 206):
+            return None
+        try:
+            delta = msgspec.json.decode(resp.data, type=IndexDelta)
+        except msgspec.DecodeError:
+            return None
+        if delta.parent_ts != expected:
+            return None
+        expected = delta.timestamp
+        deltas.append(delta)
+
+    if expected != remote_session.timestamp:
+        return None
+    return deltas
+
+
+def apply_index_deltas(remote_index, deltas, manifest, pending_deletes, membership=None):
+    """
+    Replay fetched deltas onto the sidecar in place, in the commit's own order
+    (entries, then deletes). Returns the resulting (manifest, meta_section), or
+    None when the replayed index fails the key-count check (the caller then
+    re-fetches the full body over it). The check is skipped while journaled
+    deletes are pending - those keys were already removed from the sidecar.
+    The membership (if any) is updated with each delta's keys.
+    """
+    manifest = dict(manifest)
+    for delta in deltas:
+        for key, entry in delta.entries.items():
+            remote_index[key] = entry
+        for key in delta.deletes:
+            if key in remote_index:
+                del remote_index[key]
+        if membership is not None:
+            membership.update(delta.entries, delta.deletes)
+        for gid in delta.manifest_drop:
+            manifest.pop(gid, None)
+        manifest.update(delta.manifest_set)
+    remote_index.sync()
+
+    if not pending_deletes and len(remote_index) != deltas[-1].n_keys:
+        return None
+    return manifest, deltas[-1].meta_section
+
+
 def group_obj_key(group_id, gen):
     """The S3 child key of a group object generation (relative to db_key + '/')."""
     return f'{group_id}.{gen}'
@@ -161,14 +332,87 @@ def new_generation(current_gen=None):
     """
     A fresh generation token: 13 hex chars (the lock_id idiom). No ordering
     semantics - fsck ages orphans by listing timestamps, never by token.
-    Re-rolls on the (~2**-52) collision with the group's current generation:
+    Re-rolls on the (~2**-52) collision with the group's current generation
+    (current_gen: its manifest slot, every generation of a chain counts):
     the whole point of generations is never overwriting a live object.
     """
+    live = slot_generations(current_gen) if current_gen is not None else ()
     while True:
         gen = _uuid.uuid4().hex[:13]
-        if gen != current_gen:
+        if gen not in live:
             return gen
 
+
+## Delta generations (format 4, open_ebooklet(max_group_deltas=...)). A
+## manifest slot is either a plain generation token - the whole group in one
+## object - or a CHAIN 'gen:size+gen:size+.../dead': a base generation
+## followed by delta generations, each a self-describing raw group object of
+## the given size holding only the members one push changed. The index
+## offsets of a chained group are LOGICAL: positions in the concatenation of
+## its generations in chain order, so the 15-byte index entry is unchanged
+## and a member resolves to the generation whose span holds its offset
+## (resolve_group_slot). dead counts the bytes of superseded or deleted
+## entries still inside the chain - the compactor's input.
+CHAINED_FORMAT_VERSION = 4
+
+
+def parse_group_slot(slot):
+    """
+    A manifest slot -> ([(gen, start, size_or_None)], dead). A plain token
+    is one generation starting at 0 of unknown size.
+    """
+    if ':' not in slot:
+        return [(slot, 0, None)], 0
+    chain, _, dead = slot.partition('/')
+    gens = []
+    start = 0
+    for link in chain.split('+'):
+        gen, size = link.split(':')
+        size = int(size)
+        gens.append((gen, start, size))
+        start += size
+    return gens, int(dead) if dead else 0
+
+
+def format_group_slot(gens, dead=0):
+    """[(gen, size)] + dead bytes -> a chain manifest slot."""
+    slot = '+'.join(f'{gen}:{size}' for gen, size in gens)
+    return f'{slot}/{dead}' if dead else slot
+
+
+def slot_generations(slot):
+    """The generation tokens a manifest slot references, in chain order."""
+    return [gen for gen, _start, _size in parse_group_slot(slot)[0]]
+
+
+def manifest_obj_keys(manifest):
+    """Every group object key a manifest references (chains included)."""
+    return [group_obj_key(gid, gen) for gid, slot in manifest.items() for gen in slot_generations(slot)]
+
+
+def is_chained_manifest(manifest):
+    """Whether any slot records sizes - readers older than format 4 cannot resolve it."""
+    return any(':' in slot for slot in manifest.values())
+
+
+def resolve_group_slot(slot, key_infos):
+    """
+    Split one group's (key, offset, length, timestamp_int) infos by the
+    generation holding each member. Returns [(gen, infos)] with offsets
+    relative to that generation's object - a plain slot passes through.
+    An offset equal to a generation's start belongs to that generation.
+    """
+    gens, _dead = parse_group_slot(slot)
+    if len(gens) == 1:
+        return [(gens[0][0], key_infos)]
+    starts = [start for _gen, start, _size in gens]
+    by_gen = {}
+    for key, offset, length, timestamp_int in key_infos:
+        ## starts[0] is 0, so every offset lands in some generation.
+        i = bisect_right(starts, offset) - 1
+        by_gen.setdefault(i, []).append((key, offset - starts[i], length, timestamp_int))
+    return [(gens[i][0], infos) for i, infos in sorted(by_gen.items())]
+
 ############################################
 ### Group functions
 
@@ -207,6 +451,14 @@ def key_to_group_id(key: str, num_groups: int) -> int:
 _MAX_GROUP_BYTES = 2**32 - 1   # the >I offset and length fields' ceiling
 
 
+def _group_too_large(unit):
+    return GroupTooLargeError(
+        f'packing this group would exceed {_MAX_GROUP_BYTES} {unit} (the 4-byte '
+        'offset/length ceiling). Not retryable as-is: re-create the database '
+        "with a larger num_groups (flag='n'), or store smaller values."
+    )
+
+
 def pack_group(entries: list[tuple[str, int, bytes]]) -> tuple[bytes, dict[str, tuple[int, int]]]:
     ## buf MUST be a bytearray: appending to an immutable `bytes` re-copies the
     ## whole buffer every time (quadratic - ~100GB of memcpy for a 134MB group,
@@ -223,11 +475,7 @@ def pack_group(entries: list[tuple[str, int, bytes]]) -> tuple[bytes, dict[str,
         ## are 4-byte fields - overflowing them would corrupt the index).
         entry_size = 2 + len(key_bytes) + 7 + 4 + len(value)
         if pos + entry_size > _MAX_GROUP_BYTES:
-            raise GroupTooLargeError(
-                f'packing this group would exceed {_MAX_GROUP_BYTES} bytes (the 4-byte '
-                'offset/length ceiling). Not retryable as-is: re-create the database '
-                "with a larger num_groups (flag='n'), or store smaller values."
-            )
+            raise _group_too_large('bytes')
         buf += struct.pack('>H', len(key_bytes))
         pos += 2
         buf += key_bytes
@@ -242,43 +490,300 @@ def pack_group(entries: list[tuple[str, int, bytes]]) -> tuple[bytes, dict[str,
     return bytes(buf), offsets
 
 
+def group_pack_digest(members, base_slot=None):
+    """
+    Fingerprint of one raw group pack for resumable pushes: sha256 over the
+    members in pack order - (key, ts_int, value_len) each - and the manifest
+    slot the pack replaces or extends. An equal digest means an equal
+    layout (raw_group_offsets) and, keys being rewritten with fresh
+    timestamps, equal values: the generation recorded under it can be
+    adopted instead of PUT again.
+    """
+    h = hashlib.sha256((base_slot or '').encode())
+    for key, ts_int, value_len in members:
+        key_bytes = key.encode()
+        h.update(struct.pack('>H', len(key_bytes)) + key_bytes + int_to_bytes(ts_int or 0, 7) + struct.pack('>I', value_len))
+    return h.hexdigest()
+
+
+def raw_group_offsets(members):
+    """
+    pack_group's offsets and packed length, computed from the (key, ts_int,
+    value_len) members alone - no value bytes needed.
+    """
+    offsets = {}
+    pos = 4
+    for key, _ts, value_len in members:
+        pos += 2 + len(key.encode()) + 7 + 4
+        offsets[key] = (pos, value_len)
+        pos += value_len
+    return offsets, pos
+
+
+_GROUP_COUNT = struct.Struct('>I')
+_ENTRY_KEY_LEN = struct.Struct('>H')
+_ENTRY_VALUE_LEN = struct.Struct('>I')
+
+
+class GroupTable:
+    """
+    Compact header-only table of a raw-layout group object (scan_group):
+    parallel arrays of each entry's key span and value span inside `data`
+    (a memoryview of the object). Nothing is decoded or copied up front -
+    keys, timestamps and values are read from the object on demand, values
+    as zero-copy memoryview slices (bytes(...) them to keep one past the
+    object's lifetime).
+    """
+    __slots__ = ('data', 'key_offsets', 'key_lengths', 'value_offsets', 'value_lengths')
+
+    def __init__(self, data):
+        self.data = data
+        self.key_offsets = array('Q')
+        self.key_lengths = array('H')
+        self.value_offsets = array('Q')
+        self.value_lengths = array('L')
+
+    def __len__(self):
+        return len(self.value_offsets)
+
+    def key(self, i) -> str:
+        ko = self.key_offsets[i]
+        return str(self.data[ko:ko + self.key_lengths[i]], 'utf-8')
+
+    def timestamp(self, i) -> int:
+        ## The 7-byte timestamp sits between the key and the value length.
+        vo = self.value_offsets[i]
+        return bytes_to_int(self.data[vo - 11:vo - 4])
+
+    def value(self, i) -> memoryview:
+        vo = self.value_offsets[i]
+        return self.data[vo:vo + self.value_lengths[i]]
+
+    def entries(self):
+        """Yield (key, timestamp_int, value_memoryview) in object order."""
+        for i in range(len(self)):
+            yield self.key(i), self.timestamp(i), self.value(i)
+
+
+def scan_group(data, wanted=None) -> GroupTable:
+    """
+    One header-only pass over a raw-layout group object: hop from entry
+    header to entry header without touching the value bytes, recording each
+    entry's spans in a GroupTable. With `wanted` (a collection of keys) only
+    those entries are recorded, and the scan stops as soon as all of them
+    were found. Raises ValueError on a truncated or malformed object.
+    """
+    mv = data if isinstance(data, memoryview) else memoryview(data)
+    if not mv.readonly:
+        ## Only read-only views hash (the wanted-key lookups below).
+        mv = mv.toreadonly()
+    ## Key slices for the wanted-key lookups come from the bytes object when
+    ## there is one: a tiny bytes slice is cheaper than a memoryview slice.
+    buf = data if isinstance(data, bytes) else mv
+    table = GroupTable(mv)
+    size = len(mv)
+    key_len_at = _ENTRY_KEY_LEN.unpack_from
+    value_len_at = _ENTRY_VALUE_LEN.unpack_from
+    remaining = None
+    if wanted is not None:
+        remaining = {k.encode() for k in wanted}
+        if not remaining:
+            return table
+    try:
+        n_entries = _GROUP_COUNT.unpack_from(buf, 0)[0]
+        pos = 4
+        for _ in range(n_entries):
+            key_pos = pos + 2
+            key_end = key_pos + key_len_at(buf, pos)[0]
+            value_pos = key_end + 11
+            value_len = value_len_at(buf, key_end + 7)[0]
+            pos = value_pos + value_len
+            if pos > size:
+                raise ValueError('group entry extends past the end of the object')
+            if remaining is not None:
+                key_bytes = buf[key_pos:key_end]
+                if key_bytes not in remaining:
+                    continue
+                remaining.discard(key_bytes)
+            table.key_offsets.append(key_pos)
+            table.key_lengths.append(key_end - key_pos)
+            table.value_offsets.append(value_pos)
+            table.value_lengths.append(value_len)
+            if remaining is not None and not remaining:
+                break
+    except struct.error as err:
+        raise ValueError(f'truncated group object: {err}') from err
+    return table
+
+
 def unpack_group(data: bytes) -> list[tuple[str, int, bytes]]:
-    offset = 0
-    num_entries = struct.unpack_from('>I', data, offset)[0]
-    offset += 4
+    """
+    Every entry of a raw-layout group, values copied out as bytes (the whole
+    object is being decoded anyway - for a few members use scan_group /
+    find_group_members, which copy nothing they skip).
+    """
+    key_len_at = _ENTRY_KEY_LEN.unpack_from
+    value_len_at = _ENTRY_VALUE_LEN.unpack_from
+    num_entries = _GROUP_COUNT.unpack_from(data, 0)[0]
+    offset = 4
     entries = []
+    append = entries.append
     for _ in range(num_entries):
-        key_len = struct.unpack_from('>H', data, offset)[0]
-        offset += 2
-        key = data[offset:offset + key_len].decode()
-        offset += key_len
-        timestamp = bytes_to_int(data[offset:offset + 7])
-        offset += 7
-        value_len = struct.unpack_from('>I', data, offset)[0]
-        offset += 4
-        value = data[offset:offset + value_len]
-        offset += value_len
-        entries.append((key, timestamp, value))
+        key_pos = offset + 2
+        key_end = key_pos + key_len_at(data, offset)[0]
+        value_pos = key_end + 11
+        offset = value_pos + value_len_at(data, key_end + 7)[0]
+        append((bytes(data[key_pos:key_end]).decode(), bytes_to_int(data[key_end:key_end + 7]), bytes(data[value_pos:offset])))
     return entries
 
 
+class _FramePacker:
+    """
+    Cuts members into runs of about frame_size raw bytes and hands each run,
+    as one finished frame, to write(frame_bytes). `pos` is the packed size so
+    far; `offsets` maps every member to its frame (offset, length incl. the
+    frame header). Shared by pack_framed_group and the streaming upload.
+    """
+    __slots__ = ('codec', 'frame_size', 'write', 'pos', 'offsets', '_run', '_run_size')
+
+    def __init__(self, codec, write, frame_size=compression_mod.DEFAULT_FRAME_SIZE):
+        self.codec = codec
+        self.frame_size = frame_size
+        self.write = write
+        self.pos = 0
+        self.offsets = {}
+        self._run = []
+        self._run_size = 0
+
+    def add(self, entry):
+        entry_size = 2 + len(entry[0].encode()) + 7 + 4 + len(entry[2])
+        if self._run and self._run_size + entry_size > self.frame_size:
+            self.flush()
+        self._run.append(entry)
+        self._run_size += entry_size
+
+    def flush(self):
+        if not self._run:
+            return
+        raw, _ = pack_group(self._run)
+        comp = self.codec.compress(raw)
+        frame_off = self.pos
+        frame_len = compression_mod.FRAME_HEADER_LEN + len(comp)
+        ## Same 4-byte offset/length ceiling as the raw layout (F7 guard).
+        if frame_off + frame_len > _MAX_GROUP_BYTES:
+            raise _group_too_large('compressed bytes')
+        self.write(struct.pack('>II', len(comp), len(raw)))
+        self.write(comp)
+        self.pos += frame_len
+        for key, _ts, _value in self._run:
+            self.offsets[key] = (frame_off, frame_len)
+        self._run = []
+        self._run_size = 0
+
+
+def pack_framed_group(entries: list[tuple[str, int, bytes]], codec, frame_size=compression_mod.DEFAULT_FRAME_SIZE) -> tuple[bytes, dict[str, tuple[int, int]]]:
+    """
+    The compressed (format-3) counterpart of pack_group: members are cut into
+    runs of about frame_size raw bytes, and each run is written as one
+    independently-decodable frame - comp_len >I | raw_len >I | the codec's
+    compression of pack_group(run). The returned offsets map every member to
+    its FRAME (offset, length incl. the frame header), which is what the
+    index stores for framed groups.
+    """
+    buf = bytearray()
+    packer = _FramePacker(codec, buf.extend, frame_size)
+    for entry in entries:
+        packer.add(entry)
+    packer.flush()
+    return bytes(buf), packer.offsets
+
+
+def _decompress_frame(frame, codec):
+    """
+    The raw pack_group image inside ONE frame (header included). Raises
+    ValueError when the bytes are not a complete, well-formed frame.
+    """
+    if len(frame) < compression_mod.FRAME_HEADER_LEN:
+        raise ValueError('truncated frame header')
+    comp_len, raw_len = struct.unpack_from('>II', frame, 0)
+    if compression_mod.FRAME_HEADER_LEN + comp_len != len(frame):
+        raise ValueError('frame length does not match its header')
+    try:
+        raw = codec.decompress(memoryview(frame)[compression_mod.FRAME_HEADER_LEN:])
+    except Exception as err:
+        raise ValueError(f'frame does not decompress: {err}') from err
+    if len(raw) != raw_len:
+        raise ValueError('decompressed frame length does not match its header')
+    return raw
+
+
+def _iter_frames(data):
+    """(start, end) of each frame of a framed group object, in order."""
+    pos = 0
+    while pos < len(data):
+        if pos + compression_mod.FRAME_HEADER_LEN > len(data):
+            raise ValueError('truncated frame header')
+        end = pos + compression_mod.FRAME_HEADER_LEN + struct.unpack_from('>I', data, pos)[0]
+        yield pos, end
+        pos = end
+
+
+def find_group_members(data, wanted, codec=None):
+    """
+    The wanted members of a whole group object, without unpacking the rest:
+    {key: (ts_int, value_memoryview)} for the keys actually present. Raw
+    objects are header-scanned (scan_group) and stop at the last wanted key;
+    framed objects are decompressed frame by frame until every wanted key
+    was found. Raises ValueError on a malformed object.
+    """
+    remaining = set(wanted)
+    found = {}
+    if codec is None:
+        sources = (data,)
+    else:
+        mv = memoryview(data)
+        sources = (_decompress_frame(mv[start:end], codec) for start, end in _iter_frames(mv))
+    for source in sources:
+        if not remaining:
+            break
+        table = scan_group(source, remaining)
+        try:
+            for i in range(len(table)):
+                key = table.key(i)
+                found[key] = (table.timestamp(i), table.value(i))
+                remaining.discard(key)
+        except UnicodeDecodeError as err:
+            raise ValueError(f'malformed group contents: {err}') from err
+    return found
+
+
+def group_codec(remote_session):
+    """The Codec of a session's group objects, or None for the raw layout."""
+    name = getattr(remote_session, 'compression', None)
+    return compression_mod.get_codec(name) if name is not None else None
+
+
 ############################################
 ### Functions
 
 
-def s3session_finalizer(session):
+def s3session_finalizer(*sessions):
     """
-    The finalizer function for S3Remote instances.
+    The finalizer function for S3Remote instances: release each session to
+    the process-wide registry (the pool closes with its last user).
     """
-    session._session.clear()
+    for session in sessions:
+        if session is not None:
+            sessions_mod.registry.release(session)
 
 
-def ebooklet_finalizer(local_file, remote_index, remote_session, lock, journal=None):
+def ebooklet_finalizer(local_file, remote_index, remote_session, lock, journal=None, membership=None, remote_state=None):
     """
     The finalizer function for book instances. Persists the journal BEFORE the
     local file closes, so a session torn down by garbage collection (close()
     never called) still records its pending state; a finalizer must never
-    raise, so persistence failures are logged and swallowed.
+    raise, so persistence failures are logged and swallowed. The group
+    membership is stamped for the remote state the sidecar is left at.
     """
     if journal is not None:
         try:
@@ -287,6 +792,11 @@ def ebooklet_finalizer(local_file, remote_index, remote_session, lock, journal=N
             logger.exception('journal persistence failed during finalization; pending state may be stale')
     local_file.close()
     remote_index.close()
+    if membership is not None:
+        try:
+            membership.close(remote_state.remote_ts)
+        except Exception:
+            logger.exception('group membership could not be closed; it is rebuilt at the next push')
     remote_session.close()
     if lock is not None:
         lock.release()
@@ -364,21 +874,41 @@ def init_local_file(local_file_path, flag, remote_session, value_serializer, n_b
     return local_file, overwrite_remote_index
 
 
-def get_remote_index_file(local_file_path, overwrite_remote_index, remote_session, flag):
+def get_remote_index_file(local_file_path, overwrite_remote_index, remote_session, flag, remote_state=None, pending_deletes=(), membership=None):
     """
     Ensure the local remote-index sidecar file exists (fetching + parsing the
     db-object payload when needed). Returns (remote_index_path, fetched,
     manifest, meta_section) - fetched says whether a fresh index body was
     actually ingested this call; manifest/meta_section are None when it
     wasn't (the caller falls back to the persisted remote-state slot).
+
+    An existing sidecar whose remote_state.remote_ts is on the remote's delta
+    chain is brought up to date by replaying the index deltas instead. The
+    GroupMembership (if any) follows a replay and is invalidated by a full
+    fetch.
     """
     remote_index_path = local_file_path.parent.joinpath(local_file_path.name + '.remote_index')
 
     fetched = False
     manifest = None
     meta_section = None
+    if (overwrite_remote_index and flag != 'n' and remote_state is not None
+            and remote_index_path.exists()):
+        deltas = fetch_index_deltas(remote_session, remote_state.remote_ts)
+        if deltas is not None:
+            remote_index = booklet.FixedLengthValue(remote_index_path, 'w')
+            try:
+                applied = apply_index_deltas(remote_index, deltas, remote_state.manifest, pending_deletes, membership)
+            finally:
+                remote_index.close()
+            if applied is not None:
+                manifest, meta_section = applied
+                return remote_index_path, True, manifest, meta_section
+
     if not remote_index_path.exists() or overwrite_remote_index:
         fetched, manifest, meta_section = fetch_remote_index(remote_index_path, remote_session)
+        if fetched and membership is not None:
+            membership.invalidate()
         if not fetched:
             manifest = None
             meta_section = None
@@ -547,7 +1077,9 @@ def open_remote_index(remote_index_path, flag, n_buckets, buffer_size):
     Index entry layout (fixed value_len=15): timestamp(7) + offset(4) + length(4).
     Per-key mode: offset and length are always 0. Grouped mode: offset/length
     locate the member value inside its group object; length is the value's byte
-    length and MAY be 0 (an empty value) - it is NOT a mode discriminator. Future
+    length and MAY be 0 (an empty value) - it is NOT a mode discriminator.
+    Framed (compressed, format-3) groups: offset/length locate the member's
+    FRAME (header included) - never 0 - and the value size is not stored. Future
     layouts change the fixed value_len (the layout discriminator), gated by the
     db object's format_version metadata.
     """
@@ -594,13 +1126,22 @@ class MissingRemoteObject:
                 f"or restore the object")
 
 
-def get_remote_value(local_file, key, remote_session):
+def get_remote_value(local_file, key, remote_session, hedge=False):
     """
     Fetch one per-key-mode value. (User metadata is no longer a separate
-    object in format 2 - it rides the db-object payload.)
+    object in format 2 - it rides the db-object payload.) hedge: a point
+    read - the GET may be hedged (S3SessionReader.get_object).
     """
-    resp = remote_session.get_object(key)
+    resp = remote_session.get_object(key, hedge=True) if hedge else remote_session.get_object(key)
+    return apply_remote_value(local_file, key, resp)
 
+
+def apply_remote_value(local_file, key, resp):
+    """
+    Materialize one per-key-mode GET response (the half of get_remote_value
+    after the request - shared with the asyncio front-end, which issues the
+    request itself).
+    """
     if resp.status == 200:
         timestamp = int(resp.metadata['timestamp'])
         local_file.set(key, resp.data, timestamp, encode_value=False)
@@ -624,6 +1165,23 @@ def _open_private_reader(path):
     return open(path, 'rb')
 
 
+def _warn_private_fallback(fallback_warned, err):
+    if not fallback_warned.is_set():
+        fallback_warned.set()
+        push_logger.warning(
+            f'The fast (private-fd) read path is unavailable for some groups ({err}); '
+            'falling back to locked booklet reads for those groups - slower, still correct.'
+        )
+
+
+def _compaction_error():
+    return ConcurrentCompactionError(
+        'A compaction (prune/clear) ran on the local file during the push - '
+        'every captured value offset is invalid. The push aborts before its '
+        'commit; re-run it.'
+    )
+
+
 def _read_group_values(local_file, entries, pulled_keys, fallback_warned):
     """
     Resolve one group's member values for packing. Returns a list of
@@ -670,12 +1228,7 @@ def _read_group_values(local_file, entries, pulled_keys, fallback_warned):
                         )
                     out.append((key, ts_int, valb))
     except OSError as err:
-        if not fallback_warned.is_set():
-            fallback_warned.set()
-            push_logger.warning(
-                f'The fast (private-fd) read path is unavailable for some groups ({err}); '
-                'falling back to locked booklet reads for those groups - slower, still correct.'
-            )
+        _warn_private_fallback(fallback_warned, err)
         out = []
         locked_keys = [key for key, _ts, _off, _ln in entries]
 
@@ -688,7 +1241,7 @@ def _read_group_values(local_file, entries, pulled_keys, fallback_warned):
     return out
 
 
-def upload_group(group_id, gen, local_file, remote_session, entries, pulled_keys, pack_gate, comp0, fallback_warned):
+def upload_group(group_id, gen, local_file, remote_session, entries, pulled_keys, pack_gate, comp0, fallback_warned, codec=None, part_size=None, kept=None, source_gen=None):
     """
     Pack and PUT one group's members to a FRESH generation object - never
     overwriting the live generation (immutability is the format-2 invariant).
@@ -705,21 +1258,30 @@ def upload_group(group_id, gen, local_file, remote_session, entries, pulled_keys
     comp0 is the compaction_count captured with the offsets: a mismatch after
     the reads means a prune()/clear() invalidated every captured offset - the
     reads may be garbage, and the caller aborts the push before its commit.
+    codec (a compression.Codec, or None) selects the framed layout; offsets
+    then point at each member's frame (pack_framed_group).
+
+    part_size (bytes, or None): a group whose packed size would exceed it is
+    STREAMED into a multipart upload of part_size parts instead of being
+    packed into one buffer (see stream_group) - peak memory per group stays
+    about two parts however large the group is. Same return contract.
+
+    kept/source_gen: a copy repack - the unchanged members are copied from
+    the old generation source_gen (always streamed; see stream_group).
     """
+    if kept or (part_size and _packed_size_estimate(entries) > part_size and hasattr(remote_session, 'create_multipart_upload')):
+        return stream_group(group_id, gen, local_file, remote_session, entries, pulled_keys, pack_gate, comp0, fallback_warned, codec, part_size, kept, source_gen)
+
     t0 = time.monotonic()
     try:
         with pack_gate:
             values = _read_group_values(local_file, entries, pulled_keys, fallback_warned)
-            packed, offsets = pack_group(values)
+            if codec is not None:
+                packed, offsets = pack_framed_group(values, codec)
+            else:
+                packed, offsets = pack_group(values)
             if local_file.compaction_count != comp0:
-                return (
-                    ConcurrentCompactionError(
-                        'A compaction (prune/clear) ran on the local file during the push - '
-                        'every captured value offset is invalid. The push aborts before its '
-                        'commit; re-run it.'
-                    ),
-                    None, None, 0, 0.0, 0.0,
-                )
+                return _compaction_error(), None, None, 0, 0.0, 0.0
         ts_map = {key: ts_int for key, ts_int, _valb in values}
     except Exception as err:
         ## GroupTooLargeError and everything else: the worker contract is
@@ -742,10 +1304,398 @@ def upload_group(group_id, gen, local_file, remote_session, entries, pulled_keys
     return None, offsets, ts_map, len(packed), pack_secs, put_secs
 
 
+## Default size of one part when a large group streams into a multipart
+## upload (open_ebooklet(upload_part_size=...)). S3 requires every part but
+## the last to be at least MIN_UPLOAD_PART_SIZE.
+DEFAULT_UPLOAD_PART_SIZE = 2**23
+MIN_UPLOAD_PART_SIZE = 5 * 2**20
+
+## Largest single private-fd read of the streaming path: a huge value is
+## copied into the parts a chunk at a time, never held whole.
+_STREAM_READ_CHUNK = 2**20
+
+
+def _packed_size_estimate(entries):
+    """The raw packed size of a group from its captured value lengths."""
+    return 4 + sum(2 + len(key.encode()) + 7 + 4 + (ln or 0) for key, _ts, _off, ln in entries)
+
+
+class _PrivateReadFailed(Exception):
+    """A private-fd read failed mid-stream (wraps the OSError)."""
+
+
+class _PartStream:
+    """
+    Byte sink of one streamed group object. Bytes fill fixed-size parts, and
+    every full part is uploaded as it fills (the multipart upload opens at
+    the second full part). The FIRST part is held back and uploaded last, by
+    finish(), so the raw layout's entry-count header can be patched once the
+    count is known - at most two parts are buffered at any time. A group
+    that fits in one part is PUT whole, without a multipart upload.
+
+    The pack gate (held by the caller) is released while a part uploads, so
+    the disk reads of other groups proceed under the upload - the same
+    read/PUT overlap as the buffered path, at part granularity.
+    """
+    def __init__(self, remote_session, obj_key, part_size, pack_gate):
+        self._remote_session = remote_session
+        self._obj_key = obj_key
+        self.part_size = part_size
+        self._gate = pack_gate
+        self.upload = None
+        self.first = None
+        self.buf = bytearray()
+        self.size = 0
+        self.put_secs = 0.0
+        self._next_part = 2
+
+    def room(self):
+        return self.part_size - len(self.buf)
+
+    def write(self, data):
+        mv = memoryview(data)
+        while len(mv):
+            n = min(len(mv), self.room())
+            self.buf += mv[:n]
+            mv = mv[n:]
+            self.size += n
+            if len(self.buf) == self.part_size:
+                self._ship()
+
+    def _upload(self, part_number, data):
+        t0 = time.monotonic()
+        if self.upload is None:
+            self.upload = self._remote_session.create_multipart_upload(self._obj_key)
+        self.upload.upload_part(part_number, data)
+        self.put_secs += time.monotonic() - t0
+
+    def copy(self, source_key, start, n):
+        """
+        Append bytes start..start+n of the object source_key (a db child key)
+        as one part copied server-side. Only at a part boundary, once the
+        first part is held back (n must meet the part-size floor unless it is
+        the object's tail).
+        """
+        self._gate.release()
+        try:
+            t0 = time.monotonic()
+            if self.upload is None:
+                self.upload = self._remote_session.create_multipart_upload(self._obj_key)
+            self.upload.upload_part_copy(self._next_part, self._remote_session.write_db_key + '/' + source_key, start, start + n - 1)
+            self.put_secs += time.monotonic() - t0
+            self._next_part += 1
+        finally:
+            self._gate.acquire()
+        self.size += n
+
+    def fetch(self, source_key, start, n):
+        """Download bytes start..start+n of source_key (outside the pack gate)."""
+        self._gate.release()
+        try:
+            resp = self._remote_session.get_object(source_key, range_start=start, range_end=start + n - 1)
+        finally:
+            self._gate.acquire()
+        if resp.status not in (200, 206) or len(resp.data) != n:
+            raise urllib3.exceptions.HTTPError(resp.error or {'status': resp.status})
+        return resp.data
+
+    def _ship(self):
+        part, self.buf = self.buf, bytearray()
+        if self.first is None:
+            self.first = part
+            return
+        self._gate.release()
+        try:
+            self._upload(self._next_part, part)
+            self._next_part += 1
+        finally:
+            self._gate.acquire()
+
+    def finish(self, header=b''):
+        """
+        Upload what is buffered and make the object visible (call outside
+        the pack gate). header overwrites the start of the object. Failures
+        raise; the object then does not exist.
+        """
+        if self.first is None:
+            self.buf[:len(header)] = header
+            t0 = time.monotonic()
+            resp = self._remote_session.put_object(self._obj_key, bytes(self.buf))
+            self.put_secs += time.monotonic() - t0
+            if resp.status // 100 != 2:
+                raise urllib3.exceptions.HTTPError(resp.error)
+            return
+        self.first[:len(header)] = header
+        if self.buf:
+            self._upload(self._next_part, self.buf)
+        self._upload(1, self.first)
+        t0 = time.monotonic()
+        self.upload.complete()
+        self.put_secs += time.monotonic() - t0
+
+    def abort(self):
+        if self.upload is not None:
+            err = self.upload.abort()
+            if err is not None:
+                logger.warning(f'Could not abort the multipart upload of {self._obj_key} ({err}); '
+                               'its parts linger until a bucket lifecycle rule expires them.')
+
+
+def _stream_members(local_file, entries, pulled_keys, fast):
+    """
+    Yield (key, ts_int, value_len, value_or_None, f, value_offset) for the
+    members of one group in entry order, skipping members with no local value
+    (the lost-key drop semantics of _read_group_values). With fast, members
+    with a captured offset come from the private fd f WITHOUT reading the
+    value (value None - the caller copies it from f at value_offset); other
+    members are read whole through booklet's locked path.
+    """
+    fast = fast and getattr(local_file, '_is_file', False)
+    f = None
+    try:
+        for key, ts_int, value_offset, value_len in entries:
+            if fast and value_offset is not None and key not in pulled_keys:
+                if f is None:
+                    try:
+                        f = _open_private_reader(local_file._file_path)
+                    except OSError as err:
+                        raise _PrivateReadFailed(err) from err
+                yield key, ts_int, value_len, None, f, value_offset
+            else:
+                result = local_file.get_timestamp(key, include_value=True, decode_value=False)
+                if result is None:
+                    continue
+                ts_int, valb = result
+                yield key, ts_int, len(valb), valb, None, None
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _read_private(f, key, offset, n, pos=None):
+    """n bytes of a member's value from the private fd (seeks when pos is given)."""
+    try:
+        if pos is not None:
+            f.seek(pos)
+        data = f.read(n)
+    except OSError as err:
+        raise _PrivateReadFailed(err) from err
+    if len(data) != n:
+        raise _PrivateReadFailed(
+            f"short read for key '{key}': wanted {n} bytes at offset {offset}, got {len(data)}")
+    return data
+
+
+def _stream_raw_group(stream, local_file, entries, pulled_keys, fast):
+    """Write a raw-layout group into stream; returns (offsets, ts_map)."""
+    offsets = {}
+    ts_map = {}
+    stream.write(b'\x00\x00\x00\x00')   # entry count, patched by finish()
+    members = _stream_members(local_file, entries, pulled_keys, fast)
+    with contextlib.closing(members):
+        for key, ts_int, value_len, valb, f, value_offset in members:
+            key_bytes = key.encode()
+            header = _ENTRY_KEY_LEN.pack(len(key_bytes)) + key_bytes + int_to_bytes(ts_int, 7) + _ENTRY_VALUE_LEN.pack(value_len)
+            if stream.size + len(header) + value_len > _MAX_GROUP_BYTES:
+                raise _group_too_large('bytes')
+            stream.write(header)
+            offsets[key] = (stream.size, value_len)
+            ts_map[key] = ts_int
+            if valb is not None:
+                stream.write(valb)
+                continue
+            ## Copy the value a chunk at a time, each chunk sized to the room
+            ## left in the current part (no intermediate buffer beyond it).
+            remaining = value_len
+            pos = value_offset
+            while remaining:
+                n = min(remaining, stream.room(), _STREAM_READ_CHUNK)
+                stream.write(_read_private(f, key, value_offset, n, pos))
+                pos = None
+                remaining -= n
+    return offsets, ts_map
+
+
+def _stream_kept_runs(stream, source_key, kept):
+    """
+    Append the unchanged members of a copy repack to a raw-layout stream:
+    kept is [(key, offset, length, ts_int)] of the old object source_key, in
+    offset order. Members adjacent in the old object form one run that is
+    copied as a single byte range, so the new object holds exactly the same
+    entry bytes (nothing of the replaced or deleted members). A run is copied
+    server-side from a part boundary on; bytes needed to fill the current
+    client part (always including the first) are downloaded instead. The
+    runs end the object, so the last one's tail is copied whatever its size.
+    Returns (offsets, ts_map) of the kept members.
+    """
+    offsets = {}
+    ts_map = {}
+    runs = []
+    for key, offset, length, ts_int in kept:
+        start, end = _member_span(key, offset, length)
+        if runs and runs[-1][1] == start:
+            runs[-1][1] = end
+            runs[-1][2].append((key, offset, length, ts_int))
+        else:
+            runs.append([start, end, [(key, offset, length, ts_int)]])
+
+    for i, (start, end, members) in enumerate(runs):
+        last = i == len(runs) - 1
+        new_start = stream.size
+        if new_start + end - start > _MAX_GROUP_BYTES:
+            raise _group_too_large('bytes')
+        for key, offset, length, ts_int in members:
+            offsets[key] = (new_start + offset - start, length)
+            ts_map[key] = ts_int
+        pos = start
+        while pos < end:
+            n = end - pos
+            if stream.first is not None and not stream.buf and (n >= MIN_UPLOAD_PART_SIZE or last):
+                stream.copy(source_key, pos, n)
+            else:
+                n = min(n, stream.room())
+                stream.write(stream.fetch(source_key, pos, n))
+            pos += n
+    return offsets, ts_map
+
+
+def _stream_framed_group(stream, local_file, entries, pulled_keys, fast, codec):
+    """Write a framed (compressed) group into stream; returns (offsets, ts_map)."""
+    ts_map = {}
+    packer = _FramePacker(codec, stream.write)
+    members = _stream_members(local_file, entries, pulled_keys, fast)
+    with contextlib.closing(members):
+        for key, ts_int, value_len, valb, f, value_offset in members:
+            if valb is None:
+                valb = _read_private(f, key, value_offset, value_len, value_offset)
+            packer.add((key, ts_int, valb))
+            ts_map[key] = ts_int
+    packer.flush()
+    return packer.offsets, ts_map
+
+
+def stream_group(group_id, gen, local_file, remote_session, entries, pulled_keys, pack_gate, comp0, fallback_warned, codec, part_size, kept=None, source_gen=None):
+    """
+    The streaming form of upload_group (same arguments and return contract)
+    for groups larger than one part: members are read in captured-offset
+    order and packed straight into the parts of a multipart upload of the
+    FRESH generation object, instead of into one in-memory image of the
+    whole group. Offsets are computed exactly as pack_group /
+    pack_framed_group compute them (the layout is byte-identical).
+
+    kept (raw layout only): unchanged members of generation source_gen,
+    appended after the local members as runs copied from the old object
+    (_stream_kept_runs) - a copy repack.
+
+    The object only appears when the upload completes - before the commit,
+    exactly like the buffered PUT - and any failure aborts the upload, so a
+    failed group leaves nothing behind. A private-fd failure restarts the
+    group once on booklet's locked read path (the buffered path's fallback).
+    """
+    t0 = time.monotonic()
+    obj_key = group_obj_key(group_id, gen)
+    fast = True
+    while True:
+        stream = _PartStream(remote_session, obj_key, part_size, pack_gate)
+        try:
+            with pack_gate:
+                if codec is None:
+                    offsets, ts_map = _stream_raw_group(stream, local_file, entries, pulled_keys, fast)
+                    if kept:
+                        kept_offsets, kept_ts = _stream_kept_runs(stream, group_obj_key(group_id, source_gen), kept)
+                        offsets.update(kept_offsets)
+                        ts_map.update(kept_ts)
+                    header = _GROUP_COUNT.pack(len(offsets))
+                else:
+                    offsets, ts_map = _stream_framed_group(stream, local_file, entries, pulled_keys, fast, codec)
+                    header = b''
+                if local_file.compaction_count != comp0:
+                    stream.abort()
+                    return _compaction_error(), None, None, 0, 0.0, 0.0
+            stream.finish(header)
+        except _PrivateReadFailed as err:
+            stream.abort()
+            _warn_private_fallback(fallback_warned, err)
+            fast = False
+            continue
+        except Exception as err:
+            ## Same contract as upload_group: per-group failure, never a raise.
+            stream.abort()
+            total = time.monotonic() - t0
+            return err, None, None, stream.size, total - stream.put_secs, stream.put_secs
+        total = time.monotonic() - t0
+        return None, offsets, ts_map, stream.size, total - stream.put_secs, stream.put_secs
+
+
 ## Per-entry header layout inside a packed group object (see pack_group):
 ## [key_len: >H][key][timestamp: 7 bytes][value_len: >I][value]
 group_entry_fixed_overhead = 2 + 7 + 4
 
+## Default gap (bytes) below which two member reads in the same group object
+## are coalesced into one ranged GET. Downloading a dead span this size costs
+## about as much as the extra request's round trip on a typical S3 link.
+DEFAULT_RANGE_MERGE_GAP = 2**20
+
+
+def _member_span(key, offset, length, framed=False):
+    """(start, end_exclusive) of a member's entry - header included - in its group object."""
+    if framed:
+        ## Framed index entries already span the member's whole frame.
+        return offset, offset + length
+    return offset - group_entry_fixed_overhead - len(key.encode()), offset + length
+
+
+def plan_group_ranges(key_infos, max_gap=DEFAULT_RANGE_MERGE_GAP, framed=False):
+    """
+    Split one group's requested members into the ranged reads that fetch
+    them. key_infos: list of (key, offset, length, timestamp_int) in any
+    order. Returns a list of key_info chunks in ascending offset order; each
+    chunk is fetched as ONE range from its first member's entry header to
+    its last member's end (get_remote_group_values).
+
+    Two neighbouring members share a range only when the dead bytes between
+    them are at most max_gap - a sparse request against a large group then
+    becomes several tight ranges (fetched in parallel by the caller) instead
+    of one range spanning most of the object. max_gap=0 merges only
+    adjacent members; a huge max_gap reproduces the single-range read.
+    framed=True plans against framed (compressed) index entries, whose
+    offset/length name the member's frame; members sharing a frame always
+    share a range.
+    """
+    if max_gap < 0:
+        raise ValueError('max_gap must be >= 0.')
+    chunks = []
+    chunk = None
+    chunk_end = 0
+    for info in sorted(key_infos, key=lambda x: x[1]):
+        start, end = _member_span(info[0], info[1], info[2], framed)
+        if chunk is not None and start - chunk_end <= max_gap:
+            chunk.append(info)
+            chunk_end = max(chunk_end, end)
+        else:
+            chunk = [info]
+            chunks.append(chunk)
+            chunk_end = end
+    return chunks
+
+
+def merge_group_failures(existing, new):
+    """
+    Combine two failures of the same group (from different range chunks) into
+    the one the caller reports. Missing-member markers for the same object
+    merge their keys, so the re-check protocol sees them in a single batch;
+    any other error wins over a marker (it is loud regardless).
+    """
+    if existing is None:
+        return new
+    if (isinstance(existing, MissingRemoteObject) and isinstance(new, MissingRemoteObject)
+            and existing.s3_key == new.s3_key):
+        return MissingRemoteObject(existing.s3_key, existing.keys + new.keys,
+                                   existing.object_exists and new.object_exists)
+    if isinstance(existing, MissingRemoteObject):
+        return new
+    return existing
+
 
 def recover_group_members(group_id, gen, key_infos, local_file, remote_session, report_missing_members=True):
     """
@@ -764,13 +1714,19 @@ def recover_group_members(group_id, gen, key_infos, local_file, remote_session,
     obj_key = group_obj_key(group_id, gen)
     resp = remote_session.get_object(obj_key)
     if resp.status == 200:
-        entries = {key: (timestamp, value) for key, timestamp, value in unpack_group(resp.data)}
+        ## Header-only scan for just the requested members: the rest of a
+        ## (possibly multi-GiB) group is never unpacked or copied.
+        try:
+            entries = find_group_members(resp.data, [k for k, _o, _l, _t in key_infos], group_codec(remote_session))
+        except ValueError:
+            ## An unparseable object holds no recoverable members.
+            entries = {}
         missing = []
         for key, offset, length, timestamp_int in key_infos:
             entry = entries.get(key)
             if entry is not None:
                 timestamp, value = entry
-                local_file.set(key, value, timestamp, encode_value=False)
+                local_file.set(key, bytes(value), timestamp, encode_value=False)
             else:
                 missing.append(key)
         if report_missing_members and missing:
@@ -788,49 +1744,63 @@ def recover_group_members(group_id, gen, key_infos, local_file, remote_session,
     return None
 
 
-def get_remote_group_values(group_id, gen, key_infos, local_file, remote_session, report_missing_members=True):
+def group_read_range(key_infos, framed=False):
+    """
+    The (range_start, range_end) - inclusive, as S3 Range headers are - of the
+    ONE ranged read covering these members: from the first member's entry
+    header (so every requested member's header is inside the fetched range)
+    to the last member's end - or, framed, from the first member's frame to
+    the end of the last one. None when the index offsets are malformed.
+    Callers split sparse requests into tight chunks first (plan_group_ranges).
+    """
+    spans = [_member_span(k, o, ln, framed) for k, o, ln, _t in key_infos]
+    range_start = min(start for start, _end in spans)
+    range_end = max(end for _start, end in spans) - 1
+    if range_start < 0 or range_end < range_start:
+        return None
+    return range_start, range_end
+
+
+def get_remote_group_values(group_id, gen, key_infos, local_file, remote_session, report_missing_members=True, hedge=False):
     """
     key_infos: list of (key, offset, length, timestamp_int)
 
     Each member read is verified against the group object's embedded entry header
-    (the key itself and the value length precede every value in the packed layout)
-    before being trusted - a stale index offset would otherwise silently deliver
+    (the key itself and the value length precede every value in the packed layout;
+    framed objects are decoded and searched by key) before being trusted - a stale index offset would otherwise silently deliver
     another entry's bytes. On any verification failure the whole (self-describing)
     group object is downloaded and parsed instead (recover_group_members;
     report_missing_members is passed through - see its docstring).
-    """
-    sorted_infos = sorted(key_infos, key=lambda x: x[1])
 
-    ## Start the ranged read at the first member's entry header so every requested
-    ## member's header is inside the fetched range.
-    first_key, first_offset, _, _ = sorted_infos[0]
-    range_start = first_offset - group_entry_fixed_overhead - len(first_key.encode())
-    last = sorted_infos[-1]
-    range_end = last[1] + last[2] - 1
-
-    if range_start < 0:
+    hedge: a point read - the ranged GET may be hedged
+    (S3SessionReader.get_object); batch reads never are.
+    """
+    read_range = group_read_range(key_infos, getattr(remote_session, 'compression', None) is not None)
+    if read_range is None:
         logger.warning(f"Group {group_id}: stored index offsets are malformed; recovering members from the full group object.")
         return recover_group_members(group_id, gen, key_infos, local_file, remote_session, report_missing_members)
 
-    resp = remote_session.get_object(group_obj_key(group_id, gen), range_start=range_start, range_end=range_end)
+    range_start, range_end = read_range
+    if hedge:
+        resp = remote_session.get_object(group_obj_key(group_id, gen), range_start=range_start, range_end=range_end, hedge=True)
+    else:
+        resp = remote_session.get_object(group_obj_key(group_id, gen), range_start=range_start, range_end=range_end)
+    return apply_group_range(group_id, gen, key_infos, range_start, resp, local_file, remote_session, report_missing_members)
+
+
+def apply_group_range(group_id, gen, key_infos, range_start, resp, local_file, remote_session, report_missing_members=True):
+    """
+    Verify and materialize the members of one ranged group read (the half of
+    get_remote_group_values after the request - shared with the asyncio
+    front-end, which issues the request itself). remote_session is only used
+    for the full-object recovery fallback and its group codec.
+    """
     if resp.status in (200, 206):
-        data = resp.data
-        verified = []
-        for key, offset, length, timestamp_int in sorted_infos:
-            key_bytes = key.encode()
-            header_start = offset - group_entry_fixed_overhead - len(key_bytes) - range_start
-            rel_offset = offset - range_start
-
-            ok = header_start >= 0 and rel_offset + length <= len(data)
-            if ok:
-                key_len = struct.unpack_from('>H', data, header_start)[0]
-                ok = (key_len == len(key_bytes)
-                      and data[header_start + 2:header_start + 2 + key_len] == key_bytes
-                      and struct.unpack_from('>I', data, header_start + 2 + key_len + 7)[0] == length)
-            if not ok:
-                verified = None
-                break
-            verified.append((key, data[rel_offset:rel_offset + length], timestamp_int))
+        codec = group_codec(remote_session)
+        if codec is not None:
+            verified = _framed_range_members(resp.data, key_infos, range_start, codec)
+        else:
+            verified = _raw_range_members(resp.data, key_infos, range_start)
 
         if verified is None:
             logger.warning(f"Group {group_id}: stored index offsets do not match the group object layout (corrupted or shifted object); recovering members from the full group object.")
@@ -839,7 +1809,7 @@ def get_remote_group_values(group_id, gen, key_infos, local_file, remote_session
         for key, value, timestamp_int in verified:
             local_file.set(key, value, timestamp_int, encode_value=False)
     elif resp.status == 404:
-        ## sorted_infos comes from remote-index entries, so the index claims
+        ## key_infos comes from remote-index entries, so the index claims
         ## these members - a missing group object is never legitimate absence.
         return MissingRemoteObject(group_obj_key(group_id, gen), [k for k, _o, _l, _t in key_infos])
     elif resp.status == 416:
@@ -852,8 +1822,62 @@ def get_remote_group_values(group_id, gen, key_infos, local_file, remote_session
     return None
 
 
-def get_remote_group_value(group_id, gen, key, offset, length, timestamp_int, local_file, remote_session):
-    return get_remote_group_values(group_id, gen, [(key, offset, length, timestamp_int)], local_file, remote_session)
+def _raw_range_members(data, key_infos, range_start):
+    """
+    Check each member of a ranged raw-layout read against its embedded entry
+    header. Returns [(key, value, ts_int)], or None on the first mismatch.
+    """
+    verified = []
+    for key, offset, length, timestamp_int in sorted(key_infos, key=lambda x: x[1]):
+        key_bytes = key.encode()
+        header_start = offset - group_entry_fixed_overhead - len(key_bytes) - range_start
+        rel_offset = offset - range_start
+
+        ok = header_start >= 0 and rel_offset + length <= len(data)
+        if ok:
+            key_len = struct.unpack_from('>H', data, header_start)[0]
+            ok = (key_len == len(key_bytes)
+                  and data[header_start + 2:header_start + 2 + key_len] == key_bytes
+                  and struct.unpack_from('>I', data, header_start + 2 + key_len + 7)[0] == length)
+        if not ok:
+            return None
+        verified.append((key, data[rel_offset:rel_offset + length], timestamp_int))
+    return verified
+
+
+def _framed_range_members(data, key_infos, range_start, codec):
+    """
+    The framed counterpart of apply_group_range's header verification:
+    decode each distinct frame the index entries name (once) and pick the
+    requested members out of it by key. Returns [(key, value, ts_int)], or
+    None when a frame is out of range, does not decode, or lacks a member the
+    index places in it (a stale or corrupted entry - the caller recovers from
+    the full object).
+    """
+    by_frame = {}
+    for info in key_infos:
+        by_frame.setdefault((info[1], info[2]), []).append(info)
+    mv = memoryview(data)
+    verified = []
+    for (offset, length), infos in by_frame.items():
+        rel = offset - range_start
+        if rel < 0 or rel + length > len(mv):
+            return None
+        try:
+            raw = _decompress_frame(mv[rel:rel + length], codec)
+            members = find_group_members(raw, [k for k, _o, _l, _t in infos])
+        except ValueError:
+            return None
+        for key, _offset, _length, timestamp_int in infos:
+            member = members.get(key)
+            if member is None:
+                return None
+            verified.append((key, bytes(member[1]), timestamp_int))
+    return verified
+
+
+def get_remote_group_value(group_id, gen, key, offset, length, timestamp_int, local_file, remote_session, hedge=False):
+    return get_remote_group_values(group_id, gen, [(key, offset, length, timestamp_int)], local_file, remote_session, hedge=hedge)
 
 
 def check_local_vs_remote(local_file, remote_time_bytes, key):
@@ -877,14 +1901,195 @@ def check_local_vs_remote(local_file, remote_time_bytes, key):
 ### local/remote changelog
 
 
-def create_changelog(local_file_path, local_file, remote_index, remote_session, journal=None):
+class ChangeSet:
+    """
+    The push change set (create_changelog): the changed/written keys as
+    ascending row numbers of the push's loc_map (a LocationTable, so in
+    local file order), with a parallel array of their remote timestamps
+    (0 = not on the remote). Keys and local timestamps are read from
+    loc_map, so a change costs 16 bytes here and no str object; membership
+    is a loc_map lookup plus a bisect over the rows.
+    """
+    __slots__ = ('loc_map', 'rows', 'remote_ts')
+
+    def __init__(self, loc_map=None, rows=(), remote_ts=()):
+        self.loc_map = LocationTable() if loc_map is None else loc_map
+        self.rows = array('Q', rows)
+        self.remote_ts = array('Q', remote_ts)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        key = self.loc_map.key
+        for row in self.rows:
+            yield key(row)
+
+    def _index(self, key):
+        row = self.loc_map.row(key)
+        if row < 0:
+            return -1
+        i = bisect_left(self.rows, row)
+        if i < len(self.rows) and self.rows[i] == row:
+            return i
+        return -1
+
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    def local_timestamp(self, key) -> int:
+        i = self._index(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.loc_map.ts[self.rows[i]]
+
+    def items(self):
+        """Yield (key, local_ts_int, remote_ts_int) in row order."""
+        loc_map = self.loc_map
+        for row, remote_int_us in zip(self.rows, self.remote_ts):
+            yield loc_map.key(row), loc_map.ts[row], remote_int_us
+
+
+## create_changelog's diff streams the whole remote index once (sequential
+## reads) instead of one random index lookup per local key - unless the local
+## file holds fewer than 1/_INDEX_SCAN_RATIO of the remote's keys, where the
+## point lookups touch less of the index than the scan does.
+_INDEX_SCAN_RATIO = 16
+
+
+class LocationTable:
+    """
+    Compact replacement for a {key: (ts_int, value_offset, value_len)} dict
+    of every live local value (create_changelog's loc_map). Keys are stored
+    utf-8 encoded back to back in one bytearray; ts/offset/len are parallel
+    arrays; lookups go through an open-addressing hash index of row numbers,
+    built on first use. For a 16-byte key a dict of tuples costs about 250
+    bytes (str, tuple and three int objects); a row here costs about 60 -
+    the key bytes plus about 45.
+
+    Supports the read side of the dict protocol the push uses (len, in,
+    get, [], iteration, items) plus item assignment. Rows are never removed,
+    so a row number (row()) names one key for the table's lifetime - the
+    ChangeSet stores changed keys that way.
+    """
+    __slots__ = ('_keys', '_key_ends', 'ts', 'offsets', 'lengths', '_slots', '_mask')
+
+    def __init__(self):
+        self._keys = bytearray()
+        self._key_ends = array('Q')
+        self.ts = array('Q')
+        self.offsets = array('Q')
+        self.lengths = array('L')
+        self._slots = None
+        self._mask = 0
+
+    def __len__(self):
+        return len(self._key_ends)
+
+    def _key_bytes(self, row):
+        start = self._key_ends[row - 1] if row else 0
+        return self._keys[start:self._key_ends[row]]
+
+    def key(self, row) -> str:
+        start = self._key_ends[row - 1] if row else 0
+        return self._keys[start:self._key_ends[row]].decode()
+
+    def append(self, key_bytes, ts, offset, length):
+        """Add a row for a key not yet in the table (the caller's contract)."""
+        self._keys += key_bytes
+        self._key_ends.append(len(self._keys))
+        self.ts.append(ts or 0)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        if self._slots is not None:
+            if len(self) * 4 > len(self._slots) * 3 or len(self) >= 2**31 - 1:
+                self._build_index()
+            else:
+                self._insert(len(self) - 1, hash(bytes(key_bytes)))
+
+    def _insert(self, row, h):
+        slots = self._slots
+        i = h & self._mask
+        while slots[i] >= 0:
+            i = (i + 1) & self._mask
+        slots[i] = row
+
+    def _build_index(self):
+        capacity = 8
+        while capacity * 2 < len(self) * 3:
+            capacity *= 2
+        ## 4-byte row numbers until a table outgrows them.
+        self._slots = array('i' if len(self) < 2**31 - 1 else 'q', [-1]) * capacity
+        self._mask = capacity - 1
+        keys = self._keys
+        start = 0
+        for row, end in enumerate(self._key_ends):
+            self._insert(row, hash(bytes(keys[start:end])))
+            start = end
+
+    def row(self, key):
+        """The row number of key, or -1 when the table does not hold it."""
+        if self._slots is None:
+            self._build_index()
+        kb = key.encode()
+        slots = self._slots
+        i = hash(kb) & self._mask
+        while True:
+            row = slots[i]
+            if row < 0:
+                return -1
+            if self._key_bytes(row) == kb:
+                return row
+            i = (i + 1) & self._mask
+
+    def __contains__(self, key):
+        return self.row(key) >= 0
+
+    def get(self, key, default=None):
+        row = self.row(key)
+        if row < 0:
+            return default
+        return self.ts[row], self.offsets[row], self.lengths[row]
+
+    def __getitem__(self, key):
+        row = self.row(key)
+        if row < 0:
+            raise KeyError(key)
+        return self.ts[row], self.offsets[row], self.lengths[row]
+
+    def __setitem__(self, key, value):
+        ts, offset, length = value
+        row = self.row(key)
+        if row < 0:
+            self.append(key.encode(), ts, offset, length)
+        else:
+            self.ts[row] = ts
+            self.offsets[row] = offset
+            self.lengths[row] = length
+
+    def __iter__(self):
+        keys = self._keys
+        start = 0
+        for end in self._key_ends:
+            yield keys[start:end].decode()
+            start = end
+
+    keys = __iter__
+
+    def items(self):
+        """Yield (key, (ts_int, value_offset, value_len)) in row order."""
+        for row, key in enumerate(self):
+            yield key, (self.ts[row], self.offsets[row], self.lengths[row])
+
+
+def create_changelog(local_file, remote_index, remote_session, journal=None):
     """
     Build the push changelog: the UNION of the timestamp diff (local newer than
     remote index) and the journal's pending writes. The timestamp diff catches
     writes whose journal entry was lost in a crash window (booklet auto-flushes
     data ahead of the sync-boundary journal persistence); the journal catches
     clock-skewed edits the diff can never see, and is the only source of
-    deletes (which live outside the changelog file entirely).
+    deletes (which live outside the changelog entirely).
 
     Skew normalization: a journaled key whose local timestamp does not beat the
     remote entry's is bumped to max(now, remote+1) BEFORE it enters the
@@ -892,13 +2097,24 @@ def create_changelog(local_file_path, local_file, remote_index, remote_session,
     readers that already materialized the newer remote value would never pull
     it (the 0.8.4 clock-skew case, now closed instead of warned about).
 
-    Returns (changelog_path, loc_map, compaction_count):
+    Returns (changes, loc_map, compaction_count), changes being a ChangeSet
+    held in memory (no temporary booklet file is written and read back).
+
+    The diff runs over loc_map's rows and holds no per-key Python objects:
+    one pass over the local file's header-only locations() fills loc_map;
+    one pass over the remote index (its items() in file order) records the
+    remote timestamp of every key loc_map holds in a per-row array('Q') -
+    8 bytes a row - looking each remote key up in loc_map's hash index (when
+    the local file holds under 1/_INDEX_SCAN_RATIO of the remote's keys, a
+    point lookup per local row replaces that pass); the journal pass
+    re-stamps skewed edits; and a final pass over the rows keeps those that
+    are new to the remote or newer locally - as row numbers in the ChangeSet.
 
     The sweep rides booklet's header-only locations() iterator (0.12.8), so as
-    a zero-extra-IO side product it captures loc_map = {key: (ts_int,
-    value_offset, value_len)} - the physical position of every live local
-    value. The push's pack workers later read those bytes through a private
-    fd, outside booklet's locks. loc_map is in-memory only (a retried push
+    a zero-extra-IO side product it captures loc_map - a LocationTable of
+    key -> (ts_int, value_offset, value_len), the physical position of every
+    live local value. The push's pack workers later read those bytes through
+    a private fd, outside booklet's locks. loc_map is in-memory only (a retried push
     rebuilds the changelog anyway). compaction_count is snapshotted at the
     START of the sweep: booklet value blocks are append-only, so the captured
     offsets stay valid until a prune()/clear() bumps that counter - the push
@@ -911,116 +2127,105 @@ def create_changelog(local_file_path, local_file, remote_index, remote_session,
     (append), the phase-C set_metadata (append), and the file-timestamp
     header write.
     """
-    changelog_path = local_file_path.parent.joinpath(local_file_path.name + '.changelog')
-    if remote_index is not None:
-        n_buckets = remote_index._n_buckets
-    else:
-        n_buckets = local_file._n_buckets
-
     journal_written = journal.written if journal is not None else ()
 
     ## Snapshot BEFORE the sweep (see the docstring). A compaction between
     ## this line and the sweep start only makes the push abort spuriously -
     ## safe direction, and unreachable through the session API during a push.
     compaction_count = local_file.compaction_count
-    loc_map = {}
+    loc_map = LocationTable()
+    for key, local_int_us, value_offset, value_len in local_file.locations():
+        loc_map.append(key.encode(), local_int_us, value_offset, value_len)
 
-    with booklet.FixedLengthValue(changelog_path, 'n', key_serializer='str', value_len=14, n_buckets=n_buckets) as f:
-        if remote_session.uuid and remote_index is not None:
-            for key, local_int_us, value_offset, value_len in local_file.locations():
-                loc_map[key] = (local_int_us, value_offset, value_len)
-                remote_val = remote_index.get(key)
+    n_rows = len(loc_map)
+    ## The remote timestamp of each loc_map row (0 = not on the remote).
+    remote_of = array('Q', bytes(8 * n_rows))
+
+    if remote_session.uuid and remote_index is not None:
+        if n_rows * _INDEX_SCAN_RATIO >= len(remote_index):
+            for key, remote_val in remote_index.items():
                 if remote_val:
-                    remote_ts_bytes = remote_val[:7]
-                    remote_int_us = bytes_to_int(remote_ts_bytes)
-                    if local_int_us > remote_int_us:
-                        local_bytes_us = int_to_bytes(local_int_us, 7)
-                        f[key] = local_bytes_us + remote_ts_bytes
-                else:
-                    local_bytes_us = int_to_bytes(local_int_us, 7)
-                    f[key] = local_bytes_us + int_to_bytes(0, 7)
-
-            ## Journal union: pending writes the timestamp diff missed. The
-            ## only in-range candidates are skew-stamped edits (local <= remote)
-            ## and journal entries whose local value no longer exists.
-            now_int_us = booklet.utils.make_timestamp_int()
-            for key in sorted(journal_written):
-                if key in f:
-                    continue
-                entry = loc_map.get(key)
-                local_int_us = entry[0] if entry is not None else None
-                if local_int_us is None:
-                    warnings.warn(
-                        f"The journal records an unpushed write for '{key}' but the key has no "
-                        'local value (evicted or externally removed) - it is DROPPED from this '
-                        'push. If the value mattered, re-set it before pushing.',
-                        UserWarning, stacklevel=3,
-                    )
-                    journal.discard_written(key)
-                    continue
-                remote_val = remote_index.get(key)
+                    row = loc_map.row(key)
+                    if row >= 0:
+                        remote_of[row] = bytes_to_int(remote_val[:7])
+        else:
+            for row in range(n_rows):
+                remote_val = remote_index.get(loc_map.key(row))
                 if remote_val:
-                    remote_int_us = bytes_to_int(remote_val[:7])
-                    new_ts = max(now_int_us, remote_int_us + 1)
-                    local_file.set_timestamp(key, new_ts)
-                    ## The in-place ts rewrite (offset-safe) must reach the
-                    ## captured map too - the packed entry carries the map ts.
-                    loc_map[key] = (new_ts, entry[1], entry[2])
-                    warnings.warn(
-                        f"The unpushed local edit of '{key}' carried a timestamp at or before the "
-                        "remote's (clock skew or an explicit set_timestamp); its timestamp was "
-                        'advanced so the edit propagates to readers that already hold the remote value.',
-                        UserWarning, stacklevel=3,
-                    )
-                    f[key] = int_to_bytes(new_ts, 7) + remote_val[:7]
-                else:
-                    f[key] = int_to_bytes(local_int_us, 7) + int_to_bytes(0, 7)
+                    remote_of[row] = bytes_to_int(remote_val[:7])
+
+        ## Journal union: pending writes the timestamp diff would miss. Only
+        ## skew-stamped edits (local <= remote) and journal entries whose
+        ## local value no longer exists are out of its reach; the former are
+        ## re-stamped here so the row pass below picks them up.
+        now_int_us = booklet.utils.make_timestamp_int()
+        dropped = []
+        for key in journal_written:
+            row = loc_map.row(key)
+            if row < 0:
+                dropped.append(key)
+                continue
+            remote_int_us = remote_of[row]
+            if remote_int_us and loc_map.ts[row] <= remote_int_us:
+                new_ts = max(now_int_us, remote_int_us + 1)
+                local_file.set_timestamp(key, new_ts)
+                ## The in-place ts rewrite (offset-safe) must reach the
+                ## captured map too - the packed entry carries the map ts.
+                loc_map.ts[row] = new_ts
+                warnings.warn(
+                    f"The unpushed local edit of '{key}' carried a timestamp at or before the "
+                    "remote's (clock skew or an explicit set_timestamp); its timestamp was "
+                    'advanced so the edit propagates to readers that already hold the remote value.',
+                    UserWarning, stacklevel=3,
+                )
+        ## (User metadata no longer rides the changelog: in format 2 it is
+        ## embedded in the db-object payload, driven by journal.meta_pending.)
+    else:
+        ## No remote: every local key is a change, so only the
+        ## missing-local-value warning applies to the journal.
+        dropped = [key for key in journal_written if key not in loc_map]
+
+    for key in sorted(dropped):
+        warnings.warn(
+            f"The journal records an unpushed write for '{key}' but the key has no "
+            'local value (evicted or externally removed) - it is DROPPED from this '
+            'push. If the value mattered, re-set it before pushing.',
+            UserWarning, stacklevel=3,
+        )
+        journal.discard_written(key)
+
+    rows = array('Q')
+    remote_ts = array('Q')
+    local_ts = loc_map.ts
+    for row in range(n_rows):
+        remote_int_us = remote_of[row]
+        if not remote_int_us or local_ts[row] > remote_int_us:
+            rows.append(row)
+            remote_ts.append(remote_int_us)
+    del remote_of
+    changes = ChangeSet(loc_map, rows, remote_ts)
+
+    return changes, loc_map, compaction_count
 
-            ## (User metadata no longer rides the changelog: in format 2 it is
-            ## embedded in the db-object payload, driven by journal.meta_pending.)
+
+def view_changelog(changes):
+    """
+    Yield one dict per ChangeSet record - key, remote_timestamp (None when
+    the key is new to the remote) and local_timestamp, both UTC datetimes.
+    """
+    for key, local_int_us, remote_int_us in changes.items():
+        if remote_int_us == 0:
+            remote_ts = None
         else:
-            for key, local_int_us, value_offset, value_len in local_file.locations():
-                loc_map[key] = (local_int_us, value_offset, value_len)
-                local_bytes_us = int_to_bytes(local_int_us, 7)
-                f[key] = local_bytes_us + int_to_bytes(0, 7)
-
-            ## Journal union, no-remote branch: every local key is already in
-            ## the changelog, so only the missing-local-value warning applies.
-            for key in sorted(journal_written):
-                if key not in f:
-                    warnings.warn(
-                        f"The journal records an unpushed write for '{key}' but the key has no "
-                        'local value (evicted or externally removed) - it is DROPPED from this '
-                        'push. If the value mattered, re-set it before pushing.',
-                        UserWarning, stacklevel=3,
-                    )
-                    journal.discard_written(key)
-
-    return changelog_path, loc_map, compaction_count
-
-
-def view_changelog(changelog_path):
-    """
-
-    """
-    with booklet.FixedLengthValue(changelog_path) as f:
-        for key, val in f.items():
-            local_bytes_us = val[:7]
-            remote_bytes_us = val[7:]
-            local_int_us = bytes_to_int(local_bytes_us)
-            remote_int_us = bytes_to_int(remote_bytes_us)
-            if remote_int_us == 0:
-                remote_ts = None
-            else:
-                remote_ts = datetime.fromtimestamp(remote_int_us*0.000001, tz=timezone.utc)
+            remote_ts = datetime.fromtimestamp(remote_int_us*0.000001, tz=timezone.utc)
 
-            dict1 = {
-                'key': key,
-                'remote_timestamp': remote_ts,
-                'local_timestamp': datetime.fromtimestamp(local_int_us*0.000001, tz=timezone.utc)
-                }
+        dict1 = {
+            'key': key,
+            'remote_timestamp': remote_ts,
+            'local_timestamp': datetime.fromtimestamp(local_int_us*0.000001, tz=timezone.utc)
+            }
 
-            yield dict1
+        yield dict1
 
 
 ##############################################
@@ -1077,6 +2282,76 @@ def _build_meta_section_for_push(local_file, journal, remote_state, replace_pend
     return remote_state.meta_section
 
 
+def commit_init_bytes(local_file, time_int_us):
+    """
+    The local booklet's init bytes a commit publishes (the db object's
+    init_bytes metadata), stamped with the commit timestamp and with the key
+    count zeroed. Direct _file access moves the shared file position, so hold
+    the owning booklet's thread lock (booklet's own contract since 0.12.6:
+    every position-mover locks).
+    """
+    local_file._set_file_timestamp(time_int_us)
+    with local_file._thread_lock:
+        local_file._file.seek(0)
+        local_init_bytes = bytearray(local_file._file.read(200))
+    if local_init_bytes[:16] != booklet.utils.uuid_variable_blt:
+        raise ValueError(
+            'The local file does not start with the variable-length booklet magic - '
+            f'not an ebooklet local file (first bytes: {bytes(local_init_bytes[:16])!r}).'
+        )
+
+    n_keys_pos = booklet.utils.n_keys_pos
+    local_init_bytes[n_keys_pos:n_keys_pos+4] = b'\x00\x00\x00\x00'
+    return local_init_bytes
+
+
+def commit_metadata(local_file, local_init_bytes, time_int_us, ebooklet_type, commit_format, num_groups=None, compression=None, delta_parents=()):
+    """The db object's user metadata for a commit."""
+    metadata = {
+        'timestamp': str(time_int_us),
+        'uuid': local_file.uuid.hex,
+        'type': ebooklet_type,
+        'init_bytes': base64.urlsafe_b64encode(local_init_bytes).decode(),
+        'format_version': str(commit_format),
+    }
+    if num_groups is not None:
+        metadata['num_groups'] = str(num_groups)
+    if compression is not None:
+        metadata['compression'] = compression
+    if delta_parents:
+        metadata['delta_parents'] = ','.join(str(p) for p in delta_parents)
+    return metadata
+
+
+def sweep_replaced_remote(remote_session, manifest, lock=None):
+    """
+    After a replacement commit: delete EVERYTHING in the namespace the new
+    manifest does not reference - the old database's objects, and any
+    orphans. Safe only while mutual exclusion holds, so the lock is
+    re-verified; on failure the sweep is skipped (the commit already
+    succeeded - the leftovers are orphans for fsck, never a correctness
+    problem). Failures are log-only.
+    """
+    if lock is not None and not lock.verify():
+        logger.warning('The write lock was lost after the replacement commit - skipping the old-object sweep (the leftovers are invisible orphans; run fsck to clean them up).')
+        return
+    expected = set(manifest_obj_keys(manifest))
+    try:
+        listed = remote_session.list_objects()
+        prefix_len = len(remote_session.write_db_key) + 1
+        sweep_keys = []
+        for obj in listed.iter_objects():
+            child = obj['key'][prefix_len:]
+            if child and child not in expected:
+                sweep_keys.append(child)
+        for child in sweep_keys:
+            err = remote_session.delete_object(child)
+            if err is not None:
+                logger.warning(f"Replacement sweep could not delete '{child}' (orphan; fsck will sweep): {err}")
+    except Exception as err:
+        logger.warning(f'Replacement sweep failed (leftovers are invisible orphans; run fsck): {err}')
+
+
 def _format_secs(secs):
     secs = int(secs)
     h, rem = divmod(secs, 3600)
@@ -1086,11 +2361,14 @@ def _format_secs(secs):
 
 class _PushProgress:
     """
-    Cumulative progress for the 'ebooklet.push' INFO records. Exact upfront
-    totals come from the captured loc_map value lengths (+ the pack-format
-    per-entry overhead), so done/total are mutually consistent. Rate/ETA are
+    Cumulative progress for the 'ebooklet.push' INFO records. Upfront totals
+    come from the captured loc_map value lengths and the planned pull lengths
+    (+ the pack-format per-entry overhead); revise() corrects them when a
+    pulled group drops lost members or fails, so done/total stay mutually
+    consistent. Rate/ETA are
     cumulative means - with ~100MB group quanta a windowed rate just jitters.
-    record() is only ever called from the single-threaded bookkeeping loop.
+    record() and revise() are only ever called from the single-threaded
+    dispatch loop.
     """
     def __init__(self, n_groups, n_keys, total_bytes):
         self.n_groups = n_groups
@@ -1107,10 +2385,15 @@ class _PushProgress:
             f'{self.total_bytes:,} bytes'
         )
 
-    def record(self, gid, gen, error, packed_len, pack_secs, put_secs):
+    def revise(self, d_groups, d_keys, d_bytes):
+        self.n_groups += d_groups
+        self.n_keys += d_keys
+        self.total_bytes += d_bytes
+
+    def record(self, gid, gen, error, packed_len, pack_secs, put_secs, raw_len=None):
         if error is None:
             self.done += 1
-            self.done_bytes += packed_len
+            self.done_bytes += packed_len if raw_len is None else raw_len
             elapsed = max(time.monotonic() - self.t0, 1e-9)
             rate = self.done_bytes / elapsed
             remaining = max(self.total_bytes - self.done_bytes, 0)
@@ -1136,9 +2419,196 @@ class _PushProgress:
         )
 
 
-def update_remote(local_file, remote_index, remote_index_path, changelog_path, remote_session, force_push, journal, remote_state, replace_pending, ebooklet_type, num_groups=None, lock=None, loc_map=None, comp0=None, packers=1):
+## How often (seconds) a running push persists the journal's record of the
+## groups it has uploaded, so a crash mid-push still resumes most of them.
+PUSH_PROGRESS_PERSIST_SECS = 30.0
+
+
+## Default dead-byte ratio past which a chained group is compacted
+## (open_ebooklet(compact_dead_ratio=...)).
+DEFAULT_COMPACT_DEAD_RATIO = 0.5
+
+
+class GroupDelta(msgspec.Struct):
+    """One group's delta-generation plan for a push (plan_group_deltas)."""
+    ## The old chain: [(gen, size)], and where the new delta starts.
+    chain: list
+    start: int
+    ## Dead bytes of the chain once this push commits.
+    dead: int
+    ## The changed members the delta carries (may be empty: deletes only).
+    keys: set
+
+
+def plan_group_deltas(affected_group_ids, changes, deletes, remote_index, manifest, loc_map, num_groups, max_group_deltas, compact_dead_ratio):
+    """
+    Decide which affected groups append a delta generation instead of being
+    repacked in full. Returns {gid: GroupDelta}; every other affected group
+    is compacted. A group is compacted when its slot is a plain token (its
+    base size is unknown), when another delta would exceed max_group_deltas,
+    when its dead bytes would pass compact_dead_ratio of the chain, or when
+    the chain would outgrow the 4-byte index offsets.
+
+    Superseded members count their old entry (from the index). Journaled
+    deletes are already gone from the index, so they count only their entry
+    header - a lower bound; max_group_deltas still bounds the chain.
     """
-    Push the changelog to the remote - the format-2 protocol:
+    changed = {}
+    for key in changes:
+        if key != metadata_key_str and key not in deletes:
+            changed.setdefault(key_to_group_id(key, num_groups), set()).add(key)
+    deleted = {}
+    for key in deletes:
+        deleted.setdefault(key_to_group_id(key, num_groups), []).append(key)
+
+    plan = {}
+    for gid in affected_group_ids:
+        slot = manifest.get(gid)
+        if slot is None or ':' not in slot:
+            continue
+        gens, dead = parse_group_slot(slot)
+        keys = changed.get(gid, set())
+        ## gens holds the base generation plus its deltas; another delta
+        ## must not take the chain past max_group_deltas.
+        n_deltas = len(gens) - 1
+        if keys and n_deltas >= max_group_deltas:
+            continue
+        size = 4
+        for key in keys:
+            entry = loc_map.get(key)
+            key_len = len(key.encode())
+            size += group_entry_fixed_overhead + key_len + (entry[2] if entry is not None else 0)
+            remote_val = remote_index.get(key)
+            if remote_val is not None:
+                dead += group_entry_fixed_overhead + key_len + bytes_to_int(remote_val[11:15])
+        for key in deleted.get(gid, ()):
+            dead += group_entry_fixed_overhead + len(key.encode())
+        start = gens[-1][1] + gens[-1][2]
+        end = start + size if keys else start
+        if end > _MAX_GROUP_BYTES or dead > compact_dead_ratio * end:
+            continue
+        plan[gid] = GroupDelta([(gen, gsize) for gen, _start, gsize in gens], start, dead, keys)
+    return plan
+
+
+class PushContext:
+    """
+    One push (update_remote): the session state it reads and writes, the
+    session's push settings, and what each phase hands the next. Change.push
+    builds it; the phases record their results on it.
+
+    changes is create_changelog's ChangeSet (the keys written since the last
+    push; pending deletes come from the journal). loc_map and comp0 are the
+    LocationTable capture and the compaction_count snapshotted with it
+    (built here when loc_map is None).
+
+    packers bounds how many pack workers read the local file at once (a per-
+    push BoundedSemaphore width). compression names the group codec this
+    commit writes (grouped mode; None = the raw layout). Groups packing
+    larger than upload_part_size stream into multipart uploads of parts that
+    size; None always buffers.
+
+    budget: a ByteBudget to charge (the session's, shared with its
+    load_items()); None charges a fresh ByteBudget(max_inflight_bytes).
+    window: the session's flow.ConcurrencyWindow (None = a fixed width of
+    remote_session.threads).
+
+    copy_repack, membership, max_group_deltas and compact_dead_ratio: see
+    _plan_group_push.
+    """
+    __slots__ = (
+        'local_file', 'remote_index', 'remote_index_path', 'changes', 'remote_session', 'journal',
+        'remote_state', 'ebooklet_type', 'num_groups', 'force_push', 'replace_pending', 'lock',
+        'loc_map', 'comp0', 'packers', 'range_merge_gap', 'compression', 'upload_part_size',
+        'budget', 'copy_repack', 'membership', 'max_group_deltas', 'compact_dead_ratio', 'window',
+        ## Read at the start of the push.
+        'pre_push_manifest', 'deletes',
+        ## Phases A/B.
+        'updated', 'failures', 'failed_gids', 'staged_entries', 'lost_index_keys', 'new_gens',
+        'gen_sizes', 'delta_plan', 'chained', 'emptied_gids', 'group_key_sets', 'pulled_keys',
+        'pulled_len_map', 'copy_kept', 'copy_bytes', 'groups_to_download', 'pull_chunks',
+        'group_keys', 'group_entries', 'codec', 'listed_sizes', 'adopted',
+        ## The staged index and phase C.
+        'staged_index_bytes', 'staged_n_keys', 'committed_delete_keys', 'new_slots',
+        'new_manifest', 'meta_section', 'commit_ts', 'embedded_local_meta', 'delta_parents',
+        'prev_delta_parents',
+        )
+
+    def __init__(self, local_file, remote_index, remote_index_path, changes, remote_session, journal, remote_state, ebooklet_type, num_groups=None, force_push=False, replace_pending=False, lock=None, loc_map=None, comp0=None, packers=1, range_merge_gap=DEFAULT_RANGE_MERGE_GAP, compression=None, upload_part_size=DEFAULT_UPLOAD_PART_SIZE, max_inflight_bytes=None, budget=None, copy_repack=False, membership=None, max_group_deltas=None, compact_dead_ratio=DEFAULT_COMPACT_DEAD_RATIO, window=None):
+        if loc_map is None:
+            ## Direct callers (tests) without a capture: build one now. The
+            ## snapshot-before-sweep ordering matches create_changelog.
+            comp0 = local_file.compaction_count
+            loc_map = LocationTable()
+            for key, ts, off, ln in local_file.locations():
+                loc_map.append(key.encode(), ts, off, ln)
+
+        self.local_file = local_file
+        self.remote_index = remote_index
+        self.remote_index_path = remote_index_path
+        self.changes = changes
+        self.remote_session = remote_session
+        self.journal = journal
+        self.remote_state = remote_state
+        self.ebooklet_type = ebooklet_type
+        self.num_groups = num_groups
+        self.force_push = force_push
+        self.replace_pending = replace_pending
+        self.lock = lock
+        self.loc_map = loc_map
+        self.comp0 = comp0
+        self.packers = packers
+        self.range_merge_gap = range_merge_gap
+        self.compression = compression
+        self.upload_part_size = upload_part_size
+        self.budget = budget if budget is not None else ByteBudget(max_inflight_bytes)
+        self.copy_repack = copy_repack
+        self.membership = membership
+        self.max_group_deltas = max_group_deltas
+        self.compact_dead_ratio = compact_dead_ratio
+        self.window = window
+
+        self.pre_push_manifest = dict(remote_state.manifest)
+        self.deletes = journal.deletes   # read here; written/deletes mutate only post-commit
+
+        self.updated = False
+        self.failures = {}
+        self.failed_gids = set()
+        self.staged_entries = {}
+        self.lost_index_keys = []
+        self.new_gens = {}
+        self.gen_sizes = {}
+        self.delta_plan = {}
+        self.chained = False
+        self.emptied_gids = set()
+        self.group_key_sets = {}
+        self.pulled_keys = set()
+        self.pulled_len_map = {}
+        self.copy_kept = {}
+        self.copy_bytes = {}
+        self.groups_to_download = {}
+        self.pull_chunks = {}
+        self.group_keys = {}
+        self.group_entries = {}
+        self.codec = compression_mod.get_codec(compression) if compression is not None else None
+        self.listed_sizes = None
+        self.adopted = []
+        self.staged_index_bytes = None
+        self.staged_n_keys = None
+        self.committed_delete_keys = []
+        self.new_slots = {}
+        self.new_manifest = {}
+        self.meta_section = None
+        self.commit_ts = None
+        self.embedded_local_meta = False
+        self.delta_parents = []
+        self.prev_delta_parents = []
+
+
+def update_remote(ctx):
+    """
+    Push the changelog to the remote (ctx: a PushContext) - the format-2
+    protocol:
 
       A. changelog union -> affected groups -> pull unmaterialized members
          from the OLD generations (read-your-writes gated).
@@ -1150,8 +2620,10 @@ def update_remote(local_file, remote_index, remote_index_path, changelog_path, r
          section, and the staged index bytes. lock.verify() immediately
          before - the point of no return. Only after success: the staged
          entries apply to the live sidecar, the journal clears (for exactly
-         the committed state), and the remote-state cache persists.
-      D. GC: exact-key deletes of the replaced/emptied OLD generations.
+         the committed state), and the remote-state cache persists. The
+         commit's index delta (publish_index_delta) is PUT just before it.
+      D. GC: exact-key deletes of the replaced/emptied OLD generations and
+         of the index deltas that fell off the delta_parents chain.
          Failures are log-only orphans (nothing references them; fsck
          sweeps). A REPLACEMENT push then sweeps everything under the
          db namespace not in the new manifest (after re-verifying the lock)
@@ -1159,297 +2631,17 @@ def update_remote(local_file, remote_index, remote_index_path, changelog_path, r
 
     A crash or failure before C leaves readers on the old, fully-consistent
     state and this session fully retryable; between C and D leaves only
-    invisible orphans.
-
-    Phase B is pipelined (0.10.1): loc_map ({key: (ts, value_offset,
-    value_len)}, captured by create_changelog's header-only sweep) lets each
-    pack worker read its members through a PRIVATE fd in ascending offset
-    order - no booklet lock in the hot path, one forward disk sweep per
-    group. `packers` (a per-push BoundedSemaphore width, default 1) bounds
-    how many workers read the disk at once; PUTs run outside the gate, so up
-    to `remote_session.threads` uploads overlap the packing. comp0 is the
-    compaction_count snapshotted with the capture: a mismatch detected after
-    a worker's reads aborts the push with ConcurrentCompactionError BEFORE
-    the commit (captured offsets die on prune/clear - the session-level
-    _push_active guard makes this unreachable through the API; this is the
-    belt). Progress records go to the 'ebooklet.push' logger.
-    """
-    if loc_map is None:
-        ## Direct callers (tests) without a capture: build one now. The
-        ## snapshot-before-sweep ordering matches create_changelog.
-        comp0 = local_file.compaction_count
-        loc_map = {key: (ts, off, ln) for key, ts, off, ln in local_file.locations()}
-
-    pre_push_manifest = dict(remote_state.manifest)
-    deletes = journal.deletes   # read here; journal mutated only post-commit
-
-    ## Upload data and update the remote_index file
-    updated = False
-    failures = {}
-    failed_gids = set()
-    staged_entries = {}
-    new_gens = {}
-    emptied_gids = set()
-    staged_index_bytes = None
-
-    with booklet.FixedLengthValue(changelog_path) as cl:
-        if num_groups is not None:
-            ## Grouped upload path
-            affected_group_ids = set()
-
-            for key in cl:
-                affected_group_ids.add(key_to_group_id(key, num_groups))
-
-            ## Also include groups affected by deletes
-            for key in deletes:
-                affected_group_ids.add(key_to_group_id(key, num_groups))
-
-            ## Build FULL key lists per affected group: the union of locally-present
-            ## keys (the captured loc_map - same live-key enumeration as
-            ## local_file.keys(), for free) and remote-index keys. A group object
-            ## is completely replaced on upload, so every current member must be
-            ## packed - not just the keys that happen to be materialized locally.
-            group_key_sets = {gid: set() for gid in affected_group_ids}
-            for key in loc_map:
-                if key == metadata_key_str:
-                    continue
-                gid = key_to_group_id(key, num_groups)
-                if gid in group_key_sets:
-                    group_key_sets[gid].add(key)
+    invisible orphans. Progress records go to the 'ebooklet.push' logger.
 
-            ## Keys whose value bytes were (or will be) materialized AFTER the
-            ## capture: their loc_map offset - if any - predates the write and
-            ## would deliver the STALE superseded bytes, so the pack workers
-            ## read these through booklet's locked path instead (page-cache
-            ## hot). pulled_len_map carries their index-known lengths for the
-            ## exact progress totals.
-            pulled_keys = set()
-            pulled_len_map = {}
-
-            ## Members whose local value is missing or older than the remote must be
-            ## pulled down before their group can be repacked (one ranged read per group).
-            groups_to_download = {}
-            pull_count = 0
-            pull_bytes = 0
-            ## NOTE: iterate items() in a single pass - one scan instead of a
-            ## per-key chain lookup for every get(). (Before booklet 0.12.6 this
-            ## was also mandatory: iterators held the thread lock across yields,
-            ## so get() during iteration self-deadlocked. That constraint is
-            ## gone, but the single pass remains the right access pattern.)
-            for key, remote_val in remote_index.items():
-                if key == metadata_key_str or key in deletes:
-                    continue
-                gid = key_to_group_id(key, num_groups)
-                if gid not in group_key_sets:
-                    continue
-                group_key_sets[gid].add(key)
-                ## Read-your-writes gate: a journaled pending write is the
-                ## truth for its key - never pull the remote value over it
-                ## (this also covers the length==0 empty-value branch below).
-                ## Skew-stamped journaled edits were already timestamp-
-                ## normalized by create_changelog, so this gate is belt.
-                if key in journal.written:
-                    continue
-                entry = loc_map.get(key)
-                local_time_int = entry[0] if entry is not None else None
-                ## Mirrors check_local_vs_remote's exact truthiness (a stored
-                ## ts of 0 counts as absent there), driven by the capture.
-                if remote_val and not (local_time_int and bytes_to_int(remote_val[:7]) <= local_time_int):
-                    if local_time_int is not None:
-                        logger.warning(f"Push is replacing the locally-stored value of '{key}' with the newer remote value before repacking its group - any unpushed local modification to it is discarded (its local timestamp is older than the remote's).")
-                    offset = bytes_to_int(remote_val[7:11])
-                    length = bytes_to_int(remote_val[11:15])
-                    timestamp_int = bytes_to_int(remote_val[:7])
-                    if length > 0:
-                        groups_to_download.setdefault(gid, []).append((key, offset, length, timestamp_int))
-                        pull_count += 1
-                        pull_bytes += length
-                    else:
-                        ## A grouped member with length 0 is an EMPTY value, not
-                        ## a per-key entry (those never reach this loop). There
-                        ## is nothing to download - the value IS b''. Materialize
-                        ## it directly, otherwise a locally-absent empty member
-                        ## would fall into the lost-keys drop below and be
-                        ## silently deleted by the repack.
-                        local_file.set(key, b'', timestamp_int, encode_value=False)
-                        pulled_keys.add(key)
-                        pulled_len_map[key] = 0
-
-            if groups_to_download:
-                push_logger.info(f"Pulling {pull_count} group member value(s) (~{pull_bytes} bytes) from {len(groups_to_download)} group(s) so the groups can be repacked in full.")
-                with ThreadPoolExecutor(max_workers=remote_session.threads) as executor:
-                    ## report_missing_members=False: on the push path an absent
-                    ## member is deliberately self-healed by the lost-keys drop
-                    ## below - a loud marker here would make the push fail
-                    ## permanently instead of repairing the group.
-                    pull_futures = {}
-                    for gid, key_infos in groups_to_download.items():
-                        old_gen = pre_push_manifest.get(gid)
-                        if old_gen is None:
-                            ## The index claims members of a group the manifest
-                            ## does not reference - an integrity fault; the
-                            ## group cannot be repacked in full.
-                            failures[gid] = MissingRemoteObject(
-                                f'{gid}.<unmanifested>', [k for k, _o, _l, _t in key_infos])
-                            group_key_sets.pop(gid, None)
-                            continue
-                        pull_futures[executor.submit(get_remote_group_values, gid, old_gen, key_infos, local_file, remote_session, False)] = gid
-                    for future in as_completed(pull_futures):
-                        gid = pull_futures[future]
-                        try:
-                            error = future.result()
-                        except Exception as err:
-                            ## Transport-level raises (MaxRetryError etc.) are
-                            ## per-group failures, same as returned errors.
-                            error = err
-                        if error is not None:
-                            ## Never upload a partially-materialized group - leave the
-                            ## old remote group object intact and report the failure.
-                            failures[gid] = error
-                            group_key_sets.pop(gid, None)
-                        else:
-                            ## Materialized after the capture -> the pack must
-                            ## read these through the locked path, never the
-                            ## (stale) captured offsets.
-                            for key, _offset, length, _ts in groups_to_download[gid]:
-                                pulled_keys.add(key)
-                                pulled_len_map[key] = length
-
-            ## Any member that still has no local value lost its remote bytes at some
-            ## earlier point (e.g. a partial push from a version < 0.8.4). Repack the
-            ## group without it and remove the dangling index entry. Presence is
-            ## decided by the capture (loc_map) plus the pulled set; pulled keys are
-            ## re-verified with a (page-cache-hot) point read because a group
-            ## recovery may have materialized only some of its scheduled members.
-            group_keys = {}
-            group_entries = {}
-            for gid, keys_set in group_key_sets.items():
-                keys_in_group = []
-                entries = []
-                lost_keys = []
-                for key in keys_set:
-                    entry = loc_map.get(key)
-                    if key in pulled_keys:
-                        if local_file.get_timestamp(key) is None:
-                            lost_keys.append(key)
-                        else:
-                            ln = pulled_len_map.get(key)
-                            if ln is None:
-                                ln = entry[2] if entry is not None else 0
-                            entries.append((key, None, None, ln))
-                            keys_in_group.append(key)
-                    elif entry is not None:
-                        entries.append((key, entry[0], entry[1], entry[2]))
-                        keys_in_group.append(key)
-                    else:
-                        lost_keys.append(key)
-                if lost_keys:
-                    logger.warning(f"Group {gid}: dropping {len(lost_keys)} key(s) whose remote bytes no longer exist (likely a partial push from a version < 0.8.4): {sorted(lost_keys)}")
-                    for key in lost_keys:
-                        if key in remote_index:
-                            del remote_index[key]
-                    updated = True
-                ## Ascending captured offset = the elevator order the workers
-                ## read in (locked-path members, offset None, go last).
-                entries.sort(key=lambda e: (e[2] is None, e[2] if e[2] is not None else 0))
-                group_keys[gid] = keys_in_group
-                group_entries[gid] = entries
-
-            ## Phase B: PUT each repacked group to a FRESH generation. Emptied
-            ## groups PUT nothing - they leave the manifest at commit and
-            ## their old generation is GC'd in phase D. New index entries are
-            ## STAGED (applied to the live sidecar only after the commit).
-            ## The pack gate and the fallback-warning latch are PER PUSH -
-            ## concurrent pushes of different databases in one process must
-            ## not share a gate (or each other's push_packers choice).
-            pack_gate = threading.BoundedSemaphore(max(1, packers))
-            fallback_warned = threading.Event()
-            n_submit = sum(1 for gid, kig in group_keys.items() if kig)
-            total_keys = sum(len(kig) for kig in group_keys.values())
-            total_bytes = sum(
-                4 + sum(2 + len(key.encode()) + 7 + 4 + ln for key, _ts, _off, ln in entries)
-                for entries in group_entries.values() if entries
-            )
-            progress = _PushProgress(n_submit, total_keys, total_bytes)
-            if n_submit:
-                progress.start()
-
-            with ThreadPoolExecutor(max_workers=remote_session.threads) as executor:
-                futures = {}
-                for gid, keys_in_group in group_keys.items():
-                    if not keys_in_group:
-                        emptied_gids.add(gid)
-                        updated = True
-                        continue
-                    gen = new_generation(pre_push_manifest.get(gid))
-                    new_gens[gid] = gen
-                    f = executor.submit(upload_group, gid, gen, local_file, remote_session, group_entries[gid], pulled_keys, pack_gate, comp0, fallback_warned)
-                    futures[f] = gid
-
-                for future in as_completed(futures):
-                    gid = futures[future]
-                    try:
-                        error, offsets, ts_map, packed_len, pack_secs, put_secs = future.result()
-                    except Exception as err:
-                        ## upload_group's contract is return-not-raise (its whole
-                        ## body is guarded), so this is symmetry armor with the
-                        ## pull/per-key loops: a future edit to its prologue must
-                        ## degrade to a per-group failure, never a push crash.
-                        error, offsets, ts_map, packed_len, pack_secs, put_secs = err, None, None, 0, 0.0, 0.0
-                    progress.record(gid, new_gens.get(gid, '?'), error, packed_len, pack_secs, put_secs)
-                    if error is None:
-                        ## The staged ts is the ts that was PACKED (identical by
-                        ## construction) - not a post-upload re-read that a
-                        ## concurrent overwrite could have moved past the
-                        ## packed bytes.
-                        for key, (offset, length) in offsets.items():
-                            ts = ts_map[key]
-                            if ts:
-                                staged_entries[key] = int_to_bytes(ts, 7) + int_to_bytes(offset, 4) + int_to_bytes(length, 4)
-                        updated = True
-                    else:
-                        failures[gid] = error
-                        new_gens.pop(gid, None)   # abandoned PUT (if any) = invisible orphan
-
-            if n_submit:
-                progress.finish()
-
-            ## A detected compaction means EVERY captured offset is invalid -
-            ## per-group retry semantics would be false comfort (each unpacked
-            ## group is equally suspect), so abort the whole push BEFORE
-            ## anything is staged or committed. The executor block above has
-            ## already drained; generations already PUT are invisible orphans
-            ## (the standard crash-before-C story; fsck sweeps them).
-            comp_error = next((e for e in failures.values() if isinstance(e, ConcurrentCompactionError)), None)
-            if comp_error is not None:
-                raise comp_error
-
-            failed_gids = {gid for gid in failures if isinstance(gid, int)}
-
-        else:
-            ## Per-key upload path (legacy). Objects are overwritten in place
-            ## (each PUT is object-atomic; no cross-key snapshot isolation -
-            ## documented), and index entries stay write-through.
-            with ThreadPoolExecutor(max_workers=remote_session.threads) as executor:
-                futures = {}
-                for key in cl:
-                    f = executor.submit(upload_value, key, local_file, remote_session)
-                    futures[f] = key
-
-                for future in as_completed(futures):
-                    key = futures[future]
-                    try:
-                        run_result = future.result()
-                    except Exception as err:
-                        ## Transport-level raises (MaxRetryError etc.) are
-                        ## per-key failures, same as returned errors.
-                        run_result = err
-                    if run_result is None:
-                        remote_index[key] = cl[key][:7] + b'\x00' * 8
-                        updated = True
-                    else:
-                        failures[key] = run_result
+    Returns the failures dict, or whether anything was pushed.
+    """
+    if ctx.num_groups is not None:
+        _plan_group_push(ctx)
+        _push_groups(ctx)
+    else:
+        _push_values(ctx)
 
+    failures = ctx.failures
     if failures:
         non_retryable = [k for k, v in failures.items() if isinstance(v, GroupTooLargeError)]
         if non_retryable:
@@ -1459,213 +2651,1183 @@ def update_remote(local_file, remote_index, remote_index_path, changelog_path, r
 
     ## Flush the live sidecar (still WITHOUT the staged entries in grouped
     ## mode - it must never reference uncommitted generations).
-    remote_index.sync()
-
-    ## Build the index bytes the commit will carry: grouped mode applies the
-    ## staged entries and committed delete-entry removals to a throwaway COPY
-    ## of the sidecar; per-key mode reads the live sidecar as-is.
-    committed_delete_keys = []
-    if num_groups is not None:
-        committed_delete_keys = [k for k in deletes if key_to_group_id(k, num_groups) not in failed_gids]
-        staged_path = remote_index_path.parent.joinpath(remote_index_path.name + '.staged')
-        with remote_index._thread_lock:
-            remote_index._file.seek(0)
-            base_index_bytes = remote_index._file.read()
-        try:
-            with open(staged_path, 'wb') as f:
-                f.write(base_index_bytes)
-            staged = booklet.FixedLengthValue(staged_path, 'w')
-            try:
-                for key, entry in staged_entries.items():
-                    staged[key] = entry
-                for key in committed_delete_keys:
-                    if key in staged:
-                        del staged[key]
-                staged.sync()
-                with staged._thread_lock:
-                    staged._file.seek(0)
-                    staged_index_bytes = staged._file.read()
-            finally:
-                staged.close()
-        finally:
-            try:
-                staged_path.unlink()
-            except FileNotFoundError:
-                pass
+    ctx.remote_index.sync()
+    if ctx.num_groups is not None:
+        _stage_commit_index(ctx)
 
     ## Phase C - the commit. Also runs for a metadata-only push (metadata no
     ## longer rides the changelog - it is embedded at commit), when the remote
     ## does not exist yet, or when a replacement is pending, so those cases
     ## still materialize instead of being silent no-ops.
-    if updated or force_push or journal.meta_pending or (deletes and num_groups is None) or replace_pending or not remote_session.initialized:
+    if (ctx.updated or ctx.force_push or ctx.journal.meta_pending or (ctx.deletes and ctx.num_groups is None)
+            or ctx.replace_pending or not ctx.remote_session.initialized):
         ## A partially-failed REPLACEMENT push commits NOTHING: the old remote
         ## stays fully intact (readable, uncorrupted) and the retry redoes the
         ## whole replacement. (The pre-0.10 wipe-first protocol left a wiped,
         ## half-uploaded remote here.)
-        if replace_pending and failures:
+        if ctx.replace_pending and failures:
             logger.warning('The replacement push had upload failures - NOT committing; the existing remote is untouched. Re-run the push.')
             return failures
+        _commit_push(ctx)
+        _apply_commit(ctx)
+        if ctx.num_groups is not None:
+            _collect_push_garbage(ctx)
 
-        time_int_us = booklet.utils.make_timestamp_int()
+    if failures:
+        return failures
+    else:
+        return ctx.updated
 
-        ## Get main file init bytes. Direct _file access moves the shared file
-        ## position, so hold the owning booklet's thread lock (booklet's own
-        ## contract since 0.12.6: every position-mover locks).
-        local_file._set_file_timestamp(time_int_us)
-        with local_file._thread_lock:
-            local_file._file.seek(0)
-            local_init_bytes = bytearray(local_file._file.read(200))
-        if local_init_bytes[:16] != booklet.utils.uuid_variable_blt:
-            raise ValueError(
-                'The local file does not start with the variable-length booklet magic - '
-                f'not an ebooklet local file (first bytes: {bytes(local_init_bytes[:16])!r}).'
-            )
 
-        n_keys_pos = booklet.utils.n_keys_pos
-        local_init_bytes[n_keys_pos:n_keys_pos+4] = b'\x00\x00\x00\x00'
+def _plan_group_push(ctx):
+    """
+    Phase A's plan: the affected groups, their full member sets, the pulls
+    that must land before each can be repacked, and the groups that take a
+    delta or copy their unchanged members instead.
+
+    membership: the session's GroupMembership (None = none kept). The
+    affected groups' members are then read from it and looked up in the
+    index point-wise, instead of a pass over the whole index - unless they
+    are numerous enough that the pass is cheaper. A stale record is rebuilt
+    first; the commit keeps it current.
+
+    max_group_deltas (None = off; raw layout only): an affected group whose
+    manifest slot is a chain appends a DELTA generation holding only its
+    changed members - nothing is pulled and the old generations stay live
+    (plan_group_deltas). A group is compacted (repacked in full, into a
+    one-generation chain) once it would hold more than max_group_deltas
+    deltas or its dead bytes pass compact_dead_ratio.
+
+    copy_repack: a group whose unchanged members span at least
+    upload_part_size bytes of its old generation (raw layout both sides) is
+    rebuilt as a multipart upload that copies those members' runs from the
+    old object server-side; they are not pulled, only the changed members
+    are read locally.
+
+    Pulls are split per group by plan_group_ranges(range_merge_gap) and read
+    the OLD generations with the remote's current codec
+    (remote_session.compression) - it differs from ctx.compression only on a
+    replacement push, which rewrites every group.
+    """
+    num_groups = ctx.num_groups
+    changes = ctx.changes
+    deletes = ctx.deletes
+    journal = ctx.journal
+    remote_index = ctx.remote_index
+    remote_session = ctx.remote_session
+    loc_map = ctx.loc_map
+    membership = ctx.membership
+    pre_push_manifest = ctx.pre_push_manifest
+
+    affected_group_ids = set()
+
+    for key in changes:
+        affected_group_ids.add(key_to_group_id(key, num_groups))
+
+    ## Also include groups affected by deletes
+    for key in deletes:
+        affected_group_ids.add(key_to_group_id(key, num_groups))
+
+    ## Delta generations: groups that append a delta leave the full
+    ## repack below entirely (no member lists, no pulls). Every group
+    ## this push writes in full records its size, so it can take deltas
+    ## from the next push on.
+    ctx.chained = ctx.max_group_deltas is not None and ctx.compression is None
+    if ctx.chained and remote_session.compression is None and not ctx.replace_pending:
+        ctx.delta_plan = plan_group_deltas(affected_group_ids, changes, deletes, remote_index, pre_push_manifest, loc_map, num_groups, ctx.max_group_deltas, ctx.compact_dead_ratio)
+        affected_group_ids.difference_update(ctx.delta_plan)
+        if ctx.delta_plan:
+            push_logger.info(f'Appending delta generations to {len(ctx.delta_plan)} group(s); repacking {len(affected_group_ids)} in full.')
+
+    ## Build FULL key lists per affected group: the union of locally-present
+    ## keys (the captured loc_map - same live-key enumeration as
+    ## local_file.keys(), for free) and remote-index keys. A group object
+    ## is completely replaced on upload, so every current member must be
+    ## packed - not just the keys that happen to be materialized locally.
+    ##
+    ## With a current membership record the affected groups' index members
+    ## are known without the index pass (the same _INDEX_SCAN_RATIO
+    ## trade-off as create_changelog); a stale record is rebuilt with one
+    ## keys-only pass. A replacement rewrites every group - always a scan.
+    member_lists = None
+    if membership is not None and not ctx.replace_pending:
+        if not membership.current(num_groups):
+            membership.rebuild(remote_index, num_groups, metadata_key_str)
+        member_lists = {gid: membership.members(gid) for gid in affected_group_ids}
+        if sum(len(keys) for keys in member_lists.values()) * _INDEX_SCAN_RATIO >= len(remote_index):
+            member_lists = None
+
+    group_key_sets = ctx.group_key_sets
+    group_key_sets.update((gid, set()) for gid in affected_group_ids)
+    if member_lists is not None:
+        ## Every locally-present key the index does not hold is in the
+        ## changelog (create_changelog's diff), so the changes stand in
+        ## for the loc_map pass; the index members come from the record,
+        ## filtered through the index (it is a superset).
+        for key in changes:
+            if key != metadata_key_str:
+                gid = key_to_group_id(key, num_groups)
+                if gid in group_key_sets:
+                    group_key_sets[gid].add(key)
 
-        ## The manifest this commit publishes: a replacement starts fresh
-        ## (only this push's generations); otherwise the old manifest with
-        ## successful groups re-pointed and emptied groups dropped.
-        if num_groups is not None:
-            if replace_pending:
-                new_manifest = dict(new_gens)
+        def index_entries():
+            for keys in member_lists.values():
+                for key in keys:
+                    remote_val = remote_index.get(key)
+                    if remote_val is not None:
+                        yield key, remote_val
+    else:
+        for key in loc_map:
+            if key == metadata_key_str:
+                continue
+            gid = key_to_group_id(key, num_groups)
+            if gid in group_key_sets:
+                group_key_sets[gid].add(key)
+
+        index_entries = remote_index.items
+
+    ## Keys whose value bytes were (or will be) materialized AFTER the
+    ## capture: their loc_map offset - if any - predates the write and
+    ## would deliver the STALE superseded bytes, so the pack workers
+    ## read these through booklet's locked path instead (page-cache
+    ## hot). pulled_len_map carries their index-known lengths for the
+    ## exact progress totals.
+    pulled_keys = ctx.pulled_keys
+    pulled_len_map = ctx.pulled_len_map
+
+    ## Copy-repack candidates: per group, the index members this push
+    ## does not change - (key, offset, length, ts) in the old generation.
+    copy_candidates = None
+    if (ctx.copy_repack and ctx.upload_part_size and ctx.compression is None and remote_session.compression is None
+            and not ctx.replace_pending and hasattr(remote_session, 'create_multipart_upload')):
+        copy_candidates = {}
+
+    ## Members whose local value is missing or older than the remote must be
+    ## pulled down before their group can be repacked (one ranged read per group).
+    groups_to_download = ctx.groups_to_download
+    pull_count = 0
+    pull_bytes = 0
+    ## NOTE: iterate items() in a single pass - one scan instead of a
+    ## per-key chain lookup for every get(). (Before booklet 0.12.6 this
+    ## was also mandatory: iterators held the thread lock across yields,
+    ## so get() during iteration self-deadlocked. That constraint is
+    ## gone, but the single pass remains the right access pattern
+    ## whenever the membership record cannot narrow it.)
+    for key, remote_val in index_entries():
+        if key == metadata_key_str or key in deletes:
+            continue
+        gid = key_to_group_id(key, num_groups)
+        if gid not in group_key_sets:
+            continue
+        group_key_sets[gid].add(key)
+        if copy_candidates is not None and remote_val and key not in changes and key not in journal.written:
+            copy_candidates.setdefault(gid, []).append((key, bytes_to_int(remote_val[7:11]), bytes_to_int(remote_val[11:15]), bytes_to_int(remote_val[:7])))
+        ## Read-your-writes gate: a journaled pending write is the
+        ## truth for its key - never pull the remote value over it
+        ## (this also covers the length==0 empty-value branch below).
+        ## Skew-stamped journaled edits were already timestamp-
+        ## normalized by create_changelog, so this gate is belt.
+        if key in journal.written:
+            continue
+        entry = loc_map.get(key)
+        local_time_int = entry[0] if entry is not None else None
+        ## Mirrors check_local_vs_remote's exact truthiness (a stored
+        ## ts of 0 counts as absent there), driven by the capture.
+        if remote_val and not (local_time_int and bytes_to_int(remote_val[:7]) <= local_time_int):
+            if local_time_int is not None:
+                logger.warning(f"Push is replacing the locally-stored value of '{key}' with the newer remote value before repacking its group - any unpushed local modification to it is discarded (its local timestamp is older than the remote's).")
+            offset = bytes_to_int(remote_val[7:11])
+            length = bytes_to_int(remote_val[11:15])
+            timestamp_int = bytes_to_int(remote_val[:7])
+            if length > 0:
+                groups_to_download.setdefault(gid, []).append((key, offset, length, timestamp_int))
+                pull_count += 1
+                pull_bytes += length
             else:
-                new_manifest = dict(pre_push_manifest)
-                new_manifest.update(new_gens)
-                for gid in emptied_gids:
-                    new_manifest.pop(gid, None)
-            index_bytes_for_commit = staged_index_bytes
+                ## A grouped member with length 0 is an EMPTY value, not
+                ## a per-key entry (those never reach this loop). There
+                ## is nothing to download - the value IS b''. Materialize
+                ## it directly, otherwise a locally-absent empty member
+                ## would fall into the lost-keys drop below and be
+                ## silently deleted by the repack.
+                ctx.local_file.set(key, b'', timestamp_int, encode_value=False)
+                pulled_keys.add(key)
+                pulled_len_map[key] = 0
+
+    ## Copy repack: a group whose unchanged members cover at least one
+    ## part of its old generation copies them from there instead - they
+    ## leave the pull plan and the local pack (which keeps only the
+    ## changed members).
+    copy_kept = ctx.copy_kept
+    copy_bytes = ctx.copy_bytes
+    for gid, kept in (copy_candidates or {}).items():
+        ## The kept offsets are object offsets only in a one-generation slot.
+        if gid not in pre_push_manifest or len(slot_generations(pre_push_manifest[gid])) != 1:
+            continue
+        span = sum(end - start for start, end in (_member_span(k, o, ln) for k, o, ln, _t in kept))
+        if span < ctx.upload_part_size:
+            continue
+        kept.sort(key=lambda e: e[1])
+        copy_kept[gid] = kept
+        copy_bytes[gid] = span
+        group_key_sets[gid].difference_update(k for k, _o, _l, _t in kept)
+        for _k, _o, length, _t in groups_to_download.pop(gid, ()):
+            pull_count -= 1
+            pull_bytes -= length
+    if copy_kept:
+        push_logger.info(f'Copying {sum(len(v) for v in copy_kept.values())} unchanged member(s) (~{sum(copy_bytes.values())} bytes) of {len(copy_kept)} group(s) server-side from their old generations.')
+
+    ## A delta group packs exactly its changed members (all local).
+    for gid, delta in ctx.delta_plan.items():
+        group_key_sets[gid] = set(delta.keys)
+
+    ## Pulls are planned per group up front (one chunk per
+    ## plan_group_ranges range); their lengths also seed the upfront
+    ## progress totals. An index that claims members of a group the
+    ## manifest does not reference is an integrity fault - that group
+    ## cannot be repacked in full.
+    for gid, key_infos in groups_to_download.items():
+        old_gen = pre_push_manifest.get(gid)
+        if old_gen is None:
+            ctx.failures[gid] = MissingRemoteObject(
+                f'{gid}.<unmanifested>', [k for k, _o, _l, _t in key_infos])
+            group_key_sets.pop(gid, None)
+            continue
+        for key, _offset, length, _ts in key_infos:
+            pulled_len_map[key] = length
+        ctx.pull_chunks[gid] = [(gen, chunk) for gen, gen_infos in resolve_group_slot(old_gen, key_infos)
+                                for chunk in plan_group_ranges(gen_infos, ctx.range_merge_gap, remote_session.compression is not None)]
+    if groups_to_download:
+        push_logger.info(f"Pulling {pull_count} group member value(s) (~{pull_bytes} bytes) from {len(groups_to_download)} group(s) so the groups can be repacked in full.")
+
+
+def _group_estimate(ctx, gid):
+    """
+    (n_keys, raw pack bytes) of a group as planned: members with a captured
+    or scheduled value. Exact unless a pull turns out to have lost members
+    (_finalize_group revises the totals).
+    """
+    n_keys = len(ctx.copy_kept.get(gid, ()))
+    raw = 4 + ctx.copy_bytes.get(gid, 0)
+    for key in ctx.group_key_sets[gid]:
+        ln = ctx.pulled_len_map.get(key)
+        if ln is None:
+            entry = ctx.loc_map.get(key)
+            if entry is None:
+                continue
+            ln = entry[2]
+        n_keys += 1
+        raw += 2 + len(key.encode()) + 7 + 4 + ln
+    return n_keys, raw
+
+
+def _finalize_group(ctx, gid):
+    """
+    Fix a group's pack list once its pulls have landed. Any member that still
+    has no local value lost its remote bytes at some earlier point (e.g. a
+    partial push from a version < 0.8.4): the group is repacked without it
+    and its dangling index entry removed. Presence is decided by the capture
+    (loc_map) plus the pulled set; pulled keys are re-verified with a
+    (page-cache-hot) point read because a group recovery may have
+    materialized only some of its scheduled members. Runs on the dispatching
+    thread only (remote_index is not shared with the workers).
+    """
+    keys_in_group = []
+    entries = []
+    lost_keys = []
+    for key in ctx.group_key_sets[gid]:
+        entry = ctx.loc_map.get(key)
+        if key in ctx.pulled_keys:
+            if ctx.local_file.get_timestamp(key) is None:
+                lost_keys.append(key)
+            else:
+                ln = ctx.pulled_len_map.get(key)
+                if ln is None:
+                    ln = entry[2] if entry is not None else 0
+                entries.append((key, None, None, ln))
+                keys_in_group.append(key)
+        elif entry is not None:
+            entries.append((key, entry[0], entry[1], entry[2]))
+            keys_in_group.append(key)
+        else:
+            lost_keys.append(key)
+    if lost_keys:
+        logger.warning(f"Group {gid}: dropping {len(lost_keys)} key(s) whose remote bytes no longer exist (likely a partial push from a version < 0.8.4): {sorted(lost_keys)}")
+        for key in lost_keys:
+            if key in ctx.remote_index:
+                del ctx.remote_index[key]
+        ctx.lost_index_keys.extend(lost_keys)
+        ctx.updated = True
+    ## Ascending captured offset = the elevator order the workers
+    ## read in (locked-path members, offset None, go last).
+    entries.sort(key=lambda e: (e[2] is None, e[2] if e[2] is not None else 0))
+    ctx.group_keys[gid] = keys_in_group
+    ctx.group_entries[gid] = entries
+
+
+def _stage_group(ctx, gid, offsets, ts_map, packed_len):
+    """
+    Stage the index entries of a PUT group. The staged ts is the ts that was
+    PACKED (identical by construction) - not a post-upload re-read that a
+    concurrent overwrite could have moved past the packed bytes. A delta's
+    offsets are logical: shifted past the chain it extends.
+    """
+    base = ctx.delta_plan[gid].start if gid in ctx.delta_plan else 0
+    for key, (offset, length) in offsets.items():
+        ts = ts_map[key]
+        if ts:
+            ctx.staged_entries[key] = int_to_bytes(ts, 7) + int_to_bytes(base + offset, 4) + int_to_bytes(length, 4)
+    ctx.gen_sizes[gid] = packed_len
+    ctx.updated = True
+
+
+def _adopt_pushed(ctx, gid, progress):
+    """
+    Resumable push: the journal records every generation this push PUTs
+    (journal.pushed) until a commit publishes or abandons them. A retry
+    whose group would pack byte-identically - same members, timestamps and
+    lengths in the same order on the same manifest slot - adopts the
+    recorded generation instead of uploading it again, once a listing
+    confirms the object is still there (fsck may have swept it as an orphan
+    in between). Raw layout only: the offsets of a compressed or
+    copy-repacked group depend on bytes the digest does not cover, so those
+    groups always re-upload. Returns whether gid was adopted.
+    """
+    record = ctx.journal.pushed.get(gid)
+    if record is None or ctx.codec is not None or gid in ctx.copy_kept:
+        return False
+    entries = ctx.group_entries[gid]
+    if any(off is None for _key, _ts, off, _ln in entries):
+        return False
+    members = [(key, ts, ln) for key, ts, _off, ln in entries]
+    gen, size, digest = record
+    if digest != group_pack_digest(members, ctx.pre_push_manifest.get(gid)):
+        return False
+    offsets, packed_len = raw_group_offsets(members)
+    if packed_len != size:
+        return False
+    if ctx.listed_sizes is None:
+        try:
+            listing = ctx.remote_session.list_objects()
+            ctx.listed_sizes = {obj['key']: obj.get('content_length') for obj in listing.iter_objects()}
+        except Exception as err:
+            logger.warning(f'Could not list the remote to resume the previous push (re-uploading every group): {err}')
+            ctx.listed_sizes = {}
+    obj_key = f'{ctx.remote_session.write_db_key}/{group_obj_key(gid, gen)}'
+    if obj_key not in ctx.listed_sizes or ctx.listed_sizes[obj_key] not in (None, size):
+        return False
+    ctx.new_gens[gid] = gen
+    _stage_group(ctx, gid, offsets, {key: ts for key, ts, _ln in members}, packed_len)
+    progress.record(gid, gen, None, packed_len, 0.0, 0.0, None)
+    ctx.adopted.append(gid)
+    return True
+
+
+def _push_groups(ctx):
+    """
+    Phases A and B as one per-group pipeline: pull each group's planned
+    members, then pack it (from the loc_map capture) and PUT it to a FRESH
+    generation, staging its index entries. A group's pack/PUT is dispatched
+    as soon as its own pulls have landed, so groups with nothing to pull
+    never wait on another group's pulls.
+
+    Each pack worker reads its members through a PRIVATE fd in ascending
+    offset order - no booklet lock in the hot path, one forward disk sweep
+    per group; ctx.packers bounds how many read at once, and PUTs run
+    outside that gate. A compaction_count mismatch (against ctx.comp0)
+    detected after a worker's reads aborts the push with
+    ConcurrentCompactionError BEFORE the commit.
+
+    Both stages share the remote_session.threads slots - fewer while the
+    window has backed off, fed every pull's and PUT's latency and outcome -
+    and ctx.budget caps the bytes in flight across them: a pull is charged
+    its range length, an upload its raw pack size (capped at two parts when
+    it streams). A job larger than the whole budget still runs, alone.
+
+    Every raw-layout group PUT is recorded in journal.pushed (persisted
+    every PUSH_PROGRESS_PERSIST_SECS and on a failed push) until a commit
+    clears it (see _adopt_pushed).
+    """
+    local_file = ctx.local_file
+    remote_session = ctx.remote_session
+    journal = ctx.journal
+    window = ctx.window
+    budget = ctx.budget
+    group_key_sets = ctx.group_key_sets
+    group_raw_bytes = {}
+    failures = ctx.failures
+    codec = ctx.codec
+
+    ## Phase B: PUT each repacked group to a FRESH generation. Emptied
+    ## groups PUT nothing - they leave the manifest at commit and
+    ## their old generation is GC'd in phase D. New index entries are
+    ## STAGED (applied to the live sidecar only after the commit).
+    ## The pack gate and the fallback-warning latch are PER PUSH -
+    ## concurrent pushes of different databases in one process must
+    ## not share a gate (or each other's push_packers choice).
+    pack_gate = threading.BoundedSemaphore(max(1, ctx.packers))
+    fallback_warned = threading.Event()
+    upload_part_size = ctx.upload_part_size
+    streams = bool(upload_part_size) and hasattr(remote_session, 'create_multipart_upload')
+    total_keys = 0
+    for gid in group_key_sets:
+        n_keys, raw = _group_estimate(ctx, gid)
+        if n_keys:
+            group_raw_bytes[gid] = raw
+            total_keys += n_keys
+    n_submit = len(group_raw_bytes)
+    progress = _PushProgress(n_submit, total_keys, sum(group_raw_bytes.values()))
+    if n_submit:
+        progress.start()
+
+    def queue_upload(gid):
+        _finalize_group(ctx, gid)
+        planned = group_raw_bytes.pop(gid, None)
+        keys_in_group = ctx.group_keys[gid] + [k for k, _o, _l, _t in ctx.copy_kept.get(gid, ())]
+        if keys_in_group:
+            group_raw_bytes[gid] = 4 + ctx.copy_bytes.get(gid, 0) + sum(2 + len(key.encode()) + 7 + 4 + ln for key, _ts, _off, ln in ctx.group_entries[gid])
+        progress.revise(
+            bool(keys_in_group) - (planned is not None),
+            len(keys_in_group) - (_group_estimate(ctx, gid)[0] if planned is not None else 0),
+            group_raw_bytes.get(gid, 0) - (planned or 0))
+        if not keys_in_group:
+            ## A delta group with only deletes keeps its chain (the
+            ## commit re-records its dead bytes); any other group
+            ## emptied.
+            if gid not in ctx.delta_plan:
+                ctx.emptied_gids.add(gid)
+            ctx.updated = True
+            return
+        if _adopt_pushed(ctx, gid, progress):
+            return
+        ctx.new_gens[gid] = new_generation(ctx.pre_push_manifest.get(gid))
+        upload_queue.append(gid)
+
+    ## Phases A and B share ONE executor as a per-group dependency
+    ## pipeline: a group's pack/PUT is queued the moment its OWN
+    ## pulls land - a group with nothing to pull uploads at once
+    ## instead of waiting for the slowest pull of any other group.
+    ## Neither stage may starve the other - an idle slot goes to
+    ## whichever stage holds fewer of the running jobs.
+    ## report_missing_members=False: on the push path an absent
+    ## member is deliberately self-healed by the lost-keys drop in
+    ## _finalize_group - a loud marker here would make the push fail
+    ## permanently instead of repairing the group.
+    framed_pulls = remote_session.compression is not None
+    pull_queue = deque((gid, gen, chunk) for gid, chunks in ctx.pull_chunks.items() for gen, chunk in chunks)
+    pulls_left = {gid: len(chunks) for gid, chunks in ctx.pull_chunks.items()}
+    pull_failed = {}
+    upload_queue = deque()
+    for gid in list(group_key_sets):
+        if gid not in ctx.pull_chunks:
+            queue_upload(gid)
+
+    def pull_cost(chunk):
+        read_range = group_read_range(chunk, framed_pulls)
+        if read_range is None:
+            return sum(ln for _k, _o, ln, _t in chunk)
+        return read_range[1] - read_range[0] + 1
+
+    def upload_cost(gid):
+        raw = group_raw_bytes[gid]
+        return min(raw, 2 * upload_part_size) if streams and raw > upload_part_size else raw
+
+    def admit(queue, kind, block):
+        if not queue:
+            return None
+        item = queue[0]
+        cost = pull_cost(item[2]) if kind == 'pull' else upload_cost(item)
+        if block:
+            budget.acquire(cost)
+        elif not budget.try_acquire(cost):
+            return None
+        queue.popleft()
+        if kind == 'pull':
+            gid, gen, chunk = item
+            future = executor.submit(get_remote_group_values, gid, gen, chunk, local_file, remote_session, False)
+        else:
+            gid = item
+            source_gen = slot_generations(ctx.pre_push_manifest[gid])[0] if gid in ctx.copy_kept else None
+            future = executor.submit(upload_group, gid, ctx.new_gens[gid], local_file, remote_session, ctx.group_entries[gid], ctx.pulled_keys, pack_gate, ctx.comp0, fallback_warned, codec, upload_part_size, ctx.copy_kept.get(gid), source_gen)
+        running[future] = (kind, gid, cost)
+        started[future] = time.monotonic()
+        return future
+
+    def width():
+        return window.limit if window is not None else remote_session.threads
+
+    running = {}
+    started = {}
+    last_persist = time.monotonic()
+    with ThreadPoolExecutor(max_workers=remote_session.threads) as executor:
+        while pull_queue or upload_queue or running:
+            while len(running) < width() and (pull_queue or upload_queue):
+                n_pulls = sum(1 for kind, _g, _c in running.values() if kind == 'pull')
+                order = ['upload', 'pull'] if n_pulls >= len(running) - n_pulls else ['pull', 'upload']
+                queues = {'pull': pull_queue, 'upload': upload_queue}
+                ## Nothing running: block for the head job's bytes (it
+                ## is always admitted alone) rather than spin.
+                if admit(queues[order[0]], order[0], False) is None and admit(queues[order[1]], order[1], False) is None:
+                    if running:
+                        break
+                    kind = order[0] if queues[order[0]] else order[1]
+                    admit(queues[kind], kind, True)
+
+            done, _pending = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, gid, cost = running.pop(future)
+                elapsed = time.monotonic() - started.pop(future)
+                budget.release(cost)
+                if kind == 'pull':
+                    try:
+                        error = future.result()
+                    except Exception as err:
+                        ## Transport-level raises (MaxRetryError etc.) are
+                        ## per-group failures, same as returned errors.
+                        error = err
+                    if window is not None:
+                        window.record(elapsed, cost, error)
+                    if error is not None:
+                        pull_failed[gid] = merge_group_failures(pull_failed.get(gid), error)
+                    pulls_left[gid] -= 1
+                    if pulls_left[gid]:
+                        continue
+                    if gid in pull_failed:
+                        ## Never upload a partially-materialized group - leave the
+                        ## old remote group object intact and report the failure.
+                        failures[gid] = pull_failed[gid]
+                        planned = group_raw_bytes.pop(gid, None)
+                        if planned is not None:
+                            progress.revise(-1, -_group_estimate(ctx, gid)[0], -planned)
+                        group_key_sets.pop(gid, None)
+                    else:
+                        ## Materialized after the capture -> the pack must
+                        ## read these through the locked path, never the
+                        ## (stale) captured offsets.
+                        for key, _offset, _length, _ts in ctx.groups_to_download[gid]:
+                            ctx.pulled_keys.add(key)
+                        queue_upload(gid)
+                    continue
+
+                try:
+                    error, offsets, ts_map, packed_len, pack_secs, put_secs = future.result()
+                except Exception as err:
+                    ## upload_group's contract is return-not-raise (its whole
+                    ## body is guarded), so this is symmetry armor with the
+                    ## pull/per-key loops: a future edit to its prologue must
+                    ## degrade to a per-group failure, never a push crash.
+                    error, offsets, ts_map, packed_len, pack_secs, put_secs = err, None, None, 0, 0.0, 0.0
+                if window is not None:
+                    ## The PUT's own time: packing is local work.
+                    window.record(put_secs, packed_len, error)
+                ## Compressed groups count their raw size towards the
+                ## (raw) totals; the record still logs the bytes PUT.
+                raw_len = group_raw_bytes.get(gid, 0) if codec is not None else None
+                progress.record(gid, ctx.new_gens.get(gid, '?'), error, packed_len, pack_secs, put_secs, raw_len)
+                if error is None:
+                    _stage_group(ctx, gid, offsets, ts_map, packed_len)
+                    if codec is None and gid not in ctx.copy_kept:
+                        members = [(key, ts_map[key], length) for key, (_o, length) in sorted(offsets.items(), key=lambda item: item[1][0])]
+                        journal.record_pushed(gid, ctx.new_gens[gid], packed_len, group_pack_digest(members, ctx.pre_push_manifest.get(gid)))
+                        if time.monotonic() - last_persist > PUSH_PROGRESS_PERSIST_SECS:
+                            journal.persist(local_file)
+                            last_persist = time.monotonic()
+                else:
+                    failures[gid] = error
+                    ctx.new_gens.pop(gid, None)   # abandoned PUT (if any) = invisible orphan
+                    if isinstance(error, ConcurrentCompactionError):
+                        ## Every captured offset is now suspect: start
+                        ## nothing new, let the running jobs drain.
+                        pull_queue.clear()
+                        upload_queue.clear()
+
+    if n_submit:
+        progress.finish()
+    if ctx.adopted:
+        push_logger.info(f'resumed {len(ctx.adopted)} group(s) uploaded by the previous push attempt: {sorted(ctx.adopted)}')
+
+    ## A detected compaction means EVERY captured offset is invalid -
+    ## per-group retry semantics would be false comfort (each unpacked
+    ## group is equally suspect), so abort the whole push BEFORE
+    ## anything is staged or committed. The executor block above has
+    ## already drained; generations already PUT are invisible orphans
+    ## (the standard crash-before-C story; fsck sweeps them).
+    comp_error = next((e for e in failures.values() if isinstance(e, ConcurrentCompactionError)), None)
+    if comp_error is not None:
+        raise comp_error
+
+    ctx.failed_gids = {gid for gid in failures if isinstance(gid, int)}
+
+
+def _push_values(ctx):
+    """
+    Per-key upload path (legacy). Objects are overwritten in place (each PUT
+    is object-atomic; no cross-key snapshot isolation - documented), and
+    index entries stay write-through.
+    """
+    with ThreadPoolExecutor(max_workers=ctx.remote_session.threads) as executor:
+        futures = {}
+        for key in ctx.changes:
+            f = executor.submit(upload_value, key, ctx.local_file, ctx.remote_session)
+            futures[f] = key
+
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                run_result = future.result()
+            except Exception as err:
+                ## Transport-level raises (MaxRetryError etc.) are
+                ## per-key failures, same as returned errors.
+                run_result = err
+            if run_result is None:
+                ctx.remote_index[key] = int_to_bytes(ctx.changes.local_timestamp(key), 7) + b'\x00' * 8
+                ctx.updated = True
+            else:
+                ctx.failures[key] = run_result
+
+
+def _stage_commit_index(ctx):
+    """
+    Build the index bytes a grouped commit carries: the staged entries and
+    the committed delete-entry removals applied to a throwaway COPY of the
+    sidecar.
+    """
+    remote_index = ctx.remote_index
+    ctx.committed_delete_keys = [k for k in ctx.deletes if key_to_group_id(k, ctx.num_groups) not in ctx.failed_gids]
+    staged_path = ctx.remote_index_path.parent.joinpath(ctx.remote_index_path.name + '.staged')
+    with remote_index._thread_lock:
+        remote_index._file.seek(0)
+        base_index_bytes = remote_index._file.read()
+    try:
+        with open(staged_path, 'wb') as f:
+            f.write(base_index_bytes)
+        staged = booklet.FixedLengthValue(staged_path, 'w')
+        try:
+            for key, entry in ctx.staged_entries.items():
+                staged[key] = entry
+            for key in ctx.committed_delete_keys:
+                if key in staged:
+                    del staged[key]
+            staged.sync()
+            ctx.staged_n_keys = len(staged)
+            with staged._thread_lock:
+                staged._file.seek(0)
+                ctx.staged_index_bytes = staged._file.read()
+        finally:
+            staged.close()
+    finally:
+        try:
+            staged_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _commit_push(ctx):
+    """
+    Phase C: the db-object PUT. Builds the manifest this commit publishes,
+    PUTs the commit's index delta, re-verifies the write lock and PUTs the
+    db object; then updates the session's cached db metadata.
+    """
+    remote_session = ctx.remote_session
+    num_groups = ctx.num_groups
+    local_file = ctx.local_file
+
+    time_int_us = booklet.utils.make_timestamp_int()
+    local_init_bytes = commit_init_bytes(local_file, time_int_us)
+
+    ## The manifest this commit publishes: a replacement starts fresh
+    ## (only this push's generations); otherwise the old manifest with
+    ## successful groups re-pointed and emptied groups dropped.
+    ## With delta generations on, a group written in full becomes a
+    ## one-generation chain and a delta extends its group's chain; a
+    ## failed delta group keeps its old slot.
+    if num_groups is not None:
+        new_slots = ctx.new_slots
+        for gid, gen in ctx.new_gens.items():
+            if gid in ctx.delta_plan:
+                delta = ctx.delta_plan[gid]
+                new_slots[gid] = format_group_slot(delta.chain + [(gen, ctx.gen_sizes[gid])], delta.dead)
+            elif ctx.chained:
+                new_slots[gid] = format_group_slot([(gen, ctx.gen_sizes[gid])])
+            else:
+                new_slots[gid] = gen
+        for gid, delta in ctx.delta_plan.items():
+            if gid not in ctx.new_gens and gid not in ctx.failed_gids:
+                new_slots[gid] = format_group_slot(delta.chain, delta.dead)
+        if ctx.replace_pending:
+            new_manifest = new_slots
+        else:
+            new_manifest = dict(ctx.pre_push_manifest)
+            new_manifest.update(new_slots)
+            for gid in ctx.emptied_gids:
+                new_manifest.pop(gid, None)
+        index_bytes_for_commit = ctx.staged_index_bytes
+    else:
+        new_manifest = {}
+        with ctx.remote_index._thread_lock:
+            ctx.remote_index._file.seek(0)
+            index_bytes_for_commit = ctx.remote_index._file.read()
+    ctx.new_manifest = new_manifest
+
+    ctx.embedded_local_meta = ctx.journal.meta_pending
+    meta_section = _build_meta_section_for_push(local_file, ctx.journal, ctx.remote_state, ctx.replace_pending, time_int_us)
+    commit_compression = ctx.compression if num_groups is not None else None
+    commit_format = format_version_for(commit_compression, is_chained_manifest(new_manifest))
+    payload = build_db_payload(new_manifest, meta_section, index_bytes_for_commit, commit_compression)
+
+    ## The index delta goes up BEFORE the commit: a published
+    ## delta_parents entry must never name a delta that is not there yet.
+    ## The delete list is every journaled delete (the base sidecar already
+    ## dropped them all) plus the lost-key drops. Per-key mode writes no
+    ## deltas - its object names are the user's keys.
+    delta_parents = []
+    if num_groups is not None and not ctx.replace_pending:
+        delta_parents = publish_index_delta(
+            remote_session, ctx.remote_state, new_manifest, meta_section, time_int_us,
+            ctx.staged_entries, set(ctx.deletes).union(ctx.lost_index_keys), ctx.staged_n_keys)
+
+    metadata = commit_metadata(local_file, local_init_bytes, time_int_us, ctx.ebooklet_type, commit_format, num_groups, commit_compression, delta_parents)
+
+    ## The commit PUT is the point of no return: re-verify the write lock
+    ## so a holder whose ticket was broken (another client's force_lock)
+    ## aborts here instead of committing without mutual exclusion. All
+    ## pending state stays journaled for a retry.
+    if ctx.lock is not None and not ctx.lock.verify():
+        raise LockLostError(
+            "The write lock is no longer held (this session's lock ticket was broken by "
+            'another client) - aborting the push before the commit. All pending changes '
+            'are retained; re-open the file to re-acquire the lock and push again.'
+        )
+
+    resp = remote_session.put_db_object(payload, metadata=metadata)
+
+    if resp.status // 100 != 2:
+        raise urllib3.exceptions.HTTPError("The db object failed to upload. You need to rerun the push with force_push=True or the remote will be corrupted.")
+
+    push_logger.info(f'commit succeeded ({len(payload):,} B db object)')
+
+    ## The session's cached db metadata now describes this commit (the
+    ## next push's delta parent).
+    ctx.prev_delta_parents = list(remote_session.delta_parents)
+    ctx.delta_parents = delta_parents
+    remote_session.timestamp = time_int_us
+    remote_session.delta_parents = delta_parents
+    remote_session.compression = commit_compression
+    remote_session.format_version = commit_format
+
+    ## remove deletes in remote (only for legacy per-key mode). A raised
+    ## delete failure propagates BEFORE the journal clearing in
+    ## _apply_commit, so the pending deletes are retained for retry.
+    if ctx.deletes and num_groups is None:
+        remote_session.delete_objects(list(ctx.deletes))
+
+    ctx.updated = True
+    ctx.meta_section = meta_section
+    ctx.commit_ts = time_int_us
+
+
+def _apply_commit(ctx):
+    """
+    After a successful commit: apply the staged index mutations to the live
+    sidecar, persist the committed remote state, and clear the journal for
+    exactly the state the commit made durable.
+    """
+    journal = ctx.journal
+    num_groups = ctx.num_groups
+    remote_index = ctx.remote_index
+
+    ## The live sidecar now matches what the commit published...
+    if num_groups is not None:
+        for key, entry in ctx.staged_entries.items():
+            remote_index[key] = entry
+        for key in ctx.committed_delete_keys:
+            if key in remote_index:
+                del remote_index[key]
+        remote_index.sync()
+        if ctx.membership is not None:
+            if ctx.replace_pending:
+                ctx.membership.invalidate()
+            else:
+                ctx.membership.update(ctx.staged_entries, ctx.committed_delete_keys)
+
+    ## ...record the committed remote state (manifest + metadata section +
+    ## timestamp) in the persistent cache...
+    ctx.remote_state.update_committed(ctx.new_manifest, ctx.meta_section, ctx.commit_ts)
+    ctx.remote_state.persist(ctx.local_file)
+
+    ## ...and only now the journal clears, for exactly the state this
+    ## commit made durable (review-converged rule: never clear on a failed
+    ## or skipped commit; a partially-failed replacement never commits).
+    ## Everything committed: pass the sets themselves, which
+    ## clear_committed clears without a per-key pass.
+    failures = ctx.failures
+    if not failures:
+        committed_written = journal.written
+        committed_deletes = journal.deletes
+    elif ctx.replace_pending:
+        committed_written = set()
+        committed_deletes = set()
+    elif num_groups is not None:
+        committed_written = {k for k in journal.written if key_to_group_id(k, num_groups) not in ctx.failed_gids}
+        committed_deletes = {k for k in journal.deletes if key_to_group_id(k, num_groups) not in ctx.failed_gids}
+    else:
+        committed_written = journal.written - set(failures)
+        committed_deletes = set(journal.deletes)
+    journal.clear_committed(committed_written, committed_deletes)
+    journal.clear_pushed()
+    if ctx.embedded_local_meta:
+        journal.set_meta_pending(False)
+    ## Record the storage-mode choice this commit materialized (tri-state:
+    ## per-key is num_groups=None WITH num_groups_set=True).
+    if not journal.num_groups_set:
+        journal.set_num_groups(num_groups)
+    journal.persist(ctx.local_file)
+
+
+def _collect_push_garbage(ctx):
+    """
+    Phase D - GC of the replaced/emptied OLD generations (exact keys) and of
+    the index deltas that fell off the chain. Failures are log-only: nothing
+    references these objects any more (the commit already dropped them from
+    the manifest and index; copy_remote is manifest-driven; fsck sweeps
+    orphans).
+    """
+    remote_session = ctx.remote_session
+    if ctx.replace_pending:
+        ## Replacement: sweep everything the new manifest does not
+        ## reference.
+        sweep_replaced_remote(remote_session, ctx.new_manifest, ctx.lock)
+        return
+
+    ## A delta keeps every old generation of its chain live; a
+    ## full rewrite (or compaction) replaces all of them.
+    for gid, slot in ctx.new_slots.items():
+        old_slot = ctx.pre_push_manifest.get(gid)
+        if old_slot is not None:
+            live = set(slot_generations(slot))
+            for old_gen in slot_generations(old_slot):
+                if old_gen not in live:
+                    err = remote_session.delete_object(group_obj_key(gid, old_gen))
+                    if err is not None:
+                        logger.warning(f"Could not GC replaced generation '{gid}.{old_gen}' (orphan; fsck will sweep): {err}")
+    for gid in ctx.emptied_gids:
+        old_slot = ctx.pre_push_manifest.get(gid)
+        if old_slot is not None:
+            for old_gen in slot_generations(old_slot):
+                err = remote_session.delete_object(group_obj_key(gid, old_gen))
+                if err is not None:
+                    logger.warning(f"Could not GC emptied group's generation '{gid}.{old_gen}' (orphan; fsck will sweep): {err}")
+    ## Index deltas that fell off the chain.
+    for parent_ts in ctx.prev_delta_parents:
+        if parent_ts not in ctx.delta_parents:
+            err = remote_session.delete_object(delta_obj_key(parent_ts))
+            if err is not None:
+                logger.warning(f"Could not GC index delta '{delta_obj_key(parent_ts)}' (orphan; fsck will sweep): {err}")
+
+
+## Default bytes of packed entries bulk_load holds in memory before it
+## spills the largest group buffers to temporary files
+## (EVariableLengthValue.bulk_load(spill_bytes=...)).
+DEFAULT_BULK_SPILL_BYTES = 2**28
+
+## Tries per group upload within one bulk load (each on a fresh generation).
+BULK_UPLOAD_ATTEMPTS = 3
+
+
+class _GroupSpill:
+    """
+    One group's entries during a bulk load, in pack_group's raw entry framing
+    without the count header. The bytes collect in memory until bulk_load
+    spills them to an anonymous temporary file; the upload reads the file back
+    in chunks, then the buffered tail. Only the dispatching thread appends; a
+    worker reads a group only once its appends are over.
+    """
+    __slots__ = ('buf', 'file', 'size', 'count')
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.file = None
+        self.size = 4
+        self.count = 0
+
+    def append(self, key_bytes, ts_int, valb):
+        """Add one entry; returns its value's offset in the packed group."""
+        entry_size = 2 + len(key_bytes) + 7 + 4 + len(valb)
+        ## Same 4-byte offset/length ceiling as pack_group (F7 guard).
+        if self.size + entry_size > _MAX_GROUP_BYTES:
+            raise _group_too_large('bytes')
+        self.buf += _ENTRY_KEY_LEN.pack(len(key_bytes))
+        self.buf += key_bytes
+        self.buf += int_to_bytes(ts_int, 7)
+        self.buf += _ENTRY_VALUE_LEN.pack(len(valb))
+        self.buf += valb
+        offset = self.size + entry_size - len(valb)
+        self.size += entry_size
+        self.count += 1
+        return offset
+
+    def spill(self, spill_dir):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(dir=spill_dir)
+        self.file.write(self.buf)
+        self.buf = bytearray()
+
+    def chunks(self):
+        if self.file is not None:
+            self.file.flush()
+            self.file.seek(0)
+            while chunk := self.file.read(_STREAM_READ_CHUNK):
+                yield chunk
+        if self.buf:
+            yield self.buf
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.buf = bytearray()
+
+
+def upload_bulk_group(group_id, gen, spill, remote_session, codec=None, part_size=None):
+    """
+    PUT one bulk-loaded group to generation gen. A raw group larger than
+    part_size streams its spill into a multipart upload (at most two parts
+    buffered); a compressed group is framed in memory first (pack_framed_group)
+    and streams only its compressed bytes. Worker contract as upload_group:
+    return errors, never raise.
+
+    Returns (error_or_None, offsets, packed_len, put_secs). offsets is None
+    for a raw group - its index entries were written as its entries were
+    appended.
+    """
+    header = _GROUP_COUNT.pack(spill.count)
+    obj_key = group_obj_key(group_id, gen)
+    multipart = bool(part_size) and hasattr(remote_session, 'create_multipart_upload')
+    gate = threading.BoundedSemaphore(1)
+    stream = None
+    t0 = time.monotonic()
+    try:
+        if codec is None and multipart and spill.size > part_size:
+            stream = _PartStream(remote_session, obj_key, part_size, gate)
+            with gate:
+                stream.write(header)
+                for chunk in spill.chunks():
+                    stream.write(chunk)
+            stream.finish()
+            return None, None, stream.size, time.monotonic() - t0
+        data = header + b''.join(spill.chunks())
+        offsets = None
+        if codec is not None:
+            data, offsets = pack_framed_group(unpack_group(data), codec)
+        if multipart and len(data) > part_size:
+            stream = _PartStream(remote_session, obj_key, part_size, gate)
+            with gate:
+                stream.write(data)
+            stream.finish()
         else:
-            new_manifest = {}
-            with remote_index._thread_lock:
-                remote_index._file.seek(0)
-                index_bytes_for_commit = remote_index._file.read()
+            resp = remote_session.put_object(obj_key, data)
+            if resp.status // 100 != 2:
+                return resp.error, None, len(data), time.monotonic() - t0
+        return None, offsets, len(data), time.monotonic() - t0
+    except Exception as err:
+        if stream is not None:
+            stream.abort()
+        return err, None, 0, time.monotonic() - t0
 
+
+def bulk_load_remote(local_file, remote_index_path, items, remote_session, journal, remote_state, ebooklet_type, num_groups, n_buckets, buffer_size, lock=None, local=False, timestamp=None, spill_bytes=DEFAULT_BULK_SPILL_BYTES, compression=None, upload_part_size=DEFAULT_UPLOAD_PART_SIZE, budget=None, max_group_deltas=None, window=None):
+    """
+    Replace the remote database with the (key, value) pairs of items in one
+    pass, without the per-key local writes, journal entries and changelog of
+    a regular push. Every pair is serialized with the local file's value
+    serializer, hashed to its group and appended to that group's raw pack in
+    a _GroupSpill; past spill_bytes of buffered entries the largest buffers
+    move to temporary files next to the index. The new index is written
+    directly into a staged sidecar (<remote_index>.bulk). All pairs share
+    one timestamp (timestamp, else now). A key given twice keeps its last
+    value; the earlier bytes stay in the group as dead bytes until the group
+    is next rewritten.
+
+    Once items is exhausted the groups are uploaded concurrently on
+    remote_session.threads (window.limit when adaptive), each charged to
+    `budget` like a push upload, and retried up to BULK_UPLOAD_ATTEMPTS times
+    on fresh generations. Then the db object is committed as a replacement:
+    fresh manifest, the staged index, no old metadata, and the old objects
+    swept.
+
+    local=True also writes every value to the local file with the same
+    timestamp, so reads are served locally; nothing is journaled either way
+    (the commit makes it all durable).
+
+    Returns (failures, index_path). After a commit, failures is empty and
+    index_path is the staged sidecar for the caller to swap in. Groups whose
+    uploads kept failing are returned as {gid: error} with index_path None,
+    and nothing is committed - the old remote is untouched and the uploaded
+    generations are orphans. A failed commit PUT raises HTTPError, and a lost
+    write lock raises LockLostError before the commit.
+    """
+    ts_int = booklet.utils.make_timestamp_int(timestamp)
+    codec = compression_mod.get_codec(compression) if compression is not None else None
+    spill_dir = remote_index_path.parent
+    staged_path = remote_index_path.parent.joinpath(remote_index_path.name + '.bulk')
+    staged = booklet.FixedLengthValue(staged_path, 'n', key_serializer='str', value_len=15, n_buckets=n_buckets, buffer_size=buffer_size)
+    spills = {}
+    committed = False
+    try:
+        ## Pack. Raw offsets are final as soon as an entry is appended, so a
+        ## raw group's index entries are written here; a framed group's wait
+        ## for its upload.
+        in_memory = 0
+        n_keys = 0
+        for key, value in items:
+            if key in reserved_key_strs:
+                raise ValueError(f"'{key}' is a reserved internal key.")
+            valb = local_file._pre_value(value)
+            gid = key_to_group_id(key, num_groups)
+            spill = spills.get(gid)
+            if spill is None:
+                spill = spills[gid] = _GroupSpill()
+            size0 = spill.size
+            offset = spill.append(key.encode(), ts_int, valb)
+            in_memory += spill.size - size0
+            if codec is None:
+                staged[key] = int_to_bytes(ts_int, 7) + int_to_bytes(offset, 4) + int_to_bytes(len(valb), 4)
+            if local:
+                local_file.set(key, valb, timestamp=ts_int, encode_value=False)
+            n_keys += 1
+            if in_memory > spill_bytes:
+                ## Spill the largest buffers until half the budget is free,
+                ## so the sort runs once per half-budget of input.
+                for big in sorted(spills.values(), key=lambda sp: len(sp.buf), reverse=True):
+                    in_memory -= len(big.buf)
+                    big.spill(spill_dir)
+                    if in_memory <= spill_bytes // 2:
+                        break
+
+        ## Upload. The raw packed size is known exactly for every group.
+        if budget is None:
+            budget = ByteBudget()
+        streams = bool(upload_part_size) and hasattr(remote_session, 'create_multipart_upload')
+        progress = _PushProgress(len(spills), n_keys, sum(sp.size for sp in spills.values()))
+        if spills:
+            progress.start()
+        gens = {}
+        gen_sizes = {}
+        failures = {}
+        attempts = dict.fromkeys(spills, 0)
+        queue = deque(sorted(spills))
+        running = {}
+
+        def upload_cost(gid):
+            raw = spills[gid].size
+            return min(raw, 2 * upload_part_size) if streams and raw > upload_part_size else raw
+
+        def width():
+            return window.limit if window is not None else remote_session.threads
+
+        with ThreadPoolExecutor(max_workers=remote_session.threads) as executor:
+            while queue or running:
+                while queue and len(running) < width():
+                    gid = queue[0]
+                    cost = upload_cost(gid)
+                    ## Nothing running: block for the head group's bytes (it
+                    ## is always admitted alone).
+                    if running:
+                        if not budget.try_acquire(cost):
+                            break
+                    else:
+                        budget.acquire(cost)
+                    queue.popleft()
+                    gens[gid] = new_generation()
+                    attempts[gid] += 1
+                    future = executor.submit(upload_bulk_group, gid, gens[gid], spills[gid], remote_session, codec, upload_part_size)
+                    running[future] = (gid, cost)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    gid, cost = running.pop(future)
+                    budget.release(cost)
+                    error, offsets, packed_len, put_secs = future.result()
+                    if window is not None:
+                        window.record(put_secs, packed_len, error)
+                    if error is None:
+                        progress.record(gid, gens[gid], None, packed_len, 0.0, put_secs, spills[gid].size if codec is not None else None)
+                        gen_sizes[gid] = packed_len
+                        for key, (offset, length) in (offsets or {}).items():
+                            staged[key] = int_to_bytes(ts_int, 7) + int_to_bytes(offset, 4) + int_to_bytes(length, 4)
+                        spills[gid].close()
+                    elif attempts[gid] < BULK_UPLOAD_ATTEMPTS and not isinstance(error, GroupTooLargeError):
+                        ## The failed generation (if any part of it landed)
+                        ## is an orphan the replacement sweep removes.
+                        push_logger.warning(f'bulk load: group {gid} upload failed (attempt {attempts[gid]}/{BULK_UPLOAD_ATTEMPTS}), retrying: {error}')
+                        queue.append(gid)
+                    else:
+                        progress.record(gid, gens.pop(gid), error, packed_len, 0.0, put_secs)
+                        failures[gid] = error
+        if spills:
+            progress.finish()
+        if failures:
+            logger.warning(f'The bulk load had {len(failures)} group upload failure(s) - NOT committing; the existing remote is untouched. Re-run the bulk load.')
+            return failures, None
+
+        ## Commit - a replacement: only this load's generations, the staged
+        ## index, and no metadata but a local edit.
+        staged.sync()
+        with staged._thread_lock:
+            staged._file.seek(0)
+            index_bytes = staged._file.read()
+        staged.close()
+
+        chained = max_group_deltas is not None and codec is None
+        manifest = {gid: format_group_slot([(gen, gen_sizes[gid])]) if chained else gen for gid, gen in gens.items()}
+        time_int_us = booklet.utils.make_timestamp_int()
+        local_init_bytes = commit_init_bytes(local_file, time_int_us)
         embedded_local_meta = journal.meta_pending
-        meta_section = _build_meta_section_for_push(local_file, journal, remote_state, replace_pending, time_int_us)
-        payload = build_db_payload(new_manifest, meta_section, index_bytes_for_commit)
-
-        metadata = {
-            'timestamp': str(time_int_us),
-            'uuid': local_file.uuid.hex,
-            'type': ebooklet_type,
-            'init_bytes': base64.urlsafe_b64encode(local_init_bytes).decode(),
-            'format_version': str(SUPPORTED_FORMAT_VERSION),
-        }
-        if num_groups is not None:
-            metadata['num_groups'] = str(num_groups)
-
-        ## The commit PUT is the point of no return: re-verify the write lock
-        ## so a holder whose ticket was broken (another client's force_lock)
-        ## aborts here instead of committing without mutual exclusion. All
-        ## pending state stays journaled for a retry.
+        meta_section = _build_meta_section_for_push(local_file, journal, remote_state, True, time_int_us)
+        commit_format = format_version_for(compression, is_chained_manifest(manifest))
+        payload = build_db_payload(manifest, meta_section, index_bytes, compression)
+        metadata = commit_metadata(local_file, local_init_bytes, time_int_us, ebooklet_type, commit_format, num_groups, compression)
+
         if lock is not None and not lock.verify():
             raise LockLostError(
                 "The write lock is no longer held (this session's lock ticket was broken by "
-                'another client) - aborting the push before the commit. All pending changes '
-                'are retained; re-open the file to re-acquire the lock and push again.'
+                'another client) - aborting the bulk load before the commit. Nothing was '
+                'committed; re-open the file to re-acquire the lock and load again.'
             )
 
         resp = remote_session.put_db_object(payload, metadata=metadata)
-
         if resp.status // 100 != 2:
-            raise urllib3.exceptions.HTTPError("The db object failed to upload. You need to rerun the push with force_push=True or the remote will be corrupted.")
-
-        push_logger.info(f'commit succeeded ({len(payload):,} B db object)')
-
-        ## remove deletes in remote (only for legacy per-key mode). A raised
-        ## delete failure propagates BEFORE the journal clearing below, so the
-        ## pending deletes are retained for retry.
-        if deletes and num_groups is None:
-            remote_session.delete_objects(list(deletes))
-
-        updated = True
-
-        ## COMMIT SUCCEEDED. Apply the staged index mutations to the live
-        ## sidecar (it now matches what the commit published)...
-        if num_groups is not None:
-            for key, entry in staged_entries.items():
-                remote_index[key] = entry
-            for key in committed_delete_keys:
-                if key in remote_index:
-                    del remote_index[key]
-            remote_index.sync()
-
-        ## ...record the committed remote state (manifest + metadata section +
-        ## timestamp) in the persistent cache...
-        remote_state.update_committed(new_manifest, meta_section, time_int_us)
+            raise urllib3.exceptions.HTTPError('The db object failed to upload - nothing was committed. Re-run the bulk load.')
+        committed = True
+
+        push_logger.info(f'bulk load committed: {n_keys} key(s) in {len(manifest)} group(s) ({len(payload):,} B db object)')
+
+        remote_session.timestamp = time_int_us
+        remote_session.delta_parents = []
+        remote_session.compression = compression
+        remote_session.format_version = commit_format
+
+        remote_state.update_committed(manifest, meta_section, time_int_us)
         remote_state.persist(local_file)
 
-        ## ...and only now clear the journal, for exactly the state this
-        ## commit made durable (review-converged rule: never clear on a failed
-        ## or skipped commit; a partially-failed replacement never commits).
-        if replace_pending:
-            committed_written = set(journal.written) if not failures else set()
-            committed_deletes = set(journal.deletes) if not failures else set()
-        elif num_groups is not None:
-            committed_written = {k for k in journal.written if key_to_group_id(k, num_groups) not in failed_gids}
-            committed_deletes = {k for k in journal.deletes if key_to_group_id(k, num_groups) not in failed_gids}
-        else:
-            committed_written = journal.written - set(failures)
-            committed_deletes = set(journal.deletes)
-        journal.clear_committed(committed_written, committed_deletes)
+        journal.clear_committed(journal.written, journal.deletes)
+        journal.clear_pushed()
+        journal.set_replace_pending(False)
         if embedded_local_meta:
             journal.set_meta_pending(False)
-        ## Record the storage-mode choice this commit materialized (tri-state:
-        ## per-key is num_groups=None WITH num_groups_set=True).
-        if not journal.num_groups_set:
-            journal.set_num_groups(num_groups)
+        journal.set_num_groups(num_groups)
         journal.persist(local_file)
 
-        ## Phase D - GC of the replaced/emptied OLD generations (exact keys).
-        ## Failures are log-only: nothing references these objects any more
-        ## (the commit already dropped them from the manifest and index;
-        ## copy_remote is manifest-driven; fsck sweeps orphans).
-        if num_groups is not None:
-            if replace_pending:
-                ## Replacement: sweep EVERYTHING in the namespace the new
-                ## manifest does not reference - the old database's objects,
-                ## and any orphans. Safe only while mutual exclusion holds,
-                ## so re-verify the lock; on failure, abort the sweep (the
-                ## commit already succeeded - the leftovers are orphans for
-                ## fsck, never a correctness problem).
-                if lock is not None and not lock.verify():
-                    logger.warning('The write lock was lost after the replacement commit - skipping the old-object sweep (the leftovers are invisible orphans; run fsck to clean them up).')
-                else:
-                    expected = {group_obj_key(gid, gen) for gid, gen in new_manifest.items()}
-                    try:
-                        listed = remote_session.list_objects()
-                        prefix_len = len(remote_session.write_db_key) + 1
-                        sweep_keys = []
-                        for obj in listed.iter_objects():
-                            child = obj['key'][prefix_len:]
-                            if child and child not in expected:
-                                sweep_keys.append(child)
-                        for child in sweep_keys:
-                            err = remote_session.delete_object(child)
-                            if err is not None:
-                                logger.warning(f"Replacement sweep could not delete '{child}' (orphan; fsck will sweep): {err}")
-                    except Exception as err:
-                        logger.warning(f'Replacement sweep failed (leftovers are invisible orphans; run fsck): {err}')
-            else:
-                for gid, gen in new_gens.items():
-                    old_gen = pre_push_manifest.get(gid)
-                    if old_gen is not None and old_gen != gen:
-                        err = remote_session.delete_object(group_obj_key(gid, old_gen))
-                        if err is not None:
-                            logger.warning(f"Could not GC replaced generation '{gid}.{old_gen}' (orphan; fsck will sweep): {err}")
-                for gid in emptied_gids:
-                    old_gen = pre_push_manifest.get(gid)
-                    if old_gen is not None:
-                        err = remote_session.delete_object(group_obj_key(gid, old_gen))
-                        if err is not None:
-                            logger.warning(f"Could not GC emptied group's generation '{gid}.{old_gen}' (orphan; fsck will sweep): {err}")
-
-    if failures:
-        return failures
-    else:
-        return updated
+        sweep_replaced_remote(remote_session, manifest, lock)
+        return {}, staged_path
+    finally:
+        for spill in spills.values():
+            spill.close()
+        if not committed:
+            staged.close()
+            try:
+                staged_path.unlink()
+            except FileNotFoundError:
+                pass
 
 
 # Transport/system fields that s3func's add_metadata_from_urllib3 / add_metadata_from_s3_xml
@@ -1696,8 +3858,8 @@ def indirect_copy_remote(source_session, target_session, source_key, target_key,
       2xx GET leaves .stream None and puts the bytes in .data (s3func response.py). Read .data — do
       NOT pass .stream (None here; and a raw urllib3 stream is unseekable, which crashes put_object's
       Content-Length probe). NOTE: .data buffers the whole object in memory (x copy concurrency) -
-      fine for small per-key objects, unsuitable for large/grouped ones; streaming is backlogged to
-      an s3func put_object(content_length=...) enhancement.
+      fine for small per-key objects; copy_remote sends objects larger than its part size through
+      indirect_copy_part instead, one ranged part at a time.
     - metadata: the GET response's .metadata also carries transport fields (status/version_id/etag/
       ...) that put_object would reject or that would corrupt the copy - filter to user metadata.
     """
@@ -1716,6 +3878,42 @@ def indirect_copy_remote(source_session, target_session, source_key, target_key,
     return target_resp
 
 
+## copy_remote copies an object larger than this as a multipart upload of
+## parts this size, several at once: a single CopyObject fails above 5 GB
+## and copies one object on one S3 worker. S3 allows at most
+## MAX_UPLOAD_PARTS parts, so a huge object's parts grow to fit.
+DEFAULT_COPY_PART_SIZE = 2**27
+MAX_UPLOAD_PARTS = 10000
+
+## Tries per part before a multipart copy gives up on its object.
+COPY_PART_ATTEMPTS = 3
+
+
+def copy_part_ranges(size, part_size):
+    """
+    The parts of a multipart copy of a size-byte object: (part_number,
+    range_start, range_end) with inclusive ends, every part part_size bytes
+    but the last (larger when the object needs more than MAX_UPLOAD_PARTS).
+    """
+    part_size = max(part_size, -(-size // MAX_UPLOAD_PARTS))
+    return [(n, start, min(start + part_size, size) - 1)
+            for n, start in enumerate(range(0, size, part_size), 1)]
+
+
+def indirect_copy_part(source_session, upload, source_key, part_number, range_start, range_end):
+    """
+    One part of a cross-credential multipart copy: a ranged GET from the
+    source re-uploaded as the part. Only this part's bytes are held, so a
+    copy holds at most (workers x part size) whatever the object's size.
+    Raises urllib3.exceptions.HTTPError on failure, like the upload's own
+    calls.
+    """
+    resp = source_session.get_object(source_key, range_start=range_start, range_end=range_end)
+    if resp.status // 100 != 2:
+        raise urllib3.exceptions.HTTPError(resp.error)
+    return upload.upload_part(part_number, resp.data)
+
+
 
 
 